@@ -2,51 +2,84 @@
 """Command-line interface for iOS Forensics Toolkit."""
 
 import argparse
+import json
+from collections import Counter
 import sys
 from pathlib import Path
 
-from src.parsers import (
-    SMSParser,
-    WhatsAppParser,
-    SafariParser,
-    CallHistoryParser,
-    KnowledgeCParser,
-    ContactsParser,
-    PlistParser
-)
-
-
-PARSERS = {
-    'sms': SMSParser,
-    'whatsapp': WhatsAppParser,
-    'safari': SafariParser,
-    'calls': CallHistoryParser,
-    'knowledgec': KnowledgeCParser,
-    'contacts': ContactsParser,
-    'plist': PlistParser
-}
-
-
-def detect_type(path: str) -> str:
-    """Auto-detect database type from filename."""
-    name = Path(path).name.lower()
+from src.parsers import PARSERS, PlistParser, detect_type
+from src.analysis import SummaryCache, approximate, summarize
+from src.analysis.geo import GeoIndex
+from src.analysis.knowledgec import activity, flatten_session
+from src.analysis.safari import domain_index
+from src.parsers.plist import parse_tree, tree_rows
+from src.utils import to_json, to_csv, to_html, to_ndjson, to_sqlite
+from src.utils.compress import compression
+from src.utils.dedup import open_seen
+from src.utils.diff import diff, flatten_change
+from src.utils.hashing import HashCache
+from src.utils.metrics import Metrics, collect
+from src.utils.progress import CancelToken, Cancelled, ProgressBar, cancel_on_sigint
+
+
+def run_plist_tree(args) -> None:
+    """Parse every plist under a directory to NDJSON or a SQLite table."""
+    keys = [k.strip() for k in args.keys.split(',')] if args.keys else None
+    results = parse_tree(args.file, keys=keys, workers=args.workers)
     
-    if name.endswith('.plist'):
-        return 'plist'
-    if 'sms' in name:
-        return 'sms'
-    if 'chatstorage' in name:
-        return 'whatsapp'
-    if 'history' in name:
-        return 'safari'
-    if 'callhistory' in name:
-        return 'calls'
-    if 'knowledgec' in name:
-        return 'knowledgec'
-    if 'addressbook' in name:
-        return 'contacts'
+    if not args.output:
+        for result in results:
+            print(json.dumps(result, ensure_ascii=False, default=str))
+        return
     
-    return None
+    # x.db.gz is a compressed database, x.ndjson.gz compressed NDJSON
+    target = Path(args.output)
+    if compression(target):
+        target = target.with_suffix('')
+    if target.suffix.lower() in ('.db', '.sqlite', '.sqlite3'):
+        count = to_sqlite(tree_rows(results), args.output, table='plist_values',
+                          indexes=('key', 'path'))
+        print(f"Wrote {count} values to {args.output}")
+    else:
+        count = to_ndjson(results, args.output)
+        print(f"Wrote {count} plists to {args.output}")
+
+
+def write_output(data, args, title: str) -> None:
+    """Write records to -o in the -f format."""
+    if args.format == 'csv':
+        to_csv(data if isinstance(data, list) else list(data), args.output)
+    elif args.format == 'html':
+        to_html(data, args.output, title=title)
+    else:
+        to_json(data, args.output)
+
+
+def print_integrity(p) -> bool:
+    """Print a parser's integrity summary; False if verification failed."""
+    check = getattr(p, 'integrity', None)
+    if check is None:
+        return True
+    report = check.report()
+    status = 'ok' if report['ok'] else 'FAILED'
+    print(f"Integrity: {status} ({len(report['files'])} files, "
+          f"{report['hash_seconds']}s hashing, {report['verify_seconds']}s verify)",
+          file=sys.stderr)
+    if not report['ok']:
+        for name, info in report['files'].items():
+            print(f"  {name}: open={info.get('open_status')} "
+                  f"close={info.get('close_status')}", file=sys.stderr)
+    return report['ok']
+
+
+def print_metrics(metrics, path=None) -> None:
+    """Print the timing breakdown and profiler output to stderr."""
+    print(metrics.report(), file=sys.stderr)
+    if metrics.profile:
+        print(metrics.profile, file=sys.stderr)
+    if path:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(metrics.as_dict(), f, indent=2)
 
 
 def main():
@@ -65,32 +98,147 @@ def main():
     parser.add_argument('--tables', action='store_true', help='List tables only')
     parser.add_argument('--schema', help='Show schema for table')
     parser.add_argument('--stats', action='store_true', help='Show statistics')
+    parser.add_argument('--summary', action='store_true',
+                       help='Counts, per-contact totals, activity histograms and '
+                            'percentiles from a single scan, cached per database')
+    parser.add_argument('--cache-dir',
+                       help='Summary cache directory (default ~/.cache/ios-forensics)')
+    parser.add_argument('--refresh', action='store_true',
+                       help='Recompute the summary even if a cached one matches')
+    parser.add_argument('--sample', type=float, metavar='FRACTION',
+                       help='With --summary: estimate from a random sample of this '
+                            'share of rows (e.g. 0.01), with 95%% error bounds')
+    parser.add_argument('--seed', type=int, help='Random seed for --sample')
+    parser.add_argument('--usage', choices=['hour', 'day'],
+                       help='knowledgeC: app focus time per app and hour or day')
+    parser.add_argument('--sessions', action='store_true',
+                       help='knowledgeC: unlock sessions with screen-on time and apps used')
+    parser.add_argument('--near', metavar='LAT,LON,METERS',
+                       help='Location records within METERS of a point, nearest first')
+    parser.add_argument('--bbox', metavar='SOUTH,WEST,NORTH,EAST',
+                       help='Location records inside a bounding box')
+    parser.add_argument('--since', help='With --near/--bbox: not before this ISO date')
+    parser.add_argument('--until', help='With --near/--bbox: not after this ISO date')
+    parser.add_argument('--geo-index',
+                       help='Location index file kept across runs (default: in memory)')
+    parser.add_argument('--domains', action='store_true',
+                       help='Safari: visits, URLs and first/last visit per registrable domain')
+    parser.add_argument('--domain',
+                       help='Safari: daily visits, hours and redirect chains for one domain')
+    parser.add_argument('--redirects', action='store_true',
+                       help='Safari: redirect chains')
+    parser.add_argument('--domain-index',
+                       help='Domain index file reused while History.db is unchanged')
+    parser.add_argument('--chat', metavar='ID|all',
+                       help='WhatsApp/SMS: one chat with senders and media or attachments '
+                            '(-l sets the page size), or every chat as JSON lines')
+    parser.add_argument('--after', metavar='SORT',
+                       help="With --chat: start after this message 'sort' value")
+    parser.add_argument('--utc-offset', type=int, default=0, metavar='SECONDS',
+                       help='Shift --usage, --domains and --summary days and hours from UTC '
+                            '(e.g. -18000)')
+    parser.add_argument('--snapshot', choices=['memory', 'temp'],
+                       help='Read from a private copy of the database and its WAL')
+    parser.add_argument('--wal', action='store_true',
+                       help='Report rows that exist only in the WAL')
+    parser.add_argument('--recover', action='store_true',
+                       help='Carve deleted records from free pages')
+    parser.add_argument('--keys',
+                       help='Comma-separated plist key paths to extract '
+                            '(directory mode)')
+    parser.add_argument('--workers', type=int,
+                       help='Worker processes for directory mode, '
+                            'threads for media hashing')
+    parser.add_argument('--media-root',
+                       help='Extraction root: hash SMS attachments or '
+                            'WhatsApp media found under it')
+    parser.add_argument('--hash-cache',
+                       help='Digest cache file reused across runs (media hashing, '
+                            '--summary, --domain-index and --geo-index keys)')
+    parser.add_argument('--manifest',
+                       help='Evidence manifest: hash input files when opened '
+                            'and verify them after parsing')
+    parser.add_argument('--diff', metavar='OTHER',
+                       help='Compare with another copy of the same database: '
+                            'added, removed and modified records by primary key')
+    parser.add_argument('--dedup',
+                       help='Fingerprint store shared across runs: skip records '
+                            'already seen in this or earlier backups')
+    parser.add_argument('--bloom', type=int, metavar='N',
+                       help='Use a Bloom filter sized for N records as the '
+                            '--dedup store (smaller, ~0.1%% false drops)')
+    parser.add_argument('--progress', action='store_true',
+                       help='Show a progress bar while records are read')
+    parser.add_argument('--profile', action='store_true',
+                       help='Print time spent per query, conversion and export')
+    parser.add_argument('--profile-json',
+                       help='Also write the timings as JSON to this file')
+    parser.add_argument('--cprofile',
+                       help='Run under cProfile and save the stats to this file')
+    parser.add_argument('--trace-memory', action='store_true',
+                       help='Report peak Python memory and the largest allocation sites')
     
     args = parser.parse_args()
     
+    if not (args.profile or args.profile_json or args.cprofile or args.trace_memory):
+        run(args)
+        return
+    
+    metrics = Metrics()
+    try:
+        with collect(metrics, profile_out=args.cprofile, memory=args.trace_memory):
+            run(args)
+    finally:
+        print_metrics(metrics, args.profile_json)
+
+
+def run(args) -> None:
+    """Run the command selected by the parsed arguments."""
+    # A directory is swept for plists in bulk
+    if Path(args.file).is_dir():
+        run_plist_tree(args)
+        return
+    
     # Detect or use provided type
     parser_type = args.type or detect_type(args.file)
     if not parser_type:
         print(f"Error: Cannot detect file type. Use -t option.")
         sys.exit(1)
     
+    # Fail before parsing rather than after: HTML pages are never compressed
+    if parser_type != 'plist' and args.format == 'html' and args.output \
+            and compression(args.output):
+        print(f"Error: HTML reports cannot be compressed: {args.output}")
+        sys.exit(1)
+    
     parser_cls = PARSERS[parser_type]
+    p = None
     
     try:
         # Handle plist separately
         if parser_type == 'plist':
-            p = PlistParser(args.file)
-            data = p.parse()
-            
-            if args.output:
-                p.export_json(args.output)
-                print(f"Exported to {args.output}")
-            else:
-                p.print_structure()
+            # Binary plists are read lazily while they are walked
+            with PlistParser(args.file, manifest=args.manifest) as p:
+                if args.output:
+                    p.export_json(args.output)
+                    print(f"Exported to {args.output}")
+                else:
+                    p.print_structure()
             return
         
-        # Handle database parsers
-        with parser_cls(args.file) as p:
+        # Handle database parsers. Ctrl-C cancels the token inside the
+        # loops that check it and raises KeyboardInterrupt everywhere else
+        cancel = CancelToken()
+        p = parser_cls(args.file, snapshot=args.snapshot, manifest=args.manifest,
+                       progress=ProgressBar() if args.progress else None,
+                       cancel=cancel)
+        with p:
+            if args.wal:
+                report = p.wal_info()
+                report['wal_only_rows'] = p.wal_rows()
+                print(json.dumps(report, indent=2))
+                return
+            
             if args.tables:
                 for t in p.tables():
                     print(t)
@@ -101,29 +249,216 @@ def main():
                     print(f"{col['name']}: {col['type']}")
                 return
             
+            if args.diff:
+                stats = Counter()
+                with parser_cls(args.diff, snapshot=args.snapshot, cancel=cancel) as other, \
+                        cancel_on_sigint(cancel):
+                    changes = diff(p, other, stats=stats)
+                    if args.output:
+                        if args.format in ('csv', 'html'):
+                            changes = map(flatten_change, changes)
+                        write_output(changes, args, f"{parser_type}: {args.file} -> {args.diff}")
+                        print(f"Exported to {args.output}")
+                    else:
+                        for change in changes:
+                            print(json.dumps(change, ensure_ascii=False, default=str))
+                print(f"{stats['added']} added, {stats['removed']} removed, "
+                      f"{stats['modified']} modified, {stats['unchanged']} unchanged",
+                      file=sys.stderr)
+                return
+            
+            if args.summary:
+                if args.sample:
+                    summary = approximate(p, args.sample, seed=args.seed)
+                else:
+                    hashes = HashCache(args.hash_cache) if args.hash_cache else None
+                    try:
+                        summary = summarize(p, SummaryCache(args.cache_dir),
+                                            refresh=args.refresh, hashes=hashes,
+                                            utc_offset=args.utc_offset)
+                    finally:
+                        if hashes is not None:
+                            hashes.close()
+                print(json.dumps(summary, indent=2, ensure_ascii=False))
+                return
+            
+            if args.usage or args.sessions:
+                if parser_type != 'knowledgec':
+                    print("Error: --usage and --sessions need a knowledgeC database")
+                    sys.exit(1)
+                result = activity(p, args.usage or 'hour', args.utc_offset)
+                if not args.output:
+                    del result['sessions' if args.usage else 'usage']
+                    print(json.dumps(result, indent=2, ensure_ascii=False))
+                    return
+                if args.usage:
+                    data = result['usage']
+                elif args.format in ('csv', 'html'):
+                    data = [flatten_session(s) for s in result['sessions']]
+                else:
+                    data = result['sessions']
+                write_output(data, args, f"{parser_type}: {Path(args.file).name}")
+                print(f"Exported to {args.output}")
+                return
+            
+            if args.near or args.bbox:
+                if not hasattr(p, 'iter_locations'):
+                    print(f"Error: {parser_type} records carry no locations")
+                    sys.exit(1)
+                with GeoIndex(args.geo_index or ':memory:') as index:
+                    hashes = HashCache(args.hash_cache) if args.hash_cache else None
+                    try:
+                        index.add_parser(p, hashes)
+                    finally:
+                        if hashes is not None:
+                            hashes.close()
+                    if args.near:
+                        lat, lon, meters = (float(v) for v in args.near.split(','))
+                        data = index.within(lat, lon, meters, args.since, args.until)
+                    else:
+                        box = (float(v) for v in args.bbox.split(','))
+                        data = index.bbox(*box, args.since, args.until)
+                    print(f"Found {len(data)} of {len(index)} indexed locations",
+                          file=sys.stderr)
+                if args.output:
+                    write_output(data, args, f"{parser_type}: locations")
+                    print(f"Exported to {args.output}")
+                else:
+                    for record in data:
+                        print(json.dumps(record, ensure_ascii=False))
+                return
+            
+            if args.domains or args.domain or args.redirects:
+                if parser_type != 'safari':
+                    print("Error: --domains, --domain and --redirects need a Safari History.db")
+                    sys.exit(1)
+                hashes = HashCache(args.hash_cache) if args.hash_cache else None
+                try:
+                    index = domain_index(p, args.domain_index or ':memory:',
+                                         args.utc_offset, hashes)
+                finally:
+                    if hashes is not None:
+                        hashes.close()
+                with index:
+                    if args.domain:
+                        print(json.dumps(index.lookup(args.domain), indent=2))
+                        return
+                    if args.redirects:
+                        data = index.redirects()
+                        if args.format in ('csv', 'html'):
+                            data = [dict(c, hops=' -> '.join(c['hops'])) for c in data]
+                    else:
+                        data = index.top(args.limit or 50)
+                if args.output:
+                    write_output(data, args, f"{parser_type}: {Path(args.file).name}")
+                    print(f"Exported to {args.output}")
+                else:
+                    print(json.dumps(data, indent=2))
+                return
+            
+            if args.chat:
+                if parser_type not in ('whatsapp', 'sms'):
+                    print("Error: --chat needs a WhatsApp ChatStorage.sqlite or an sms.db")
+                    sys.exit(1)
+                sms = parser_type == 'sms'
+                if args.chat == 'all':
+                    for chat, messages in (p.iter_threads() if sms else p.iter_chats()):
+                        print(json.dumps({'chat': chat, 'messages': messages},
+                                         ensure_ascii=False))
+                    return
+                # SMS pages are keyed on (message_date, message id), written 'DATE,ID'
+                if args.after is None:
+                    after = None
+                elif sms:
+                    after = tuple(int(v) for v in args.after.split(','))
+                else:
+                    after = int(args.after)
+                if sms:
+                    page = p.thread_page(int(args.chat), args.limit or 100, after)
+                else:
+                    page = p.chat_page(int(args.chat), args.limit or 100, after)
+                if args.output:
+                    data = page['messages']
+                    if args.format in ('csv', 'html'):
+                        if sms:
+                            data = [dict(m, sort=','.join(map(str, m['sort'])),
+                                         attachments=', '.join(a['filename'] or ''
+                                                               for a in m['attachments']))
+                                    for m in data]
+                        else:
+                            data = [dict(m, media=m['media'] and m['media']['path'])
+                                    for m in data]
+                    write_output(data, args, f"{parser_type}: chat {args.chat}")
+                    print(f"Exported to {args.output}")
+                else:
+                    print(json.dumps(page, indent=2, ensure_ascii=False))
+                if page['next'] is not None:
+                    after = page['next']
+                    cursor = ','.join(map(str, after)) if sms else after
+                    print(f"Next page: --after {cursor}", file=sys.stderr)
+                return
+            
             if args.stats and hasattr(p, 'stats'):
-                import json
                 print(json.dumps(p.stats(), indent=2))
                 return
             
-            # Parse data
-            data = p.parse(limit=args.limit)
-            print(f"Parsed {len(data)} records")
+            if args.recover:
+                data = list(p.recover())
+                print(f"Recovered {len(data)} records")
+                if args.output:
+                    write_output(data, args, f"{parser_type}: recovered records")
+                    print(f"Exported to {args.output}")
+                return
+            
+            if args.media_root:
+                if not hasattr(p, 'hash_attachments') and not hasattr(p, 'hash_media'):
+                    print(f"Error: no media to hash for {parser_type}")
+                    sys.exit(1)
+                cache = HashCache(args.hash_cache) if args.hash_cache else None
+                try:
+                    hasher = getattr(p, 'hash_attachments', None) or p.hash_media
+                    data = hasher(args.media_root, limit=args.limit,
+                                  workers=args.workers, cache=cache)
+                finally:
+                    if cache:
+                        cache.close()
+                found = sum(1 for r in data if r['resolved_path'])
+                print(f"Hashed {found} of {len(data)} files")
+                if args.output:
+                    write_output(data, args, f"{parser_type}: media hashes")
+                    print(f"Exported to {args.output}")
+                return
+            
+            # Parse data, keeping first copies only when deduplicating
+            if args.dedup:
+                with open_seen(args.dedup, bloom=bool(args.bloom),
+                               capacity=args.bloom or 0) as seen, cancel_on_sigint(cancel):
+                    dedup = p.dedup(seen)
+                    data = list(dedup.filter(p.iter_parse(args.limit)))
+                print(f"Parsed {len(data)} new records, "
+                      f"skipped {dedup.dropped} already seen")
+            else:
+                with cancel_on_sigint(cancel):
+                    data = p.parse(limit=args.limit)
+                print(f"Parsed {len(data)} records")
             
             # Export if output specified
             if args.output:
-                if args.format == 'json':
-                    p.export_json(args.output)
-                elif args.format == 'csv':
-                    p.export_csv(args.output)
+                write_output(data, args, f"{parser_type}: {Path(args.file).name}")
                 print(f"Exported to {args.output}")
     
+    except (Cancelled, KeyboardInterrupt):
+        print("Cancelled", file=sys.stderr)
+        sys.exit(130)
     except FileNotFoundError as e:
         print(f"Error: {e}")
         sys.exit(1)
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
+    finally:
+        if p is not None and not print_integrity(p):
+            sys.exit(2)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,41 @@
+"""Aggregate analytics computed in a single pass over each database."""
+
+from .aggregate import (
+    Aggregator,
+    Count,
+    DailySeries,
+    GroupBy,
+    HourHistogram,
+    Percentiles,
+    Scan,
+    WeekdayHistogram,
+    sample_ranges
+)
+from .cache import SummaryCache, database_fingerprint, parser_fingerprint
+from .sketches import ApproxCount, Distinct, HeavyHitters, Quantiles, TDigest
+from .summaries import APPROX_SCANS, SCANS, approximate, summarize, unix_sql
+
+__all__ = [
+    'Aggregator',
+    'Count',
+    'DailySeries',
+    'GroupBy',
+    'HourHistogram',
+    'Percentiles',
+    'Scan',
+    'WeekdayHistogram',
+    'sample_ranges',
+    'SummaryCache',
+    'database_fingerprint',
+    'parser_fingerprint',
+    'ApproxCount',
+    'Distinct',
+    'HeavyHitters',
+    'Quantiles',
+    'TDigest',
+    'APPROX_SCANS',
+    'SCANS',
+    'approximate',
+    'summarize',
+    'unix_sql'
+]
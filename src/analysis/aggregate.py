@@ -0,0 +1,291 @@
+"""
+Streaming aggregators fed from one scan of a table.
+
+Every aggregator takes rows one at a time through add() and returns its
+summary from result(), so any number of them can share a single SQL
+scan. Timestamps are expected as Unix seconds (UTC); buckets are cut
+with integer arithmetic rather than datetime objects, after shifting by
+the histograms' `utc_offset` seconds for local hours and days.
+"""
+
+from __future__ import annotations
+import random
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+
+def sample_ranges(parser, table: str, fraction: float, block: int = 256,
+                  seed: int | None = None) -> Tuple[List[Tuple[int, int]], float]:
+    """
+    Random blocks of consecutive rowids covering about `fraction` of a table.
+    
+    Each block is a short range read from the table's b-tree, so a 1%
+    sample costs about 1% of a full scan. Blocks are returned one range
+    each, even when adjacent, since the sketches estimate their error
+    from the spread between block totals. Returns the ranges and the
+    share of the rowid span they cover.
+    """
+    lo, hi = parser.execute(f"SELECT min(ROWID), max(ROWID) FROM {table}").fetchone()
+    if lo is None or fraction >= 1:
+        return ([] if lo is None else [(lo, hi)]), 1.0
+    blocks = (hi - lo) // block + 1
+    chosen = sorted(random.Random(seed).sample(range(blocks),
+                                               max(1, round(blocks * fraction))))
+    ranges = [(lo + b * block, min(lo + (b + 1) * block - 1, hi)) for b in chosen]
+    covered = sum(end - start + 1 for start, end in ranges)
+    return ranges, covered / (hi - lo + 1)
+
+
+def format_unix(ts: float | None) -> str:
+    """Unix seconds as 'YYYY-MM-DD HH:MM:SS' UTC, '' if missing."""
+    if ts is None:
+        return ''
+    try:
+        return datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    except (ValueError, OverflowError, OSError):
+        return ''
+
+
+class Aggregator:
+    """
+    Base class: `where` optionally restricts the rows counted.
+    
+    `fraction` is the share of the table the rows were sampled from;
+    exact aggregators are only run on full scans and ignore it, as they
+    ignore end_block(), called after each sampled block of rows.
+    """
+    
+    fraction = 1.0
+    
+    def __init__(self, where: Callable[[Any], bool] | None = None):
+        self.where = where
+    
+    def add(self, row) -> None:
+        if self.where is None or self.where(row):
+            self._add(row)
+    
+    def _add(self, row) -> None:
+        raise NotImplementedError
+    
+    def end_block(self) -> None:
+        pass
+    
+    def result(self) -> Any:
+        raise NotImplementedError
+
+
+class Count(Aggregator):
+    """Number of rows."""
+    
+    def __init__(self, where: Callable[[Any], bool] | None = None):
+        super().__init__(where)
+        self.count = 0
+    
+    def _add(self, row) -> None:
+        self.count += 1
+    
+    def result(self) -> int:
+        return self.count
+
+
+class GroupBy(Aggregator):
+    """
+    Per-key row count, sums and maxima.
+    
+    result() is a list of {key_name: key, 'count': n, <sum>: total,
+    <max>: value} sorted by `sort` (descending), cut to `limit`.
+    `maxes` is a list of fields or a {name: field} mapping; maxima
+    named in `timestamps` are formatted as dates.
+    """
+    
+    def __init__(self, key: str, sums: Sequence[str] = (),
+                 maxes: Sequence[str] | Dict[str, str] = (),
+                 sort: str = 'count', limit: int | None = None,
+                 timestamps: Sequence[str] = (), name: str | None = None,
+                 where: Callable[[Any], bool] | None = None):
+        super().__init__(where)
+        self.key = key
+        self.sums = tuple(sums)
+        self.maxes = dict(maxes) if isinstance(maxes, dict) else {f: f for f in maxes}
+        self.sort = sort
+        self.limit = limit
+        self.timestamps = frozenset(timestamps)
+        self.name = name or key
+        self.groups: Dict[Any, list] = {}
+    
+    def _add(self, row) -> None:
+        state = self.groups.get(row[self.key])
+        if state is None:
+            state = [0] + [0] * len(self.sums) + [None] * len(self.maxes)
+            self.groups[row[self.key]] = state
+        state[0] += 1
+        i = 1
+        for field in self.sums:
+            state[i] += row[field] or 0
+            i += 1
+        for field in self.maxes.values():
+            value = row[field]
+            if value is not None and (state[i] is None or value > state[i]):
+                state[i] = value
+            i += 1
+    
+    def result(self) -> List[Dict[str, Any]]:
+        fields = ('count',) + self.sums + tuple(self.maxes)
+        rows = []
+        for key, state in self.groups.items():
+            entry = {self.name: key}
+            for field, value in zip(fields, state):
+                entry[field] = format_unix(value) if field in self.timestamps else value
+            rows.append(entry)
+        rows.sort(key=lambda r: (r[self.sort] is not None, r[self.sort]), reverse=True)
+        return rows[:self.limit] if self.limit else rows
+
+
+class HourHistogram(Aggregator):
+    """Rows per hour of day at `utc_offset` seconds from UTC, keyed '00'-'23'."""
+    
+    def __init__(self, field: str, utc_offset: int = 0,
+                 where: Callable[[Any], bool] | None = None):
+        super().__init__(where)
+        self.field = field
+        self.offset = utc_offset
+        self.bins = [0] * 24
+    
+    def _add(self, row) -> None:
+        ts = row[self.field]
+        if ts is not None:
+            self.bins[int((ts + self.offset) // 3600) % 24] += 1
+    
+    def result(self) -> Dict[str, int]:
+        return {f'{hour:02d}': n for hour, n in enumerate(self.bins)}
+
+
+class WeekdayHistogram(Aggregator):
+    """Rows per day of week at `utc_offset` seconds from UTC, Monday first."""
+    
+    def __init__(self, field: str, utc_offset: int = 0,
+                 where: Callable[[Any], bool] | None = None):
+        super().__init__(where)
+        self.field = field
+        self.offset = utc_offset
+        self.bins = [0] * 7
+    
+    def _add(self, row) -> None:
+        ts = row[self.field]
+        if ts is not None:
+            # 1970-01-01 was a Thursday
+            self.bins[(int((ts + self.offset) // 86400) + 3) % 7] += 1
+    
+    def result(self) -> Dict[str, int]:
+        return dict(zip(WEEKDAYS, self.bins))
+
+
+class DailySeries(Aggregator):
+    """Rows per calendar day at `utc_offset` seconds from UTC, in date order."""
+    
+    def __init__(self, field: str, utc_offset: int = 0,
+                 where: Callable[[Any], bool] | None = None):
+        super().__init__(where)
+        self.field = field
+        self.offset = utc_offset
+        self.days: Dict[int, int] = {}
+    
+    def _add(self, row) -> None:
+        ts = row[self.field]
+        if ts is not None:
+            day = int((ts + self.offset) // 86400)
+            self.days[day] = self.days.get(day, 0) + 1
+    
+    def result(self) -> Dict[str, int]:
+        return {
+            datetime.fromtimestamp(day * 86400, timezone.utc).strftime('%Y-%m-%d'): n
+            for day, n in sorted(self.days.items())
+        }
+
+
+class Percentiles(Aggregator):
+    """
+    Exact percentiles of a numeric field.
+    
+    Values are kept in a compact array of doubles (8 bytes each) and
+    sorted once at the end.
+    """
+    
+    def __init__(self, field: str, qs: Sequence[float] = (50, 90, 99),
+                 where: Callable[[Any], bool] | None = None):
+        super().__init__(where)
+        self.field = field
+        self.qs = tuple(qs)
+        self.values = array('d')
+    
+    def _add(self, row) -> None:
+        value = row[self.field]
+        if value is not None:
+            self.values.append(value)
+    
+    def result(self) -> Dict[str, Any]:
+        ordered = sorted(self.values)
+        n = len(ordered)
+        result: Dict[str, Any] = {'count': n}
+        if not n:
+            return result
+        result['min'] = ordered[0]
+        result['max'] = ordered[-1]
+        result['mean'] = round(sum(ordered) / n, 3)
+        for q in self.qs:
+            pos = (n - 1) * q / 100
+            lo = int(pos)
+            hi = min(lo + 1, n - 1)
+            result[f'p{q:g}'] = round(ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo), 3)
+        return result
+
+
+class Scan:
+    """
+    One SQL query feeding many aggregators.
+    
+    `finish`, if given, post-processes the dict of results (renaming
+    codes, unit conversion) before it is returned and cached. `table`
+    and `key` (its rowid alias as written in the query) allow scanning
+    a sample of rowid ranges instead of the whole table.
+    """
+    
+    def __init__(self, sql: str, aggregators: Dict[str, Aggregator],
+                 finish: Callable[[Dict[str, Any]], Dict[str, Any]] | None = None,
+                 table: str | None = None, key: str | None = None):
+        self.sql = sql
+        self.aggregators = aggregators
+        self.finish = finish
+        self.table = table
+        self.key = key
+    
+    def run(self, parser, ranges: Sequence[Tuple[int, int]] | None = None,
+            fraction: float = 1.0) -> Dict[str, Any]:
+        """
+        Scan the table once through a connected parser.
+        
+        With `ranges`, only rows whose key falls in one of the inclusive
+        (low, high) ranges are read, each range a sampled block;
+        `fraction` is the share of the table they cover, used by the
+        sketches to scale their counts.
+        """
+        aggregators = list(self.aggregators.values())
+        for aggregator in aggregators:
+            aggregator.fraction = fraction
+        if ranges is None:
+            cursors = [parser.execute(self.sql)]
+        else:
+            sql = f"{self.sql} WHERE {self.key} BETWEEN ? AND ?"
+            cursors = (parser.execute(sql, bounds) for bounds in ranges)
+        for cursor in cursors:
+            for row in cursor:
+                for aggregator in aggregators:
+                    aggregator.add(row)
+            if ranges is not None:
+                for aggregator in aggregators:
+                    aggregator.end_block()
+        results = {name: agg.result() for name, agg in self.aggregators.items()}
+        return self.finish(results) if self.finish else results
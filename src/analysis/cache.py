@@ -0,0 +1,89 @@
+"""
+Summary cache keyed by database content fingerprint.
+
+The fingerprint is built from the SHA-256 of the database and its -wal
+and -journal files, so two acquisitions share cached results only if
+their contents are identical. Headers and sizes are not enough: in WAL
+mode the change counter is not bumped, and an updated row leaves the
+file size alone. Digests already taken for an evidence manifest, or
+kept in a HashCache, are reused instead of reading the files again.
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict
+
+from ..utils.hashing import HashCache, hash_file, stat_key
+from ..utils.integrity import evidence_files
+
+# Bump when a scan's output shape changes so stale entries are ignored
+SUMMARY_VERSION = 1
+
+DEFAULT_CACHE_DIR = Path.home() / '.cache' / 'ios-forensics'
+
+
+def database_fingerprint(path: str | Path, cache: HashCache | None = None,
+                         known: Dict[str, Dict[str, Any]] | None = None) -> str:
+    """
+    Hex digest identifying the content of a database and its side files.
+    
+    `known` maps file paths to digests already computed with the stat
+    key they were taken at (IntegrityCheck.files); `cache` skips files
+    whose stat key is unchanged since an earlier run.
+    """
+    path = Path(path)
+    h = hashlib.blake2b(digest_size=16)
+    for file in evidence_files(path):
+        key = stat_key(file.stat())
+        info = (known or {}).get(str(file)) or {}
+        digest = info.get('sha256') if tuple(info.get('stat') or ()) == key else None
+        if digest is None and cache is not None:
+            cached = cache.get(key, ('sha256',))
+            digest = cached['sha256'] if cached else None
+        if digest is None:
+            digest = hash_file(file, ('sha256',))['sha256']
+            if cache is not None:
+                cache.put(key, {'sha256': digest})
+        h.update(f"{file.name[len(path.name):]}:{digest};".encode())
+    return h.hexdigest()
+
+
+def parser_fingerprint(parser, cache: HashCache | None = None) -> str:
+    """database_fingerprint of a parser's database, reusing its integrity digests."""
+    integrity = getattr(parser, 'integrity', None)
+    known = integrity.files if integrity is not None else None
+    return database_fingerprint(parser.db_path, cache, known)
+
+
+class SummaryCache:
+    """One JSON file per (database fingerprint, summary kind)."""
+    
+    def __init__(self, directory: str | Path | None = None):
+        self.directory = Path(directory) if directory else DEFAULT_CACHE_DIR
+    
+    def _path(self, fingerprint: str, kind: str) -> Path:
+        return self.directory / f"{fingerprint}-{kind}.json"
+    
+    def get(self, fingerprint: str, kind: str) -> Dict[str, Any] | None:
+        """Cached summary, or None if missing, unreadable or stale."""
+        try:
+            with open(self._path(fingerprint, kind), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get('version') != SUMMARY_VERSION:
+            return None
+        return entry.get('summary')
+    
+    def put(self, fingerprint: str, kind: str, summary: Dict[str, Any]) -> None:
+        """Store a summary, replacing any previous one atomically."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(fingerprint, kind)
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': SUMMARY_VERSION, 'summary': summary}, f,
+                      ensure_ascii=False, default=str)
+        os.replace(tmp, path)
@@ -0,0 +1,268 @@
+"""
+Spatio-temporal index of location-bearing records.
+
+Records from parsers with an iter_locations() method are stored in a
+SQLite R*Tree over (longitude, latitude, time), so bounding-box,
+radius and time-window queries visit only the tree nodes that can
+match instead of every row. R*Tree boxes are 32-bit floats rounded
+outwards; candidates are then filtered on the exact stored values and,
+for radius queries, by great-circle distance computed over the whole
+candidate set at once (vectorised with numpy when it is installed).
+"""
+
+from __future__ import annotations
+import math
+import sqlite3
+from array import array
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence
+
+from ..utils.hashing import HashCache
+from .cache import parser_fingerprint
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+EARTH_RADIUS_M = 6371008.8
+
+# Metres per degree of latitude
+DEGREE_M = math.pi * EARTH_RADIUS_M / 180
+
+
+def to_unix(value) -> float | None:
+    """Unix seconds from a number, a datetime (naive = UTC) or an ISO string."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def haversine(lat: float, lon: float, lats: Sequence[float],
+              lons: Sequence[float]) -> Sequence[float]:
+    """Great-circle distances in metres from one point to many."""
+    if np is not None:
+        la = np.radians(np.asarray(lats, dtype=float))
+        lo = np.radians(np.asarray(lons, dtype=float))
+        lat0, lon0 = math.radians(lat), math.radians(lon)
+        a = (np.sin((la - lat0) / 2) ** 2
+             + math.cos(lat0) * np.cos(la) * np.sin((lo - lon0) / 2) ** 2)
+        return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+    
+    lat0, lon0 = math.radians(lat), math.radians(lon)
+    cos0 = math.cos(lat0)
+    sin, cos, radians = math.sin, math.cos, math.radians
+    out = array('d')
+    for la, lo in zip(lats, lons):
+        la, lo = radians(la), radians(lo)
+        a = sin((la - lat0) / 2) ** 2 + cos0 * cos(la) * sin((lo - lon0) / 2) ** 2
+        out.append(2 * EARTH_RADIUS_M * math.asin(math.sqrt(min(a, 1.0))))
+    return out
+
+
+def radius_boxes(lat: float, lon: float, meters: float) -> List[tuple]:
+    """
+    (min_lon, max_lon, min_lat, max_lat) boxes covering a circle.
+    
+    Two boxes when the circle crosses the antimeridian; the full
+    longitude range near the poles.
+    """
+    dlat = meters / DEGREE_M
+    min_lat, max_lat = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if cos_lat <= 1e-9 or meters / (DEGREE_M * cos_lat) >= 180:
+        return [(-180.0, 180.0, min_lat, max_lat)]
+    dlon = meters / (DEGREE_M * cos_lat)
+    west, east = lon - dlon, lon + dlon
+    if west < -180:
+        return [(west + 360, 180.0, min_lat, max_lat), (-180.0, east, min_lat, max_lat)]
+    if east > 180:
+        return [(west, 180.0, min_lat, max_lat), (-180.0, east - 360, min_lat, max_lat)]
+    return [(west, east, min_lat, max_lat)]
+
+
+class GeoIndex:
+    """
+    R*Tree index of (source, file, record id, lat, lon, time, label) points.
+    
+    path=':memory:' (the default) builds a throwaway index; a file path
+    keeps it across runs. Each file's content fingerprint is stored with
+    its points: re-adding an unchanged file is skipped, and a changed
+    one has its old points replaced.
+    """
+    
+    def __init__(self, path: str | Path = ':memory:'):
+        self.path = str(path)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS points (
+                id INTEGER PRIMARY KEY,
+                source TEXT,
+                file TEXT,
+                record_id INTEGER,
+                lat REAL,
+                lon REAL,
+                timestamp REAL,
+                date TEXT,
+                label TEXT,
+                UNIQUE (source, file, record_id)
+            );
+            CREATE TABLE IF NOT EXISTS files (
+                source TEXT,
+                file TEXT,
+                fingerprint TEXT,
+                PRIMARY KEY (source, file)
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS points_rtree USING rtree(
+                id, min_lon, max_lon, min_lat, max_lat, min_t, max_t
+            );
+        """)
+    
+    def fingerprint(self, source: str, file: str) -> str | None:
+        """Content fingerprint a file's points were indexed from, if any."""
+        row = self.conn.execute(
+            "SELECT fingerprint FROM files WHERE source = ? AND file = ?", (source, file)
+        ).fetchone()
+        return row[0] if row else None
+    
+    def remove(self, source: str, file: str) -> int:
+        """Drop a file's points; returns how many."""
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM points_rtree WHERE id IN "
+                "(SELECT id FROM points WHERE source = ? AND file = ?)", (source, file)
+            )
+            removed = self.conn.execute(
+                "DELETE FROM points WHERE source = ? AND file = ?", (source, file)
+            ).rowcount
+            self.conn.execute("DELETE FROM files WHERE source = ? AND file = ?",
+                              (source, file))
+        return removed
+    
+    def add(self, source: str, records: Iterable[Dict[str, Any]],
+            file: str | None = None, fingerprint: str | None = None) -> int:
+        """
+        Index records with 'id', 'lat', 'lon' and optional 'timestamp'.
+        
+        With a `file` and its content `fingerprint`, nothing is read if
+        the file was indexed with the same fingerprint, and its previous
+        points are replaced if the fingerprint differs. Without one,
+        records already indexed under the same id are left as they are.
+        """
+        if file is not None and fingerprint is not None:
+            if self.fingerprint(source, file) == fingerprint:
+                return 0
+            # Also clears points an older index stored without a fingerprint
+            self.remove(source, file)
+        added = 0
+        with self.conn:
+            if file is not None and fingerprint is not None:
+                self.conn.execute("INSERT INTO files VALUES (?, ?, ?)",
+                                  (source, file, fingerprint))
+            for r in records:
+                lat, lon = r['lat'], r['lon']
+                if lat is None or lon is None or not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                    continue
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO points "
+                    "(source, file, record_id, lat, lon, timestamp, date, label) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (source, file, r['id'], lat, lon, r.get('timestamp'), r.get('date'),
+                     r.get('label'))
+                )
+                if not cursor.rowcount:
+                    continue
+                # Undated points span all time so untimed queries still find them
+                ts = r.get('timestamp')
+                t0, t1 = (ts, ts) if ts is not None else (-1e12, 1e12)
+                self.conn.execute(
+                    "INSERT INTO points_rtree VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (cursor.lastrowid, lon, lon, lat, lat, t0, t1)
+                )
+                added += 1
+        return added
+    
+    def add_parser(self, parser, hashes: HashCache | None = None) -> int:
+        """
+        Index every location a connected parser exposes.
+        
+        A file-backed index keys the database on its content fingerprint
+        (see analysis.cache), so a changed database is re-indexed;
+        `hashes` avoids re-reading an unchanged one.
+        """
+        fingerprint = None
+        if self.path != ':memory:':
+            fingerprint = parser_fingerprint(parser, hashes)
+        return self.add(type(parser).__name__, parser.iter_locations(),
+                        str(Path(parser.db_path).resolve()), fingerprint)
+    
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM points").fetchone()[0]
+    
+    def _query(self, boxes: List[tuple], start=None, end=None) -> List[Dict[str, Any]]:
+        start, end = to_unix(start), to_unix(end)
+        timed = start is not None or end is not None
+        t0 = start if start is not None else -1e12
+        t1 = end if end is not None else 1e12
+        rows: List[Dict[str, Any]] = []
+        for min_lon, max_lon, min_lat, max_lat in boxes:
+            cursor = self.conn.execute("""
+                SELECT p.* FROM points_rtree r JOIN points p ON p.id = r.id
+                WHERE r.max_lon >= ? AND r.min_lon <= ?
+                    AND r.max_lat >= ? AND r.min_lat <= ?
+                    AND r.max_t >= ? AND r.min_t <= ?
+            """, (min_lon, max_lon, min_lat, max_lat, t0, t1))
+            for row in cursor:
+                # The tree is only exact to float32; recheck the stored values
+                ts = row['timestamp']
+                if not (min_lon <= row['lon'] <= max_lon and min_lat <= row['lat'] <= max_lat):
+                    continue
+                if timed and (ts is None or not t0 <= ts <= t1):
+                    continue
+                rows.append(dict(row))
+        return rows
+    
+    def bbox(self, south: float, west: float, north: float, east: float,
+             start=None, end=None) -> List[Dict[str, Any]]:
+        """Points inside a box, optionally in [start, end]; west > east wraps."""
+        if west > east:
+            boxes = [(west, 180.0, south, north), (-180.0, east, south, north)]
+        else:
+            boxes = [(west, east, south, north)]
+        return sorted(self._query(boxes, start, end),
+                      key=lambda r: (r['timestamp'] is None, r['timestamp'] or 0))
+    
+    def within(self, lat: float, lon: float, meters: float,
+               start=None, end=None) -> List[Dict[str, Any]]:
+        """Points within `meters` of (lat, lon), nearest first, with 'distance_m'."""
+        candidates = self._query(radius_boxes(lat, lon, meters), start, end)
+        if not candidates:
+            return []
+        distances = haversine(lat, lon, [r['lat'] for r in candidates],
+                              [r['lon'] for r in candidates])
+        hits = []
+        for record, distance in zip(candidates, distances):
+            if distance <= meters:
+                record['distance_m'] = round(float(distance), 1)
+                hits.append(record)
+        hits.sort(key=lambda r: r['distance_m'])
+        return hits
+    
+    def between(self, start=None, end=None) -> List[Dict[str, Any]]:
+        """Points in a time window, in time order."""
+        return self.bbox(-90.0, -180.0, 90.0, 180.0, start, end)
+    
+    def close(self) -> None:
+        self.conn.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
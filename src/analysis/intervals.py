@@ -0,0 +1,117 @@
+"""
+Sweeps over time intervals arriving in start order.
+
+Everything here is push-based so that several sweeps can share one
+ordered pass over a table: feed intervals with add(), call close() at
+the end. Memory is bounded by how many intervals overlap at once, not
+by the length of the stream.
+"""
+
+from __future__ import annotations
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Iterator, Tuple
+
+
+class IntervalMerger:
+    """
+    Union of start-sorted intervals.
+    
+    Overlapping intervals, and ones separated by at most `gap` seconds,
+    are joined; each merged interval is passed to `emit` once no later
+    interval can extend it.
+    """
+    
+    def __init__(self, emit: Callable[[float, float], None], gap: float = 0):
+        self.emit = emit
+        self.gap = gap
+        self.current: list | None = None
+    
+    def add(self, start: float, end: float) -> None:
+        current = self.current
+        if current is not None and start <= current[1] + self.gap:
+            if end > current[1]:
+                current[1] = end
+            return
+        if current is not None:
+            self.emit(current[0], current[1])
+        self.current = [start, end]
+    
+    def close(self) -> None:
+        if self.current is not None:
+            self.emit(self.current[0], self.current[1])
+            self.current = None
+
+
+class OverlapMeter:
+    """
+    Total time covered by both of two streams of disjoint, sorted intervals.
+    
+    Two-pointer intersection: an interval is dropped as soon as the
+    other stream has passed its end, so only intervals still waiting
+    for a partner are held.
+    """
+    
+    def __init__(self):
+        self.a: deque = deque()
+        self.b: deque = deque()
+        self.seconds = 0.0
+    
+    def add_a(self, start: float, end: float) -> None:
+        self.a.append((start, end))
+        self._advance()
+    
+    def add_b(self, start: float, end: float) -> None:
+        self.b.append((start, end))
+        self._advance()
+    
+    def _advance(self) -> None:
+        a, b = self.a, self.b
+        while a and b:
+            (s1, e1), (s2, e2) = a[0], b[0]
+            overlap = min(e1, e2) - max(s1, s2)
+            if overlap > 0:
+                self.seconds += overlap
+            if e1 <= e2:
+                a.popleft()
+            else:
+                b.popleft()
+
+
+def covered(intervals) -> float:
+    """Seconds covered by start-sorted intervals, overlaps counted once."""
+    total = 0.0
+    reach = None
+    for start, end in intervals:
+        if reach is None or start > reach:
+            total += end - start
+            reach = end
+        elif end > reach:
+            total += end - reach
+            reach = end
+    return total
+
+
+def split_buckets(start: float, end: float, size: int,
+                  offset: int = 0) -> Iterator[Tuple[int, float]]:
+    """
+    (bucket, seconds) pieces of [start, end) cut into `size`-second buckets.
+    
+    Buckets are aligned to Unix time shifted by `offset` seconds, so an
+    offset of -18000 cuts hours and days on US Eastern standard time.
+    """
+    start += offset
+    end += offset
+    bucket = int(start // size)
+    while start < end:
+        boundary = (bucket + 1) * size
+        piece_end = end if end < boundary else boundary
+        yield bucket, piece_end - start
+        start = piece_end
+        bucket += 1
+
+
+def bucket_label(bucket: int, size: int) -> str:
+    """'YYYY-MM-DD' for day buckets, 'YYYY-MM-DD HH:MM' otherwise."""
+    moment = datetime.fromtimestamp(bucket * size, timezone.utc)
+    return moment.strftime('%Y-%m-%d' if size % 86400 == 0 else '%Y-%m-%d %H:%M')
@@ -0,0 +1,218 @@
+"""
+KnowledgeC usage and session reconstruction.
+
+App focus, lock state and backlight intervals are read in start order
+(one index-ordered query per stream, merged in Python, so SQLite never
+sorts) and swept once to produce:
+
+- per-app usage cut into hour or day buckets, with overlapping focus
+  events for the same app counted once;
+- device sessions: unlocked periods, each with its screen-on time and
+  the apps used during it;
+- concurrency totals: how much focus time fell while the screen was on
+  or the device unlocked, and how long the screen was lit while locked.
+"""
+
+from __future__ import annotations
+import heapq
+from operator import itemgetter
+from typing import Any, Dict, Iterator, List
+
+from .aggregate import format_unix
+from .intervals import IntervalMerger, OverlapMeter, bucket_label, covered, split_buckets
+from .summaries import unix_sql
+
+FOCUS = '/app/inFocus'
+LOCKED = '/device/isLocked'
+BACKLIT = '/display/isBacklit'
+
+BUCKETS = {'hour': 3600, 'day': 86400}
+
+TIMELINE_SQL = f"""
+    SELECT
+        {unix_sql('o.ZSTARTDATE')} AS start,
+        {unix_sql('o.ZENDDATE')} AS end,
+        o.ZSTREAMNAME AS stream,
+        CASE o.ZSTREAMNAME
+            WHEN '{FOCUS}' THEN COALESCE(o.ZVALUESTRING, s.ZBUNDLEID)
+            ELSE o.ZVALUEINTEGER
+        END AS value
+    FROM ZOBJECT o
+    LEFT JOIN ZSOURCE s ON o.ZSOURCE = s.Z_PK
+    WHERE o.ZSTREAMNAME = ?
+        AND o.ZSTARTDATE IS NOT NULL
+        AND o.ZENDDATE >= o.ZSTARTDATE
+    ORDER BY o.ZSTARTDATE
+"""
+
+
+def timeline(parser, streams=(FOCUS, LOCKED, BACKLIT)) -> Iterator[tuple]:
+    """(start, end, stream, value) rows of several streams in start order."""
+    cursors = [parser.execute(TIMELINE_SQL, (stream,)) for stream in streams]
+    return heapq.merge(*cursors, key=itemgetter(0))
+
+
+class ActivitySweep:
+    """
+    Single pass over a start-ordered KnowledgeC timeline.
+    
+    `bucket` is 'hour' or 'day', cut at `utc_offset` seconds from UTC.
+    Unlocked periods separated by at most `session_gap` seconds form one
+    session. Focus and backlight events are buffered only while they may
+    still overlap the current or next session.
+    """
+    
+    def __init__(self, bucket: str = 'hour', utc_offset: int = 0,
+                 session_gap: float = 30):
+        if bucket not in BUCKETS:
+            raise ValueError(f"bucket must be one of {', '.join(BUCKETS)}")
+        self.size = BUCKETS[bucket]
+        self.offset = utc_offset
+        self.usage: Dict[int, Dict[str, float]] = {}
+        self.app_totals: Dict[str, float] = {}
+        self.sessions: List[Dict[str, Any]] = []
+        
+        self._apps: Dict[str, IntervalMerger] = {}
+        self._focus_on = OverlapMeter()
+        self._focus_unlocked = OverlapMeter()
+        self._lit_unlocked = OverlapMeter()
+        self.totals = {'focus': 0.0, 'screen_on': 0.0, 'unlocked': 0.0}
+        self._focus = IntervalMerger(self._on_focus)
+        self._lit = IntervalMerger(self._on_lit)
+        self._unlocked = IntervalMerger(self._on_unlocked)
+        self._sessions = IntervalMerger(self._on_session, session_gap)
+        self._pending_focus: List[tuple] = []
+        self._pending_lit: List[tuple] = []
+        self._prune_at = 10000
+    
+    def add(self, start: float, end: float, stream: str, value) -> None:
+        if stream == FOCUS:
+            if value is None:
+                return
+            merger = self._apps.get(value)
+            if merger is None:
+                merger = self._apps[value] = IntervalMerger(self._app_emitter(value))
+            merger.add(start, end)
+            self._focus.add(start, end)
+            self._pending_focus.append((start, end, value))
+        elif stream == BACKLIT:
+            if value == 1:
+                self._lit.add(start, end)
+                self._pending_lit.append((start, end))
+        elif stream == LOCKED:
+            if value == 0:
+                self._unlocked.add(start, end)
+                self._sessions.add(start, end)
+        if len(self._pending_focus) + len(self._pending_lit) > self._prune_at:
+            self._prune(start)
+    
+    def _prune(self, now: float) -> None:
+        """Drop buffered events that end before any session they could join."""
+        current = self._sessions.current
+        cutoff = current[0] if current is not None else now
+        self._pending_focus = [p for p in self._pending_focus if p[1] > cutoff]
+        self._pending_lit = [p for p in self._pending_lit if p[1] > cutoff]
+        self._prune_at = max(10000, 2 * (len(self._pending_focus) + len(self._pending_lit)))
+    
+    def _app_emitter(self, bundle: str):
+        def emit(start: float, end: float) -> None:
+            self.app_totals[bundle] = self.app_totals.get(bundle, 0.0) + end - start
+            for bucket, seconds in split_buckets(start, end, self.size, self.offset):
+                row = self.usage.setdefault(bucket, {})
+                row[bundle] = row.get(bundle, 0.0) + seconds
+        return emit
+    
+    def _on_focus(self, start: float, end: float) -> None:
+        self.totals['focus'] += end - start
+        self._focus_on.add_a(start, end)
+        self._focus_unlocked.add_a(start, end)
+    
+    def _on_lit(self, start: float, end: float) -> None:
+        self.totals['screen_on'] += end - start
+        self._focus_on.add_b(start, end)
+        self._lit_unlocked.add_a(start, end)
+    
+    def _on_unlocked(self, start: float, end: float) -> None:
+        self.totals['unlocked'] += end - start
+        self._focus_unlocked.add_b(start, end)
+        self._lit_unlocked.add_b(start, end)
+    
+    def _on_session(self, start: float, end: float) -> None:
+        """Attribute buffered focus and backlight time to a closed session."""
+        apps: Dict[str, list] = {}
+        lit = []
+        for s, e, bundle in self._pending_focus:
+            if e > start and s < end:
+                apps.setdefault(bundle, []).append((max(s, start), min(e, end)))
+        for s, e in self._pending_lit:
+            if e > start and s < end:
+                lit.append((max(s, start), min(e, end)))
+        used = sorted(((b, covered(pieces)) for b, pieces in apps.items()),
+                      key=itemgetter(1), reverse=True)
+        self.sessions.append({
+            'start': format_unix(start),
+            'end': format_unix(end),
+            'duration_sec': round(end - start),
+            'screen_on_sec': round(covered(lit)),
+            'app_seconds': round(sum(seconds for _, seconds in used)),
+            'apps': {bundle: round(seconds) for bundle, seconds in used}
+        })
+        # Later sessions start after this one ends
+        self._pending_focus = [p for p in self._pending_focus if p[1] > end]
+        self._pending_lit = [p for p in self._pending_lit if p[1] > end]
+    
+    def close(self) -> None:
+        for merger in self._apps.values():
+            merger.close()
+        for merger in (self._focus, self._lit, self._unlocked, self._sessions):
+            merger.close()
+    
+    def usage_rows(self) -> List[Dict[str, Any]]:
+        """Long-format usage matrix: one row per (bucket, app), in time order."""
+        rows = []
+        for bucket in sorted(self.usage):
+            label = bucket_label(bucket, self.size)
+            for bundle, seconds in sorted(self.usage[bucket].items(),
+                                          key=itemgetter(1), reverse=True):
+                rows.append({'bucket': label, 'bundle_id': bundle,
+                             'seconds': round(seconds, 1)})
+        return rows
+    
+    def concurrency(self) -> Dict[str, float]:
+        """Seconds of focus, screen-on and unlocked time and their overlaps."""
+        totals = self.totals
+        return {
+            'focus_seconds': round(totals['focus']),
+            'screen_on_seconds': round(totals['screen_on']),
+            'unlocked_seconds': round(totals['unlocked']),
+            'focus_while_screen_on': round(self._focus_on.seconds),
+            'focus_while_unlocked': round(self._focus_unlocked.seconds),
+            'screen_on_while_locked': round(totals['screen_on'] - self._lit_unlocked.seconds)
+        }
+    
+    def result(self) -> Dict[str, Any]:
+        return {
+            'apps': [{'bundle_id': b, 'hours': round(s / 3600, 2)}
+                     for b, s in sorted(self.app_totals.items(),
+                                        key=itemgetter(1), reverse=True)],
+            'concurrency': self.concurrency(),
+            'sessions': self.sessions,
+            'usage': self.usage_rows()
+        }
+
+
+def flatten_session(session: Dict[str, Any]) -> Dict[str, Any]:
+    """A session with its apps as one 'bundle (seconds)' column, for tables."""
+    row = dict(session)
+    row['apps'] = ', '.join(f"{b} ({s}s)" for b, s in session['apps'].items())
+    return row
+
+
+def activity(parser, bucket: str = 'hour', utc_offset: int = 0,
+             session_gap: float = 30) -> Dict[str, Any]:
+    """Usage matrix, sessions and concurrency for a connected KnowledgeCParser."""
+    sweep = ActivitySweep(bucket, utc_offset, session_gap)
+    for start, end, stream, value in timeline(parser):
+        sweep.add(start, end, stream, value)
+    sweep.close()
+    return sweep.result()
@@ -0,0 +1,279 @@
+"""
+Safari per-domain analytics.
+
+Each history item's URL is reduced to its registrable domain once, by
+the memoised url_domain() SQL function; one pass over history_visits,
+without a join, then fills per-domain totals, per-day counts and an
+hour-of-day profile, and collects the visits that take part in
+redirects so chains can be followed afterwards. The results are written
+to a small SQLite database keyed by domain, so later lookups are index
+seeks instead of another scan; a file-backed index is reused while the
+source database is unchanged.
+"""
+
+from __future__ import annotations
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List
+
+from ..utils.hashing import HashCache
+from ..utils.urls import url_domain
+from .aggregate import format_unix
+from .cache import parser_fingerprint
+from .summaries import unix_sql
+
+ITEMS_SQL = "SELECT id, url_domain(url), url FROM history_items"
+
+VISITS_SQL = f"""
+    SELECT
+        id,
+        history_item,
+        {unix_sql('NULLIF(visit_time, 0)')},
+        redirect_source,
+        redirect_destination
+    FROM history_visits
+"""
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS domains (
+    domain TEXT PRIMARY KEY,
+    visits INTEGER,
+    urls INTEGER,
+    first_visit REAL,
+    last_visit REAL,
+    redirected_in INTEGER,
+    redirected_out INTEGER,
+    hours TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS domain_days (
+    domain TEXT,
+    day TEXT,
+    visits INTEGER,
+    PRIMARY KEY (domain, day)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS redirect_hops (
+    chain INTEGER,
+    hop INTEGER,
+    visit_id INTEGER,
+    domain TEXT,
+    url TEXT,
+    time REAL,
+    PRIMARY KEY (chain, hop)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS redirect_hops_domain ON redirect_hops (domain, chain);
+"""
+
+
+class DomainSweep:
+    """
+    Per-domain accumulators for one pass over visit rows.
+    
+    `items` maps history item id to (domain, url). Days and hours are
+    cut at `utc_offset` seconds from UTC.
+    """
+    
+    def __init__(self, items: Dict[int, tuple], utc_offset: int = 0):
+        self.items = items
+        self.offset = utc_offset
+        # domain -> [visits, first, last, redirected_in, redirected_out]
+        self.domains: Dict[str, list] = {}
+        self.urls: Dict[str, set] = {}
+        self.days: Dict[tuple, int] = {}
+        self.hours: Dict[str, List[int]] = {}
+        # visit id -> (next visit id, domain, url, ts) for visits in a redirect
+        self.hops: Dict[int, tuple] = {}
+        self.heads: List[int] = []
+    
+    def add(self, visit: int, item: int, ts: float | None,
+            source: int | None, destination: int | None) -> None:
+        domain, url = self.items.get(item, ('', None))
+        domain = domain or ''
+        state = self.domains.get(domain)
+        if state is None:
+            state = self.domains[domain] = [0, ts, ts, 0, 0]
+            self.urls[domain] = set()
+            self.hours[domain] = [0] * 24
+        state[0] += 1
+        self.urls[domain].add(item)
+        if ts is not None:
+            if state[1] is None or ts < state[1]:
+                state[1] = ts
+            if state[2] is None or ts > state[2]:
+                state[2] = ts
+            local = ts + self.offset
+            day = int(local // 86400)
+            self.days[(domain, day)] = self.days.get((domain, day), 0) + 1
+            self.hours[domain][int(local // 3600) % 24] += 1
+        
+        if source is not None or destination is not None:
+            self.hops[visit] = (destination, domain, url, ts)
+            if source is None:
+                self.heads.append(visit)
+            else:
+                state[3] += 1
+            if destination is not None:
+                state[4] += 1
+    
+    def chains(self) -> List[List[tuple]]:
+        """Redirect chains as lists of (visit id, domain, url, ts), in visit order."""
+        chains = []
+        for head in self.heads:
+            chain = []
+            visit = head
+            while visit is not None and visit in self.hops and len(chain) < 100:
+                destination, domain, url, ts = self.hops[visit]
+                chain.append((visit, domain, url, ts))
+                visit = destination
+            if len(chain) > 1:
+                chains.append(chain)
+        return chains
+
+
+class DomainIndex:
+    """
+    Per-domain visit statistics and redirect chains, keyed for lookups.
+    
+    Daily counts and hour-of-day profiles are in local time at the
+    `utc_offset` the index was built with; first and last visits are UTC.
+    """
+    
+    def __init__(self, path: str | Path = ':memory:'):
+        self.path = str(path)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(INDEX_SCHEMA)
+    
+    def _meta(self, key: str) -> str | None:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    @property
+    def fingerprint(self) -> str | None:
+        return self._meta('fingerprint')
+    
+    @property
+    def utc_offset(self) -> int | None:
+        value = self._meta('utc_offset')
+        return int(value) if value is not None else None
+    
+    def build(self, parser, utc_offset: int = 0, fingerprint: str | None = None) -> None:
+        """Replace the index contents with one pass over the parser's visits."""
+        if fingerprint is None:
+            fingerprint = parser_fingerprint(parser)
+        items = {item: (domain, url) for item, domain, url in parser.execute(ITEMS_SQL)}
+        sweep = DomainSweep(items, utc_offset)
+        for row in parser.execute(VISITS_SQL):
+            sweep.add(*row)
+        
+        with self.conn:
+            for table in ('domains', 'domain_days', 'redirect_hops', 'meta'):
+                self.conn.execute(f"DELETE FROM {table}")
+            self.conn.executemany(
+                "INSERT INTO domains VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                ((domain, s[0], len(sweep.urls[domain]), s[1], s[2], s[3], s[4],
+                  json.dumps(sweep.hours[domain]))
+                 for domain, s in sweep.domains.items())
+            )
+            self.conn.executemany(
+                "INSERT INTO domain_days VALUES (?, ?, ?)",
+                ((domain, format_unix(day * 86400)[:10], n)
+                 for (domain, day), n in sweep.days.items())
+            )
+            self.conn.executemany(
+                "INSERT INTO redirect_hops VALUES (?, ?, ?, ?, ?, ?)",
+                ((n, hop, *step)
+                 for n, chain in enumerate(sweep.chains())
+                 for hop, step in enumerate(chain))
+            )
+            self.conn.executemany("INSERT INTO meta VALUES (?, ?)", (
+                ('fingerprint', fingerprint),
+                ('utc_offset', str(utc_offset))
+            ))
+    
+    def _domain_row(self, row) -> Dict[str, Any]:
+        return {
+            'domain': row['domain'],
+            'visits': row['visits'],
+            'urls': row['urls'],
+            'first_visit': format_unix(row['first_visit']),
+            'last_visit': format_unix(row['last_visit']),
+            'redirected_in': row['redirected_in'],
+            'redirected_out': row['redirected_out']
+        }
+    
+    def top(self, n: int | None = 50) -> List[Dict[str, Any]]:
+        """Domains by visit count."""
+        query = "SELECT * FROM domains ORDER BY visits DESC"
+        if n:
+            query += f" LIMIT {int(n)}"
+        return [self._domain_row(row) for row in self.conn.execute(query)]
+    
+    def lookup(self, domain: str) -> Dict[str, Any] | None:
+        """Totals, daily visits, hour-of-day profile and redirects for a domain."""
+        domain = url_domain(f"//{domain}") or domain.lower()
+        row = self.conn.execute("SELECT * FROM domains WHERE domain = ?", (domain,)).fetchone()
+        if row is None:
+            return None
+        result = self._domain_row(row)
+        result['by_hour'] = {f'{h:02d}': n for h, n in enumerate(json.loads(row['hours']))}
+        result['daily'] = dict(self.conn.execute(
+            "SELECT day, visits FROM domain_days WHERE domain = ? ORDER BY day", (domain,)
+        ).fetchall())
+        result['redirects'] = self.redirects(domain)
+        return result
+    
+    def redirects(self, domain: str | None = None) -> List[Dict[str, Any]]:
+        """Redirect chains, all of them or those passing through a domain."""
+        if domain:
+            chains = self.conn.execute(
+                "SELECT DISTINCT chain FROM redirect_hops WHERE domain = ?", (domain,)
+            ).fetchall()
+            ids = [c[0] for c in chains]
+        else:
+            ids = None
+        query = "SELECT * FROM redirect_hops"
+        params: tuple = ()
+        if ids is not None:
+            if not ids:
+                return []
+            query += f" WHERE chain IN ({','.join('?' * len(ids))})"
+            params = tuple(ids)
+        query += " ORDER BY chain, hop"
+        
+        result: List[Dict[str, Any]] = []
+        current = None
+        for row in self.conn.execute(query, params):
+            if row['chain'] != current:
+                current = row['chain']
+                result.append({'time': format_unix(row['time']), 'hops': []})
+            result[-1]['hops'].append(row['url'])
+        for chain in result:
+            chain['final_url'] = chain['hops'][-1]
+        return result
+    
+    def close(self) -> None:
+        self.conn.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def domain_index(parser, path: str | Path = ':memory:', utc_offset: int = 0,
+                 hashes: HashCache | None = None) -> DomainIndex:
+    """
+    Open a domain index for a connected SafariParser.
+    
+    It is rebuilt if the content of the database changed (see
+    cache.database_fingerprint; `hashes` saves re-reading it) or it was
+    built for another UTC offset.
+    """
+    index = DomainIndex(path)
+    fingerprint = parser_fingerprint(parser, hashes)
+    if index.fingerprint != fingerprint or index.utc_offset != utc_offset:
+        index.build(parser, utc_offset, fingerprint)
+    return index
@@ -0,0 +1,371 @@
+"""
+Streaming sketches for approximate summaries.
+
+Each sketch is an Aggregator reporting an estimate with a 95% interval.
+When a scan reads a random sample of rowid blocks, Scan sets `fraction`
+and calls end_block() after each block; counts are scaled up by
+1 / fraction and the interval is widened by the sampling error of a
+cluster sample, measured from the spread between block totals. Rows
+next to each other are alike (a conversation, a call burst, an app
+session), so treating them as independent draws would understate it.
+"""
+
+from __future__ import annotations
+import hashlib
+import heapq
+import math
+from array import array
+from bisect import bisect_right
+from typing import Any, Callable, Dict, List, Tuple
+
+from .aggregate import Aggregator
+
+# Two-sided 95% normal quantile
+Z95 = 1.96
+
+# Two-sided 95% Student t quantiles by degrees of freedom, for samples
+# of few blocks; Z95 beyond the table
+T95 = (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+       2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+       2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042)
+
+
+def t95(blocks: int) -> float:
+    """95% quantile for a spread estimated from `blocks` block totals."""
+    return T95[blocks - 2] if blocks - 2 < len(T95) else Z95
+
+
+def _hash64(value) -> int:
+    digest = hashlib.blake2b(repr(value).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def scale_count(count: float, fraction: float, digits: int = 0,
+                squares: float = 0.0, blocks: int = 0) -> Dict[str, float]:
+    """
+    A count or sum seen in a sample of blocks, scaled to the whole table.
+    
+    `squares` is the sum of the squared per-block totals over the
+    `blocks` sampled blocks (blocks without the value count as zero).
+    The 95% interval is that of a cluster sample, from the variance
+    between block totals; with fewer than two blocks there is no
+    spread to measure and `high` is None.
+    """
+    
+    def r(x: float) -> float:
+        return round(x, digits) if digits else round(x)
+    
+    if fraction >= 1:
+        return {'estimate': r(count), 'low': r(count), 'high': r(count)}
+    estimate = count / fraction
+    if blocks < 2:
+        return {'estimate': r(estimate), 'low': r(count), 'high': None}
+    spread = max(0.0, (squares - count * count / blocks) / (blocks - 1))
+    margin = t95(blocks) * math.sqrt(blocks * (1 - fraction) * spread) / fraction
+    return {'estimate': r(estimate), 'low': r(max(count, estimate - margin)),
+            'high': r(estimate + margin)}
+
+
+class ApproxCount(Aggregator):
+    """Row count scaled from the sample."""
+    
+    def __init__(self, where: Callable[[Any], bool] | None = None):
+        super().__init__(where)
+        self.count = 0
+        self.squares = 0
+        self.blocks = 0
+        self._block = 0
+    
+    def _add(self, row) -> None:
+        self.count += 1
+        self._block += 1
+    
+    def end_block(self) -> None:
+        self.squares += self._block * self._block
+        self.blocks += 1
+        self._block = 0
+    
+    def result(self) -> Dict[str, Any]:
+        return dict(scale_count(self.count, self.fraction, 0, self.squares, self.blocks),
+                    sampled=self.count)
+
+
+class Distinct(Aggregator):
+    """
+    HyperLogLog estimate of the number of distinct values of a field.
+    
+    2**p one-byte registers; the relative standard error is
+    1.04 / sqrt(2**p), 1.6% at the default p=12 (4 KB). On a sample
+    only a lower bound can be given: values never sampled are not seen
+    at all, so `high` is None.
+    """
+    
+    def __init__(self, field: str, p: int = 12,
+                 where: Callable[[Any], bool] | None = None):
+        super().__init__(where)
+        self.field = field
+        self.p = p
+        self.registers = bytearray(1 << p)
+        self._rest = 64 - p
+        self._mask = (1 << self._rest) - 1
+    
+    def _add(self, row) -> None:
+        value = row[self.field]
+        if value is None:
+            return
+        x = _hash64(value)
+        index = x >> self._rest
+        rank = self._rest - (x & self._mask).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+    
+    def estimate(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate while registers are sparse
+            return m * math.log(m / zeros)
+        return raw
+    
+    def result(self) -> Dict[str, Any]:
+        estimate = self.estimate()
+        error = 1.04 / math.sqrt(len(self.registers))
+        return {
+            'estimate': round(estimate),
+            'low': round(estimate * (1 - Z95 * error)),
+            'high': round(estimate * (1 + Z95 * error)) if self.fraction >= 1 else None,
+            'relative_error': round(error, 4)
+        }
+
+
+class HeavyHitters(Aggregator):
+    """
+    Top-k values of a field by count, or by the sum of `weight`.
+    
+    Space-Saving keeps `capacity` counters (total, inherited total, sum
+    of squared block totals, total in the current block); a value's
+    true total lies between its counter minus the count it inherited on
+    eviction and the counter itself, which is the interval reported
+    before sampling error is added. Values with fewer than capacity
+    distinct keys are counted exactly.
+    """
+    
+    def __init__(self, field: str, k: int = 20, capacity: int | None = None,
+                 weight: str | None = None, name: str | None = None,
+                 where: Callable[[Any], bool] | None = None):
+        super().__init__(where)
+        self.field = field
+        self.k = k
+        self.capacity = capacity or max(50 * k, 1000)
+        self.weight = weight
+        self.name = name or field
+        self.counters: Dict[Any, List[float]] = {}
+        self.blocks = 0
+        # Keys whose current-block total is not yet folded into squares
+        self._touched: set = set()
+        # (count, key) entries, possibly stale; fixed up lazily on eviction
+        self._heap: List[Tuple[float, str, Any]] = []
+    
+    def _add(self, row) -> None:
+        key = row[self.field]
+        if key is None:
+            return
+        w = (row[self.weight] or 0) if self.weight else 1
+        self._touched.add(key)
+        counter = self.counters.get(key)
+        if counter is not None:
+            counter[0] += w
+            counter[3] += w
+            return
+        if len(self.counters) < self.capacity:
+            self.counters[key] = [w, 0, 0, w]
+            heapq.heappush(self._heap, (w, repr(key), key))
+            return
+        floor, squares = self._evict()
+        self.counters[key] = [floor + w, floor, squares, w]
+        heapq.heappush(self._heap, (floor + w, repr(key), key))
+    
+    def end_block(self) -> None:
+        for key in self._touched:
+            counter = self.counters.get(key)
+            if counter is not None:
+                counter[2] += counter[3] * counter[3]
+                counter[3] = 0
+        self._touched.clear()
+        self.blocks += 1
+    
+    def _evict(self) -> Tuple[float, float]:
+        """Drop the smallest counter and return its total and squares."""
+        while True:
+            count, order, key = heapq.heappop(self._heap)
+            counter = self.counters.get(key)
+            if counter is None:
+                continue
+            current = counter[0]
+            if current == count:
+                _, _, squares, block = self.counters.pop(key)
+                return count, squares + block * block
+            heapq.heappush(self._heap, (current, order, key))
+    
+    def result(self) -> List[Dict[str, Any]]:
+        digits = 1 if self.weight else 0
+        top = sorted(self.counters.items(), key=lambda kv: kv[1][0], reverse=True)
+        rows = []
+        for key, (count, error, squares, _) in top[:self.k]:
+            upper = scale_count(count, self.fraction, digits, squares, self.blocks)
+            lower = scale_count(count - error, self.fraction, digits, squares, self.blocks)
+            rows.append({self.name: key, 'estimate': upper['estimate'],
+                         'low': lower['low'], 'high': upper['high']})
+        return rows
+
+
+class TDigest:
+    """
+    Merging t-digest (Dunning) for streaming quantiles.
+    
+    Centroids are small near the tails and large in the middle, so
+    extreme quantiles stay accurate with about `compression` centroids.
+    """
+    
+    def __init__(self, compression: float = 100):
+        self.compression = compression
+        self.means: List[float] = []
+        self.weights: List[float] = []
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer = array('d')
+    
+    def add(self, x: float) -> None:
+        self._buffer.append(x)
+        if len(self._buffer) >= 10 * self.compression:
+            self._compress()
+    
+    def _k(self, q: float) -> float:
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+    
+    def _q(self, k: float) -> float:
+        k = min(k, self.compression / 4)
+        return (math.sin(k * 2 * math.pi / self.compression) + 1) / 2
+    
+    def _compress(self) -> None:
+        if not self._buffer:
+            return
+        points = sorted([(x, 1.0) for x in self._buffer] + list(zip(self.means, self.weights)))
+        self._buffer = array('d')
+        self.min = min(self.min, points[0][0])
+        self.max = max(self.max, points[-1][0])
+        total = self.total + len(points) - len(self.means)
+        
+        means: List[float] = []
+        weights: List[float] = []
+        mean, weight = points[0]
+        done = 0.0
+        limit = total * self._q(self._k(0.0) + 1)
+        for m, w in points[1:]:
+            if done + weight + w <= limit:
+                weight += w
+                mean += (m - mean) * w / weight
+            else:
+                means.append(mean)
+                weights.append(weight)
+                done += weight
+                limit = total * self._q(self._k(done / total) + 1)
+                mean, weight = m, w
+        means.append(mean)
+        weights.append(weight)
+        self.means, self.weights, self.total = means, weights, total
+    
+    def quantile(self, q: float) -> Tuple[float | None, float]:
+        """
+        Value at quantile q and the rank uncertainty of the answer.
+        
+        The rank error is the share of points in the centroids the
+        value was interpolated between.
+        """
+        self._compress()
+        if not self.means:
+            return None, 0.0
+        target = q * self.total
+        means, weights = self.means, self.weights
+        if target <= weights[0] / 2:
+            share = weights[0] / 2 / self.total
+            span = weights[0] / 2
+            value = self.min + (means[0] - self.min) * (target / span if span else 0)
+            return value, share
+        
+        center = weights[0] / 2
+        for i in range(len(means) - 1):
+            next_center = center + (weights[i] + weights[i + 1]) / 2
+            if target <= next_center:
+                t = (target - center) / (next_center - center)
+                share = (weights[i] + weights[i + 1]) / 2 / self.total
+                return means[i] + (means[i + 1] - means[i]) * t, share
+            center = next_center
+        
+        span = weights[-1] / 2
+        t = (target - center) / span if span else 1
+        return means[-1] + (self.max - means[-1]) * min(t, 1), span / self.total
+
+
+class Quantiles(Aggregator):
+    """
+    Approximate percentiles of a numeric field from a t-digest.
+    
+    `rank_error` bounds how far the reported value's true rank may sit
+    from the requested one: digest interpolation plus, on a sample, the
+    sampling error of the rank. Sampled values are also kept per block
+    (sorted) so that error comes from how much each block's share below
+    the value differs from the overall one, a cluster ratio estimate.
+    """
+    
+    def __init__(self, field: str, qs=(50, 90, 99), compression: float = 100,
+                 where: Callable[[Any], bool] | None = None):
+        super().__init__(where)
+        self.field = field
+        self.qs = tuple(qs)
+        self.digest = TDigest(compression)
+        self.count = 0
+        self.sum = 0.0
+        self._blocks: List[array] = []
+        self._block = array('d')
+    
+    def _add(self, row) -> None:
+        value = row[self.field]
+        if value is not None:
+            self.digest.add(value)
+            self.count += 1
+            self.sum += value
+            if self.fraction < 1:
+                self._block.append(value)
+    
+    def end_block(self) -> None:
+        self._blocks.append(array('d', sorted(self._block)))
+        self._block = array('d')
+    
+    def _rank_error(self, value: float, q: float) -> float:
+        """95% sampling error of the share of rows at or below `value`."""
+        n = len(self._blocks)
+        if n < 2:
+            return 1.0
+        deviations = [bisect_right(b, value) - q * len(b) for b in self._blocks]
+        spread = sum(d * d for d in deviations) / (n - 1)
+        mean_rows = self.count / n
+        return t95(n) * math.sqrt((1 - self.fraction) * spread / n) / mean_rows
+    
+    def result(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {'count': self.count}
+        if not self.count:
+            return result
+        result['mean'] = round(self.sum / self.count, 3)
+        errors = {}
+        for q in self.qs:
+            value, share = self.digest.quantile(q / 100)
+            if self.fraction < 1:
+                share = min(1.0, share + self._rank_error(value, q / 100))
+            result[f'p{q:g}'] = round(value, 3)
+            errors[f'p{q:g}'] = round(share, 4)
+        result['rank_error'] = errors
+        return result
@@ -0,0 +1,282 @@
+"""Summary scans per artifact: everything a report needs from one pass."""
+
+from __future__ import annotations
+from typing import Any, Callable, Dict
+
+from ..parsers.calls import CallHistoryParser
+from ..utils.timestamp import COCOA_OFFSET
+from .aggregate import (
+    Count, DailySeries, GroupBy, HourHistogram, Percentiles, Scan, WeekdayHistogram,
+    sample_ranges
+)
+from ..utils.hashing import HashCache
+from .cache import SummaryCache, parser_fingerprint
+from .sketches import ApproxCount, Distinct, HeavyHitters, Quantiles
+
+
+def unix_sql(column: str) -> str:
+    """SQL turning a Cocoa timestamp (seconds or nanoseconds) into Unix seconds."""
+    return (f"(CASE WHEN {column} > 1e15 THEN {column} / 1e9 ELSE {column} END"
+            f" + {COCOA_OFFSET})")
+
+
+def _activity(utc_offset: int = 0, field: str = 'ts') -> Dict[str, Any]:
+    return {
+        'by_hour': HourHistogram(field, utc_offset),
+        'by_weekday': WeekdayHistogram(field, utc_offset),
+        'daily': DailySeries(field, utc_offset)
+    }
+
+
+SMS_SQL = f"""
+    SELECT
+        h.id AS contact,
+        m.is_from_me AS sent,
+        1 - m.is_from_me AS received,
+        {unix_sql('NULLIF(m.date, 0)')} AS ts
+    FROM message m
+    LEFT JOIN handle h ON m.handle_id = h.ROWID
+"""
+
+WHATSAPP_SQL = f"""
+    SELECT
+        COALESCE(c.ZPARTNERNAME, c.ZCONTACTJID) AS chat,
+        m.ZISFROMME AS sent,
+        1 - m.ZISFROMME AS received,
+        {unix_sql('NULLIF(m.ZMESSAGEDATE, 0)')} AS ts
+    FROM ZWAMESSAGE m
+    LEFT JOIN ZWACHATSESSION c ON m.ZCHATSESSION = c.Z_PK
+"""
+
+CALLS_SQL = f"""
+    SELECT
+        ZADDRESS AS number,
+        ZCALLTYPE AS call_type,
+        COALESCE(ZDURATION, 0) AS duration,
+        {unix_sql('NULLIF(ZDATE, 0)')} AS ts
+    FROM ZCALLRECORD
+"""
+
+KNOWLEDGEC_SQL = f"""
+    SELECT
+        o.ZSTREAMNAME AS stream,
+        s.ZBUNDLEID AS bundle_id,
+        o.ZSTREAMNAME LIKE '%InFocus%' AS in_focus,
+        o.ZENDDATE - o.ZSTARTDATE AS duration,
+        {unix_sql('NULLIF(o.ZSTARTDATE, 0)')} AS ts
+    FROM ZOBJECT o
+    LEFT JOIN ZSOURCE s ON o.ZSOURCE = s.Z_PK
+"""
+
+SAFARI_SQL = f"""
+    SELECT
+        hi.url AS url,
+        hi.visit_count AS visit_count,
+        {unix_sql('NULLIF(hv.visit_time, 0)')} AS ts
+    FROM history_items hi
+    LEFT JOIN history_visits hv ON hi.id = hv.history_item
+"""
+
+# Visits first: sampling by visit keeps each sampled row independent
+SAFARI_VISITS_SQL = f"""
+    SELECT
+        hi.url AS url,
+        hi.visit_count AS visit_count,
+        {unix_sql('NULLIF(hv.visit_time, 0)')} AS ts
+    FROM history_visits hv
+    JOIN history_items hi ON hi.id = hv.history_item
+"""
+
+
+def in_focus(row) -> bool:
+    """App-in-focus events with a bundle and a duration."""
+    return bool(row['in_focus'] and row['bundle_id'] and row['duration'] is not None)
+
+
+def sms(utc_offset: int = 0) -> Scan:
+    return Scan(SMS_SQL, {
+        'messages': Count(),
+        'conversations': GroupBy('contact', sums=('sent', 'received'), maxes={'last': 'ts'},
+                                 timestamps=('last',), where=lambda r: r['contact']),
+        **_activity(utc_offset)
+    })
+
+
+def whatsapp(utc_offset: int = 0) -> Scan:
+    return Scan(WHATSAPP_SQL, {
+        'messages': Count(),
+        'chats': GroupBy('chat', sums=('sent', 'received'), maxes={'last': 'ts'},
+                         timestamps=('last',), where=lambda r: r['chat']),
+        **_activity(utc_offset)
+    })
+
+
+def calls(utc_offset: int = 0) -> Scan:
+    def finish(results: Dict[str, Any]) -> Dict[str, Any]:
+        by_type = {}
+        for group in results['by_type']:
+            name = CallHistoryParser.CALL_TYPES.get(group['call_type'], 'unknown')
+            by_type[name] = {
+                'count': group['count'],
+                'total_minutes': round(group['duration'] / 60, 1),
+                'avg_seconds': round(group['duration'] / group['count'], 1)
+            }
+        results['by_type'] = by_type
+        for group in results['by_contact']:
+            group['total_minutes'] = round(group.pop('duration') / 60, 1)
+        return results
+    
+    return Scan(CALLS_SQL, {
+        'calls': Count(),
+        'by_type': GroupBy('call_type', sums=('duration',)),
+        'by_contact': GroupBy('number', sums=('duration',), maxes={'last': 'ts'},
+                              timestamps=('last',), where=lambda r: r['number']),
+        'duration_seconds': Percentiles('duration'),
+        **_activity(utc_offset)
+    }, finish)
+
+
+def knowledgec(utc_offset: int = 0) -> Scan:
+    def finish(results: Dict[str, Any]) -> Dict[str, Any]:
+        for group in results['app_usage']:
+            group['total_hours'] = round(group.pop('duration') / 3600, 2)
+        return results
+    
+    return Scan(KNOWLEDGEC_SQL, {
+        'events': Count(),
+        'streams': GroupBy('stream', where=lambda r: r['stream']),
+        'app_usage': GroupBy('bundle_id', sums=('duration',), sort='duration',
+                             where=in_focus),
+        'focus_seconds': Percentiles('duration', where=in_focus),
+        **_activity(utc_offset)
+    }, finish)
+
+
+def safari(utc_offset: int = 0) -> Scan:
+    return Scan(SAFARI_SQL, {
+        'visits': Count(where=lambda r: r['ts'] is not None),
+        'top_sites': GroupBy('url', maxes={'visit_count': 'visit_count', 'last': 'ts'},
+                             sort='visit_count', limit=100, timestamps=('last',)),
+        **_activity(utc_offset)
+    })
+
+
+def sms_approx() -> Scan:
+    return Scan(SMS_SQL, {
+        'messages': ApproxCount(),
+        'contacts': Distinct('contact'),
+        'top_contacts': HeavyHitters('contact')
+    }, table='message', key='m.ROWID')
+
+
+def whatsapp_approx() -> Scan:
+    return Scan(WHATSAPP_SQL, {
+        'messages': ApproxCount(),
+        'chats': Distinct('chat'),
+        'top_chats': HeavyHitters('chat')
+    }, table='ZWAMESSAGE', key='m.Z_PK')
+
+
+def calls_approx() -> Scan:
+    return Scan(CALLS_SQL, {
+        'calls': ApproxCount(),
+        'numbers': Distinct('number'),
+        'top_numbers': HeavyHitters('number'),
+        'duration_seconds': Quantiles('duration')
+    }, table='ZCALLRECORD', key='Z_PK')
+
+
+def knowledgec_approx() -> Scan:
+    def finish(results: Dict[str, Any]) -> Dict[str, Any]:
+        for group in results['app_usage']:
+            for field in ('estimate', 'low', 'high'):
+                group[field] = round(group[field] / 3600, 2)
+        return results
+    
+    return Scan(KNOWLEDGEC_SQL, {
+        'events': ApproxCount(),
+        'streams': HeavyHitters('stream', k=50),
+        'bundles': Distinct('bundle_id'),
+        'app_usage': HeavyHitters('bundle_id', weight='duration', where=in_focus),
+        'focus_seconds': Quantiles('duration', where=in_focus)
+    }, finish, table='ZOBJECT', key='o.Z_PK')
+
+
+def safari_approx() -> Scan:
+    return Scan(SAFARI_VISITS_SQL, {
+        'visits': ApproxCount(),
+        'urls': Distinct('url'),
+        'top_sites': HeavyHitters('url')
+    }, table='history_visits', key='hv.id')
+
+
+# Parser class name -> builder of its summary scan, given a UTC offset
+SCANS: Dict[str, Callable[[int], Scan]] = {
+    'SMSParser': sms,
+    'WhatsAppParser': whatsapp,
+    'CallHistoryParser': calls,
+    'KnowledgeCParser': knowledgec,
+    'SafariParser': safari
+}
+
+# Parser class name -> builder of its sampled, sketch-based scan
+APPROX_SCANS: Dict[str, Callable[[], Scan]] = {
+    'SMSParser': sms_approx,
+    'WhatsAppParser': whatsapp_approx,
+    'CallHistoryParser': calls_approx,
+    'KnowledgeCParser': knowledgec_approx,
+    'SafariParser': safari_approx
+}
+
+
+def summarize(parser, cache: SummaryCache | None = None,
+              refresh: bool = False, hashes: HashCache | None = None,
+              utc_offset: int = 0) -> Dict[str, Any]:
+    """
+    All summaries for a connected parser from one scan of its table.
+    
+    Hours, weekdays and days are cut at `utc_offset` seconds from UTC.
+    With a cache, a database whose content is unchanged is answered
+    without scanning; it is still hashed unless `hashes` (or the
+    parser's evidence manifest) already has its digests. `refresh`
+    forces a new scan and overwrites the cached entry.
+    """
+    kind = type(parser).__name__
+    build = SCANS.get(kind)
+    if build is None:
+        raise NotImplementedError(f"No summary scan for {kind}")
+    
+    key = parser_fingerprint(parser, hashes) if cache else None
+    # Each offset is cached separately; UTC keeps the plain name
+    entry = f"{kind}{utc_offset:+d}" if utc_offset else kind
+    if cache and not refresh:
+        summary = cache.get(key, entry)
+        if summary is not None:
+            return summary
+    
+    summary = build(utc_offset).run(parser)
+    if cache:
+        cache.put(key, entry, summary)
+    return summary
+
+
+def approximate(parser, fraction: float = 0.01, block: int = 256,
+                seed: int | None = None) -> Dict[str, Any]:
+    """
+    Triage summaries from a random sample of about `fraction` of the rows.
+    
+    Counts, distinct values (HyperLogLog), heavy hitters (Space-Saving)
+    and duration quantiles (t-digest) each come with a 95% interval.
+    Results are not cached: a sample is only worth keeping until the
+    exact summary is ready.
+    """
+    kind = type(parser).__name__
+    build = APPROX_SCANS.get(kind)
+    if build is None:
+        raise NotImplementedError(f"No approximate scan for {kind}")
+    scan = build()
+    ranges, covered = sample_ranges(parser, scan.table, fraction, block, seed)
+    summary = scan.run(parser, ranges, covered)
+    summary['sample'] = {'fraction': round(covered, 6), 'ranges': len(ranges),
+                         'block': block, 'seed': seed}
+    return summary
@@ -0,0 +1,22 @@
+"""Synthetic data generators and throughput benchmarks."""
+
+from .generators import (
+    GENERATORS,
+    generate,
+    generate_all,
+    generate_plist,
+    typedstream_string
+)
+from .runner import run_benchmarks, compare, save, load
+
+__all__ = [
+    'GENERATORS',
+    'generate',
+    'generate_all',
+    'generate_plist',
+    'typedstream_string',
+    'run_benchmarks',
+    'compare',
+    'save',
+    'load'
+]
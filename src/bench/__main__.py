@@ -0,0 +1,72 @@
+"""
+Run the benchmark suite.
+    
+    python -m src.bench --rows 100000 -o bench.json
+    python -m src.bench --rows 100000 --baseline bench.json
+"""
+
+import argparse
+import sys
+import tempfile
+
+from .generators import GENERATORS
+from .runner import EXPORTERS, compare, load, run_benchmarks, save
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='iOS Forensics benchmarks')
+    parser.add_argument('--rows', type=int, default=10000,
+                       help='Rows in the main table of each database')
+    parser.add_argument('--plist-entries', type=int, default=10000,
+                       help='Top-level keys in the generated plists')
+    parser.add_argument('--kinds', default=','.join(list(GENERATORS) + ['plist']),
+                       help='Comma-separated kinds to run')
+    parser.add_argument('--exporters', default=','.join(EXPORTERS),
+                       help='Comma-separated exporters to run')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per case')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--snapshot', choices=['memory', 'temp'],
+                       help='Open databases through a snapshot')
+    parser.add_argument('--workdir', help='Where generated files are kept and reused')
+    parser.add_argument('--no-isolate', action='store_true',
+                       help='Run cases in this process (faster, RSS is cumulative)')
+    parser.add_argument('-o', '--output', help='Write results JSON here')
+    parser.add_argument('--baseline', help='Compare against an earlier results JSON')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                       help='Relative change counted as a regression')
+    args = parser.parse_args()
+    
+    workdir = args.workdir or tempfile.mkdtemp(prefix='ios-forensics-bench-')
+    exporters = [e for e in args.exporters.split(',') if e]
+    results = run_benchmarks(
+        workdir, rows=args.rows, plist_entries=args.plist_entries, repeat=args.repeat,
+        kinds=args.kinds.split(','), exporters=exporters, seed=args.seed,
+        snapshot=args.snapshot, isolate=not args.no_isolate,
+        progress=lambda msg: print(f"  {msg}", file=sys.stderr)
+    )
+    
+    print(f"{'case':<36} {'rows':>9} {'rows/s':>12} {'p50 ms':>10} "
+          f"{'p99 ms':>10} {'peak MB':>8}")
+    for name, r in results['results'].items():
+        if 'error' in r:
+            print(f"{name:<36} ERROR {r['error']}")
+            continue
+        print(f"{name:<36} {r['rows']:>9} {r['rows_per_sec'] or 0:>12,.0f} "
+              f"{r['p50_ms']:>10.2f} {r['p99_ms']:>10.2f} {r['peak_rss_mb'] or 0:>8.1f}")
+    
+    if args.output:
+        save(results, args.output)
+        print(f"Saved to {args.output}")
+    
+    if args.baseline:
+        regressions = compare(results, load(args.baseline), args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r['case']} {r['metric']}: {r['baseline']} -> "
+                  f"{r['current']} ({r['change']:+.1%})")
+        if regressions:
+            sys.exit(1)
+        print("No regressions")
+
+
+if __name__ == '__main__':
+    main()
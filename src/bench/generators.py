@@ -0,0 +1,825 @@
+"""Synthetic iOS databases and plists with the real schemas."""
+
+from __future__ import annotations
+import plistlib
+import random
+import sqlite3
+import uuid
+from array import array
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator
+
+# 2019-01-01 .. 2024-01-01 in Cocoa seconds
+COCOA_START = 567993600
+COCOA_SPAN = 157766400
+
+BATCH = 10000
+
+WORDS = (
+    'ok', 'yes', 'no', 'thanks', 'see', 'you', 'later', 'tomorrow', 'call', 'me',
+    'where', 'are', 'meeting', 'at', 'the', 'office', 'home', 'lunch', 'dinner',
+    'running', 'late', 'sounds', 'good', 'love', 'it', 'photo', 'send', 'address',
+    'train', 'station', 'airport', 'hotel', 'tonight', 'weekend', 'plan', 'maybe'
+)
+FIRST_NAMES = (
+    'Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Jamie', 'Robin',
+    'Avery', 'Riley', 'Quinn', 'Drew', 'Kai', 'Noa', 'Lee', 'Max'
+)
+LAST_NAMES = (
+    'Smith', 'Garcia', 'Chen', 'Kowalski', 'Nakamura', 'Okafor', 'Silva',
+    'Novak', 'Ivanova', 'Haddad', 'Muller', 'Rossi', 'Larsen', 'Dubois'
+)
+DOMAINS = (
+    'www.google.com', 'mail.google.com', 'news.ycombinator.com', 'en.wikipedia.org',
+    'm.youtube.com', 'www.youtube.com', 'www.reddit.com', 'old.reddit.com',
+    'github.com', 'gist.github.com', 'www.bbc.co.uk', 'maps.apple.com',
+    'www.amazon.com', 'smile.amazon.co.uk', 'stackoverflow.com', 't.co',
+    'bit.ly', 'www.nytimes.com', 'docs.python.org', 'weather.com'
+)
+SHORTENERS = ('t.co', 'bit.ly')
+BUNDLES = (
+    'com.apple.mobilesafari', 'com.apple.MobileSMS', 'net.whatsapp.WhatsApp',
+    'com.apple.mobilemail', 'com.apple.camera', 'com.apple.Maps',
+    'com.burbn.instagram', 'com.google.ios.youtube', 'com.spotify.client',
+    'com.apple.mobilephone', 'com.apple.Preferences', 'com.toyopagroup.picaboo'
+)
+# (lat, lon) of a few cities to cluster locations around
+CITIES = (
+    (40.7128, -74.0060), (51.5074, -0.1278), (48.8566, 2.3522),
+    (35.6762, 139.6503), (52.5200, 13.4050), (37.7749, -122.4194)
+)
+
+
+def _words(rng: random.Random, lo: int = 1, hi: int = 12) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(lo, hi)))
+
+
+def _phone(rng: random.Random) -> str:
+    return f"+1555{rng.randrange(10 ** 7):07d}"
+
+
+def _cocoa(rng: random.Random) -> float:
+    return COCOA_START + rng.random() * COCOA_SPAN
+
+
+def typedstream_string(text: str) -> bytes:
+    """
+    Minimal NSAttributedString typedstream, as in message.attributedBody.
+    
+    Enough structure for decoders that locate the NSString payload the
+    way real sms.db blobs lay it out.
+    """
+    raw = text.encode('utf-8')
+    if len(raw) < 0x80:
+        length = bytes([len(raw)])
+    elif len(raw) < 0x10000:
+        length = b'\x81' + len(raw).to_bytes(2, 'little')
+    else:
+        length = b'\x82' + len(raw).to_bytes(4, 'little')
+    return (
+        b'\x04\x0bstreamtyped\x81\xe8\x03\x84\x01@\x84\x84\x84'
+        b'\x12NSAttributedString\x00\x84\x84\x08NSObject\x00\x85\x92'
+        b'\x84\x84\x84\x08NSString\x01\x94\x84\x01+' + length + raw +
+        b'\x86\x84\x02iI\x01' + bytes([min(len(text), 0x7f)]) +
+        b'\x92\x84\x84\x84\x0cNSDictionary\x00\x94\x84\x01i\x00\x86\x86'
+    )
+
+
+def _create(path: Path, schema: str) -> sqlite3.Connection:
+    if path.exists():
+        path.unlink()
+    conn = sqlite3.connect(str(path))
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -65536")
+    conn.executescript(schema)
+    return conn
+
+
+def _insert(conn: sqlite3.Connection, table: str, columns: str,
+            rows: Iterable[tuple]) -> None:
+    """Insert a generator of rows in batches, without materializing it."""
+    marks = ', '.join('?' for _ in columns.split(','))
+    sql = f"INSERT INTO {table} ({columns}) VALUES ({marks})"
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH:
+            conn.executemany(sql, batch)
+            batch = []
+    conn.executemany(sql, batch)
+
+
+SMS_SCHEMA = """
+CREATE TABLE _SqliteDatabaseProperties (key TEXT, value TEXT, UNIQUE(key));
+CREATE TABLE handle (ROWID INTEGER PRIMARY KEY AUTOINCREMENT UNIQUE, id TEXT NOT NULL,
+    country TEXT, service TEXT NOT NULL, uncanonicalized_id TEXT,
+    person_centric_id TEXT, UNIQUE (id, service));
+CREATE TABLE message (ROWID INTEGER PRIMARY KEY AUTOINCREMENT, guid TEXT UNIQUE NOT NULL,
+    text TEXT, replace INTEGER DEFAULT 0, service_center TEXT, handle_id INTEGER DEFAULT 0,
+    subject TEXT, country TEXT, attributedBody BLOB, version INTEGER DEFAULT 0,
+    type INTEGER DEFAULT 0, service TEXT, account TEXT, account_guid TEXT,
+    error INTEGER DEFAULT 0, date INTEGER, date_read INTEGER, date_delivered INTEGER,
+    is_delivered INTEGER DEFAULT 0, is_finished INTEGER DEFAULT 0,
+    is_emote INTEGER DEFAULT 0, is_from_me INTEGER DEFAULT 0, is_empty INTEGER DEFAULT 0,
+    is_delayed INTEGER DEFAULT 0, is_auto_reply INTEGER DEFAULT 0,
+    is_prepared INTEGER DEFAULT 0, is_read INTEGER DEFAULT 0,
+    is_system_message INTEGER DEFAULT 0, is_sent INTEGER DEFAULT 0,
+    has_dd_results INTEGER DEFAULT 0, is_service_message INTEGER DEFAULT 0,
+    is_forward INTEGER DEFAULT 0, was_downgraded INTEGER DEFAULT 0,
+    is_archive INTEGER DEFAULT 0, cache_has_attachments INTEGER DEFAULT 0,
+    cache_roomnames TEXT, was_data_detected INTEGER DEFAULT 0,
+    was_deduplicated INTEGER DEFAULT 0, is_audio_message INTEGER DEFAULT 0,
+    is_played INTEGER DEFAULT 0, date_played INTEGER, item_type INTEGER DEFAULT 0,
+    other_handle INTEGER DEFAULT 0, group_title TEXT, group_action_type INTEGER DEFAULT 0,
+    share_status INTEGER DEFAULT 0, share_direction INTEGER DEFAULT 0,
+    is_expirable INTEGER DEFAULT 0, expire_state INTEGER DEFAULT 0,
+    message_action_type INTEGER DEFAULT 0, message_source INTEGER DEFAULT 0,
+    associated_message_guid TEXT, associated_message_type INTEGER DEFAULT 0,
+    balloon_bundle_id TEXT, payload_data BLOB, expressive_send_style_id TEXT,
+    associated_message_range_location INTEGER DEFAULT 0,
+    associated_message_range_length INTEGER DEFAULT 0, time_expressive_send_played INTEGER,
+    message_summary_info BLOB, ck_sync_state INTEGER DEFAULT 0, ck_record_id TEXT,
+    ck_record_change_tag TEXT, destination_caller_id TEXT, sr_ck_sync_state INTEGER DEFAULT 0,
+    sr_ck_record_id TEXT, sr_ck_record_change_tag TEXT, is_corrupt INTEGER DEFAULT 0,
+    reply_to_guid TEXT, sort_id INTEGER, is_spam INTEGER DEFAULT 0,
+    has_unseen_mention INTEGER DEFAULT 0, thread_originator_guid TEXT,
+    thread_originator_part TEXT, date_retracted INTEGER DEFAULT 0,
+    date_edited INTEGER DEFAULT 0);
+CREATE TABLE chat (ROWID INTEGER PRIMARY KEY AUTOINCREMENT, guid TEXT UNIQUE NOT NULL,
+    style INTEGER, state INTEGER, account_id TEXT, properties BLOB, chat_identifier TEXT,
+    service_name TEXT, room_name TEXT, account_login TEXT, is_archived INTEGER DEFAULT 0,
+    last_addressed_handle TEXT, display_name TEXT, group_id TEXT, is_filtered INTEGER DEFAULT 0,
+    successful_query INTEGER, engram_id TEXT, server_change_token TEXT,
+    ck_sync_state INTEGER DEFAULT 0, original_group_id TEXT, last_read_message_timestamp INTEGER DEFAULT 0,
+    cloudkit_record_id TEXT, last_addressed_sim_id TEXT, is_blackholed INTEGER DEFAULT 0);
+CREATE TABLE chat_handle_join (chat_id INTEGER REFERENCES chat (ROWID) ON DELETE CASCADE,
+    handle_id INTEGER REFERENCES handle (ROWID) ON DELETE CASCADE, UNIQUE(chat_id, handle_id));
+CREATE TABLE chat_message_join (chat_id INTEGER REFERENCES chat (ROWID) ON DELETE CASCADE,
+    message_id INTEGER REFERENCES message (ROWID) ON DELETE CASCADE,
+    message_date INTEGER DEFAULT 0, PRIMARY KEY (chat_id, message_id));
+CREATE TABLE attachment (ROWID INTEGER PRIMARY KEY AUTOINCREMENT, guid TEXT UNIQUE NOT NULL,
+    created_date INTEGER DEFAULT 0, start_date INTEGER DEFAULT 0, filename TEXT, uti TEXT,
+    mime_type TEXT, transfer_state INTEGER DEFAULT 0, is_outgoing INTEGER DEFAULT 0,
+    user_info BLOB, transfer_name TEXT, total_bytes INTEGER DEFAULT 0,
+    is_sticker INTEGER DEFAULT 0, sticker_user_info BLOB, attribution_info BLOB,
+    hide_attachment INTEGER DEFAULT 0, ck_sync_state INTEGER DEFAULT 0,
+    ck_server_change_token_blob BLOB, ck_record_id TEXT, original_guid TEXT UNIQUE NOT NULL,
+    sr_ck_sync_state INTEGER DEFAULT 0, sr_ck_server_change_token_blob BLOB,
+    sr_ck_record_id TEXT, is_commsafety_sensitive INTEGER DEFAULT 0);
+CREATE TABLE message_attachment_join (message_id INTEGER REFERENCES message (ROWID) ON DELETE CASCADE,
+    attachment_id INTEGER REFERENCES attachment (ROWID) ON DELETE CASCADE,
+    UNIQUE(message_id, attachment_id));
+"""
+
+SMS_INDEXES = """
+CREATE INDEX message_idx_handle ON message(handle_id, date);
+CREATE INDEX message_idx_date ON message(date);
+CREATE INDEX chat_message_join_idx_message_id_only ON chat_message_join(message_id);
+CREATE INDEX chat_message_join_idx_message_date_id_chat_id ON chat_message_join(chat_id, message_date, message_id);
+CREATE INDEX message_attachment_join_idx_message_id ON message_attachment_join(message_id);
+CREATE INDEX chat_handle_join_idx_handle_id ON chat_handle_join(handle_id);
+"""
+
+ATTACHMENT_TYPES = (
+    ('public.jpeg', 'image/jpeg', 'jpeg'), ('public.heic', 'image/heic', 'heic'),
+    ('com.apple.quicktime-movie', 'video/quicktime', 'mov'),
+    ('com.apple.coreaudio-format', 'audio/x-caf', 'caf'),
+    ('com.adobe.pdf', 'application/pdf', 'pdf')
+)
+
+
+def generate_sms(path: str | Path, rows: int, seed: int = 1) -> Path:
+    """sms.db with `rows` messages, chats, handles and attachments."""
+    path = Path(path)
+    rng = random.Random(seed)
+    conn = _create(path, SMS_SCHEMA)
+    
+    n_handles = max(10, rows // 200)
+    n_groups = max(2, rows // 2000)
+    
+    _insert(conn, 'handle', 'id, country, service, uncanonicalized_id',
+            ((f"+1555{n:07d}", 'us', rng.choice(('iMessage', 'SMS')), None)
+             for n in rng.sample(range(10 ** 7), n_handles)))
+    
+    # One direct chat per handle, then group chats of 3-8 members
+    _insert(conn, 'chat', 'guid, style, state, chat_identifier, service_name, display_name',
+            ((f"iMessage;-;chat{i}", 45, 3, f"chat{i}", 'iMessage', None)
+             for i in range(1, n_handles + 1)))
+    _insert(conn, 'chat', 'guid, style, state, chat_identifier, service_name, display_name',
+            ((f"iMessage;+;chat{n_handles + i}", 43, 3, f"chat{n_handles + i}", 'iMessage',
+              f"{rng.choice(LAST_NAMES)} {rng.choice(('trip', 'family', 'team', 'party'))}")
+             for i in range(1, n_groups + 1)))
+    
+    members = {}
+    for chat in range(1, n_handles + 1):
+        members[chat] = [chat]
+    for chat in range(n_handles + 1, n_handles + n_groups + 1):
+        members[chat] = rng.sample(range(1, n_handles + 1), min(n_handles, rng.randint(3, 8)))
+    _insert(conn, 'chat_handle_join', 'chat_id, handle_id',
+            ((chat, h) for chat, hs in members.items() for h in hs))
+    
+    chats = list(members)
+    message_chats = array('l')
+    
+    def messages() -> Iterator[tuple]:
+        for _ in range(rows):
+            chat = rng.choice(chats)
+            message_chats.append(chat)
+            from_me = rng.random() < 0.45
+            handle = 0 if from_me and chat > n_handles else rng.choice(members[chat])
+            date = int(_cocoa(rng) * 1e9)
+            text = _words(rng)
+            body = typedstream_string(text) if rng.random() < 0.8 else None
+            if body is not None and rng.random() < 0.25:
+                # Newer iOS keeps the text only in attributedBody
+                text = None
+            yield (
+                str(uuid.UUID(int=rng.getrandbits(128))).upper(), text, handle, body,
+                'iMessage', date, date + rng.randint(1, 3600) * 10 ** 9 if not from_me else 0,
+                date + 10 ** 9, int(from_me), int(not from_me), int(from_me),
+                int(rng.random() < 0.05),
+                f"chat{chat}" if chat > n_handles else None
+            )
+    
+    _insert(conn, 'message',
+            'guid, text, handle_id, attributedBody, service, date, date_read, '
+            'date_delivered, is_from_me, is_read, is_sent, cache_has_attachments, '
+            'cache_roomnames', messages())
+    
+    _insert(conn, 'chat_message_join', 'chat_id, message_id, message_date',
+            ((chat, i + 1, 0) for i, chat in enumerate(message_chats)))
+    conn.execute(
+        "UPDATE chat_message_join SET message_date = "
+        "(SELECT date FROM message WHERE ROWID = message_id)"
+    )
+    
+    attachment_messages = [r[0] for r in conn.execute(
+        "SELECT ROWID FROM message WHERE cache_has_attachments = 1 ORDER BY ROWID"
+    )]
+    
+    def attachments() -> Iterator[tuple]:
+        for i, message in enumerate(attachment_messages, 1):
+            uti, mime, ext = rng.choice(ATTACHMENT_TYPES)
+            guid = str(uuid.UUID(int=rng.getrandbits(128))).upper()
+            yield (
+                guid, int(_cocoa(rng)), f"~/Library/SMS/Attachments/{i % 256:02x}/"
+                f"{i % 16:02d}/{guid}/IMG_{i:04d}.{ext}", uti, mime, 5,
+                f"IMG_{i:04d}.{ext}", rng.randint(10 ** 4, 5 * 10 ** 7), guid
+            )
+    
+    _insert(conn, 'attachment',
+            'guid, created_date, filename, uti, mime_type, transfer_state, '
+            'transfer_name, total_bytes, original_guid', attachments())
+    _insert(conn, 'message_attachment_join', 'message_id, attachment_id',
+            ((m, i) for i, m in enumerate(attachment_messages, 1)))
+    
+    conn.executescript(SMS_INDEXES)
+    conn.commit()
+    conn.close()
+    return path
+
+
+WHATSAPP_SCHEMA = """
+CREATE TABLE Z_PRIMARYKEY (Z_ENT INTEGER PRIMARY KEY, Z_NAME VARCHAR, Z_SUPER INTEGER, Z_MAX INTEGER);
+CREATE TABLE ZWACHATSESSION (Z_PK INTEGER PRIMARY KEY, Z_ENT INTEGER, Z_OPT INTEGER,
+    ZARCHIVED INTEGER, ZCONTACTABID INTEGER, ZFLAGS INTEGER, ZHIDDEN INTEGER,
+    ZIDENTITYVERIFICATIONEPOCH INTEGER, ZIDENTITYVERIFICATIONSTATE INTEGER,
+    ZMESSAGECOUNTER INTEGER, ZREMOVED INTEGER, ZSESSIONTYPE INTEGER, ZSPOTLIGHTSTATUS INTEGER,
+    ZUNREADCOUNT INTEGER, ZGROUPINFO INTEGER, ZLASTMESSAGE INTEGER, ZPROPERTIES INTEGER,
+    ZLASTMESSAGEDATE TIMESTAMP, ZLOCATIONSHARINGENDDATE TIMESTAMP, ZCONTACTIDENTIFIER VARCHAR,
+    ZCONTACTJID VARCHAR, ZETAG VARCHAR, ZLASTMESSAGETEXT VARCHAR, ZPARTNERNAME VARCHAR,
+    ZSAVEDINPUT VARCHAR);
+CREATE TABLE ZWAGROUPINFO (Z_PK INTEGER PRIMARY KEY, Z_ENT INTEGER, Z_OPT INTEGER,
+    ZSTATE INTEGER, ZCHATSESSION INTEGER, ZLASTMESSAGEOWNER INTEGER, ZCREATIONDATE TIMESTAMP,
+    ZSUBJECTTIMESTAMP TIMESTAMP, ZCREATORJID VARCHAR, ZOWNERJID VARCHAR, ZPICTUREID VARCHAR,
+    ZPICTUREPATH VARCHAR, ZSOURCEJID VARCHAR, ZSUBJECTOWNERJID VARCHAR);
+CREATE TABLE ZWAGROUPMEMBER (Z_PK INTEGER PRIMARY KEY, Z_ENT INTEGER, Z_OPT INTEGER,
+    ZCONTACTABID INTEGER, ZISACTIVE INTEGER, ZISADMIN INTEGER, ZSENDERKEYSENT INTEGER,
+    ZCHATSESSION INTEGER, ZRECENTGROUPCHAT INTEGER, ZCONTACTIDENTIFIER VARCHAR,
+    ZCONTACTNAME VARCHAR, ZFIRSTNAME VARCHAR, ZMEMBERJID VARCHAR);
+CREATE TABLE ZWAMESSAGE (Z_PK INTEGER PRIMARY KEY, Z_ENT INTEGER, Z_OPT INTEGER,
+    ZCHILDMESSAGESDELIVEREDCOUNT INTEGER, ZCHILDMESSAGESPLAYEDCOUNT INTEGER,
+    ZCHILDMESSAGESREADCOUNT INTEGER, ZDATAITEMVERSION INTEGER, ZDOCID INTEGER,
+    ZENCRETRYCOUNT INTEGER, ZFILTEREDRECIPIENTCOUNT INTEGER, ZFLAGS INTEGER,
+    ZGROUPEVENTTYPE INTEGER, ZISFROMME INTEGER, ZMESSAGEERRORSTATUS INTEGER,
+    ZMESSAGESTATUS INTEGER, ZMESSAGETYPE INTEGER, ZSORT INTEGER, ZSPOTLIGHTSTATUS INTEGER,
+    ZSTARRED INTEGER, ZCHATSESSION INTEGER, ZGROUPMEMBER INTEGER, ZLASTSESSION INTEGER,
+    ZMEDIAITEM INTEGER, ZMESSAGEINFO INTEGER, ZPARENTMESSAGE INTEGER,
+    ZMESSAGEDATE TIMESTAMP, ZSENTDATE TIMESTAMP, ZFROMJID VARCHAR, ZMEDIASECTIONID VARCHAR,
+    ZPHASH VARCHAR, ZPUSHNAME VARCHAR, ZSTANZAID VARCHAR, ZTEXT VARCHAR, ZTOJID VARCHAR);
+CREATE TABLE ZWAMEDIAITEM (Z_PK INTEGER PRIMARY KEY, Z_ENT INTEGER, Z_OPT INTEGER,
+    ZCLOUDSTATUS INTEGER, ZFILESIZE INTEGER, ZMEDIAORIGIN INTEGER, ZMOVIEDURATION INTEGER,
+    ZMESSAGE INTEGER, ZASPECTRATIO FLOAT, ZHACCURACY FLOAT, ZLATITUDE FLOAT, ZLONGITUDE FLOAT,
+    ZMEDIAURLDATE TIMESTAMP, ZAUTHORNAME VARCHAR, ZCOLLECTIONNAME VARCHAR,
+    ZMEDIALOCALPATH VARCHAR, ZMEDIAURL VARCHAR, ZTHUMBNAILLOCALPATH VARCHAR, ZTITLE VARCHAR,
+    ZVCARDNAME VARCHAR, ZVCARDSTRING VARCHAR, ZXMPPTHUMBPATH VARCHAR, ZMEDIAKEY BLOB,
+    ZMETADATA BLOB);
+CREATE TABLE ZWAPROFILEPUSHNAME (Z_PK INTEGER PRIMARY KEY, Z_ENT INTEGER, Z_OPT INTEGER,
+    ZJID VARCHAR, ZPUSHNAME VARCHAR);
+"""
+
+WHATSAPP_INDEXES = """
+CREATE INDEX ZWAMESSAGE_ZCHATSESSION_INDEX ON ZWAMESSAGE (ZCHATSESSION);
+CREATE INDEX ZWAMESSAGE_ZMEDIAITEM_INDEX ON ZWAMESSAGE (ZMEDIAITEM);
+CREATE INDEX ZWAMESSAGE_ZGROUPMEMBER_INDEX ON ZWAMESSAGE (ZGROUPMEMBER);
+CREATE INDEX Z_WAMessage_byChatSessionAndSort ON ZWAMESSAGE (ZCHATSESSION, ZSORT);
+CREATE INDEX ZWAMEDIAITEM_ZMESSAGE_INDEX ON ZWAMEDIAITEM (ZMESSAGE);
+CREATE INDEX ZWAGROUPMEMBER_ZCHATSESSION_INDEX ON ZWAGROUPMEMBER (ZCHATSESSION);
+"""
+
+WHATSAPP_MEDIA = {
+    1: ('jpg', 'Media/{jid}/{a}/{b}/{id}.jpg'),
+    2: ('mp4', 'Media/{jid}/{a}/{b}/{id}.mp4'),
+    3: ('opus', 'Media/{jid}/{a}/{b}/{id}.opus'),
+    8: ('pdf', 'Media/{jid}/{a}/{b}/{id}.pdf'),
+    15: ('webp', 'Media/{jid}/{a}/{b}/{id}.webp')
+}
+
+
+def _jid(rng: random.Random) -> str:
+    return f"1555{rng.randrange(10 ** 7):07d}@s.whatsapp.net"
+
+
+def generate_whatsapp(path: str | Path, rows: int, seed: int = 1) -> Path:
+    """ChatStorage.sqlite with `rows` messages, groups, members and media."""
+    path = Path(path)
+    rng = random.Random(seed)
+    conn = _create(path, WHATSAPP_SCHEMA)
+    
+    n_direct = max(5, rows // 300)
+    n_groups = max(2, rows // 3000)
+    contacts = [(_jid(rng), f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}")
+                for _ in range(max(n_direct, 20))]
+    
+    sessions = []
+    for i in range(n_direct):
+        sessions.append((i + 1, 0) + contacts[i])
+    for i in range(n_groups):
+        jid = f"1555{rng.randrange(10 ** 7):07d}-{rng.randrange(10 ** 9)}@g.us"
+        sessions.append((n_direct + i + 1, 1, jid, f"{rng.choice(WORDS).title()} group"))
+    
+    members: Dict[int, list] = {}
+    member_rows = []
+    for pk, kind, jid, _ in sessions:
+        if kind == 1:
+            chosen = rng.sample(range(len(contacts)), min(len(contacts), rng.randint(3, 12)))
+            members[pk] = []
+            for n, c in enumerate(chosen):
+                member_rows.append((1, int(n == 0), pk, contacts[c][1],
+                                    contacts[c][1].split()[0], contacts[c][0]))
+                members[pk].append(len(member_rows))
+    _insert(conn, 'ZWAGROUPMEMBER',
+            'ZISACTIVE, ZISADMIN, ZCHATSESSION, ZCONTACTNAME, ZFIRSTNAME, ZMEMBERJID',
+            member_rows)
+    _insert(conn, 'ZWAPROFILEPUSHNAME', 'ZJID, ZPUSHNAME',
+            ((jid, name.split()[0]) for jid, name in contacts))
+    
+    counters = {pk: 0 for pk, *_ in sessions}
+    last_dates = {pk: 0.0 for pk, *_ in sessions}
+    n_media = 0
+    sort = 0
+    
+    def messages() -> Iterator[tuple]:
+        nonlocal sort, n_media
+        for _ in range(rows):
+            pk, kind, jid, _ = rng.choice(sessions)
+            from_me = rng.random() < 0.45
+            date = _cocoa(rng)
+            counters[pk] += 1
+            last_dates[pk] = max(last_dates[pk], date)
+            sort += 1
+            r = rng.random()
+            msg_type = 0 if r < 0.75 else rng.choice((1, 1, 2, 3, 5, 8, 15))
+            member = None
+            if kind == 1 and not from_me:
+                member = rng.choice(members[pk])
+            media = None
+            if msg_type:
+                n_media += 1
+                media = n_media
+            yield (
+                9, 1, int(from_me), 1 if from_me else 2, msg_type, int(rng.random() < 0.01),
+                pk, member, media, date, date - rng.random() * 5, sort,
+                None if from_me else jid, jid if from_me else None,
+                _words(rng) if msg_type == 0 else None,
+                f"{rng.getrandbits(64):016X}"
+            )
+    
+    _insert(conn, 'ZWAMESSAGE',
+            'Z_ENT, Z_OPT, ZISFROMME, ZMESSAGESTATUS, ZMESSAGETYPE, ZSTARRED, '
+            'ZCHATSESSION, ZGROUPMEMBER, ZMEDIAITEM, ZMESSAGEDATE, ZSENTDATE, ZSORT, '
+            'ZFROMJID, ZTOJID, ZTEXT, ZSTANZAID', messages())
+    
+    def media() -> Iterator[tuple]:
+        rows = conn.execute("""
+            SELECT m.ZMEDIAITEM, m.ZMESSAGETYPE, m.Z_PK, c.ZCONTACTJID
+            FROM ZWAMESSAGE m JOIN ZWACHATSESSION c ON m.ZCHATSESSION = c.Z_PK
+            WHERE m.ZMEDIAITEM IS NOT NULL ORDER BY m.ZMEDIAITEM
+        """)
+        for n, msg_type, message, jid in rows:
+            lat = lon = None
+            local = None
+            if msg_type == 5:
+                city = rng.choice(CITIES)
+                lat = city[0] + rng.gauss(0, 0.05)
+                lon = city[1] + rng.gauss(0, 0.05)
+            else:
+                ext, pattern = WHATSAPP_MEDIA[msg_type]
+                local = pattern.format(jid=jid, a=n % 10, b=n % 7,
+                                       id=uuid.UUID(int=rng.getrandbits(128)))
+            yield (n, message, rng.randint(10 ** 3, 3 * 10 ** 7) if local else None,
+                   lat, lon, local, _cocoa(rng))
+    
+    # Sessions go in before media so paths can use the chat JID
+    _insert(conn, 'ZWACHATSESSION',
+            'Z_PK, Z_ENT, Z_OPT, ZSESSIONTYPE, ZCONTACTJID, ZPARTNERNAME, '
+            'ZMESSAGECOUNTER, ZLASTMESSAGEDATE, ZARCHIVED, ZUNREADCOUNT',
+            ((pk, 4, 1, kind, jid, name, counters[pk], last_dates[pk] or None, 0, 0)
+             for pk, kind, jid, name in sessions))
+    _insert(conn, 'ZWAMEDIAITEM',
+            'Z_PK, ZMESSAGE, ZFILESIZE, ZLATITUDE, ZLONGITUDE, ZMEDIALOCALPATH, ZMEDIAURLDATE',
+            media())
+    _insert(conn, 'ZWAGROUPINFO', 'ZCHATSESSION, ZCREATIONDATE, ZCREATORJID, ZOWNERJID',
+            ((pk, COCOA_START, contacts[0][0], contacts[0][0])
+             for pk, kind, _, _ in sessions if kind == 1))
+    conn.execute("UPDATE ZWACHATSESSION SET ZGROUPINFO = "
+                 "(SELECT Z_PK FROM ZWAGROUPINFO g WHERE g.ZCHATSESSION = ZWACHATSESSION.Z_PK)")
+    
+    conn.executescript(WHATSAPP_INDEXES)
+    conn.commit()
+    conn.close()
+    return path
+
+
+SAFARI_SCHEMA = """
+CREATE TABLE history_items (id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL UNIQUE,
+    domain_expansion TEXT NULL, visit_count INTEGER NOT NULL, daily_visit_counts BLOB NOT NULL,
+    weekly_visit_counts BLOB NULL, autocomplete_triggers BLOB NULL,
+    should_recompute_derived_visit_counts INTEGER NOT NULL, visit_count_score INTEGER NOT NULL,
+    status_code INTEGER NOT NULL DEFAULT 0);
+CREATE TABLE history_visits (id INTEGER PRIMARY KEY AUTOINCREMENT,
+    history_item INTEGER NOT NULL REFERENCES history_items(id) ON DELETE CASCADE,
+    visit_time REAL NOT NULL, title TEXT NULL, load_successful BOOLEAN NOT NULL DEFAULT 1,
+    http_non_get BOOLEAN NOT NULL DEFAULT 0, synthesized BOOLEAN NOT NULL DEFAULT 0,
+    redirect_source INTEGER NULL UNIQUE REFERENCES history_visits(id) ON DELETE CASCADE,
+    redirect_destination INTEGER NULL UNIQUE REFERENCES history_visits(id) ON DELETE CASCADE,
+    origin INTEGER NOT NULL DEFAULT 0, generation INTEGER NOT NULL DEFAULT 0,
+    attributes INTEGER NOT NULL DEFAULT 0, score INTEGER NOT NULL DEFAULT 0);
+CREATE TABLE history_tombstones (id INTEGER PRIMARY KEY AUTOINCREMENT,
+    start_time REAL NOT NULL, end_time REAL NOT NULL, url TEXT,
+    generation INTEGER NOT NULL DEFAULT 0);
+"""
+
+SAFARI_INDEXES = """
+CREATE INDEX history_items__domain_expansion ON history_items (domain_expansion);
+CREATE INDEX history_visits__last_visit ON history_visits (history_item, visit_time DESC);
+CREATE INDEX history_visits__origin ON history_visits (origin, generation);
+"""
+
+
+def generate_safari(path: str | Path, rows: int, seed: int = 1) -> Path:
+    """History.db with `rows` visits, including redirect chains."""
+    path = Path(path)
+    rng = random.Random(seed)
+    conn = _create(path, SAFARI_SCHEMA)
+    
+    # Real histories have far fewer URLs than visits
+    n_items = max(10, min(rows // 4, 10 ** 6))
+    urls = []
+    seen = set()
+    while len(urls) < n_items:
+        host = rng.choice(DOMAINS)
+        url = f"https://{host}/{'/'.join(rng.choice(WORDS) for _ in range(rng.randint(0, 3)))}"
+        if rng.random() < 0.3:
+            url += f"?q={rng.choice(WORDS)}&id={rng.randrange(10 ** 6)}"
+        if url not in seen:
+            seen.add(url)
+            urls.append((url, host))
+    
+    visits = array('q', bytes(8 * n_items))
+    
+    def visit_rows() -> Iterator[tuple]:
+        n = 0
+        while n < rows:
+            item = rng.randrange(n_items)
+            chain = 1
+            # Shortener hits redirect once or twice before landing
+            if urls[item][1] in SHORTENERS and n + 3 <= rows:
+                chain = rng.randint(2, 3)
+            time = _cocoa(rng)
+            for step in range(chain):
+                n += 1
+                visits[item] += 1
+                source = n - 1 if step else None
+                dest = n + 1 if step < chain - 1 else None
+                yield (item + 1, time + step * 0.2,
+                       None if dest else f"{_words(rng, 2, 6).title()}", source, dest,
+                       int(rng.random() < 0.1))
+                if step < chain - 1:
+                    item = rng.randrange(n_items)
+                    while urls[item][1] in SHORTENERS:
+                        item = rng.randrange(n_items)
+    
+    # Items first with zero counts so visit foreign keys resolve
+    _insert(conn, 'history_items',
+            'url, domain_expansion, visit_count, daily_visit_counts, '
+            'should_recompute_derived_visit_counts, visit_count_score',
+            ((url, host.split('.')[-2] if host.count('.') else host, 0, b'', 0, 0)
+             for url, host in urls))
+    _insert(conn, 'history_visits',
+            'history_item, visit_time, title, redirect_source, redirect_destination, origin',
+            visit_rows())
+    conn.executemany("UPDATE history_items SET visit_count = ?, visit_count_score = ? "
+                     "WHERE id = ?",
+                     ((v, v * 100, i + 1) for i, v in enumerate(visits) if v))
+    
+    conn.executescript(SAFARI_INDEXES)
+    conn.commit()
+    conn.close()
+    return path
+
+
+CALLS_SCHEMA = """
+CREATE TABLE Z_PRIMARYKEY (Z_ENT INTEGER PRIMARY KEY, Z_NAME VARCHAR, Z_SUPER INTEGER, Z_MAX INTEGER);
+CREATE TABLE ZCALLRECORD (Z_PK INTEGER PRIMARY KEY, Z_ENT INTEGER, Z_OPT INTEGER,
+    ZANSWERED INTEGER, ZCALL_CATEGORY INTEGER, ZCALLTYPE INTEGER, ZDISCONNECTED_CAUSE INTEGER,
+    ZFACE_TIME_DATA BLOB, ZHANDLE_TYPE INTEGER, ZNUMBER_AVAILABILITY INTEGER,
+    ZORIGINATED INTEGER, ZREAD INTEGER, ZJUNKCONFIDENCE INTEGER, ZVERIFICATIONSTATUS INTEGER,
+    ZDATE TIMESTAMP, ZDURATION FLOAT, ZADDRESS VARCHAR, ZDEVICE_ID VARCHAR,
+    ZISO_COUNTRY_CODE VARCHAR, ZLOCATION VARCHAR, ZNAME VARCHAR, ZSERVICE_PROVIDER VARCHAR,
+    ZUNIQUE_ID VARCHAR);
+"""
+
+
+def generate_calls(path: str | Path, rows: int, seed: int = 1) -> Path:
+    """CallHistory.storedata with `rows` call records."""
+    path = Path(path)
+    rng = random.Random(seed)
+    conn = _create(path, CALLS_SCHEMA)
+    numbers = [_phone(rng) for _ in range(max(10, rows // 50))]
+    
+    def calls() -> Iterator[tuple]:
+        for _ in range(rows):
+            call_type = rng.choice((1, 1, 1, 8, 16))
+            originated = int(rng.random() < 0.5)
+            answered = int(originated or rng.random() < 0.8)
+            facetime = call_type in (8, 16)
+            yield (
+                5, 1, answered, call_type, originated, 1, _cocoa(rng),
+                rng.expovariate(1 / 120) if answered else 0.0, rng.choice(numbers),
+                'us', rng.choice(('Cupertino, CA', 'New York, NY', None)),
+                'com.apple.FaceTime' if facetime else 'com.apple.Telephony',
+                b'\x00' * 16 if facetime else None,
+                str(uuid.UUID(int=rng.getrandbits(128))).upper()
+            )
+    
+    _insert(conn, 'ZCALLRECORD',
+            'Z_ENT, Z_OPT, ZANSWERED, ZCALLTYPE, ZORIGINATED, ZREAD, ZDATE, ZDURATION, '
+            'ZADDRESS, ZISO_COUNTRY_CODE, ZLOCATION, ZSERVICE_PROVIDER, ZFACE_TIME_DATA, '
+            'ZUNIQUE_ID', calls())
+    conn.execute("CREATE INDEX ZCALLRECORD_ZDATE_INDEX ON ZCALLRECORD (ZDATE)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+KNOWLEDGEC_SCHEMA = """
+CREATE TABLE Z_PRIMARYKEY (Z_ENT INTEGER PRIMARY KEY, Z_NAME VARCHAR, Z_SUPER INTEGER, Z_MAX INTEGER);
+CREATE TABLE ZSOURCE (Z_PK INTEGER PRIMARY KEY, Z_ENT INTEGER, Z_OPT INTEGER,
+    ZUSERID INTEGER, ZBUNDLEID VARCHAR, ZDEVICEID VARCHAR, ZGROUPID VARCHAR,
+    ZINTENTID VARCHAR, ZITEMID VARCHAR, ZSOURCEID VARCHAR);
+CREATE TABLE ZSTRUCTUREDMETADATA (Z_PK INTEGER PRIMARY KEY, Z_ENT INTEGER, Z_OPT INTEGER,
+    Z_DKAPPLICATIONACTIVITYMETADATAKEY__ACTIVITYTYPE VARCHAR,
+    Z_DKLOCATIONAPPLICATIONACTIVITYMETADATAKEY__LATITUDE FLOAT,
+    Z_DKLOCATIONAPPLICATIONACTIVITYMETADATAKEY__LONGITUDE FLOAT,
+    Z_DKSAFARIHISTORYMETADATAKEY__TITLE VARCHAR);
+CREATE TABLE ZOBJECT (Z_PK INTEGER PRIMARY KEY, Z_ENT INTEGER, Z_OPT INTEGER,
+    ZUUIDHASH INTEGER, ZEVENT INTEGER, ZSOURCE INTEGER, ZCATEGORYTYPE INTEGER,
+    ZINTEGERVALUE INTEGER, ZCOMPATIBILITYVERSION INTEGER, ZENDDAYOFWEEK INTEGER,
+    ZENDSECONDOFDAY INTEGER, ZHASCUSTOMMETADATA INTEGER, ZHASSTRUCTUREDMETADATA INTEGER,
+    ZSECONDSFROMGMT INTEGER, ZSHOULDSYNC INTEGER, ZSTARTDAYOFWEEK INTEGER,
+    ZSTARTSECONDOFDAY INTEGER, ZVALUECLASS INTEGER, ZVALUEINTEGER INTEGER,
+    ZVALUETYPECODE INTEGER, ZSTRUCTUREDMETADATA INTEGER, ZCREATIONDATE TIMESTAMP,
+    ZCONFIDENCE FLOAT, ZENDDATE TIMESTAMP, ZSTARTDATE TIMESTAMP, ZVALUEDOUBLE FLOAT,
+    ZUUID BLOB, ZSTREAMNAME VARCHAR, ZVALUESTRING VARCHAR, ZMETADATA BLOB);
+"""
+
+KNOWLEDGEC_INDEXES = """
+CREATE INDEX ZOBJECT_ZSOURCE_INDEX ON ZOBJECT (ZSOURCE);
+CREATE INDEX ZOBJECT_ZSTRUCTUREDMETADATA_INDEX ON ZOBJECT (ZSTRUCTUREDMETADATA);
+CREATE INDEX Z_Object_ZSTREAMNAME_ZSTARTDATE ON ZOBJECT (ZSTREAMNAME, ZSTARTDATE);
+CREATE INDEX Z_Object_ZSTREAMNAME_ZENDDATE ON ZOBJECT (ZSTREAMNAME, ZENDDATE);
+"""
+
+# (stream, share of events, typical duration in seconds)
+STREAMS = (
+    ('/app/inFocus', 0.45, 90), ('/app/usage', 0.10, 300),
+    ('/device/isLocked', 0.12, 600), ('/display/isBacklit', 0.12, 240),
+    ('/device/isPluggedIn', 0.04, 3600), ('/app/webUsage', 0.08, 120),
+    ('/notification/usage', 0.07, 0), ('/app/locationActivity', 0.02, 60)
+)
+
+
+def generate_knowledgec(path: str | Path, rows: int, seed: int = 1) -> Path:
+    """knowledgeC.db with `rows` events over the usual streams."""
+    path = Path(path)
+    rng = random.Random(seed)
+    conn = _create(path, KNOWLEDGEC_SCHEMA)
+    
+    _insert(conn, 'ZSOURCE', 'Z_ENT, Z_OPT, ZBUNDLEID, ZSOURCEID',
+            ((3, 1, b, b) for b in BUNDLES))
+    streams = [s for s, _, _ in STREAMS]
+    weights = [w for _, w, _ in STREAMS]
+    durations = {s: d for s, _, d in STREAMS}
+    locations = []
+    
+    def events() -> Iterator[tuple]:
+        for i in range(1, rows + 1):
+            stream = rng.choices(streams, weights)[0]
+            start = _cocoa(rng)
+            mean = durations[stream]
+            end = start + (rng.expovariate(1 / mean) if mean else 0)
+            source = rng.randrange(len(BUNDLES)) + 1
+            value = None
+            integer = None
+            meta = None
+            if stream in ('/app/inFocus', '/app/usage', '/app/webUsage',
+                          '/notification/usage'):
+                value = BUNDLES[source - 1]
+            elif stream == '/app/locationActivity':
+                value = BUNDLES[source - 1]
+                locations.append(i)
+                meta = len(locations)
+            else:
+                integer = int(rng.random() < 0.5)
+                source = None
+            offset = int(start) % 86400
+            yield (
+                11, 1, source, integer, meta, start, end, start, stream, value,
+                -18000, (int(start) // 86400 + 1) % 7 + 1, offset,
+                uuid.UUID(int=rng.getrandbits(128)).bytes
+            )
+    
+    _insert(conn, 'ZOBJECT',
+            'Z_ENT, Z_OPT, ZSOURCE, ZVALUEINTEGER, ZSTRUCTUREDMETADATA, ZSTARTDATE, '
+            'ZENDDATE, ZCREATIONDATE, ZSTREAMNAME, ZVALUESTRING, ZSECONDSFROMGMT, '
+            'ZSTARTDAYOFWEEK, ZSTARTSECONDOFDAY, ZUUID', events())
+    
+    def metadata() -> Iterator[tuple]:
+        for _ in locations:
+            city = rng.choice(CITIES)
+            yield (city[0] + rng.gauss(0, 0.05), city[1] + rng.gauss(0, 0.05))
+    
+    _insert(conn, 'ZSTRUCTUREDMETADATA',
+            'Z_DKLOCATIONAPPLICATIONACTIVITYMETADATAKEY__LATITUDE, '
+            'Z_DKLOCATIONAPPLICATIONACTIVITYMETADATAKEY__LONGITUDE', metadata())
+    
+    conn.executescript(KNOWLEDGEC_INDEXES)
+    conn.commit()
+    conn.close()
+    return path
+
+
+CONTACTS_SCHEMA = """
+CREATE TABLE ABPerson (ROWID INTEGER PRIMARY KEY AUTOINCREMENT, First TEXT, Last TEXT,
+    Middle TEXT, FirstPhonetic TEXT, MiddlePhonetic TEXT, LastPhonetic TEXT,
+    Organization TEXT, Department TEXT, Note TEXT, Kind INTEGER, Birthday TEXT,
+    JobTitle TEXT, Nickname TEXT, Prefix TEXT, Suffix TEXT, FirstSort TEXT, LastSort TEXT,
+    CreationDate INTEGER, ModificationDate INTEGER, CompositeNameFallback TEXT,
+    ExternalIdentifier TEXT, ExternalModificationTag TEXT, ExternalUUID TEXT,
+    StoreID INTEGER, DisplayName TEXT, ExternalRepresentation BLOB, FirstSortSection TEXT,
+    LastSortSection TEXT, FirstSortLanguageIndex INTEGER DEFAULT 2147483647,
+    LastSortLanguageIndex INTEGER DEFAULT 2147483647, PersonLink INTEGER DEFAULT -1,
+    ImageURI TEXT, IsPreferredName INTEGER DEFAULT 1, guid TEXT DEFAULT (ab_generate_guid()),
+    PhonemeData TEXT, AlternateBirthday TEXT, MapsData TEXT, FirstPronunciation TEXT,
+    MiddlePronunciation TEXT, LastPronunciation TEXT, OrganizationPhonetic TEXT,
+    OrganizationPronunciation TEXT, PreviousFamilyName TEXT, PreferredLikenessSource TEXT,
+    PreferredPersonaIdentifier TEXT, PreferredChannel TEXT, DowntimeWhitelist TEXT);
+CREATE TABLE ABMultiValue (UID INTEGER PRIMARY KEY, record_id INTEGER, property INTEGER,
+    identifier INTEGER, label INTEGER, value TEXT, guid TEXT DEFAULT (ab_generate_guid()));
+CREATE TABLE ABMultiValueLabel (value TEXT, UNIQUE(value));
+CREATE TABLE ABGroup (ROWID INTEGER PRIMARY KEY AUTOINCREMENT, Name TEXT, StoreID INTEGER);
+CREATE TABLE ABGroupMembers (UID INTEGER PRIMARY KEY, group_id INTEGER, member_type INTEGER,
+    member_id INTEGER, UNIQUE(group_id, member_type, member_id));
+"""
+
+CONTACT_LABELS = ('_$!<Mobile>!$_', '_$!<Home>!$_', '_$!<Work>!$_', 'iPhone', '_$!<Other>!$_')
+
+
+def generate_contacts(path: str | Path, rows: int, seed: int = 1) -> Path:
+    """AddressBook.sqlitedb with `rows` people, phones and emails."""
+    path = Path(path)
+    rng = random.Random(seed)
+    # The real schema defaults guid through a function the app registers
+    schema = CONTACTS_SCHEMA.replace('DEFAULT (ab_generate_guid())', '')
+    conn = _create(path, schema)
+    _insert(conn, 'ABMultiValueLabel', 'value', ((l,) for l in CONTACT_LABELS))
+    
+    def persons() -> Iterator[tuple]:
+        for _ in range(rows):
+            first = rng.choice(FIRST_NAMES)
+            last = rng.choice(LAST_NAMES)
+            created = int(_cocoa(rng))
+            yield (
+                first, last, rng.choice(('Acme Corp', 'Globex', None, None)),
+                _words(rng, 0, 6) or None, 0, created,
+                created + rng.randint(0, 10 ** 7), str(uuid.UUID(int=rng.getrandbits(128)))
+            )
+    
+    _insert(conn, 'ABPerson',
+            'First, Last, Organization, Note, Kind, CreationDate, ModificationDate, guid',
+            persons())
+    
+    people = conn.execute("SELECT ROWID, First, Last FROM ABPerson ORDER BY ROWID")
+    
+    def values() -> Iterator[tuple]:
+        for pk, first, last in people:
+            for n in range(rng.randint(1, 3)):
+                yield (pk, 3, n, rng.randint(1, len(CONTACT_LABELS)), _phone(rng))
+            if rng.random() < 0.6:
+                yield (pk, 4, 0, rng.randint(1, 3),
+                       f"{first.lower()}.{last.lower()}{pk}@example.com")
+    
+    _insert(conn, 'ABMultiValue', 'record_id, property, identifier, label, value', values())
+    conn.execute("CREATE INDEX ABMultiValueRecordIDIndex ON ABMultiValue(record_id)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _plist_value(rng: random.Random, depth: int) -> Any:
+    r = rng.random()
+    if depth > 0 and r < 0.12:
+        return {f"{rng.choice(WORDS)}{i}": _plist_value(rng, depth - 1)
+                for i in range(rng.randint(1, 6))}
+    if depth > 0 and r < 0.2:
+        return [_plist_value(rng, depth - 1) for _ in range(rng.randint(1, 6))]
+    if r < 0.45:
+        return _words(rng)
+    if r < 0.6:
+        return rng.randrange(-2 ** 40, 2 ** 40)
+    if r < 0.7:
+        return rng.random() * 1000
+    if r < 0.78:
+        return rng.random() < 0.5
+    if r < 0.88:
+        return datetime(2019, 1, 1) + timedelta(seconds=rng.randrange(COCOA_SPAN))
+    return rng.randbytes(rng.randint(4, 64)) if hasattr(rng, 'randbytes') else \
+        bytes(rng.getrandbits(8) for _ in range(16))
+
+
+def generate_plist(path: str | Path, entries: int, seed: int = 1,
+                   fmt: str = 'binary', depth: int = 4) -> Path:
+    """Plist whose root dict has `entries` keys of mixed, nested values."""
+    path = Path(path)
+    rng = random.Random(seed)
+    root = {f"key{i:08d}": _plist_value(rng, depth) for i in range(entries)}
+    root['CFBundleIdentifier'] = 'com.example.bench'
+    with open(path, 'wb') as f:
+        plistlib.dump(root, f, fmt=plistlib.FMT_BINARY if fmt == 'binary' else plistlib.FMT_XML,
+                      sort_keys=False)
+    return path
+
+
+# kind -> (generator, file name, parser type)
+GENERATORS: Dict[str, tuple] = {
+    'sms': (generate_sms, 'sms.db', 'sms'),
+    'whatsapp': (generate_whatsapp, 'ChatStorage.sqlite', 'whatsapp'),
+    'safari': (generate_safari, 'History.db', 'safari'),
+    'calls': (generate_calls, 'CallHistory.storedata', 'calls'),
+    'knowledgec': (generate_knowledgec, 'knowledgeC.db', 'knowledgec'),
+    'contacts': (generate_contacts, 'AddressBook.sqlitedb', 'contacts')
+}
+
+
+def generate(kind: str, directory: str | Path, rows: int, seed: int = 1,
+             reuse: bool = True) -> Path:
+    """
+    Generate one database into directory/<rows>/<real file name>.
+    
+    An existing file from an earlier run with the same size and seed is
+    reused unless reuse=False.
+    """
+    func, name, _ = GENERATORS[kind]
+    target = Path(directory) / f"{rows}-s{seed}" / name
+    if reuse and target.exists():
+        return target
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + '.tmp')
+    func(tmp, rows, seed)
+    tmp.replace(target)
+    return target
+
+
+def generate_all(directory: str | Path, rows: int, seed: int = 1,
+                 kinds: Iterable[str] | None = None,
+                 progress: Callable[[str], None] | None = None) -> Dict[str, Path]:
+    """Generate every (or the given) database kind."""
+    paths = {}
+    for kind in kinds or GENERATORS:
+        if progress:
+            progress(kind)
+        paths[kind] = generate(kind, directory, rows, seed)
+    return paths
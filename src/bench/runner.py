@@ -0,0 +1,282 @@
+"""Benchmark runner: time parser methods and exporters, compare to a baseline."""
+
+from __future__ import annotations
+import gc
+import inspect
+import json
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from ..parsers import PARSERS, BaseParser, PlistParser
+from ..utils import to_json, to_csv, to_html, to_ndjson, to_sqlite
+from .generators import GENERATORS, generate, generate_plist
+
+# Arguments for methods that need some
+METHOD_ARGS: Dict[str, Dict[str, Any]] = {
+    'search': {'keyword': 'an'},
+    'search_url': {'keyword': 'wiki'},
+    'count': {'table': 'sqlite_master'},
+    'schema': {'table': 'sqlite_master'}
+}
+
+# Methods that need files outside the database or only manage the parser
+SKIP_METHODS = frozenset((
+    'connect', 'close', 'execute', 'export_json', 'export_csv', 'aiter_parse',
+    'arecover', 'hash_attachments', 'hash_media', 'parse', 'iter_parse'
+))
+
+EXPORTERS: Dict[str, Callable] = {
+    'json': to_json,
+    'ndjson': to_ndjson,
+    'csv': to_csv,
+    'html': to_html,
+    'sqlite': to_sqlite
+}
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Linear-interpolated percentile of a list, q in 0..100."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    pos = (len(ordered) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident set size of this process in MB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return round(peak / (1 << 20 if sys.platform == 'darwin' else 1 << 10), 1)
+
+
+def _count(result: Any) -> int:
+    if isinstance(result, (list, tuple, dict)):
+        return len(result)
+    if isinstance(result, Iterable) and not isinstance(result, (str, bytes)):
+        return sum(1 for _ in result)
+    return 1
+
+
+def methods(parser_cls: type) -> List[str]:
+    """Public query methods of a parser that can run without extra files."""
+    names = ['iter_parse', 'parse']
+    for name, func in inspect.getmembers(parser_cls, inspect.isfunction):
+        if name.startswith('_') or name in SKIP_METHODS:
+            continue
+        required = [
+            p for p in list(inspect.signature(func).parameters.values())[1:]
+            if p.default is p.empty and p.kind not in (p.VAR_POSITIONAL, p.VAR_KEYWORD)
+        ]
+        if all(p.name in METHOD_ARGS.get(name, {}) for p in required):
+            names.append(name)
+    return names
+
+
+def _run_case(case: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one case `repeat` times; executed in a fresh process when isolated."""
+    rss_start = peak_rss_mb()
+    timings = []
+    rows = 0
+    kind = case['kind']
+    path = case['path']
+    method = case['method']
+    
+    if kind == 'plist':
+        for _ in range(case['repeat']):
+            gc.collect()
+            start = time.perf_counter()
+            with PlistParser(path) as p:
+                if method == 'export_json':
+                    with tempfile.TemporaryDirectory() as tmp:
+                        p.export_json(str(Path(tmp) / 'out.json'))
+                    rows = len(p.keys())
+                elif method == 'get':
+                    p.get('CFBundleIdentifier')
+                    rows = 1
+                elif method == 'iter_flatten':
+                    rows = sum(1 for _ in p.iter_flatten())
+                else:
+                    rows = _count(getattr(p, method)())
+            timings.append(time.perf_counter() - start)
+    else:
+        with PARSERS[case['parser']](path, snapshot=case.get('snapshot')) as p:
+            if method.startswith('export:'):
+                exporter = EXPORTERS[method.split(':', 1)[1]]
+                records = p.parse()
+                rows = len(records)
+                for _ in range(case['repeat']):
+                    with tempfile.TemporaryDirectory() as tmp:
+                        gc.collect()
+                        start = time.perf_counter()
+                        exporter(records, str(Path(tmp) / 'out'))
+                        timings.append(time.perf_counter() - start)
+            else:
+                func = getattr(p, method)
+                args = METHOD_ARGS.get(method, {})
+                for _ in range(case['repeat']):
+                    gc.collect()
+                    start = time.perf_counter()
+                    rows = _count(func(**args))
+                    timings.append(time.perf_counter() - start)
+    
+    p50 = percentile(timings, 50)
+    rss_end = peak_rss_mb()
+    return {
+        'rows': rows,
+        'runs': len(timings),
+        'rows_per_sec': round(rows / p50, 1) if p50 else None,
+        'p50_ms': round(p50 * 1000, 3),
+        'p90_ms': round(percentile(timings, 90) * 1000, 3),
+        'p99_ms': round(percentile(timings, 99) * 1000, 3),
+        'min_ms': round(min(timings) * 1000, 3),
+        'max_ms': round(max(timings) * 1000, 3),
+        'peak_rss_mb': rss_end,
+        'rss_growth_mb': round(rss_end - rss_start, 1) if rss_end is not None else None
+    }
+
+
+def build_cases(paths: Dict[str, Path], plists: Dict[str, Path], repeat: int,
+                exporters: Iterable[str] = tuple(EXPORTERS),
+                snapshot: str | None = None) -> List[Dict[str, Any]]:
+    """One case per parser method and exporter for each generated file."""
+    cases = []
+    for kind, path in paths.items():
+        parser_type = GENERATORS[kind][2]
+        base = {'kind': kind, 'parser': parser_type, 'path': str(path),
+                'repeat': repeat, 'snapshot': snapshot}
+        for method in methods(PARSERS[parser_type]):
+            cases.append(dict(base, name=f"{kind}.{method}", method=method))
+        for exporter in exporters:
+            cases.append(dict(base, name=f"{kind}.export:{exporter}",
+                              method=f"export:{exporter}"))
+    for fmt, path in plists.items():
+        for method in ('parse', 'get', 'iter_flatten', 'to_serializable', 'export_json'):
+            cases.append({'kind': 'plist', 'path': str(path), 'repeat': repeat,
+                          'name': f"plist_{fmt}.{method}", 'method': method})
+    return cases
+
+
+def run_benchmarks(workdir: str | Path, rows: int = 10000, plist_entries: int = 10000,
+                   repeat: int = 5, kinds: Iterable[str] | None = None,
+                   exporters: Iterable[str] = tuple(EXPORTERS), seed: int = 1,
+                   snapshot: str | None = None, isolate: bool = True,
+                   progress: Callable[[str], None] | None = None) -> Dict[str, Any]:
+    """
+    Generate the synthetic files and benchmark every case.
+    
+    With isolate=True each case runs in a fresh interpreter, so peak RSS
+    belongs to that case alone rather than the largest case so far.
+    """
+    workdir = Path(workdir)
+    kinds = list(kinds or GENERATORS)
+    db_kinds = [k for k in kinds if k in GENERATORS]
+    
+    paths = {}
+    for kind in db_kinds:
+        if progress:
+            progress(f"generating {kind} ({rows} rows)")
+        paths[kind] = generate(kind, workdir, rows, seed)
+    
+    plists = {}
+    if 'plist' in kinds:
+        for fmt in ('binary', 'xml'):
+            target = workdir / f"{plist_entries}-s{seed}" / f"bench-{fmt}.plist"
+            if not target.exists():
+                if progress:
+                    progress(f"generating {fmt} plist ({plist_entries} entries)")
+                target.parent.mkdir(parents=True, exist_ok=True)
+                generate_plist(target, plist_entries, seed, fmt)
+            plists[fmt] = target
+    
+    results = {}
+    for case in build_cases(paths, plists, repeat, exporters, snapshot):
+        if progress:
+            progress(case['name'])
+        try:
+            if isolate:
+                with ProcessPoolExecutor(1, mp_context=get_context('spawn')) as pool:
+                    results[case['name']] = pool.submit(_run_case, case).result()
+            else:
+                results[case['name']] = _run_case(case)
+        except Exception as e:
+            results[case['name']] = {'error': f"{type(e).__name__}: {e}"}
+    
+    return {
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'rows': rows,
+            'plist_entries': plist_entries,
+            'repeat': repeat,
+            'seed': seed,
+            'snapshot': snapshot,
+            'isolated': isolate
+        },
+        'results': results
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any],
+            threshold: float = 0.10, min_ms: float = 1.0) -> List[Dict[str, Any]]:
+    """
+    Cases that got slower or bigger than the baseline by more than threshold.
+    
+    Throughput and p50 latency are compared, and peak RSS where both
+    runs recorded it. Cases missing from either side are ignored, as
+    are timings of cases faster than min_ms, which are mostly noise.
+    """
+    regressions = []
+    for name, now in current['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if not before or 'error' in now or 'error' in before:
+            continue
+        
+        checks = [('peak_rss_mb', 1)]
+        if max(before['p50_ms'], now['p50_ms']) >= min_ms:
+            checks += [
+                ('rows_per_sec', -1),   # lower is worse
+                ('p50_ms', 1)           # higher is worse
+            ]
+        for metric, direction in checks:
+            a, b = before.get(metric), now.get(metric)
+            if not a or b is None:
+                continue
+            change = (b - a) / a
+            if change * direction > threshold:
+                regressions.append({
+                    'case': name, 'metric': metric, 'baseline': a,
+                    'current': b, 'change': round(change, 3)
+                })
+    return regressions
+
+
+def save(results: Dict[str, Any], path: str | Path) -> None:
+    """Write results as a JSON baseline."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+
+def load(path: str | Path) -> Dict[str, Any]:
+    """Read a JSON baseline."""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
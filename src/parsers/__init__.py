@@ -1,5 +1,8 @@
 """iOS forensics parsers."""
 
+from __future__ import annotations
+from pathlib import Path
+
 from .base import BaseParser
 from .sms import SMSParser
 from .whatsapp import WhatsAppParser
@@ -9,6 +12,39 @@ from .knowledgec import KnowledgeCParser
 from .contacts import ContactsParser
 from .plist import PlistParser
 
+PARSERS = {
+    'sms': SMSParser,
+    'whatsapp': WhatsAppParser,
+    'safari': SafariParser,
+    'calls': CallHistoryParser,
+    'knowledgec': KnowledgeCParser,
+    'contacts': ContactsParser,
+    'plist': PlistParser
+}
+
+
+def detect_type(path: str) -> str | None:
+    """Auto-detect database type from filename."""
+    name = Path(path).name.lower()
+    
+    if name.endswith('.plist'):
+        return 'plist'
+    if 'sms' in name:
+        return 'sms'
+    if 'chatstorage' in name:
+        return 'whatsapp'
+    if 'history' in name:
+        return 'safari'
+    if 'callhistory' in name:
+        return 'calls'
+    if 'knowledgec' in name:
+        return 'knowledgec'
+    if 'addressbook' in name:
+        return 'contacts'
+    
+    return None
+
+
 __all__ = [
     'BaseParser',
     'SMSParser',
@@ -17,5 +53,7 @@ __all__ = [
     'CallHistoryParser',
     'KnowledgeCParser',
     'ContactsParser',
-    'PlistParser'
+    'PlistParser',
+    'PARSERS',
+    'detect_type'
 ]
@@ -2,51 +2,289 @@
 
 from __future__ import annotations
 import sqlite3
+import threading
+import time
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import AsyncIterator, Callable, Iterator, List, Dict, Any, Tuple
 from abc import ABC, abstractmethod
 
-from ..utils import to_json, to_csv
+from ..utils import to_json, to_csv, to_html
+from ..utils.snapshot import Snapshot, wal_info, wal_only_rows, wal_path
+from ..utils.integrity import IntegrityCheck
+from ..utils.aio import AsyncProxy, aiter_blocking, run
+from ..utils.metrics import Metrics, TimedCursor, current
+from ..utils.progress import CancelToken, Cancelled, Progress
+from ..utils.dedup import Deduplicator, fingerprint
+from ..recovery import SQLiteCarver
+
+# Records between cancellation checks and progress updates
+PROGRESS_BATCH = 1000
+# SQLite VM instructions between calls to the cancellation handler
+PROGRESS_STEPS = 10000
+
+
+class ConnectionPool:
+    """
+    Read-only SQLite connections, one per thread.
+    
+    A thread gets its own connection the first time it asks for one, so
+    queries from different threads run concurrently (sqlite3 releases
+    the GIL while stepping) and never share a cursor. Connections are
+    opened with check_same_thread=False only so close() can release them
+    all from whichever thread owns the parser.
+    """
+    
+    def __init__(self, factory: Callable[[], sqlite3.Connection],
+                 setup: Callable[[sqlite3.Connection], None] | None = None):
+        self._factory = factory
+        self._setup = setup
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._conns: List[sqlite3.Connection] = []
+    
+    def get(self) -> sqlite3.Connection:
+        """Connection for the calling thread."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._factory()
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA query_only = 1")
+            if self._setup:
+                self._setup(conn)
+            self._local.conn = conn
+            with self._lock:
+                self._conns.append(conn)
+        return conn
+    
+    def release(self) -> None:
+        """Close the calling thread's connection, if it has one."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            if conn in self._conns:
+                self._conns.remove(conn)
+        conn.close()
+    
+    def close(self) -> None:
+        """Close every connection handed out."""
+        with self._lock:
+            conns, self._conns = self._conns, []
+            self._local = threading.local()
+        for conn in conns:
+            conn.close()
 
 
 class BaseParser(ABC):
-    """Abstract base for all database parsers."""
+    """
+    Abstract base for all database parsers.
+    
+    With snapshot='memory' or snapshot='temp' the database and its -wal
+    are copied to a private location before SQLite touches them, so the
+    most recent WAL rows are visible and the evidence is never written.
+    
+    With a manifest path, the database and its side files are hashed
+    when connecting (during the copy in snapshot mode), checked against
+    the manifest and verified again on close; see `integrity`.
+    
+    Connections are read-only and per thread (see ConnectionPool), and
+    every query gets its own cursor, so a parser can be shared between
+    threads and iter_parse() can be consumed while other methods run.
+    
+    From asyncio code use `async with parser`, `aiter_parse()` and
+    `await parser.aio.<method>()`; the blocking work runs on the shared
+    pool in utils.aio.
+    
+    With a Metrics collector (passed in, or active through
+    utils.metrics.collect() when the parser is created) every query
+    records its execute and fetch time, rows and bytes, and row to
+    record conversion is timed as the 'convert' stage.
+    
+    `progress` is called with a utils.progress.Progress (rows done, an
+    estimated total from estimate_rows(), rows per second) while
+    records are produced. Cancelling `cancel`, a CancelToken, raises
+    Cancelled between batches of records and interrupts a running query
+    through SQLite's progress handler.
+    """
     
-    def __init__(self, db_path: str):
+    # Main table behind parse(), used for deleted record recovery
+    TABLE: str | None = None
+    # Table with one row per record, for estimate_rows(), when not TABLE
+    # (a join yields a record per row of the joined table)
+    ESTIMATE_TABLE: str | None = None
+    # Record fields that identify the same row across backups (ids do not):
+    # raw full-resolution columns and GUIDs, never formatted display strings
+    FINGERPRINT: Tuple[str, ...] = ()
+    # ORDER BY for primary key order; the key is the records' 'id' field
+    KEY: str | None = None
+    # Record fields holding that key, in the same order
+    KEY_FIELDS: Tuple[str, ...] = ('id',)
+    
+    def __init__(self, db_path: str, snapshot: str | None = None,
+                 manifest: str | None = None, metrics: Metrics | None = None,
+                 progress: Callable[[Progress], None] | None = None,
+                 cancel: CancelToken | None = None):
         self.db_path = Path(db_path)
-        self._conn: sqlite3.Connection | None = None
-        self._cursor: sqlite3.Cursor | None = None
+        self.snapshot = snapshot
+        self._pool: ConnectionPool | None = None
+        self._snapshot: Snapshot | None = None
         self._data: List[Dict[str, Any]] = []
+        self.metrics = metrics if metrics is not None else current()
+        self.progress = progress
+        self.cancel = cancel
         
         if not self.db_path.exists():
             raise FileNotFoundError(f"Database not found: {db_path}")
+        
+        self.integrity: IntegrityCheck | None = None
+        if manifest:
+            self.integrity = IntegrityCheck(self.db_path, manifest)
     
     @property
-    def cursor(self) -> sqlite3.Cursor:
-        """Get cursor, raise if not connected."""
-        if self._cursor is None:
+    def conn(self) -> sqlite3.Connection:
+        """Get the calling thread's connection, raise if not connected."""
+        if self._pool is None:
             raise RuntimeError("Not connected. Use 'with' statement or call connect()")
-        return self._cursor
+        return self._pool.get()
+    
+    def release(self) -> None:
+        """Close the calling thread's connection; the next query reopens one."""
+        if self._pool is not None:
+            self._pool.release()
     
     @property
-    def conn(self) -> sqlite3.Connection:
-        """Get connection, raise if not connected."""
-        if self._conn is None:
-            raise RuntimeError("Not connected. Use 'with' statement or call connect()")
-        return self._conn
+    def cursor(self) -> sqlite3.Cursor:
+        """Get a new cursor on the calling thread's connection."""
+        return self.conn.cursor()
+    
+    def execute(self, sql: str, params=()) -> sqlite3.Cursor:
+        """Run a query on its own cursor and return the cursor."""
+        if self.cancel is not None:
+            self.cancel.check()
+        try:
+            if self.metrics is None:
+                return self.conn.execute(sql, params)
+            start = time.perf_counter()
+            cursor = self.conn.execute(sql, params)
+        except sqlite3.OperationalError:
+            self._check_interrupted()
+            raise
+        self.metrics.add_query(sql, exec_seconds=time.perf_counter() - start, calls=1)
+        return TimedCursor(cursor, self.metrics, sql)
+    
+    def _check_interrupted(self) -> None:
+        """Turn a query interrupted by the cancel token into Cancelled."""
+        if self.cancel is not None and self.cancel.cancelled:
+            raise Cancelled("Operation cancelled") from None
+    
+    def _records(self, cursor, limit: int | None = None,
+                 estimate: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Convert rows of a main-table query to records.
+        
+        Conversion is timed and progress reported only when enabled, so
+        the plain loop stays as cheap as it was.
+        """
+        if self.metrics is None and self.progress is None and self.cancel is None:
+            for row in cursor:
+                yield self._record(row)
+            return
+        
+        progress = None
+        if self.progress is not None:
+            total = self.estimate_rows() if estimate else None
+            if total is not None and limit:
+                total = min(total, limit)
+            progress = Progress(self.progress, total, label=type(self).__name__)
+        
+        timed = self.metrics is not None
+        seconds = 0.0
+        count = 0
+        clock = time.perf_counter
+        try:
+            for row in cursor:
+                if timed:
+                    start = clock()
+                    record = self._record(row)
+                    seconds += clock() - start
+                else:
+                    record = self._record(row)
+                count += 1
+                if count % PROGRESS_BATCH == 0:
+                    if self.cancel is not None:
+                        self.cancel.check()
+                    if progress is not None:
+                        progress.advance(PROGRESS_BATCH)
+                yield record
+        except sqlite3.OperationalError:
+            self._check_interrupted()
+            raise
+        finally:
+            if timed:
+                self.metrics.add('convert', seconds, rows=count)
+        
+        if progress is not None:
+            progress.advance(count % PROGRESS_BATCH)
+            progress.finish()
     
     def connect(self) -> None:
-        """Open database connection."""
-        self._conn = sqlite3.connect(str(self.db_path))
-        self._conn.row_factory = sqlite3.Row
-        self._cursor = self._conn.cursor()
+        """
+        Open database connections, or a snapshot of it.
+        
+        Under an integrity check nothing may touch the evidence directory:
+        a database with a WAL is read through a temp snapshot (opening it
+        in place would create or update its -shm), one without is opened
+        with immutable=1.
+        """
+        snapshot = self.snapshot
+        if self.integrity and not snapshot and wal_path(self.db_path).exists():
+            snapshot = 'temp'
+        if snapshot:
+            algorithms = self.integrity.algorithms if self.integrity else ()
+            self._snapshot = Snapshot(self.db_path, snapshot, algorithms)
+            if self.metrics is None:
+                self._snapshot.open()
+            else:
+                with self.metrics.timer('snapshot'):
+                    self._snapshot.open()
+            if self.integrity:
+                self.integrity.open_check(self._snapshot.digests)
+            self._pool = ConnectionPool(self._snapshot.connect, self._setup)
+        else:
+            if self.integrity:
+                self.integrity.open_check()
+            uri = self.db_path.resolve().as_uri()
+            uri += '?immutable=1' if self.integrity else '?mode=ro'
+            self._pool = ConnectionPool(
+                lambda: sqlite3.connect(uri, uri=True, check_same_thread=False),
+                self._setup
+            )
+        # Open the calling thread's connection now so errors surface here
+        self._pool.get()
+    
+    def _setup(self, conn: sqlite3.Connection) -> None:
+        """Let the cancel token interrupt queries on a new connection."""
+        if self.cancel is not None:
+            conn.set_progress_handler(self.cancel, PROGRESS_STEPS)
     
     def close(self) -> None:
-        """Close database connection."""
-        if self._conn:
-            self._conn.close()
-            self._conn = None
-            self._cursor = None
+        """Close database connections."""
+        if self._pool is None:
+            return
+        self._pool.close()
+        self._pool = None
+        if self._snapshot:
+            self._snapshot.close()
+            self._snapshot = None
+        
+        if self.integrity:
+            self.integrity.close_check()
+            if self.metrics is not None:
+                check = self.integrity
+                self.metrics.add('integrity:hash', check.hash_seconds,
+                                 nbytes=check.bytes_hashed)
+                self.metrics.add('integrity:verify', check.verify_seconds)
     
     def __enter__(self):
         self.connect()
@@ -55,30 +293,133 @@ class BaseParser(ABC):
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
     
+    async def __aenter__(self):
+        await run(self.connect)
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await run(self.close)
+    
+    @property
+    def aio(self) -> AsyncProxy:
+        """Awaitable versions of this parser's methods."""
+        return AsyncProxy(self)
+    
     @abstractmethod
+    def iter_parse(self, limit: int | None = None,
+                   order_by: str | None = None) -> Iterator[Dict[str, Any]]:
+        """Yield records one at a time from their own cursor."""
+        pass
+    
+    def iter_keyed(self) -> Iterator[Dict[str, Any]]:
+        """Records in primary key order, for merge joins such as diff()."""
+        if not self.KEY:
+            raise NotImplementedError(f"{type(self).__name__} has no primary key order")
+        return self.iter_parse(order_by=self.KEY)
+    
     def parse(self, limit: int | None = None) -> List[Dict[str, Any]]:
         """Parse database and return records."""
-        pass
+        self._data = list(self.iter_parse(limit))
+        return self._data
+    
+    def fingerprint(self, record: Dict[str, Any]) -> bytes:
+        """Content fingerprint of a record, stable across backups and runs."""
+        return fingerprint(record, self.FINGERPRINT, type(self).__name__)
+    
+    def dedup(self, seen) -> Deduplicator:
+        """
+        Filter for records of this type not yet in `seen`.
+        
+        seen is a DiskHashSet, BloomFilter or MemorySet (utils.dedup);
+        sharing one between parsers of several backups keeps only the
+        first copy of each record: `dedup(seen).filter(parser.iter_parse())`.
+        """
+        if not self.FINGERPRINT:
+            raise NotImplementedError(f"{type(self).__name__} has no fingerprint fields")
+        return Deduplicator(seen, self.FINGERPRINT, type(self).__name__)
+    
+    def aiter_parse(self, limit: int | None = None,
+                    batch: int = 500) -> AsyncIterator[Dict[str, Any]]:
+        """Async iteration over iter_parse(), read in batches off the loop."""
+        return aiter_blocking(self.iter_parse(limit), batch, self.release)
+    
+    def arecover(self, batch: int = 500) -> AsyncIterator[Dict[str, Any]]:
+        """Async iteration over recover()."""
+        return aiter_blocking(self.recover(), batch, self.release)
+    
+    def _record(self, row) -> Dict[str, Any]:
+        """Convert a row of the main table to a record."""
+        raise NotImplementedError
+    
+    def recover(self) -> Iterator[Dict[str, Any]]:
+        """
+        Carve deleted rows of the main table from free pages.
+        
+        Records have the same fields as parse() plus 'recovered': True and
+        the file 'offset' they were carved from. Columns that come from
+        joined tables are None. The connection is not needed.
+        """
+        if not self.TABLE:
+            raise NotImplementedError(f"{type(self).__name__} has no table to recover")
+        
+        with SQLiteCarver(self.db_path) as carver:
+            for _, row in carver.carve(self.TABLE):
+                try:
+                    record = self._record(row)
+                except (TypeError, ValueError, OverflowError):
+                    continue
+                record['recovered'] = True
+                record['offset'] = row['_offset']
+                yield record
     
     def tables(self) -> List[str]:
         """List all tables in database."""
-        self.cursor.execute(
+        cursor = self.execute(
             "SELECT name FROM sqlite_master WHERE type='table'"
         )
-        return [r[0] for r in self.cursor.fetchall()]
+        return [r[0] for r in cursor.fetchall()]
     
     def schema(self, table: str) -> List[Dict[str, Any]]:
         """Get table schema."""
-        self.cursor.execute(f"PRAGMA table_info({table})")
+        cursor = self.execute(f"PRAGMA table_info({table})")
         return [
             {'name': r[1], 'type': r[2], 'pk': bool(r[5])}
-            for r in self.cursor.fetchall()
+            for r in cursor.fetchall()
         ]
     
     def count(self, table: str) -> int:
         """Count rows in table."""
-        self.cursor.execute(f"SELECT COUNT(*) FROM {table}")
-        return self.cursor.fetchone()[0]
+        return self.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    
+    def estimate_rows(self, exact: bool = False) -> int | None:
+        """
+        Records parse() will produce, for progress totals.
+        
+        Rows of ESTIMATE_TABLE, or of the main table if it is not set.
+        By default the rowid range is read from the ends of the table's
+        b-tree, which is instant but overcounts deleted rows; exact=True
+        runs COUNT(*). None if there is no main table.
+        """
+        table = self.ESTIMATE_TABLE or self.TABLE
+        if not table:
+            return None
+        if exact:
+            return self.count(table)
+        try:
+            row = self.execute(
+                f"SELECT max(ROWID) - min(ROWID) + 1 FROM {table}"
+            ).fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return row[0] or 0
+    
+    def wal_info(self) -> Dict[str, Any]:
+        """Get size and frame count of the database's WAL file."""
+        return wal_info(self.db_path)
+    
+    def wal_rows(self) -> Dict[str, int]:
+        """Count rows per table that exist only in the WAL."""
+        return wal_only_rows(self.conn, self.db_path)
     
     def export_json(self, path: str) -> None:
         """Export parsed data to JSON."""
@@ -88,6 +429,10 @@ class BaseParser(ABC):
         """Export parsed data to CSV."""
         to_csv(self._data, path)
     
+    def export_html(self, path: str, title: str | None = None) -> None:
+        """Export parsed data to a paginated HTML report."""
+        to_html(self._data, path, title or type(self).__name__.replace('Parser', ''))
+    
     @property
     def data(self) -> List[Dict[str, Any]]:
         """Get parsed data."""
@@ -1,7 +1,7 @@
 """Call history parser (CallHistory.storedata)."""
 
 from __future__ import annotations
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
 
 from .base import BaseParser
 from ..utils import cocoa_to_datetime, format_ts
@@ -14,6 +14,10 @@ class CallHistoryParser(BaseParser):
     Path: /private/var/mobile/Library/CallHistoryDB/CallHistory.storedata
     """
     
+    TABLE = 'ZCALLRECORD'
+    KEY = 'Z_PK'
+    FINGERPRINT = ('unique_id', 'number', 'date_raw', 'duration', 'outgoing')
+    
     CALL_TYPES = {
         1: 'incoming',
         2: 'outgoing',
@@ -24,11 +28,13 @@ class CallHistoryParser(BaseParser):
         7: 'missed_facetime'
     }
     
-    def parse(self, limit: int | None = None) -> List[Dict[str, Any]]:
+    def iter_parse(self, limit: int | None = None,
+                   order_by: str | None = None) -> Iterator[Dict[str, Any]]:
         """Extract call records."""
-        query = """
+        query = f"""
             SELECT 
                 Z_PK,
+                ZUNIQUE_ID,
                 ZADDRESS,
                 ZDATE,
                 ZDURATION,
@@ -37,32 +43,32 @@ class CallHistoryParser(BaseParser):
                 ZORIGINATED,
                 ZFACE_TIME_DATA
             FROM ZCALLRECORD
-            ORDER BY ZDATE DESC
+            ORDER BY {order_by or 'ZDATE DESC'}
         """
         
         if limit:
             query += f" LIMIT {limit}"
         
-        self.cursor.execute(query)
-        self._data = []
-        
-        for row in self.cursor.fetchall():
-            call_type = self.CALL_TYPES.get(row['ZCALLTYPE'], 'unknown')
-            duration = row['ZDURATION'] or 0
-            
-            self._data.append({
-                'id': row['Z_PK'],
-                'number': row['ZADDRESS'],
-                'date': format_ts(cocoa_to_datetime(row['ZDATE'])),
-                'duration': int(duration),
-                'duration_fmt': f"{int(duration//60)}:{int(duration%60):02d}",
-                'type': call_type,
-                'answered': bool(row['ZANSWERED']),
-                'outgoing': bool(row['ZORIGINATED']),
-                'facetime': row['ZFACE_TIME_DATA'] is not None
-            })
+        yield from self._records(self.execute(query), limit)
+    
+    def _record(self, row) -> Dict[str, Any]:
+        """Convert a call row to a record."""
+        call_type = self.CALL_TYPES.get(row['ZCALLTYPE'], 'unknown')
+        duration = row['ZDURATION'] or 0
         
-        return self._data
+        return {
+            'id': row['Z_PK'],
+            'unique_id': row['ZUNIQUE_ID'],
+            'number': row['ZADDRESS'],
+            'date': format_ts(cocoa_to_datetime(row['ZDATE'])),
+            'date_raw': row['ZDATE'],
+            'duration': int(duration),
+            'duration_fmt': f"{int(duration//60)}:{int(duration%60):02d}",
+            'type': call_type,
+            'answered': bool(row['ZANSWERED']),
+            'outgoing': bool(row['ZORIGINATED']),
+            'facetime': row['ZFACE_TIME_DATA'] is not None
+        }
     
     def stats(self) -> Dict[str, Any]:
         """Get call statistics."""
@@ -76,10 +82,10 @@ class CallHistoryParser(BaseParser):
             GROUP BY ZCALLTYPE
         """
         
-        self.cursor.execute(query)
+        cursor = self.execute(query)
         results = {}
         
-        for row in self.cursor.fetchall():
+        for row in cursor.fetchall():
             call_type = self.CALL_TYPES.get(row['ZCALLTYPE'], 'unknown')
             results[call_type] = {
                 'count': row['cnt'],
@@ -103,10 +109,10 @@ class CallHistoryParser(BaseParser):
             ORDER BY total DESC
         """
         
-        self.cursor.execute(query)
+        cursor = self.execute(query)
         results = []
         
-        for row in self.cursor.fetchall():
+        for row in cursor.fetchall():
             results.append({
                 'number': row['ZADDRESS'],
                 'total_calls': row['total'],
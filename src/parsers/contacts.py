@@ -1,7 +1,7 @@
 """Contacts database parser (AddressBook.sqlitedb)."""
 
 from __future__ import annotations
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
 
 from .base import BaseParser
 from ..utils import cocoa_to_datetime, format_ts
@@ -14,9 +14,15 @@ class ContactsParser(BaseParser):
     Path: /private/var/mobile/Library/AddressBook/AddressBook.sqlitedb
     """
     
-    def parse(self, limit: int | None = None) -> List[Dict[str, Any]]:
+    TABLE = 'ABPerson'
+    KEY = 'p.ROWID'
+    # AddressBook dates are whole seconds and not every version has a GUID
+    FINGERPRINT = ('first_name', 'last_name', 'organization', 'created_raw')
+    
+    def iter_parse(self, limit: int | None = None,
+                   order_by: str | None = None) -> Iterator[Dict[str, Any]]:
         """Extract contacts."""
-        query = """
+        query = f"""
             SELECT 
                 p.ROWID,
                 p.First,
@@ -26,27 +32,26 @@ class ContactsParser(BaseParser):
                 p.CreationDate,
                 p.ModificationDate
             FROM ABPerson p
-            ORDER BY p.Last, p.First
+            ORDER BY {order_by or 'p.Last, p.First'}
         """
         
         if limit:
             query += f" LIMIT {limit}"
         
-        self.cursor.execute(query)
-        self._data = []
-        
-        for row in self.cursor.fetchall():
-            self._data.append({
-                'id': row['ROWID'],
-                'first_name': row['First'],
-                'last_name': row['Last'],
-                'organization': row['Organization'],
-                'note': row['Note'],
-                'created': format_ts(cocoa_to_datetime(row['CreationDate'])),
-                'modified': format_ts(cocoa_to_datetime(row['ModificationDate']))
-            })
-        
-        return self._data
+        yield from self._records(self.execute(query), limit)
+    
+    def _record(self, row) -> Dict[str, Any]:
+        """Convert an ABPerson row to a record."""
+        return {
+            'id': row['ROWID'],
+            'first_name': row['First'],
+            'last_name': row['Last'],
+            'organization': row['Organization'],
+            'note': row['Note'],
+            'created': format_ts(cocoa_to_datetime(row['CreationDate'])),
+            'created_raw': row['CreationDate'],
+            'modified': format_ts(cocoa_to_datetime(row['ModificationDate']))
+        }
     
     def phones(self) -> List[Dict[str, Any]]:
         """Get all phone numbers with contact info."""
@@ -63,10 +68,10 @@ class ContactsParser(BaseParser):
             ORDER BY p.Last, p.First
         """
         
-        self.cursor.execute(query)
+        cursor = self.execute(query)
         results = []
         
-        for row in self.cursor.fetchall():
+        for row in cursor.fetchall():
             name = ' '.join(filter(None, [row['First'], row['Last']]))
             results.append({
                 'id': row['ROWID'],
@@ -92,10 +97,10 @@ class ContactsParser(BaseParser):
             ORDER BY p.Last, p.First
         """
         
-        self.cursor.execute(query)
+        cursor = self.execute(query)
         results = []
         
-        for row in self.cursor.fetchall():
+        for row in cursor.fetchall():
             name = ' '.join(filter(None, [row['First'], row['Last']]))
             results.append({
                 'id': row['ROWID'],
@@ -120,10 +125,10 @@ class ContactsParser(BaseParser):
         """
         
         pattern = f'%{keyword}%'
-        self.cursor.execute(query, (pattern, pattern, pattern))
+        cursor = self.execute(query, (pattern, pattern, pattern))
         results = []
         
-        for row in self.cursor.fetchall():
+        for row in cursor.fetchall():
             name = ' '.join(filter(None, [row['First'], row['Last']]))
             results.append({
                 'id': row['ROWID'],
@@ -1,10 +1,10 @@
 """KnowledgeC system activity parser (knowledgeC.db)."""
 
 from __future__ import annotations
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
 
 from .base import BaseParser
-from ..utils import cocoa_to_datetime, format_ts
+from ..utils import cocoa_to_datetime, cocoa_to_unix, format_ts
 
 
 class KnowledgeCParser(BaseParser):
@@ -16,11 +16,17 @@ class KnowledgeCParser(BaseParser):
     Contains app usage, device states, locations, and user activities.
     """
     
-    def parse(self, limit: int | None = None) -> List[Dict[str, Any]]:
+    TABLE = 'ZOBJECT'
+    KEY = 'o.Z_PK'
+    FINGERPRINT = ('uuid', 'stream', 'start_raw', 'end_raw', 'bundle_id', 'value')
+    
+    def iter_parse(self, limit: int | None = None,
+                   order_by: str | None = None) -> Iterator[Dict[str, Any]]:
         """Extract activity events."""
-        query = """
+        query = f"""
             SELECT 
                 o.Z_PK,
+                o.ZUUID,
                 o.ZSTREAMNAME,
                 o.ZCREATIONDATE,
                 o.ZSTARTDATE,
@@ -29,35 +35,37 @@ class KnowledgeCParser(BaseParser):
                 s.ZBUNDLEID
             FROM ZOBJECT o
             LEFT JOIN ZSOURCE s ON o.ZSOURCE = s.Z_PK
-            ORDER BY o.ZCREATIONDATE DESC
+            ORDER BY {order_by or 'o.ZCREATIONDATE DESC'}
         """
         
         if limit:
             query += f" LIMIT {limit}"
         
-        self.cursor.execute(query)
-        self._data = []
+        yield from self._records(self.execute(query), limit)
+    
+    def _record(self, row) -> Dict[str, Any]:
+        """Convert a ZOBJECT row to a record."""
+        start = cocoa_to_datetime(row['ZSTARTDATE'])
+        end = cocoa_to_datetime(row['ZENDDATE'])
+        duration = None
         
-        for row in self.cursor.fetchall():
-            start = cocoa_to_datetime(row['ZSTARTDATE'])
-            end = cocoa_to_datetime(row['ZENDDATE'])
-            duration = None
-            
-            if start and end:
-                duration = int((end - start).total_seconds())
-            
-            self._data.append({
-                'id': row['Z_PK'],
-                'stream': row['ZSTREAMNAME'],
-                'created': format_ts(cocoa_to_datetime(row['ZCREATIONDATE'])),
-                'start': format_ts(start),
-                'end': format_ts(end),
-                'duration_sec': duration,
-                'bundle_id': row['ZBUNDLEID'],
-                'value': row['ZVALUESTRING']
-            })
+        if start and end:
+            duration = int((end - start).total_seconds())
         
-        return self._data
+        uuid = row['ZUUID']
+        return {
+            'id': row['Z_PK'],
+            'uuid': uuid.hex() if isinstance(uuid, bytes) else uuid,
+            'stream': row['ZSTREAMNAME'],
+            'created': format_ts(cocoa_to_datetime(row['ZCREATIONDATE'])),
+            'start': format_ts(start),
+            'end': format_ts(end),
+            'start_raw': row['ZSTARTDATE'],
+            'end_raw': row['ZENDDATE'],
+            'duration_sec': duration,
+            'bundle_id': row['ZBUNDLEID'],
+            'value': row['ZVALUESTRING']
+        }
     
     def app_usage(self) -> List[Dict[str, Any]]:
         """Get app usage statistics."""
@@ -76,10 +84,10 @@ class KnowledgeCParser(BaseParser):
             ORDER BY total_sec DESC
         """
         
-        self.cursor.execute(query)
+        cursor = self.execute(query)
         results = []
         
-        for row in self.cursor.fetchall():
+        for row in cursor.fetchall():
             total = row['total_sec'] or 0
             results.append({
                 'bundle_id': row['ZBUNDLEID'],
@@ -101,12 +109,39 @@ class KnowledgeCParser(BaseParser):
             ORDER BY cnt DESC
         """
         
-        self.cursor.execute(query)
+        cursor = self.execute(query)
         return [
             {'stream': row['ZSTREAMNAME'], 'count': row['cnt']}
-            for row in self.cursor.fetchall()
+            for row in cursor.fetchall()
         ]
     
+    def iter_locations(self) -> Iterator[Dict[str, Any]]:
+        """Events carrying a location in their structured metadata."""
+        query = """
+            SELECT 
+                o.Z_PK,
+                o.ZSTARTDATE,
+                o.ZSTREAMNAME,
+                COALESCE(o.ZVALUESTRING, s.ZBUNDLEID) AS bundle,
+                md.Z_DKLOCATIONAPPLICATIONACTIVITYMETADATAKEY__LATITUDE AS lat,
+                md.Z_DKLOCATIONAPPLICATIONACTIVITYMETADATAKEY__LONGITUDE AS lon
+            FROM ZOBJECT o
+            JOIN ZSTRUCTUREDMETADATA md ON o.ZSTRUCTUREDMETADATA = md.Z_PK
+            LEFT JOIN ZSOURCE s ON o.ZSOURCE = s.Z_PK
+            WHERE md.Z_DKLOCATIONAPPLICATIONACTIVITYMETADATAKEY__LATITUDE IS NOT NULL
+                AND md.Z_DKLOCATIONAPPLICATIONACTIVITYMETADATAKEY__LONGITUDE IS NOT NULL
+        """
+        
+        for row in self.execute(query):
+            yield {
+                'id': row['Z_PK'],
+                'lat': row['lat'],
+                'lon': row['lon'],
+                'date': format_ts(cocoa_to_datetime(row['ZSTARTDATE'])),
+                'timestamp': cocoa_to_unix(row['ZSTARTDATE']),
+                'label': row['bundle'] or row['ZSTREAMNAME']
+            }
+    
     def device_states(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Get device lock/unlock events."""
         query = """
@@ -122,10 +157,10 @@ class KnowledgeCParser(BaseParser):
             LIMIT ?
         """
         
-        self.cursor.execute(query, (limit,))
+        cursor = self.execute(query, (limit,))
         results = []
         
-        for row in self.cursor.fetchall():
+        for row in cursor.fetchall():
             results.append({
                 'id': row['Z_PK'],
                 'stream': row['ZSTREAMNAME'],
@@ -1,34 +1,363 @@
 """Apple Property List (plist) parser."""
 
 from __future__ import annotations
-import json
+import fnmatch
+import mmap
+import os
 import plistlib
+import struct
+import weakref
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from datetime import datetime
-from typing import Dict, Any, List
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Any, List, Iterable, Iterator, Tuple
 
+from ..utils.compress import open_output
+from ..utils.export import write_json
+from ..utils.integrity import IntegrityCheck
+from ..utils.metrics import Metrics, current
+from ..utils.nskeyedarchiver import CycleRef, decode_archive, is_keyed_archive
 
-class PlistParser:
-    """Parser for binary and XML plist files."""
+BPLIST_MAGIC = b'bplist00'
+PLIST_EPOCH = datetime(2001, 1, 1)
+
+# get() default marker, distinct from a stored None
+_MISSING = object()
+
+
+class LazyDict(Mapping):
+    """Binary plist dictionary whose values are decoded on access."""
+    
+    # Object reference it was decoded from, set by BinaryPlistReader.object()
+    ref: int | None = None
+    
+    def __init__(self, reader: BinaryPlistReader, key_refs: tuple, value_refs: tuple):
+        self._reader = reader
+        self._key_refs = key_refs
+        self._value_refs = value_refs
+        self._index: Dict[str, int] | None = None
+        self._scans = 0
+    
+    def _keys(self) -> Dict[str, int]:
+        if self._index is None:
+            key = self._reader.key
+            self._index = {key(ref): i for i, ref in enumerate(self._key_refs)}
+        return self._index
+    
+    def __getitem__(self, key: str) -> Any:
+        if self._index is None and self._scans < 8:
+            # Point lookups compare raw key bytes instead of building the index
+            self._scans += 1
+            i = self._reader.find_key(self._key_refs, key)
+        else:
+            i = self._keys().get(key)
+        if i is None:
+            raise KeyError(key)
+        return self._reader.object(self._value_refs[i])
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys())
+    
+    def __len__(self) -> int:
+        return len(self._key_refs)
+    
+    def __repr__(self) -> str:
+        return f"<LazyDict {len(self)} keys>"
+
+
+class LazyArray(Sequence):
+    """Binary plist array whose items are decoded on access."""
+    
+    ref: int | None = None
+    
+    def __init__(self, reader: BinaryPlistReader, refs: tuple):
+        self._reader = reader
+        self._refs = refs
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._reader.object(ref) for ref in self._refs[index]]
+        return self._reader.object(self._refs[index])
+    
+    def __len__(self) -> int:
+        return len(self._refs)
+    
+    def __repr__(self) -> str:
+        return f"<LazyArray {len(self)} items>"
+
+
+class BinaryPlistReader:
+    """
+    Lazy, memory-mapped bplist00 reader.
+    
+    Only the trailer is read up front. Objects are decoded from the
+    mapping when first reached and memoized by object reference, so a
+    point lookup touches a handful of objects whatever the file size.
+    Dictionaries and arrays come back as LazyDict / LazyArray.
+    
+    They read from the mapping, so they only work until close(). The
+    mapping and file are also released when the reader is garbage
+    collected, so a reader that is never closed does not leak them.
+    """
     
     def __init__(self, path: str):
         self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        try:
+            self._buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Not a binary plist: {path}")
+        self._finalizer = weakref.finalize(self, _release, self._buf, self._file)
+        
+        if self._buf[:8] != BPLIST_MAGIC or len(self._buf) < 40:
+            self.close()
+            raise ValueError(f"Not a binary plist: {path}")
+        
+        (self._offset_size, self._ref_size, self._num_objects,
+         self._top, table) = struct.unpack('>6xBBQQQ', self._buf[-32:])
+        self._offset_table = table
+        self._cache: Dict[int, Any] = {}
+    
+    def close(self) -> None:
+        """Unmap the file."""
+        self._buf = None
+        self._finalizer()
+    
+    @property
+    def root(self) -> Any:
+        """Top-level object."""
+        return self.object(self._top)
+    
+    def object(self, ref: int) -> Any:
+        """Decode an object by reference, memoized."""
+        try:
+            return self._cache[ref]
+        except KeyError:
+            pass
+        
+        value = self._decode(self._offset(ref))
+        if isinstance(value, (LazyDict, LazyArray)):
+            value.ref = ref
+        self._cache[ref] = value
+        return value
+    
+    def key(self, ref: int) -> Any:
+        """Decode a dictionary key without memoizing it."""
+        if ref in self._cache:
+            return self._cache[ref]
+        return self._decode(self._offset(ref))
+    
+    def find_key(self, refs: tuple, key: str) -> int | None:
+        """Index of the ref whose string equals key, by raw byte comparison."""
+        if not isinstance(key, str):
+            return None
+        
+        buf = self._buf
+        try:
+            ascii_key = key.encode('ascii')
+        except UnicodeEncodeError:
+            ascii_key = None
+        utf16_key = key.encode('utf-16be')
+        
+        for i, ref in enumerate(refs):
+            pos = self._offset(ref)
+            marker = buf[pos]
+            high = marker & 0xF0
+            if high == 0x50 and ascii_key is not None:
+                raw = ascii_key
+            elif high == 0x60:
+                raw = utf16_key
+            else:
+                continue
+            count, start = self._count(pos, marker & 0x0F)
+            if count * (2 if high == 0x60 else 1) == len(raw) and \
+                    buf[start:start + len(raw)] == raw:
+                return i
+        
+        return None
+    
+    def _offset(self, ref: int) -> int:
+        if self._buf is None:
+            raise ValueError(f"Plist reader is closed: {self.path}")
+        if ref >= self._num_objects:
+            raise ValueError(f"Invalid object reference: {ref}")
+        pos = self._offset_table + ref * self._offset_size
+        return int.from_bytes(self._buf[pos:pos + self._offset_size], 'big')
+    
+    def _count(self, pos: int, low: int):
+        """Object length from the marker, or from a following int."""
+        if low != 0xF:
+            return low, pos + 1
+        marker = self._buf[pos + 1]
+        size = 1 << (marker & 0xF)
+        return int.from_bytes(self._buf[pos + 2:pos + 2 + size], 'big'), pos + 2 + size
+    
+    def _refs(self, pos: int, count: int) -> tuple:
+        size = self._ref_size
+        buf = self._buf
+        if size == 1:
+            return tuple(buf[pos:pos + count])
+        fmt = {2: 'H', 4: 'I', 8: 'Q'}.get(size)
+        if fmt:
+            return struct.unpack_from(f'>{count}{fmt}', buf, pos)
+        return tuple(
+            int.from_bytes(buf[p:p + size], 'big')
+            for p in range(pos, pos + count * size, size)
+        )
+    
+    def _decode(self, pos: int) -> Any:
+        buf = self._buf
+        marker = buf[pos]
+        high, low = marker & 0xF0, marker & 0x0F
+        
+        if marker == 0x00:
+            return None
+        if marker == 0x08:
+            return False
+        if marker == 0x09:
+            return True
+        if high == 0x10:
+            size = 1 << low
+            return int.from_bytes(buf[pos + 1:pos + 1 + size], 'big', signed=low >= 3)
+        if marker == 0x22:
+            return struct.unpack_from('>f', buf, pos + 1)[0]
+        if marker == 0x23:
+            return struct.unpack_from('>d', buf, pos + 1)[0]
+        if marker == 0x33:
+            seconds = struct.unpack_from('>d', buf, pos + 1)[0]
+            return PLIST_EPOCH + timedelta(seconds=seconds)
+        if high == 0x80:
+            return plistlib.UID(int.from_bytes(buf[pos + 1:pos + 2 + low], 'big'))
+        
+        count, start = self._count(pos, low)
+        
+        if high == 0x40:
+            return bytes(buf[start:start + count])
+        if high == 0x50:
+            return buf[start:start + count].decode('ascii')
+        if high == 0x60:
+            return buf[start:start + count * 2].decode('utf-16be')
+        if high == 0x70:
+            return buf[start:start + count].decode('utf-8')
+        if high in (0xA0, 0xC0):
+            return LazyArray(self, self._refs(start, count))
+        if high == 0xD0:
+            keys = self._refs(start, count)
+            values = self._refs(start + count * self._ref_size, count)
+            return LazyDict(self, keys, values)
+        
+        raise ValueError(f"Unknown bplist marker 0x{marker:02x} at {pos}")
+
+
+def _release(buf: mmap.mmap, file) -> None:
+    """Unmap and close a reader's file; its finalizer."""
+    buf.close()
+    file.close()
+
+
+class PlistParser:
+    """
+    Parser for binary and XML plist files.
+    
+    parse() loads the whole file. Before that, get(), keys() and iteration
+    read binary plists lazily through BinaryPlistReader. Inside a `with`
+    block the reader stays open and get() can return LazyDict / LazyArray
+    views, valid until the block ends. Outside one, every call returns
+    plain dicts and lists and releases the reader before returning.
+    
+    With a manifest path the file is hashed on construction and verified
+    again by close(). With a Metrics collector, loading and JSON export
+    are timed as the 'plist:parse' and 'export:plist-json' stages.
+    """
+    
+    def __init__(self, path: str, manifest: str | None = None,
+                 metrics: Metrics | None = None):
+        self.path = Path(path)
+        self.metrics = metrics if metrics is not None else current()
         self._data: Dict[str, Any] = {}
+        self._parsed = False
+        self._reader: BinaryPlistReader | None = None
+        self._entered = False
+        # Generators still walking the reader outside a with block
+        self._walks = 0
         
         if not self.path.exists():
             raise FileNotFoundError(f"Plist not found: {path}")
+        
+        self.integrity: IntegrityCheck | None = None
+        if manifest:
+            self.integrity = IntegrityCheck(self.path, manifest, sqlite=False)
+            self.integrity.open_check()
     
     def parse(self) -> Dict[str, Any]:
         """Parse plist file."""
+        if self.metrics is not None:
+            with self.metrics.timer('plist:parse') as counts:
+                counts['bytes'] = self.path.stat().st_size
+                return self._load()
+        return self._load()
+    
+    def _load(self) -> Dict[str, Any]:
         with open(self.path, 'rb') as f:
             self._data = plistlib.load(f)
+        self._parsed = True
         return self._data
     
+    def is_binary(self) -> bool:
+        """Check for the bplist00 header."""
+        with open(self.path, 'rb') as f:
+            return f.read(8) == BPLIST_MAGIC
+    
+    def close(self) -> None:
+        """Release the lazy reader and verify integrity, if enabled."""
+        self._release()
+        if self.integrity and not self.integrity.closed:
+            self.integrity.close_check()
+            if self.metrics is not None:
+                self.metrics.add('integrity:hash', self.integrity.hash_seconds,
+                                 nbytes=self.integrity.bytes_hashed)
+                self.metrics.add('integrity:verify', self.integrity.verify_seconds)
+    
+    def __enter__(self):
+        self._entered = True
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._entered = False
+        self.close()
+    
+    def _release(self) -> None:
+        if self._reader:
+            self._reader.close()
+            self._reader = None
+    
+    def _done(self, value: Any = None) -> Any:
+        """Outside a with block, materialise value and release the reader."""
+        if self._entered:
+            return value
+        value = _materialize(value)
+        if not self._walks:
+            self._release()
+        return value
+    
     @property
     def data(self) -> Dict[str, Any]:
         """Get parsed data."""
         return self._data
     
+    @property
+    def root(self) -> Any:
+        """Parsed data, or a lazy view of a binary plist not yet parsed."""
+        if self._parsed:
+            return self._data
+        if self._reader is None:
+            if not self.is_binary():
+                return self.parse()
+            self._reader = BinaryPlistReader(str(self.path))
+        return self._reader.root
+    
     def get(self, key_path: str, default: Any = None) -> Any:
         """
         Get nested value using dot notation.
@@ -36,87 +365,314 @@ class PlistParser:
         Example: get('root.child.value')
         """
         keys = key_path.split('.')
-        current = self._data
+        current = self.root
         
         for key in keys:
-            if isinstance(current, dict) and key in current:
-                current = current[key]
-            elif isinstance(current, list):
+            if isinstance(current, Mapping):
+                # One lookup: a LazyDict may scan its keys for each
+                current = current.get(key, _MISSING)
+                if current is _MISSING:
+                    return self._done(default)
+            elif isinstance(current, (list, LazyArray)):
                 try:
                     current = current[int(key)]
                 except (ValueError, IndexError):
-                    return default
+                    return self._done(default)
             else:
-                return default
+                return self._done(default)
         
-        return current
+        return self._done(current)
     
     def keys(self) -> List[str]:
         """Get top-level keys."""
-        if isinstance(self._data, dict):
-            return list(self._data.keys())
-        return []
+        root = self.root
+        keys = list(root.keys()) if isinstance(root, Mapping) else []
+        return self._done(keys)
+    
+    def __iter__(self) -> Iterator[Any]:
+        """Iterate top-level keys, or items of a top-level array."""
+        if self._entered:
+            return iter(self.root)
+        return iter(self._done(self.root))
+    
+    def is_archive(self) -> bool:
+        """Check whether the plist is an NSKeyedArchiver archive."""
+        return self._done(is_keyed_archive(self.root))
+    
+    def unarchive(self) -> Any:
+        """Decode an NSKeyedArchiver plist into plain objects."""
+        return self._done(decode_archive(self.root))
+    
+    def _plain(self) -> Any:
+        """Parsed (or lazily read) data, with keyed archives resolved."""
+        data = self.root
+        if is_keyed_archive(data):
+            return decode_archive(data)
+        return data
+    
+    def iter_flatten(self, sep: str = '.') -> Iterator[Tuple[Any, Any]]:
+        """
+        Yield (path, value) for every leaf, depth first.
+        
+        Walks with an explicit stack, so deep plists cannot hit the
+        recursion limit and nothing is accumulated along the way. A
+        container met again inside itself yields a CycleRef leaf.
+        """
+        self._walks += 1
+        try:
+            root = self._plain()
+            if not _is_container(root):
+                yield '', root
+                return
+            
+            stack = [_children(root, '', sep)]
+            active = [id(root)]
+            while stack:
+                for path, value in stack[-1]:
+                    if _is_container(value):
+                        if id(value) not in active:
+                            stack.append(_children(value, path, sep))
+                            active.append(id(value))
+                            break
+                        value = _cycle(value)
+                    yield path, value
+                else:
+                    stack.pop()
+                    active.pop()
+        finally:
+            self._walks -= 1
+            self._done()
     
     def flatten(self, sep: str = '.') -> Dict[str, Any]:
         """Flatten nested plist to single-level dict."""
-        result = {}
-        
-        def _flatten(obj, prefix=''):
-            if isinstance(obj, dict):
-                for k, v in obj.items():
-                    new_key = f"{prefix}{sep}{k}" if prefix else k
-                    _flatten(v, new_key)
-            elif isinstance(obj, list):
-                for i, v in enumerate(obj):
-                    _flatten(v, f"{prefix}{sep}{i}")
-            else:
-                result[prefix] = obj
-        
-        _flatten(self._data)
-        return result
+        return dict(self.iter_flatten(sep))
     
     def to_serializable(self) -> Dict[str, Any]:
         """Convert to JSON-serializable dict."""
-        def _convert(obj):
-            if isinstance(obj, dict):
-                return {k: _convert(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [_convert(v) for v in obj]
-            elif isinstance(obj, datetime):
-                return obj.isoformat()
-            elif isinstance(obj, bytes):
-                return obj.hex()
-            return obj
-        
-        return _convert(self._data)
+        return self._done(_to_serializable(self._plain()))
     
     def export_json(self, path: str) -> None:
-        """Export plist as JSON."""
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(self.to_serializable(), f, ensure_ascii=False, indent=2)
+        """Export plist as JSON, written while the plist is walked."""
+        if self.metrics is None:
+            self._write_json(path)
+            return
+        with self.metrics.timer('export:plist-json') as counts:
+            self._write_json(path)
+            counts['bytes'] = os.path.getsize(path)
     
-    def print_structure(self, max_depth: int = 3) -> None:
-        """Print plist structure."""
-        def _print(obj, depth=0, prefix=''):
-            indent = '  ' * depth
+    def _write_json(self, path: str) -> None:
+        with open_output(path) as f:
+            write_json(self._plain(), f, indent=2, default=_serializable)
+        self._done()
+    
+    def iter_structure(self, max_depth: int = 3) -> Iterator[str]:
+        """Yield the lines of the structure outline."""
+        self._walks += 1
+        try:
+            yield from self._structure(max_depth)
+        finally:
+            self._walks -= 1
+            self._done()
+    
+    def _structure(self, max_depth: int) -> Iterator[str]:
+        stack: List[tuple] = []
+        visit: tuple | None = (self._plain(), 0)
+        
+        while True:
+            if visit is not None:
+                obj, depth = visit
+                visit = None
+                indent = '  ' * depth
+                
+                if depth > max_depth:
+                    yield f"{indent}..."
+                elif isinstance(obj, Mapping):
+                    stack.append((iter(obj.items()), depth))
+                elif _is_container(obj):
+                    yield f"{indent}[{len(obj)} items]"
+                    if len(obj):
+                        visit = (obj[0], depth + 1)
+                        continue
             
-            if depth > max_depth:
-                print(f"{indent}...")
-                return
+            while stack and visit is None:
+                items, depth = stack[-1]
+                indent = '  ' * depth
+                for k, v in items:
+                    if _is_container(v):
+                        kind = 'dict' if isinstance(v, Mapping) else 'list'
+                        yield f"{indent}{k}: ({kind})"
+                        visit = (v, depth + 1)
+                        break
+                    val = str(v)[:40]
+                    if len(str(v)) > 40:
+                        val += '...'
+                    yield f"{indent}{k}: {val}"
+                else:
+                    stack.pop()
             
-            if isinstance(obj, dict):
-                for k, v in obj.items():
-                    if isinstance(v, (dict, list)):
-                        print(f"{indent}{k}: ({type(v).__name__})")
-                        _print(v, depth + 1)
-                    else:
-                        val = str(v)[:40]
-                        if len(str(v)) > 40:
-                            val += '...'
-                        print(f"{indent}{k}: {val}")
-            elif isinstance(obj, list):
-                print(f"{indent}[{len(obj)} items]")
-                if obj:
-                    _print(obj[0], depth + 1)
-        
-        _print(self._data)
+            if visit is None:
+                return
+    
+    def print_structure(self, max_depth: int = 3) -> None:
+        """Print plist structure."""
+        for line in self.iter_structure(max_depth):
+            print(line)
+
+
+def _is_container(obj: Any) -> bool:
+    return isinstance(obj, (Mapping, list, tuple, LazyArray))
+
+
+def _children(obj: Any, prefix: Any, sep: str) -> Iterator[Tuple[Any, Any]]:
+    """(path, value) pairs for the direct children of a container."""
+    if isinstance(obj, Mapping):
+        for k, v in obj.items():
+            yield (f"{prefix}{sep}{k}" if prefix else k), v
+    else:
+        for i, v in enumerate(obj):
+            yield f"{prefix}{sep}{i}", v
+
+
+def _cycle(obj: Any) -> CycleRef:
+    """Placeholder for a container reached again from inside itself."""
+    return CycleRef(getattr(obj, 'ref', None))
+
+
+def _copy(obj: Any, is_node: Callable[[Any], bool],
+          leaf: Callable[[Any], Any]) -> Any:
+    """
+    Plain dict / list copy of the nodes of a plist value, without recursion.
+    
+    Depth first, so the containers on the current path are known: one
+    that contains itself (possible in a crafted binary plist, whose
+    objects are shared by reference) is cut with a CycleRef, as
+    KeyedArchive does for keyed archives, instead of copied forever.
+    """
+    result = {} if isinstance(obj, Mapping) else []
+    stack = [(_entries(obj), result, obj)]
+    active = {id(obj)}
+    
+    while stack:
+        items, dst, src = stack[-1]
+        for k, v in items:
+            child = None
+            if not is_node(v):
+                v = leaf(v)
+            elif id(v) in active:
+                v = _cycle(v)
+            else:
+                child, v = v, ({} if isinstance(v, Mapping) else [])
+            if isinstance(dst, list):
+                dst.append(v)
+            else:
+                dst[k] = v
+            if child is not None:
+                stack.append((_entries(child), v, child))
+                active.add(id(child))
+                break
+        else:
+            stack.pop()
+            active.discard(id(src))
+    
+    return result
+
+
+def _entries(obj: Any) -> Iterator[Tuple[Any, Any]]:
+    return iter(obj.items()) if isinstance(obj, Mapping) else enumerate(obj)
+
+
+def _is_lazy(obj: Any) -> bool:
+    return isinstance(obj, (LazyDict, LazyArray))
+
+
+def _materialize(obj: Any) -> Any:
+    """Plain dict / list copy of a lazy plist value."""
+    if not _is_lazy(obj):
+        return obj
+    return _copy(obj, _is_lazy, lambda v: v)
+
+
+def _serializable(obj: Any) -> Any:
+    """JSON-friendly form of a plist scalar."""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, bytes):
+        return obj.hex()
+    if isinstance(obj, plistlib.UID):
+        return obj.data
+    return obj
+
+
+def _to_serializable(obj: Any) -> Any:
+    """JSON-friendly copy of a plist value, built without recursion."""
+    if not _is_container(obj):
+        return _serializable(obj)
+    return _copy(obj, _is_container, _serializable)
+
+
+def _parse_one(job: Tuple[str, Tuple[str, ...] | None]) -> Dict[str, Any]:
+    """Worker for parse_tree: one file to a picklable result."""
+    path, keys = job
+    result: Dict[str, Any] = {'path': path, 'error': None, 'data': None}
+    
+    try:
+        with PlistParser(path) as p:
+            if keys:
+                result['data'] = {k: _to_serializable(p.get(k)) for k in keys}
+            else:
+                result['data'] = p.to_serializable()
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    
+    return result
+
+
+def find_plists(root: str, pattern: str = '*.plist') -> Iterator[str]:
+    """Walk a directory tree and yield plist file paths."""
+    for dirpath, _, filenames in os.walk(root):
+        for name in fnmatch.filter(filenames, pattern):
+            yield os.path.join(dirpath, name)
+
+
+def parse_tree(root: str, keys: List[str] | None = None, workers: int | None = None,
+               pattern: str = '*.plist', chunksize: int = 32) -> Iterator[Dict[str, Any]]:
+    """
+    Parse every plist under a directory in a process pool.
+    
+    Yields {'path', 'error', 'data'} per file, in walk order. With keys,
+    data holds only those dot-notation key paths, read lazily from
+    binary plists, so a sweep does not decode whole files.
+    """
+    jobs = ((path, tuple(keys) if keys else None) for path in find_plists(root, pattern))
+    
+    if workers == 1:
+        yield from map(_parse_one, jobs)
+        return
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_parse_one, jobs, chunksize=chunksize)
+
+
+def tree_rows(results: Iterable[Dict[str, Any]], sep: str = '.') -> Iterator[Dict[str, Any]]:
+    """Flatten parse_tree results to (path, key, value) rows."""
+    for result in results:
+        if result['error']:
+            yield {'path': result['path'], 'key': None, 'value': None,
+                   'error': result['error']}
+            continue
+        
+        data = result['data']
+        if not _is_container(data):
+            yield {'path': result['path'], 'key': '', 'value': data, 'error': None}
+            continue
+        
+        stack = [_children(data, '', sep)]
+        while stack:
+            for key, value in stack[-1]:
+                if _is_container(value) and value:
+                    stack.append(_children(value, key, sep))
+                    break
+                yield {'path': result['path'], 'key': str(key), 'value': value,
+                       'error': None}
+            else:
+                stack.pop()
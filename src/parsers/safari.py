@@ -1,10 +1,11 @@
 """Safari browser history parser (History.db)."""
 
 from __future__ import annotations
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
 
 from .base import BaseParser
 from ..utils import cocoa_to_datetime, format_ts
+from ..utils.urls import register_url_functions
 
 
 class SafariParser(BaseParser):
@@ -12,38 +13,54 @@ class SafariParser(BaseParser):
     Parser for Safari browsing history.
     
     Path: /private/var/mobile/Library/Safari/History.db
+    
+    Queries can call url_host(url) and url_domain(url), memoised Python
+    functions registered on each connection.
     """
     
-    def parse(self, limit: int | None = None) -> List[Dict[str, Any]]:
+    TABLE = 'history_items'
+    # parse() yields a record per visit
+    ESTIMATE_TABLE = 'history_visits'
+    KEY = 'hi.id, hv.id'
+    KEY_FIELDS = ('id', 'visit_id')
+    FINGERPRINT = ('url', 'visit_time_raw')
+    
+    def iter_parse(self, limit: int | None = None,
+                   order_by: str | None = None) -> Iterator[Dict[str, Any]]:
         """Extract browsing history."""
-        query = """
+        query = f"""
             SELECT 
                 hi.id,
+                hv.id AS visit_id,
                 hi.url,
                 hv.title,
                 hv.visit_time,
                 hi.visit_count
             FROM history_items hi
             LEFT JOIN history_visits hv ON hi.id = hv.history_item
-            ORDER BY hv.visit_time DESC
+            ORDER BY {order_by or 'hv.visit_time DESC'}
         """
         
         if limit:
             query += f" LIMIT {limit}"
         
-        self.cursor.execute(query)
-        self._data = []
-        
-        for row in self.cursor.fetchall():
-            self._data.append({
-                'id': row['id'],
-                'url': row['url'],
-                'title': row['title'],
-                'visit_time': format_ts(cocoa_to_datetime(row['visit_time'])),
-                'visit_count': row['visit_count']
-            })
-        
-        return self._data
+        yield from self._records(self.execute(query), limit)
+    
+    def _setup(self, conn) -> None:
+        super()._setup(conn)
+        register_url_functions(conn)
+    
+    def _record(self, row) -> Dict[str, Any]:
+        """Convert a history row to a record."""
+        return {
+            'id': row['id'],
+            'visit_id': row['visit_id'],
+            'url': row['url'],
+            'title': row['title'],
+            'visit_time': format_ts(cocoa_to_datetime(row['visit_time'])),
+            'visit_time_raw': row['visit_time'],
+            'visit_count': row['visit_count']
+        }
     
     def top_sites(self, n: int = 20) -> List[Dict[str, Any]]:
         """Get most visited sites."""
@@ -59,10 +76,10 @@ class SafariParser(BaseParser):
             LIMIT ?
         """
         
-        self.cursor.execute(query, (n,))
+        cursor = self.execute(query, (n,))
         results = []
         
-        for row in self.cursor.fetchall():
+        for row in cursor.fetchall():
             results.append({
                 'url': row['url'],
                 'visits': row['visit_count'],
@@ -76,6 +93,7 @@ class SafariParser(BaseParser):
         query = """
             SELECT 
                 hi.id,
+                hv.id AS visit_id,
                 hi.url,
                 hv.title,
                 hv.visit_time,
@@ -86,16 +104,26 @@ class SafariParser(BaseParser):
             ORDER BY hv.visit_time DESC
         """
         
-        self.cursor.execute(query, (f'%{keyword}%',))
-        results = []
-        
-        for row in self.cursor.fetchall():
-            results.append({
-                'id': row['id'],
-                'url': row['url'],
-                'title': row['title'],
-                'visit_time': format_ts(cocoa_to_datetime(row['visit_time'])),
-                'visit_count': row['visit_count']
-            })
+        cursor = self.execute(query, (f'%{keyword}%',))
+        return list(self._records(cursor, estimate=False))
+    
+    def domain_visits(self, domain: str) -> List[Dict[str, Any]]:
+        """Visits to a registrable domain (any subdomain), newest first."""
+        query = """
+            SELECT 
+                hi.id,
+                hv.id AS visit_id,
+                hi.url,
+                hv.title,
+                hv.visit_time,
+                hi.visit_count
+            FROM history_items hi
+            JOIN history_visits hv ON hi.id = hv.history_item
+            WHERE hi.id IN (
+                SELECT id FROM history_items WHERE url_domain(url) = ?
+            )
+            ORDER BY hv.visit_time DESC
+        """
         
-        return results
+        cursor = self.execute(query, (domain.lower(),))
+        return list(self._records(cursor, estimate=False))
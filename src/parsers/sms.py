@@ -1,10 +1,14 @@
 """SMS/iMessage database parser (sms.db)."""
 
 from __future__ import annotations
-from typing import List, Dict, Any
+from itertools import groupby
+from operator import itemgetter
+from typing import List, Dict, Any, Iterator, Tuple
 
 from .base import BaseParser
-from ..utils import cocoa_to_datetime, format_ts
+from ..utils import attributed_text, cocoa_to_datetime, format_ts
+from ..utils.hashing import HashCache
+from ..utils.media import MediaResolver, hash_records
 
 
 class SMSParser(BaseParser):
@@ -14,12 +18,46 @@ class SMSParser(BaseParser):
     Path: /private/var/mobile/Library/SMS/sms.db
     """
     
-    def parse(self, limit: int | None = None) -> List[Dict[str, Any]]:
+    TABLE = 'message'
+    KEY = 'm.ROWID'
+    FINGERPRINT = ('guid', 'handle', 'date_raw', 'is_from_me', 'text')
+    
+    # Group chats; 45 is a one-to-one conversation
+    GROUP_STYLE = 43
+    
+    # Messages of chats in (chat_id, message_date, message_id) order, the
+    # key of chat_message_join's date index. attributedBody is only read
+    # when there is no plain text to fall back from.
+    THREAD_SQL = """
+        SELECT
+            cmj.chat_id,
+            cmj.message_date,
+            m.ROWID,
+            m.text,
+            CASE WHEN m.text IS NULL THEN m.attributedBody END AS attributedBody,
+            m.date,
+            m.date_read,
+            m.is_from_me,
+            m.handle_id,
+            m.service,
+            m.cache_has_attachments
+        FROM chat_message_join cmj
+        JOIN message m ON m.ROWID = cmj.message_id
+    """
+    
+    _handles: Dict[int, str] | None = None
+    _chats: Dict[int, Dict[str, Any]] | None = None
+    _attachments: Dict[int, List[Dict[str, Any]]] | None = None
+    
+    def iter_parse(self, limit: int | None = None,
+                   order_by: str | None = None) -> Iterator[Dict[str, Any]]:
         """Extract messages from database."""
-        query = """
+        query = f"""
             SELECT 
                 m.ROWID,
+                m.guid,
                 m.text,
+                CASE WHEN m.text IS NULL THEN m.attributedBody END AS attributedBody,
                 m.date,
                 m.date_read,
                 m.date_delivered,
@@ -31,32 +69,153 @@ class SMSParser(BaseParser):
                 m.cache_has_attachments
             FROM message m
             LEFT JOIN handle h ON m.handle_id = h.ROWID
-            ORDER BY m.date DESC
+            ORDER BY {order_by or 'm.date DESC'}
         """
         
         if limit:
             query += f" LIMIT {limit}"
         
-        self.cursor.execute(query)
-        self._data = []
+        yield from self._records(self.execute(query), limit)
+    
+    def _record(self, row) -> Dict[str, Any]:
+        """Convert a message row to a record."""
+        ts = row['date'] / 1e9 if row['date'] else None
+        ts_read = row['date_read'] / 1e9 if row['date_read'] else None
+        
+        return {
+            'id': row['ROWID'],
+            'guid': row['guid'],
+            'text': row['text'] if row['text'] is not None else attributed_text(row['attributedBody']),
+            'date': format_ts(cocoa_to_datetime(ts)),
+            'date_raw': row['date'],
+            'date_read': format_ts(cocoa_to_datetime(ts_read)),
+            'is_from_me': bool(row['is_from_me']),
+            'is_read': bool(row['is_read']),
+            'handle': row['handle'],
+            'service': row['service'],
+            'has_attachment': bool(row['cache_has_attachments'])
+        }
+    
+    def _load_maps(self) -> None:
+        """Read handles, chats with participants and attachments once per connection."""
+        if self._handles is not None:
+            return
+        handles = {row['ROWID']: row['id'] for row in self.execute("SELECT ROWID, id FROM handle")}
         
-        for row in self.cursor.fetchall():
-            ts = row['date'] / 1e9 if row['date'] else None
-            ts_read = row['date_read'] / 1e9 if row['date_read'] else None
-            
-            self._data.append({
+        chats = {}
+        for row in self.execute("""
+            SELECT ROWID, guid, style, chat_identifier, service_name, display_name
+            FROM chat
+        """):
+            chats[row['ROWID']] = {
                 'id': row['ROWID'],
-                'text': row['text'],
-                'date': format_ts(cocoa_to_datetime(ts)),
-                'date_read': format_ts(cocoa_to_datetime(ts_read)),
-                'is_from_me': bool(row['is_from_me']),
-                'is_read': bool(row['is_read']),
-                'handle': row['handle'],
-                'service': row['service'],
-                'has_attachment': bool(row['cache_has_attachments'])
+                'guid': row['guid'],
+                'identifier': row['chat_identifier'],
+                'name': row['display_name'] or row['chat_identifier'],
+                'service': row['service_name'],
+                'is_group': row['style'] == self.GROUP_STYLE,
+                'participants': []
+            }
+        for row in self.execute("SELECT chat_id, handle_id FROM chat_handle_join ORDER BY chat_id"):
+            chat = chats.get(row['chat_id'])
+            if chat is not None and row['handle_id'] in handles:
+                chat['participants'].append(handles[row['handle_id']])
+        
+        attachments: Dict[int, List[Dict[str, Any]]] = {}
+        for row in self.execute("""
+            SELECT
+                maj.message_id,
+                a.ROWID,
+                a.filename,
+                a.transfer_name,
+                a.mime_type,
+                a.total_bytes
+            FROM message_attachment_join maj
+            JOIN attachment a ON a.ROWID = maj.attachment_id
+        """):
+            attachments.setdefault(row['message_id'], []).append({
+                'id': row['ROWID'],
+                'filename': row['filename'],
+                'name': row['transfer_name'],
+                'mime_type': row['mime_type'],
+                'size_bytes': row['total_bytes']
             })
         
-        return self._data
+        self._handles, self._chats, self._attachments = handles, chats, attachments
+    
+    def _thread_record(self, row) -> Dict[str, Any]:
+        """Convert a THREAD_SQL row, resolving sender and attachments from the maps."""
+        ts = row['date'] / 1e9 if row['date'] else None
+        ts_read = row['date_read'] / 1e9 if row['date_read'] else None
+        text = row['text']
+        if text is None:
+            text = attributed_text(row['attributedBody'])
+        return {
+            'id': row['ROWID'],
+            'chat_id': row['chat_id'],
+            'sort': (row['message_date'], row['ROWID']),
+            'text': text,
+            'date': format_ts(cocoa_to_datetime(ts)),
+            'date_read': format_ts(cocoa_to_datetime(ts_read)),
+            'is_from_me': bool(row['is_from_me']),
+            'sender': 'me' if row['is_from_me'] else self._handles.get(row['handle_id']),
+            'service': row['service'],
+            'attachments': (self._attachments.get(row['ROWID'], [])
+                            if row['cache_has_attachments'] else [])
+        }
+    
+    def chats(self) -> List[Dict[str, Any]]:
+        """Chats with their participants' handles."""
+        self._load_maps()
+        return list(self._chats.values())
+    
+    def iter_thread(self, chat_id: int, after: Tuple[int, int] | None = None,
+                    limit: int | None = None) -> Iterator[Dict[str, Any]]:
+        """
+        Messages of one chat in date order.
+        
+        `after` is the 'sort' value of the last message already seen, so
+        the next page starts with an index seek instead of an OFFSET scan.
+        """
+        self._load_maps()
+        query = self.THREAD_SQL + " WHERE cmj.chat_id = ?"
+        params: tuple = (chat_id,)
+        if after is not None:
+            query += " AND (cmj.message_date, cmj.message_id) > (?, ?)"
+            params += tuple(after)
+        query += " ORDER BY cmj.message_date, cmj.message_id"
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        for row in self.execute(query, params):
+            yield self._thread_record(row)
+    
+    def thread_page(self, chat_id: int, size: int = 100,
+                    after: Tuple[int, int] | None = None) -> Dict[str, Any]:
+        """One page of a chat; pass 'next' back as `after` for the following page."""
+        messages = list(self.iter_thread(chat_id, after, size))
+        return {
+            'chat': self._chats.get(chat_id),
+            'messages': messages,
+            'next': messages[-1]['sort'] if len(messages) == size else None
+        }
+    
+    def iter_threads(self) -> Iterator[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """
+        (chat, messages) for every chat, each in date order.
+        
+        One scan of chat_message_join's (chat_id, message_date,
+        message_id) index; only the current chat's messages are held.
+        """
+        self._load_maps()
+        query = self.THREAD_SQL + " ORDER BY cmj.chat_id, cmj.message_date, cmj.message_id"
+        records = (self._thread_record(row) for row in self.execute(query))
+        for chat_id, messages in groupby(records, key=itemgetter('chat_id')):
+            yield self._chats.get(chat_id) or {'id': chat_id}, list(messages)
+    
+    def close(self) -> None:
+        """Close connections and drop the lookup maps with them."""
+        super().close()
+        self._handles = self._chats = self._attachments = None
     
     def conversations(self) -> List[Dict[str, Any]]:
         """Get conversation summary per contact."""
@@ -73,10 +232,10 @@ class SMSParser(BaseParser):
             ORDER BY last_date DESC
         """
         
-        self.cursor.execute(query)
+        cursor = self.execute(query)
         results = []
         
-        for row in self.cursor.fetchall():
+        for row in cursor.fetchall():
             ts = row['last_date'] / 1e9 if row['last_date'] else None
             results.append({
                 'contact': row['contact'],
@@ -104,10 +263,10 @@ class SMSParser(BaseParser):
         if limit:
             query += f" LIMIT {limit}"
         
-        self.cursor.execute(query)
+        cursor = self.execute(query)
         results = []
         
-        for row in self.cursor.fetchall():
+        for row in cursor.fetchall():
             ts = row['created_date'] / 1e9 if row['created_date'] else None
             results.append({
                 'id': row['ROWID'],
@@ -118,3 +277,15 @@ class SMSParser(BaseParser):
             })
         
         return results
+    
+    def hash_attachments(self, root: str, limit: int | None = None,
+                         workers: int | None = None,
+                         cache: HashCache | None = None) -> List[Dict[str, Any]]:
+        """
+        Get attachments with resolved paths and SHA-256/MD5 digests.
+        
+        root is the file system extraction the database came from.
+        """
+        resolver = MediaResolver(root)
+        return hash_records(self.attachments(limit), 'filename', resolver,
+                            workers=workers, cache=cache)
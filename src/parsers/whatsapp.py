@@ -1,10 +1,14 @@
 """WhatsApp ChatStorage.sqlite parser."""
 
 from __future__ import annotations
-from typing import List, Dict, Any
+from itertools import groupby
+from operator import itemgetter
+from typing import List, Dict, Any, Iterator, Tuple
 
 from .base import BaseParser
-from ..utils import cocoa_to_datetime, format_ts
+from ..utils import cocoa_to_datetime, cocoa_to_unix, format_ts
+from ..utils.hashing import HashCache
+from ..utils.media import MediaResolver, hash_records
 
 
 class WhatsAppParser(BaseParser):
@@ -14,6 +18,10 @@ class WhatsAppParser(BaseParser):
     Path: /private/var/mobile/Containers/Data/Application/[UUID]/Documents/ChatStorage.sqlite
     """
     
+    TABLE = 'ZWAMESSAGE'
+    KEY = 'm.Z_PK'
+    FINGERPRINT = ('stanza_id', 'contact_jid', 'date_raw', 'is_from_me', 'text')
+    
     MSG_TYPES = {
         0: 'text',
         1: 'image',
@@ -26,11 +34,35 @@ class WhatsAppParser(BaseParser):
         15: 'sticker'
     }
     
-    def parse(self, limit: int | None = None) -> List[Dict[str, Any]]:
+    # Messages in one chat, in conversation order; ZSORT is the key of
+    # the (ZCHATSESSION, ZSORT) index, so paging on it never sorts
+    CHAT_MESSAGES_SQL = """
+        SELECT
+            Z_PK,
+            ZCHATSESSION,
+            ZSORT,
+            ZTEXT,
+            ZMESSAGEDATE,
+            ZISFROMME,
+            ZMESSAGETYPE,
+            ZSTARRED,
+            ZGROUPMEMBER,
+            ZMEDIAITEM,
+            ZPUSHNAME
+        FROM ZWAMESSAGE
+    """
+    
+    _members: Dict[int, Tuple[str, str | None]] | None = None
+    _media: Dict[int, Dict[str, Any]] | None = None
+    _sessions: Dict[int, Dict[str, Any]] | None = None
+    
+    def iter_parse(self, limit: int | None = None,
+                   order_by: str | None = None) -> Iterator[Dict[str, Any]]:
         """Extract messages from database."""
-        query = """
+        query = f"""
             SELECT 
                 m.Z_PK,
+                m.ZSTANZAID,
                 m.ZTEXT,
                 m.ZMESSAGEDATE,
                 m.ZISFROMME,
@@ -40,30 +72,28 @@ class WhatsAppParser(BaseParser):
                 c.ZCONTACTJID
             FROM ZWAMESSAGE m
             LEFT JOIN ZWACHATSESSION c ON m.ZCHATSESSION = c.Z_PK
-            ORDER BY m.ZMESSAGEDATE DESC
+            ORDER BY {order_by or 'm.ZMESSAGEDATE DESC'}
         """
         
         if limit:
             query += f" LIMIT {limit}"
         
-        self.cursor.execute(query)
-        self._data = []
-        
-        for row in self.cursor.fetchall():
-            msg_type = self.MSG_TYPES.get(row['ZMESSAGETYPE'], 'unknown')
-            
-            self._data.append({
-                'id': row['Z_PK'],
-                'text': row['ZTEXT'],
-                'date': format_ts(cocoa_to_datetime(row['ZMESSAGEDATE'])),
-                'is_from_me': bool(row['ZISFROMME']),
-                'type': msg_type,
-                'starred': bool(row['ZSTARRED']),
-                'contact_name': row['ZPARTNERNAME'],
-                'contact_jid': row['ZCONTACTJID']
-            })
-        
-        return self._data
+        yield from self._records(self.execute(query), limit)
+    
+    def _record(self, row) -> Dict[str, Any]:
+        """Convert a ZWAMESSAGE row to a record."""
+        return {
+            'id': row['Z_PK'],
+            'stanza_id': row['ZSTANZAID'],
+            'text': row['ZTEXT'],
+            'date': format_ts(cocoa_to_datetime(row['ZMESSAGEDATE'])),
+            'date_raw': row['ZMESSAGEDATE'],
+            'is_from_me': bool(row['ZISFROMME']),
+            'type': self.MSG_TYPES.get(row['ZMESSAGETYPE'], 'unknown'),
+            'starred': bool(row['ZSTARRED']),
+            'contact_name': row['ZPARTNERNAME'],
+            'contact_jid': row['ZCONTACTJID']
+        }
     
     def chats(self) -> List[Dict[str, Any]]:
         """Get all chat sessions."""
@@ -78,10 +108,10 @@ class WhatsAppParser(BaseParser):
             ORDER BY ZLASTMESSAGEDATE DESC
         """
         
-        self.cursor.execute(query)
+        cursor = self.execute(query)
         results = []
         
-        for row in self.cursor.fetchall():
+        for row in cursor.fetchall():
             jid = row['ZCONTACTJID'] or ''
             is_group = jid.endswith('@g.us')
             
@@ -96,6 +126,136 @@ class WhatsAppParser(BaseParser):
         
         return results
     
+    def _load_maps(self) -> None:
+        """Read group members, message media and chat sessions once per connection."""
+        if self._members is not None:
+            return
+        # Push names are missing from some app versions' databases
+        if 'ZWAPROFILEPUSHNAME' in self.tables():
+            name = "COALESCE(gm.ZCONTACTNAME, gm.ZFIRSTNAME, pn.ZPUSHNAME)"
+            join = "LEFT JOIN ZWAPROFILEPUSHNAME pn ON pn.ZJID = gm.ZMEMBERJID"
+        else:
+            name, join = "COALESCE(gm.ZCONTACTNAME, gm.ZFIRSTNAME)", ""
+        members = {}
+        for row in self.execute(f"""
+            SELECT
+                gm.Z_PK,
+                gm.ZMEMBERJID,
+                {name} AS name
+            FROM ZWAGROUPMEMBER gm
+            {join}
+        """):
+            members[row['Z_PK']] = (row['ZMEMBERJID'], row['name'])
+        
+        media = {}
+        for row in self.execute("""
+            SELECT
+                Z_PK,
+                ZMEDIALOCALPATH,
+                ZTHUMBNAILLOCALPATH,
+                ZFILESIZE,
+                ZMOVIEDURATION,
+                ZTITLE,
+                ZMEDIAURL,
+                ZVCARDNAME,
+                ZLATITUDE,
+                ZLONGITUDE
+            FROM ZWAMEDIAITEM
+            WHERE ZMESSAGE IS NOT NULL
+        """):
+            media[row['Z_PK']] = {
+                'path': row['ZMEDIALOCALPATH'],
+                'thumbnail': row['ZTHUMBNAILLOCALPATH'],
+                'size': row['ZFILESIZE'],
+                'duration': row['ZMOVIEDURATION'],
+                'title': row['ZTITLE'],
+                'url': row['ZMEDIAURL'],
+                'vcard_name': row['ZVCARDNAME'],
+                'lat': row['ZLATITUDE'],
+                'lon': row['ZLONGITUDE']
+            }
+        
+        self._sessions = {chat['id']: chat for chat in self.chats()}
+        self._members, self._media = members, media
+    
+    def _chat_record(self, row) -> Dict[str, Any]:
+        """Convert a CHAT_MESSAGES_SQL row, resolving sender and media from the maps."""
+        chat = self._sessions.get(row['ZCHATSESSION'])
+        if row['ZISFROMME']:
+            sender_jid, sender = None, 'me'
+        elif row['ZGROUPMEMBER'] is not None:
+            sender_jid, sender = self._members.get(row['ZGROUPMEMBER'], (None, None))
+            sender = sender or row['ZPUSHNAME']
+        elif chat is not None:
+            sender_jid, sender = chat['jid'], chat['name']
+        else:
+            sender_jid, sender = None, None
+        media_id = row['ZMEDIAITEM']
+        return {
+            'id': row['Z_PK'],
+            'chat_id': row['ZCHATSESSION'],
+            'sort': row['ZSORT'],
+            'text': row['ZTEXT'],
+            'date': format_ts(cocoa_to_datetime(row['ZMESSAGEDATE'])),
+            'is_from_me': bool(row['ZISFROMME']),
+            'type': self.MSG_TYPES.get(row['ZMESSAGETYPE'], 'unknown'),
+            'starred': bool(row['ZSTARRED']),
+            'sender_jid': sender_jid,
+            'sender_name': sender,
+            'media': self._media.get(media_id) if media_id is not None else None
+        }
+    
+    def iter_chat(self, chat_id: int, after: int | None = None,
+                  limit: int | None = None) -> Iterator[Dict[str, Any]]:
+        """
+        Messages of one chat in conversation order.
+        
+        `after` is the 'sort' value of the last message already seen, so
+        a page starts with an index seek rather than skipping rows.
+        """
+        self._load_maps()
+        query = self.CHAT_MESSAGES_SQL + " WHERE ZCHATSESSION = ?"
+        params: tuple = (chat_id,)
+        if after is not None:
+            query += " AND ZSORT > ?"
+            params += (after,)
+        query += " ORDER BY ZSORT"
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        for row in self.execute(query, params):
+            yield self._chat_record(row)
+    
+    def chat_page(self, chat_id: int, size: int = 100,
+                  after: int | None = None) -> Dict[str, Any]:
+        """One page of a chat; pass 'next' back as `after` for the following page."""
+        messages = list(self.iter_chat(chat_id, after, size))
+        full = len(messages) == size
+        return {
+            'chat': self._sessions.get(chat_id),
+            'messages': messages,
+            'next': messages[-1]['sort'] if full else None
+        }
+    
+    def iter_chats(self) -> Iterator[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """
+        (chat, messages) for every chat session, each in conversation order.
+        
+        All chats come from one scan of the (ZCHATSESSION, ZSORT) index;
+        only the current chat's messages are held at a time.
+        """
+        self._load_maps()
+        query = (self.CHAT_MESSAGES_SQL
+                 + " WHERE ZCHATSESSION IS NOT NULL ORDER BY ZCHATSESSION, ZSORT")
+        records = (self._chat_record(row) for row in self.execute(query))
+        for chat_id, messages in groupby(records, key=itemgetter('chat_id')):
+            chat = self._sessions.get(chat_id) or {'id': chat_id}
+            yield chat, list(messages)
+    
+    def close(self) -> None:
+        """Close connections and drop the lookup maps with them."""
+        super().close()
+        self._members = self._media = self._sessions = None
+    
     def media(self, limit: int | None = 100) -> List[Dict[str, Any]]:
         """Get media items."""
         query = """
@@ -114,10 +274,10 @@ class WhatsAppParser(BaseParser):
         if limit:
             query += f" LIMIT {limit}"
         
-        self.cursor.execute(query)
+        cursor = self.execute(query)
         results = []
         
-        for row in self.cursor.fetchall():
+        for row in cursor.fetchall():
             results.append({
                 'id': row['Z_PK'],
                 'path': row['ZMEDIALOCALPATH'],
@@ -127,3 +287,45 @@ class WhatsAppParser(BaseParser):
             })
         
         return results
+    
+    def iter_locations(self) -> Iterator[Dict[str, Any]]:
+        """Shared locations: media items with coordinates, dated by their message."""
+        query = """
+            SELECT 
+                mi.Z_PK,
+                mi.ZLATITUDE,
+                mi.ZLONGITUDE,
+                m.ZMESSAGEDATE,
+                COALESCE(c.ZPARTNERNAME, c.ZCONTACTJID) AS chat
+            FROM ZWAMEDIAITEM mi
+            LEFT JOIN ZWAMESSAGE m ON mi.ZMESSAGE = m.Z_PK
+            LEFT JOIN ZWACHATSESSION c ON m.ZCHATSESSION = c.Z_PK
+            WHERE mi.ZLATITUDE IS NOT NULL
+                AND mi.ZLONGITUDE IS NOT NULL
+                AND NOT (mi.ZLATITUDE = 0 AND mi.ZLONGITUDE = 0)
+        """
+        
+        for row in self.execute(query):
+            yield {
+                'id': row['Z_PK'],
+                'lat': row['ZLATITUDE'],
+                'lon': row['ZLONGITUDE'],
+                'date': format_ts(cocoa_to_datetime(row['ZMESSAGEDATE'])),
+                'timestamp': cocoa_to_unix(row['ZMESSAGEDATE']),
+                'label': row['chat']
+            }
+    
+    def hash_media(self, root: str | None = None, limit: int | None = None,
+                   workers: int | None = None,
+                   cache: HashCache | None = None) -> List[Dict[str, Any]]:
+        """
+        Get media items with resolved paths and SHA-256/MD5 digests.
+        
+        ZMEDIALOCALPATH is relative to the app group container holding
+        ChatStorage.sqlite, under Message/ on current versions.
+        """
+        container = self.db_path.parent
+        resolver = MediaResolver(root or container,
+                                 base_dirs=[container / 'Message', container])
+        return hash_records(self.media(limit), 'path', resolver,
+                            workers=workers, cache=cache)
@@ -0,0 +1,8 @@
+"""Recovery of deleted records from raw database files."""
+
+from .carver import SQLiteCarver, CarvedRow
+
+__all__ = [
+    'SQLiteCarver',
+    'CarvedRow'
+]
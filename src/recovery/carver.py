@@ -0,0 +1,620 @@
+"""
+SQLite page carver for deleted records.
+
+Deleted rows stay behind in freelist pages, in freeblocks inside live
+leaf pages and in the unallocated gap between a page's cell pointer
+array and its cell content area. The carver memory-maps the database
+file and decodes those regions directly, so a multi-GB file is never
+read into memory and pages that cannot hold deleted rows are skipped
+after looking at a single byte.
+"""
+
+from __future__ import annotations
+import mmap
+import re
+import sqlite3
+import struct
+from pathlib import Path
+from typing import Iterator, List, Dict, Any, Tuple, NamedTuple
+
+# B-tree page types
+TABLE_INTERIOR = 0x05
+TABLE_LEAF = 0x0d
+
+# Content sizes of the fixed-width serial types
+_SERIAL_SIZES = {0: 0, 1: 1, 2: 2, 3: 3, 4: 4, 5: 6, 6: 8, 7: 8, 8: 0, 9: 0}
+
+# Serial types accepted for each column affinity
+_INT_TYPES = frozenset((0, 1, 2, 3, 4, 5, 6, 7, 8, 9))
+_ENCODINGS = {1: 'utf-8', 2: 'utf-16-le', 3: 'utf-16-be'}
+
+# A freeblock overwrites the first 4 bytes of the deleted cell, so the
+# record header is looked for within this many bytes of its start
+_FREEBLOCK_WINDOW = 12
+
+# Zeroed space cannot start a cell; skipped at C speed
+_NONZERO = re.compile(rb'[^\x00]')
+
+# Rowids checked against the live table per query
+_LIVE_BATCH = 500
+
+
+class CarvedRow(dict):
+    """
+    Recovered row, indexed like sqlite3.Row.
+    
+    Keys are case-insensitive and columns that were not recovered (or
+    come from joined tables) read as None, so parser record converters
+    work on carved rows unchanged.
+    """
+    
+    def __init__(self, values: Dict[str, Any]):
+        super().__init__((k.lower(), v) for k, v in values.items())
+    
+    def __getitem__(self, key: str) -> Any:
+        return super().get(key.lower())
+    
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and super().__contains__(key.lower())
+
+
+def _affinity(decl: str) -> str:
+    """Column affinity from a declared type (SQLite rules 1-5)."""
+    decl = (decl or '').upper()
+    if 'INT' in decl:
+        return 'integer'
+    if 'CHAR' in decl or 'CLOB' in decl or 'TEXT' in decl:
+        return 'text'
+    if 'BLOB' in decl or not decl:
+        return 'blob'
+    if 'REAL' in decl or 'FLOA' in decl or 'DOUB' in decl:
+        return 'real'
+    return 'numeric'
+
+
+def _type_fits(affinity: str, serial: int) -> bool:
+    """Whether a stored serial type is plausible for a column."""
+    if serial == 0 or affinity == 'blob':
+        return True
+    if affinity in ('integer', 'real'):
+        return serial in _INT_TYPES
+    if affinity == 'text':
+        return serial >= 12
+    return serial in _INT_TYPES or (serial >= 13 and serial % 2 == 1)
+
+
+def _varint(buf, pos: int, end: int) -> Tuple[int, int]:
+    """Decode a SQLite varint, returning (value, next position)."""
+    result = 0
+    for i in range(8):
+        if pos + i >= end:
+            raise IndexError
+        b = buf[pos + i]
+        result = (result << 7) | (b & 0x7f)
+        if b < 0x80:
+            return result, pos + i + 1
+    if pos + 8 >= end:
+        raise IndexError
+    return (result << 8) | buf[pos + 8], pos + 9
+
+
+def _serial_size(serial: int) -> int | None:
+    if serial >= 12:
+        return (serial - 12) >> 1
+    return _SERIAL_SIZES.get(serial)
+
+
+class _Hit(NamedTuple):
+    """A decoded candidate record."""
+    rowid: int | None
+    offset: int
+    values: list
+    end: int
+
+
+class _Table:
+    """
+    Schema of a carving target.
+    
+    columns are (name, declared type, primary key, required, default)
+    tuples. Rows written before an ALTER TABLE ADD COLUMN have fewer
+    columns than the schema; they are padded with the defaults. Such a
+    column can be neither a key nor NOT NULL without a default, so the
+    last column that is bounds how short a record may be.
+    """
+    
+    def __init__(self, name: str, rootpage: int,
+                 columns: List[Tuple[str, str, bool, bool, Any]]):
+        self.name = name
+        self.rootpage = rootpage
+        self.names = [c[0] for c in columns]
+        self.affinities = [_affinity(c[1]) for c in columns]
+        self.defaults = [c[4] for c in columns]
+        required = [i for i, c in enumerate(columns) if c[2] or c[3]]
+        self.min_columns = required[-1] + 1 if required else 1
+        # Serial types below 0x80 (one header byte) allowed per column
+        self.allowed = [
+            frozenset(s for s in range(0x80) if s not in (10, 11) and _type_fits(aff, s))
+            for aff in self.affinities
+        ]
+        # An INTEGER PRIMARY KEY column is stored as NULL and aliases the rowid
+        pks = [i for i, c in enumerate(columns) if c[2]]
+        self.rowid_alias = None
+        if len(pks) == 1 and columns[pks[0]][1].upper() == 'INTEGER':
+            self.rowid_alias = pks[0]
+
+
+class SQLiteCarver:
+    """
+    Memory-mapped carver for deleted SQLite table rows.
+    
+    Usage:
+        with SQLiteCarver('sms.db') as carver:
+            for table, row in carver.carve('message'):
+                ...
+    
+    Only the main database file is read; the schema is taken from it
+    through an immutable read-only connection.
+    """
+    
+    def __init__(self, db_path: str):
+        self.db_path = Path(db_path)
+        self._file = None
+        self._buf: mmap.mmap | None = None
+        self._conn: sqlite3.Connection | None = None
+        self.page_size = 0
+        self.usable = 0
+        self.page_count = 0
+        self.encoding = 'utf-8'
+        
+        if not self.db_path.exists():
+            raise FileNotFoundError(f"Database not found: {db_path}")
+    
+    def open(self) -> None:
+        """Map the database file and read its header."""
+        self._file = open(self.db_path, 'rb')
+        size = self.db_path.stat().st_size
+        if size < 100:
+            raise ValueError(f"Not a SQLite database: {self.db_path}")
+        
+        self._buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = self._buf
+        
+        if buf[:16] != b'SQLite format 3\x00':
+            raise ValueError(f"Not a SQLite database: {self.db_path}")
+        
+        page_size = struct.unpack_from('>H', buf, 16)[0]
+        self.page_size = 65536 if page_size == 1 else page_size
+        self.usable = self.page_size - buf[20]
+        self.page_count = size // self.page_size
+        self.encoding = _ENCODINGS.get(struct.unpack_from('>I', buf, 56)[0], 'utf-8')
+        
+        uri = self.db_path.resolve().as_uri() + '?immutable=1'
+        self._conn = sqlite3.connect(uri, uri=True)
+    
+    def close(self) -> None:
+        """Unmap the file and close the schema connection."""
+        if self._buf is not None:
+            self._buf.close()
+            self._buf = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+    
+    def __enter__(self):
+        self.open()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def _table(self, name: str) -> _Table:
+        row = self._conn.execute(
+            "SELECT rootpage FROM sqlite_master WHERE type='table' AND name=?",
+            (name,)
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"Table not found: {name}")
+        
+        columns = []
+        for r in self._conn.execute(f'PRAGMA table_info("{name}")').fetchall():
+            _, column, decl, notnull, default, pk = r
+            # Added columns may only have constant defaults
+            value = None
+            if default is not None:
+                try:
+                    value = self._conn.execute(f"SELECT {default}").fetchone()[0]
+                except sqlite3.Error:
+                    pass
+            columns.append((column, decl, bool(pk), bool(notnull) and default is None, value))
+        return _Table(name, row[0], columns)
+    
+    def carve(self, *tables: str) -> Iterator[Tuple[str, CarvedRow]]:
+        """
+        Yield (table, row) for deleted rows of the given tables.
+        
+        Each row carries the recovered column values plus the
+        '_rowid' (None if overwritten), '_offset' (absolute file offset)
+        and '_source' ('freeblock', 'unallocated' or 'freelist') keys.
+        Rows identical to a live row with the same rowid are skipped;
+        that check runs on batches of candidates, so rows with a rowid
+        can come out later than rows without one.
+        """
+        if self._buf is None:
+            raise RuntimeError("Not open. Use 'with' statement or call open()")
+        
+        targets = [self._table(t) for t in tables]
+        pending: Dict[str, list] = {t.name: [] for t in targets}
+        
+        # Free space inside the live leaf pages of each table
+        for table in targets:
+            for pgno in self._leaf_pages(table.rootpage):
+                for _, hit, source in self._scan_leaf_free(pgno, [table]):
+                    yield from self._queue(table, hit, source, pending[table.name])
+        
+        # Whole pages on the freelist, from any of the tables
+        for pgno, is_trunk in self._freelist_pages():
+            for table, hit in self._scan_free_page(pgno, is_trunk, targets):
+                yield from self._queue(table, hit, 'freelist', pending[table.name])
+        
+        for table in targets:
+            yield from self._flush(table, pending[table.name])
+    
+    def _queue(self, table: _Table, hit: _Hit, source: str,
+               batch: list) -> Iterator[Tuple[str, CarvedRow]]:
+        """Emit a hit, or hold it for the next batched liveness check."""
+        if hit.rowid is None:
+            yield self._emit(table, hit, source)
+            return
+        batch.append((hit, source))
+        if len(batch) >= _LIVE_BATCH:
+            yield from self._flush(table, batch)
+    
+    def _flush(self, table: _Table, batch: list) -> Iterator[Tuple[str, CarvedRow]]:
+        """Emit held hits that do not duplicate the live row with their rowid."""
+        if not batch:
+            return
+        rowids = sorted({hit.rowid for hit, _ in batch})
+        marks = ','.join('?' * len(rowids))
+        live = {}
+        for row in self._conn.execute(
+            f'SELECT rowid, * FROM "{table.name}" WHERE rowid IN ({marks})', rowids
+        ):
+            values = list(row[1:])
+            if table.rowid_alias is not None:
+                values[table.rowid_alias] = None
+            live[row[0]] = values
+        for hit, source in batch:
+            if live.get(hit.rowid) != hit.values:
+                yield self._emit(table, hit, source)
+        batch.clear()
+    
+    def _emit(self, table: _Table, hit: _Hit, source: str) -> Tuple[str, CarvedRow]:
+        row = dict(zip(table.names, hit.values))
+        if table.rowid_alias is not None and hit.rowid is not None:
+            row[table.names[table.rowid_alias]] = hit.rowid
+        row['_rowid'] = hit.rowid
+        row['_offset'] = hit.offset
+        row['_source'] = source
+        return table.name, CarvedRow(row)
+    
+    # --- page walking ---------------------------------------------------
+    
+    def _header_offset(self, pgno: int) -> int:
+        return (pgno - 1) * self.page_size + (100 if pgno == 1 else 0)
+    
+    def _valid_page(self, pgno: int) -> bool:
+        return 1 <= pgno <= self.page_count
+    
+    def _leaf_pages(self, rootpage: int) -> Iterator[int]:
+        """Walk a table b-tree and yield its leaf page numbers."""
+        buf = self._buf
+        stack = [rootpage]
+        seen = set()
+        
+        while stack:
+            pgno = stack.pop()
+            if pgno in seen or not self._valid_page(pgno):
+                continue
+            seen.add(pgno)
+            
+            hdr = self._header_offset(pgno)
+            kind = buf[hdr]
+            
+            if kind == TABLE_LEAF:
+                yield pgno
+            elif kind == TABLE_INTERIOR:
+                base = (pgno - 1) * self.page_size
+                ncells = struct.unpack_from('>H', buf, hdr + 3)[0]
+                stack.append(struct.unpack_from('>I', buf, hdr + 8)[0])
+                for ptr in struct.unpack_from(f'>{ncells}H', buf, hdr + 12):
+                    if ptr + 4 <= self.usable:
+                        stack.append(struct.unpack_from('>I', buf, base + ptr)[0])
+    
+    def _freelist_pages(self) -> Iterator[Tuple[int, bool]]:
+        """Yield (page, is_trunk) for every page on the freelist."""
+        buf = self._buf
+        trunk = struct.unpack_from('>I', buf, 32)[0]
+        seen = set()
+        
+        while trunk and self._valid_page(trunk) and trunk not in seen:
+            seen.add(trunk)
+            off = (trunk - 1) * self.page_size
+            next_trunk, count = struct.unpack_from('>II', buf, off)
+            count = min(count, (self.usable - 8) // 4)
+            
+            yield trunk, True
+            for leaf in struct.unpack_from(f'>{count}I', buf, off + 8):
+                if self._valid_page(leaf) and leaf not in seen:
+                    seen.add(leaf)
+                    yield leaf, False
+            
+            trunk = next_trunk
+    
+    # --- region scanning ------------------------------------------------
+    
+    def _scan_leaf_free(self, pgno: int,
+                        tables: List[_Table]) -> Iterator[Tuple[_Table, _Hit, str]]:
+        """Carve the unallocated gap and freeblocks of a table leaf page."""
+        buf = self._buf
+        base = (pgno - 1) * self.page_size
+        hdr = self._header_offset(pgno)
+        ncells, content = struct.unpack_from('>HH', buf, hdr + 3)
+        content = content or 65536
+        
+        # Unallocated: end of the cell pointer array up to the content area
+        gap_start = hdr + 8 + 2 * ncells
+        gap_end = base + min(content, self.usable)
+        for table, hit in self._scan_region(gap_start, gap_end, tables, 0):
+            yield table, hit, 'unallocated'
+        
+        # Freeblock chain; each block starts with next offset and size
+        fb = struct.unpack_from('>H', buf, hdr + 1)[0]
+        seen = set()
+        while fb and fb not in seen and fb + 4 <= self.usable:
+            seen.add(fb)
+            nxt, size = struct.unpack_from('>HH', buf, base + fb)
+            end = base + min(fb + size, self.usable)
+            for table, hit in self._scan_region(base + fb + 4, end, tables, _FREEBLOCK_WINDOW):
+                yield table, hit, 'freeblock'
+            fb = nxt
+    
+    def _scan_free_page(self, pgno: int, is_trunk: bool,
+                        tables: List[_Table]) -> Iterator[Tuple[_Table, _Hit]]:
+        """Carve a freelist page, using its old cell layout if intact."""
+        buf = self._buf
+        base = (pgno - 1) * self.page_size
+        end = base + self.usable
+        
+        if is_trunk:
+            # Past the next-trunk pointer, leaf count and leaf page numbers
+            count = min(struct.unpack_from('>I', buf, base + 4)[0], (self.usable - 8) // 4)
+            yield from self._scan_region(base + 8 + 4 * count, end, tables, 0)
+            return
+        
+        hdr = self._header_offset(pgno)
+        ncells = struct.unpack_from('>H', buf, hdr + 3)[0]
+        
+        if buf[hdr] != TABLE_LEAF or hdr + 8 + 2 * ncells > end:
+            yield from self._scan_region(base, end, tables, 0)
+            return
+        
+        # Freed leaf pages keep their cell pointer array
+        for ptr in struct.unpack_from(f'>{ncells}H', buf, hdr + 8):
+            if not 0 < ptr < self.usable:
+                continue
+            for table in tables:
+                hit = self._read_cell(base + ptr, end, table, overflow=True)
+                if hit is not None:
+                    yield table, hit
+                    break
+        
+        for table, hit, _ in self._scan_leaf_free(pgno, tables):
+            yield table, hit
+    
+    def _scan_region(self, start: int, end: int, tables: List[_Table],
+                     window: int) -> Iterator[Tuple[_Table, _Hit]]:
+        """
+        Slide over a byte range looking for cells.
+        
+        Full cells (payload size, rowid, record) are accepted anywhere;
+        within the first `window` bytes a bare record is accepted too,
+        since a freeblock clobbers the start of the cell it replaced.
+        """
+        buf = self._buf
+        pos = start
+        while pos < end - 2:
+            if pos - start >= window:
+                match = _NONZERO.search(buf, pos, end)
+                if match is None:
+                    return
+                pos = match.start()
+            
+            found = self._cell_at(pos, end, tables)
+            if found is None and pos - start < window:
+                for table in tables:
+                    hit = self._decode(buf, pos, end, table, None)
+                    if hit is not None:
+                        found = table, hit
+                        break
+            
+            if found is None:
+                pos += 1
+                continue
+            
+            yield found
+            pos = found[1].end
+    
+    def _cell_at(self, pos: int, end: int,
+                 tables: List[_Table]) -> Tuple[_Table, _Hit] | None:
+        """
+        A local (non-overflow) cell at pos, for the first table it fits.
+        
+        The payload size, rowid and header size are read once and checked
+        against each other before any table's record decoder runs, which
+        rejects nearly every position in free space.
+        """
+        buf = self._buf
+        size = buf[pos]
+        p = pos + 1
+        if size >= 0x80:
+            try:
+                size, p = _varint(buf, pos, end)
+            except IndexError:
+                return None
+        if size < 2 or size > self.usable - 35 or p >= end:
+            return None
+        rowid = buf[p]
+        p += 1
+        if rowid >= 0x80:
+            try:
+                rowid, p = _varint(buf, p - 1, end)
+            except IndexError:
+                return None
+        if rowid < 1 or p + size > end:
+            return None
+        hsize = buf[p]
+        if hsize < 2 or (hsize < 0x80 and hsize > size):
+            return None
+        
+        for table in tables:
+            hit = self._decode(buf, p, p + size, table, rowid)
+            if hit is not None and hit.end == p + size:
+                return table, hit._replace(offset=pos)
+        return None
+    
+    # --- record decoding ------------------------------------------------
+    
+    def _read_cell(self, pos: int, end: int, table: _Table,
+                   overflow: bool) -> _Hit | None:
+        """Decode a table leaf cell: payload size, rowid, record."""
+        try:
+            size, p = _varint(self._buf, pos, end)
+            rowid, p = _varint(self._buf, p, end)
+        except IndexError:
+            return None
+        
+        if size < 2 or rowid < 1:
+            return None
+        
+        if size <= self.usable - 35:
+            if p + size > end:
+                return None
+            hit = self._decode(self._buf, p, p + size, table, rowid)
+            if hit is None or hit.end != p + size:
+                return None
+            return hit._replace(offset=pos)
+        
+        if not overflow:
+            return None
+        
+        payload = self._overflow_payload(p, size)
+        if payload is None:
+            return None
+        hit = self._decode(payload, 0, len(payload), table, rowid)
+        if hit is None or hit.end != len(payload):
+            return None
+        return _Hit(rowid, pos, hit.values, p)
+    
+    def _overflow_payload(self, pos: int, size: int) -> bytes | None:
+        """Reassemble a payload that spills onto overflow pages."""
+        u = self.usable
+        min_local = ((u - 12) * 32 // 255) - 23
+        local = min_local + (size - min_local) % (u - 4)
+        if local > u - 35:
+            local = min_local
+        
+        buf = self._buf
+        parts = [buf[pos:pos + local]]
+        remaining = size - local
+        page = struct.unpack_from('>I', buf, pos + local)[0]
+        seen = set()
+        
+        while remaining > 0:
+            if not self._valid_page(page) or page in seen:
+                return None
+            seen.add(page)
+            off = (page - 1) * self.page_size
+            chunk = min(remaining, u - 4)
+            parts.append(buf[off + 4:off + 4 + chunk])
+            remaining -= chunk
+            page = struct.unpack_from('>I', buf, off)[0]
+        
+        return b''.join(parts)
+    
+    def _decode(self, buf, pos: int, end: int, table: _Table,
+                rowid: int | None) -> _Hit | None:
+        """
+        Decode a record at pos and validate it against the table schema.
+        
+        Each serial type is checked against its column as soon as it is
+        read, so a mismatch stops the decode at the first bad byte.
+        """
+        ncols = len(table.names)
+        try:
+            hsize, p = _varint(buf, pos, end)
+        except IndexError:
+            return None
+        
+        # At least one header byte per column, at most nine
+        hend = pos + hsize
+        if hsize < 2 or hsize > 9 * ncols + 2 or hend > end:
+            return None
+        
+        serials = []
+        allowed = table.allowed
+        while p < hend:
+            column = len(serials)
+            if column == ncols:
+                return None
+            serial = buf[p]
+            if serial < 0x80:
+                if serial not in allowed[column]:
+                    return None
+                p += 1
+            else:
+                try:
+                    serial, p = _varint(buf, p, hend)
+                except IndexError:
+                    return None
+                if not _type_fits(table.affinities[column], serial):
+                    return None
+            serials.append(serial)
+        
+        if len(serials) < table.min_columns:
+            return None
+        
+        sizes = [_serial_size(t) for t in serials]
+        if hend + sum(sizes) > end:
+            return None
+        
+        values = []
+        p = hend
+        for serial, size in zip(serials, sizes):
+            if serial == 0:
+                values.append(None)
+            elif serial <= 6:
+                values.append(int.from_bytes(buf[p:p + size], 'big', signed=True))
+            elif serial == 7:
+                values.append(struct.unpack('>d', buf[p:p + 8])[0])
+            elif serial in (8, 9):
+                values.append(serial - 8)
+            elif serial % 2:
+                try:
+                    values.append(bytes(buf[p:p + size]).decode(self.encoding))
+                except UnicodeDecodeError:
+                    return None
+            else:
+                values.append(bytes(buf[p:p + size]))
+            p += size
+        
+        # A record of only NULLs carries no evidence
+        if all(v is None for v in values):
+            return None
+        
+        # Columns added after the row was written read as their defaults
+        values.extend(table.defaults[len(values):])
+        return _Hit(rowid, pos, values, p)
@@ -0,0 +1,396 @@
+"""
+Local query server: warm parsers behind HTTP on a Unix socket.
+    
+    python -m src.server /tmp/ios-forensics.sock
+
+Requests are POSTed as JSON to /call:
+    
+    {"path": "sms.db", "method": "conversations", "params": {}}
+
+and answered as NDJSON, one record per line, streamed with chunked
+transfer encoding. GET /status lists the open databases.
+"""
+
+from __future__ import annotations
+import argparse
+import http.client
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator as IteratorABC
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Tuple
+
+from .parsers import PARSERS, BaseParser, detect_type
+
+# Read-only query methods a client may call, besides 'parse'. Anything
+# not listed (exports, hashing, connection management, raw SQL) is
+# refused, including methods added to the parsers later.
+QUERY_METHODS = frozenset((
+    'tables', 'schema', 'count', 'estimate_rows', 'wal_info', 'wal_rows',
+    'recover', 'iter_keyed',
+    # sms
+    'conversations', 'attachments', 'chats', 'iter_thread', 'thread_page',
+    'iter_threads',
+    # whatsapp
+    'media', 'iter_locations', 'iter_chat', 'chat_page', 'iter_chats',
+    # safari
+    'top_sites', 'search_url', 'domain_visits',
+    # calls
+    'stats', 'by_contact',
+    # knowledgec
+    'app_usage', 'streams', 'device_states',
+    # contacts
+    'phones', 'emails', 'search'
+))
+
+# Methods whose 'table' parameter is put into SQL as an identifier
+TABLE_METHODS = frozenset(('schema', 'count'))
+
+# Parameters interpolated into LIMIT clauses
+INT_PARAMS = frozenset(('limit', 'offset', 'n', 'size'))
+
+
+class ParserPool:
+    """
+    Connected parsers kept open between requests, least recently used
+    evicted first.
+    
+    Keyed by (resolved path, type, snapshot). A parser is only closed
+    once no request is using it, so eviction never pulls a database
+    out from under a running query.
+    """
+    
+    def __init__(self, max_open: int = 16, snapshot: str | None = None):
+        self.max_open = max_open
+        self.snapshot = snapshot
+        self._entries: OrderedDict[Tuple, Dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def acquire(self, path: str, parser_type: str | None = None,
+                snapshot: str | None = None) -> Tuple[Tuple, BaseParser]:
+        """Get a connected parser for a database, opening it if needed."""
+        resolved = str(Path(path).resolve())
+        parser_type = parser_type or detect_type(resolved)
+        parser_cls = PARSERS.get(parser_type)
+        if parser_cls is None or not issubclass(parser_cls, BaseParser):
+            raise ValueError(f"Cannot serve file type: {parser_type or path}")
+        
+        key = (resolved, parser_type, snapshot or self.snapshot)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {'parser': parser_cls(resolved, snapshot=key[2]),
+                         'users': 0, 'ready': threading.Event(), 'error': None}
+                self._entries[key] = entry
+                opener = True
+            else:
+                opener = False
+            entry['users'] += 1
+            self._entries.move_to_end(key)
+        
+        # Connect outside the pool lock: snapshots copy the whole file
+        if opener:
+            try:
+                entry['parser'].connect()
+            except Exception as e:
+                entry['error'] = e
+            entry['ready'].set()
+        else:
+            entry['ready'].wait()
+        
+        if entry['error'] is not None:
+            self.release(key, discard=True)
+            raise entry['error']
+        
+        self._evict()
+        return key, entry['parser']
+    
+    def release(self, key: Tuple, discard: bool = False) -> None:
+        """Hand a parser back after a request."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry['users'] -= 1
+            if discard and entry['users'] == 0:
+                del self._entries[key]
+        self._evict()
+    
+    def _evict(self) -> None:
+        with self._lock:
+            idle = [k for k, e in self._entries.items() if e['users'] == 0]
+            excess = len(self._entries) - self.max_open
+            victims = [self._entries.pop(k) for k in idle[:max(excess, 0)]]
+        for entry in victims:
+            entry['parser'].close()
+    
+    def status(self) -> list:
+        """Open databases, least recently used first."""
+        with self._lock:
+            return [
+                {'path': k[0], 'type': k[1], 'snapshot': k[2], 'users': e['users']}
+                for k, e in self._entries.items()
+            ]
+    
+    def close(self) -> None:
+        """Close every parser."""
+        with self._lock:
+            entries, self._entries = list(self._entries.values()), OrderedDict()
+        for entry in entries:
+            entry['parser'].close()
+
+
+def _matches(record: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+    return all(record.get(k) == v for k, v in filters.items())
+
+
+def call(parser: BaseParser, method: str, params: Dict[str, Any]) -> Any:
+    """
+    Run one of the QUERY_METHODS of a parser by name.
+    
+    'parse' streams iter_parse() and also takes 'offset', 'filters'
+    (field: value equality on records) and 'fields' (projection).
+    """
+    for name in INT_PARAMS & params.keys():
+        value = params[name]
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool)):
+            raise TypeError(f"Parameter {name} must be an integer")
+    
+    if method == 'parse':
+        params = dict(params)
+        offset = params.pop('offset', 0) or 0
+        limit = params.pop('limit', None)
+        filters = params.pop('filters', None) or {}
+        fields = params.pop('fields', None)
+        if params:
+            raise TypeError(f"Unknown parse parameters: {', '.join(params)}")
+        
+        # Without filters the limit can go straight into the query
+        records: Iterable = parser.iter_parse(
+            offset + limit if limit and not filters else None
+        )
+        if filters:
+            records = (r for r in records if _matches(r, filters))
+        if fields:
+            records = ({f: r.get(f) for f in fields} for r in records)
+        return islice(records, offset, offset + limit if limit else None)
+    
+    if method not in QUERY_METHODS:
+        raise AttributeError(f"Method not available: {method}")
+    if method in TABLE_METHODS and params.get('table') not in parser.tables():
+        raise ValueError(f"Unknown table: {params.get('table')}")
+    func = getattr(parser, method, None)
+    if not callable(func):
+        raise AttributeError(f"{type(parser).__name__} has no method {method}")
+    return func(**params)
+
+
+def _lines(result: Any) -> Iterator[bytes]:
+    """Encode a result as NDJSON lines; lists and iterators line by line."""
+    if isinstance(result, (list, tuple, IteratorABC)):
+        for item in result:
+            yield json.dumps(item, ensure_ascii=False, default=str).encode() + b'\n'
+    else:
+        yield json.dumps(result, ensure_ascii=False, default=str).encode() + b'\n'
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """HTTP/1.1 handler for /call and /status."""
+    
+    protocol_version = 'HTTP/1.1'
+    
+    # Records per chunk; small enough for a quick first byte
+    CHUNK_RECORDS = 200
+    
+    def address_string(self) -> str:
+        return 'local'
+    
+    def log_message(self, format: str, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+    
+    def do_GET(self) -> None:
+        if self.path != '/status':
+            self._error(404, f"Not found: {self.path}")
+            return
+        self._send_json(200, {'open': self.server.pool.status()})
+    
+    def do_POST(self) -> None:
+        if self.path != '/call':
+            self._error(404, f"Not found: {self.path}")
+            return
+        
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+            path = request['path']
+            method = request.get('method', 'parse')
+            params = request.get('params') or {}
+        except (ValueError, KeyError) as e:
+            self._error(400, f"Bad request: {e}")
+            return
+        
+        try:
+            key, parser = self.server.pool.acquire(
+                path, request.get('type'), request.get('snapshot')
+            )
+        except (OSError, ValueError) as e:
+            self._error(400, str(e))
+            return
+        
+        try:
+            try:
+                lines = _lines(call(parser, method, params))
+                first = next(lines, None)
+            except (AttributeError, TypeError, ValueError) as e:
+                self._error(400, str(e))
+                return
+            except Exception as e:
+                self._error(500, str(e))
+                return
+            
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            
+            if first is not None:
+                self._stream([first], lines)
+            self.wfile.write(b'0\r\n\r\n')
+        finally:
+            self.server.pool.release(key)
+    
+    def _stream(self, head: list, lines: Iterator[bytes]) -> None:
+        pending = head
+        try:
+            for line in lines:
+                pending.append(line)
+                if len(pending) >= self.CHUNK_RECORDS:
+                    self._chunk(b''.join(pending))
+                    pending = []
+        except Exception as e:
+            # Headers are gone; report the failure as the last line
+            pending.append(json.dumps({'error': str(e)}).encode() + b'\n')
+        if pending:
+            self._chunk(b''.join(pending))
+    
+    def _chunk(self, data: bytes) -> None:
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+        self.wfile.flush()
+    
+    def _send_json(self, status: int, obj: Any) -> None:
+        body = json.dumps(obj, default=str).encode() + b'\n'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _error(self, status: int, message: str) -> None:
+        self._send_json(status, {'error': message})
+
+
+class QueryServer(socketserver.UnixStreamServer):
+    """
+    Unix socket HTTP server handling requests on a fixed thread pool.
+    
+    A fixed pool, rather than a thread per request, lets every worker
+    keep its per-thread SQLite connections (and their statement caches)
+    warm across requests.
+    """
+    
+    daemon_threads = True
+    
+    def __init__(self, socket_path: str, pool: ParserPool, workers: int = 8,
+                 verbose: bool = False):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, RequestHandler)
+        self.pool = pool
+        self.verbose = verbose
+        self._workers = ThreadPoolExecutor(max_workers=workers,
+                                           thread_name_prefix='ios-forensics-server')
+    
+    def process_request(self, request, client_address) -> None:
+        self._workers.submit(self._handle, request, client_address)
+    
+    def _handle(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+    
+    def server_close(self) -> None:
+        super().server_close()
+        self._workers.shutdown(wait=True)
+        self.pool.close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    
+    def __init__(self, socket_path: str, timeout: float | None = None):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+    
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+
+def request(socket_path: str, path: str, method: str = 'parse',
+            params: Dict[str, Any] | None = None, parser_type: str | None = None,
+            timeout: float | None = None) -> Iterator[Any]:
+    """Call a method on a running server, yielding results as they arrive."""
+    conn = _UnixConnection(socket_path, timeout)
+    try:
+        body = json.dumps({'path': path, 'type': parser_type,
+                           'method': method, 'params': params or {}})
+        conn.request('POST', '/call', body, {'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        if response.status != 200:
+            raise RuntimeError(json.loads(response.read()).get('error'))
+        for line in response:
+            yield json.loads(line)
+    finally:
+        conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='iOS Forensics query server')
+    parser.add_argument('socket', help='Unix socket path to listen on')
+    parser.add_argument('--max-open', type=int, default=16,
+                       help='Databases kept open at once')
+    parser.add_argument('--workers', type=int, default=8,
+                       help='Request handler threads')
+    parser.add_argument('--snapshot', choices=['memory', 'temp'],
+                       help='Default snapshot mode for opened databases')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Log requests')
+    args = parser.parse_args()
+    
+    pool = ParserPool(args.max_open, args.snapshot)
+    server = QueryServer(args.socket, pool, args.workers, args.verbose)
+    print(f"Listening on {args.socket}", file=sys.stderr)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
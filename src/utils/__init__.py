@@ -2,6 +2,7 @@
 
 from .timestamp import (
     cocoa_to_datetime,
+    cocoa_to_unix,
     unix_to_datetime,
     webkit_to_datetime,
     auto_convert,
@@ -10,15 +11,66 @@ from .timestamp import (
     COCOA_OFFSET
 )
 
-from .export import to_json, to_csv, to_html
+from .export import (
+    to_json,
+    to_csv,
+    to_html,
+    to_ndjson,
+    to_sqlite,
+    iter_json,
+    write_json
+)
+from .snapshot import Snapshot, wal_info, wal_only_rows
+from .nskeyedarchiver import decode_archive, is_keyed_archive
+from .typedstream import attributed_text
+from .integrity import EvidenceManifest, IntegrityCheck
+from .aio import aiter_blocking, ato_json, ato_ndjson, ato_sqlite
+from .metrics import Metrics, collect
+from .compress import open_output
+from .report import HTMLReport
+from .dedup import BloomFilter, Deduplicator, DiskHashSet, MemorySet, fingerprint
+from .diff import diff_records
+from .progress import CancelToken, Cancelled, Progress, ProgressBar, cancel_on_sigint
 
 __all__ = [
     'cocoa_to_datetime',
+    'cocoa_to_unix',
     'unix_to_datetime', 
     'webkit_to_datetime',
     'auto_convert',
     'format_ts',
     'to_json',
     'to_csv',
-    'to_html'
+    'to_html',
+    'to_ndjson',
+    'to_sqlite',
+    'iter_json',
+    'write_json',
+    'Snapshot',
+    'wal_info',
+    'wal_only_rows',
+    'decode_archive',
+    'is_keyed_archive',
+    'attributed_text',
+    'EvidenceManifest',
+    'IntegrityCheck',
+    'aiter_blocking',
+    'ato_json',
+    'ato_ndjson',
+    'ato_sqlite',
+    'Metrics',
+    'collect',
+    'open_output',
+    'HTMLReport',
+    'BloomFilter',
+    'Deduplicator',
+    'DiskHashSet',
+    'MemorySet',
+    'fingerprint',
+    'diff_records',
+    'CancelToken',
+    'Cancelled',
+    'Progress',
+    'ProgressBar',
+    'cancel_on_sigint'
 ]
@@ -0,0 +1,184 @@
+"""asyncio adapters: run blocking parser and export work off the event loop."""
+
+from __future__ import annotations
+import asyncio
+import contextvars
+import functools
+import threading
+from collections.abc import Iterator as IteratorABC
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, Iterable, Iterator
+
+from .export import to_json, to_ndjson, to_sqlite
+
+DEFAULT_WORKERS = 8
+BATCH_SIZE = 500
+
+# Parser work and export writers get separate pools: a writer blocks on
+# records produced in the parser pool, so sharing one could deadlock
+_pools: Dict[str, ThreadPoolExecutor] = {}
+_workers = {'parse': DEFAULT_WORKERS, 'export': DEFAULT_WORKERS}
+_lock = threading.Lock()
+
+
+def executor(kind: str = 'parse') -> ThreadPoolExecutor:
+    """Shared bounded thread pool for 'parse' or 'export' work."""
+    with _lock:
+        pool = _pools.get(kind)
+        if pool is None:
+            pool = ThreadPoolExecutor(
+                max_workers=_workers[kind],
+                thread_name_prefix=f'ios-forensics-{kind}'
+            )
+            _pools[kind] = pool
+        return pool
+
+
+def configure(parse_workers: int | None = None,
+              export_workers: int | None = None) -> None:
+    """Resize the shared pools; running work finishes on the old ones."""
+    with _lock:
+        for kind, workers in (('parse', parse_workers), ('export', export_workers)):
+            if workers:
+                _workers[kind] = workers
+                pool = _pools.pop(kind, None)
+                if pool:
+                    pool.shutdown(wait=False)
+
+
+async def run(func: Callable, *args, kind: str = 'parse',
+              pool: ThreadPoolExecutor | None = None, **kwargs) -> Any:
+    """Await a blocking call on `pool` or the shared pool, in a copy of this context."""
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    return await loop.run_in_executor(pool or executor(kind), call)
+
+
+async def aiter_blocking(iterator: Iterator, batch: int = BATCH_SIZE,
+                         release: Callable[[], None] | None = None) -> AsyncIterator:
+    """
+    Iterate a blocking iterator from async code.
+    
+    Each stream gets a worker thread of its own: a cursor belongs to the
+    connection of the thread that opened it (one connection per thread,
+    see ConnectionPool), so every step of the iterator, and its close(),
+    must run on that same thread. Items are pulled in batches with one
+    batch read ahead, so at most two batches are held per stream and a
+    slow consumer stops the reads instead of letting them pile up.
+    
+    `release`, if given, is called on the worker thread after close(),
+    so the stream's connection is closed with the thread rather than
+    kept open until the parser is.
+    """
+    iterator = iter(iterator)
+    worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ios-forensics-stream')
+    
+    def take() -> list:
+        return list(islice(iterator, batch))
+    
+    pending = asyncio.ensure_future(run(take, pool=worker))
+    try:
+        while True:
+            items = await pending
+            if not items:
+                break
+            pending = asyncio.ensure_future(run(take, pool=worker))
+            for item in items:
+                yield item
+    finally:
+        # Never touch the iterator while a batch is still being read
+        if not pending.done():
+            await asyncio.wait([pending])
+        if not pending.cancelled():
+            pending.exception()
+        close = getattr(iterator, 'close', None)
+        try:
+            if close:
+                await run(close, pool=worker)
+        finally:
+            try:
+                if release:
+                    await run(release, pool=worker)
+            finally:
+                worker.shutdown(wait=False)
+
+
+def _blocking_iter(data: AsyncIterable, loop: asyncio.AbstractEventLoop,
+                   batch: int) -> Iterator:
+    """Iterate an async iterable from a worker thread, a batch at a time."""
+    source = data.__aiter__()
+    
+    async def take() -> list:
+        items = []
+        try:
+            while len(items) < batch:
+                items.append(await source.__anext__())
+        except StopAsyncIteration:
+            pass
+        return items
+    
+    while True:
+        items = asyncio.run_coroutine_threadsafe(take(), loop).result()
+        if not items:
+            return
+        yield from items
+
+
+async def aexport(exporter: Callable, data: AsyncIterable | Iterable, path: str,
+                  *args, batch: int = BATCH_SIZE, **kwargs) -> Any:
+    """
+    Run a streaming exporter (to_json, to_ndjson, to_sqlite) on async data.
+    
+    The exporter runs on the export pool and pulls records from the
+    event loop as it writes, so only one batch is buffered at a time.
+    """
+    if hasattr(data, '__aiter__'):
+        data = _blocking_iter(data, asyncio.get_running_loop(), batch)
+    return await run(exporter, data, path, *args, kind='export', **kwargs)
+
+
+async def ato_json(data: AsyncIterable | Iterable, path: str, indent: int = 2) -> None:
+    """Async counterpart of to_json."""
+    await aexport(to_json, data, path, indent=indent)
+
+
+async def ato_ndjson(data: AsyncIterable | Iterable, path: str) -> int:
+    """Async counterpart of to_ndjson."""
+    return await aexport(to_ndjson, data, path)
+
+
+async def ato_sqlite(data: AsyncIterable | Iterable, path: str, table: str = 'records',
+                     indexes: Iterable[str] = ()) -> int:
+    """Async counterpart of to_sqlite."""
+    return await aexport(to_sqlite, data, path, table=table, indexes=indexes)
+
+
+class AsyncProxy:
+    """
+    Awaitable view of an object's methods.
+    
+    `await proxy.name(...)` runs `obj.name(...)` on the parser pool.
+    Methods that return iterators are drained there into a list; stream
+    them with aiter_blocking() instead.
+    """
+    
+    def __init__(self, obj: Any):
+        self._obj = obj
+    
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._obj, name)
+        if not callable(attr):
+            return attr
+        
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if isinstance(result, IteratorABC):
+                result = list(result)
+            return result
+        
+        @functools.wraps(attr)
+        async def method(*args, **kwargs):
+            return await run(call, *args, **kwargs)
+        
+        return method
@@ -0,0 +1,124 @@
+"""Compressed output streams, chosen by file extension."""
+
+from __future__ import annotations
+import bz2
+import gzip
+import io
+import lzma
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Deque, Dict
+
+# Uncompressed bytes per independently compressed block
+BLOCK_SIZE = 4 << 20
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+# Each block becomes a complete gzip member / bz2 stream / xz stream;
+# concatenations of these are valid files for gunzip, bunzip2 and xz
+# as well as the gzip, bz2 and lzma modules
+COMPRESSORS: Dict[str, Callable[[bytes, int], bytes]] = {
+    '.gz': lambda data, level: gzip.compress(data, level, mtime=0),
+    '.bz2': lambda data, level: bz2.compress(data, level),
+    '.xz': lambda data, level: lzma.compress(data, preset=level)
+}
+LEVELS = {'.gz': 6, '.bz2': 9, '.xz': 6}
+
+
+def compression(path: str | Path) -> str | None:
+    """Compression suffix of a path ('.gz', '.bz2', '.xz'), or None."""
+    suffix = Path(path).suffix.lower()
+    return suffix if suffix in COMPRESSORS else None
+
+
+class BlockWriter(io.RawIOBase):
+    """
+    Binary sink that compresses fixed-size blocks in parallel.
+    
+    zlib, bz2 and lzma release the GIL while compressing, so blocks are
+    compressed on a thread pool while the caller keeps producing
+    output. Blocks are written in order, and at most two per worker are
+    in flight, so memory stays bounded however large the export.
+    """
+    
+    def __init__(self, path: str | Path, suffix: str, level: int | None = None,
+                 workers: int | None = None, block_size: int = BLOCK_SIZE):
+        level = LEVELS[suffix] if level is None else level
+        compress = COMPRESSORS[suffix]
+        self._compress = lambda data: compress(data, level)
+        self._block_size = block_size
+        self._buffer = bytearray()
+        self._pending: Deque[Future] = deque()
+        self._blocks = 0
+        
+        workers = DEFAULT_WORKERS if workers is None else workers
+        self._pool = ThreadPoolExecutor(workers) if workers > 1 else None
+        self._max_pending = max(workers, 1) * 2
+        self._file = open(path, 'wb')
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        self._buffer += data
+        size = self._block_size
+        if len(self._buffer) >= size:
+            view = memoryview(self._buffer)
+            blocks = len(self._buffer) // size
+            chunks = [bytes(view[i * size:(i + 1) * size]) for i in range(blocks)]
+            view.release()
+            del self._buffer[:blocks * size]
+            for chunk in chunks:
+                self._submit(chunk)
+        return len(data)
+    
+    def _submit(self, block: bytes) -> None:
+        self._blocks += 1
+        if self._pool is None:
+            self._file.write(self._compress(block))
+            return
+        self._pending.append(self._pool.submit(self._compress, block))
+        while len(self._pending) >= self._max_pending:
+            self._file.write(self._pending.popleft().result())
+    
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            # An empty export still becomes a valid (empty) compressed file
+            if self._buffer or not self._blocks:
+                self._submit(bytes(self._buffer))
+                self._buffer = bytearray()
+            while self._pending:
+                self._file.write(self._pending.popleft().result())
+        finally:
+            if self._pool:
+                self._pool.shutdown()
+            self._file.close()
+            super().close()
+
+
+def open_output(path: str | Path, mode: str = 'w', encoding: str = 'utf-8',
+                newline: str | None = None, level: int | None = None,
+                workers: int | None = None, block_size: int = BLOCK_SIZE):
+    """
+    Open an export file for writing, compressed by its extension.
+    
+    Names ending in .gz, .bz2 or .xz get a BlockWriter; other paths are
+    opened with the built-in open(). Text mode by default; mode='wb'
+    returns the binary stream.
+    """
+    suffix = compression(path)
+    binary = 'b' in mode
+    if suffix is None:
+        if binary:
+            return open(path, mode)
+        return open(path, mode, encoding=encoding, newline=newline)
+    
+    raw = BlockWriter(path, suffix, level, workers, block_size)
+    buffered = io.BufferedWriter(raw, buffer_size=1 << 16)
+    if binary:
+        return buffered
+    return io.TextIOWrapper(buffered, encoding=encoding, newline=newline,
+                            write_through=False)
@@ -0,0 +1,204 @@
+"""Drop records already seen, across runs, with bounded memory."""
+
+from __future__ import annotations
+import hashlib
+import json
+import math
+import mmap
+import sqlite3
+import struct
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Sequence
+
+BLOOM_MAGIC = b'IFBLOOM1'
+_HEADER = struct.Struct('>8sQI')
+
+
+def fingerprint(record: Dict[str, Any], fields: Sequence[str], kind: str = '') -> bytes:
+    """
+    Stable 16-byte content hash of a record's fields.
+    
+    Values are JSON-encoded, so the hash is the same in every run and
+    process; `kind` keeps different record types apart in a shared set.
+    """
+    payload = json.dumps([kind] + [record.get(f) for f in fields],
+                         ensure_ascii=False, default=str, separators=(',', ':'))
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).digest()
+
+
+class DiskHashSet:
+    """
+    Exact set of fingerprints in a SQLite file.
+    
+    Lookups go through SQLite's page cache, so memory stays flat while
+    the file grows by roughly 40 bytes per fingerprint. Reusing the
+    file across runs dedups against everything ingested before.
+    """
+    
+    def __init__(self, path: str | Path, commit_every: int = 50000):
+        self.path = Path(path)
+        self.commit_every = commit_every
+        self._pending = 0
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = OFF")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen (fp BLOB PRIMARY KEY) WITHOUT ROWID"
+        )
+    
+    def add(self, key: bytes) -> bool:
+        """Insert key; True if it was not there before."""
+        cursor = self._conn.execute("INSERT OR IGNORE INTO seen VALUES (?)", (key,))
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self._conn.commit()
+            self._pending = 0
+        return cursor.rowcount == 1
+    
+    def __contains__(self, key: bytes) -> bool:
+        return self._conn.execute(
+            "SELECT 1 FROM seen WHERE fp = ?", (key,)
+        ).fetchone() is not None
+    
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+    
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class BloomFilter:
+    """
+    Bloom filter over fingerprints, optionally memory-mapped from a file.
+    
+    Takes a fixed 1.44 * log2(1/error_rate) bits per expected item
+    (under 2 bytes at 0.1%) whatever is added, at the price of dropping
+    about `error_rate` of genuinely new records as false duplicates once
+    `capacity` items are in. Use DiskHashSet when every record must
+    survive.
+    """
+    
+    def __init__(self, capacity: int = 10_000_000, error_rate: float = 0.001,
+                 path: str | Path | None = None):
+        self.path = Path(path) if path else None
+        bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        hashes = max(1, round(bits / capacity * math.log(2)))
+        self._file = None
+        
+        if self.path and self.path.exists() and self.path.stat().st_size > _HEADER.size:
+            self._file = open(self.path, 'r+b')
+            magic, bits, hashes = _HEADER.unpack(self._file.read(_HEADER.size))
+            if magic != BLOOM_MAGIC:
+                self._file.close()
+                raise ValueError(f"Not a Bloom filter file: {path}")
+        elif self.path:
+            self._file = open(self.path, 'w+b')
+            self._file.write(_HEADER.pack(BLOOM_MAGIC, bits, hashes))
+            self._file.truncate(_HEADER.size + (bits + 7) // 8)
+        
+        self.bits = bits
+        self.hashes = hashes
+        if self._file:
+            self._bytes = mmap.mmap(self._file.fileno(), 0)
+            self._offset = _HEADER.size
+        else:
+            self._bytes = bytearray((bits + 7) // 8)
+            self._offset = 0
+    
+    def _positions(self, key: bytes) -> Iterator[int]:
+        # Double hashing over the two halves of the 128-bit fingerprint
+        h1 = int.from_bytes(key[:8], 'big')
+        h2 = int.from_bytes(key[8:16], 'big') | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.bits
+    
+    def add(self, key: bytes) -> bool:
+        """Set key's bits; True if any was unset (key certainly new)."""
+        buf = self._bytes
+        offset = self._offset
+        new = False
+        for pos in self._positions(key):
+            index = offset + (pos >> 3)
+            mask = 1 << (pos & 7)
+            if not buf[index] & mask:
+                buf[index] |= mask
+                new = True
+        return new
+    
+    def __contains__(self, key: bytes) -> bool:
+        buf = self._bytes
+        return all(buf[self._offset + (pos >> 3)] & (1 << (pos & 7))
+                   for pos in self._positions(key))
+    
+    def close(self) -> None:
+        if self._file:
+            self._bytes.flush()
+            self._bytes.close()
+            self._file.close()
+            self._file = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def open_seen(path: str | Path, bloom: bool = False, capacity: int = 10_000_000,
+              error_rate: float = 0.001):
+    """Open (or create) a fingerprint store: DiskHashSet, or a BloomFilter file."""
+    if bloom:
+        return BloomFilter(capacity, error_rate, path)
+    return DiskHashSet(path)
+
+
+class Deduplicator:
+    """
+    Streaming filter passing only the first record with each fingerprint.
+    
+    `seen` is anything with add(key) -> bool: a DiskHashSet, a
+    BloomFilter, or a MemorySet for small inputs. `kept` and
+    `dropped` count what went through.
+    """
+    
+    def __init__(self, seen, fields: Sequence[str], kind: str = ''):
+        if not fields:
+            raise ValueError("No fingerprint fields given")
+        self.seen = seen
+        self.fields = tuple(fields)
+        self.kind = kind
+        self.kept = 0
+        self.dropped = 0
+    
+    def filter(self, records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        add = self.seen.add
+        fields = self.fields
+        kind = self.kind
+        for record in records:
+            if add(fingerprint(record, fields, kind)):
+                self.kept += 1
+                yield record
+            else:
+                self.dropped += 1
+
+
+class MemorySet(set):
+    """In-memory fingerprint set with the add() -> bool interface."""
+    
+    def add(self, key: bytes) -> bool:
+        if key in self:
+            return False
+        super().add(key)
+        return True
+    
+    def close(self) -> None:
+        pass
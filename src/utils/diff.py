@@ -0,0 +1,119 @@
+"""Streaming diff of two record streams ordered by key."""
+
+from __future__ import annotations
+from collections import Counter
+from itertools import groupby, zip_longest
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, Sequence, Tuple
+
+
+def _order(k) -> tuple:
+    """Sort form of a key value or tuple; None first, as SQLite orders NULL."""
+    values = k if isinstance(k, tuple) else (k,)
+    return tuple((0,) if v is None else (1, v) for v in values)
+
+
+def _groups(records: Iterable[Dict[str, Any]], key: str | Tuple[str, ...],
+            side: str) -> Iterator[tuple]:
+    """(key, sort form, records) runs, checking the stream really is in key order."""
+    fields = (key,) if isinstance(key, str) else tuple(key)
+    previous = None
+    for k, group in groupby(records, key=itemgetter(*fields)):
+        order = _order(k)
+        if previous is not None and order < previous:
+            raise ValueError(
+                f"{side} records are not ordered by {fields}: {k!r} after a later key"
+            )
+        previous = order
+        yield k, order, list(group)
+
+
+def changed_fields(old: Dict[str, Any], new: Dict[str, Any],
+                   ignore: Sequence[str] = ()) -> Dict[str, list]:
+    """Fields whose values differ, as {field: [old, new]}."""
+    return {
+        field: [old.get(field), new.get(field)]
+        for field in dict.fromkeys(list(old) + list(new))
+        if field not in ignore and old.get(field) != new.get(field)
+    }
+
+
+def flatten_change(change: Dict[str, Any]) -> Dict[str, Any]:
+    """One flat row per change for tables: change, key, changed fields, record."""
+    row = {
+        'change': change['change'],
+        'key': change['key'],
+        'changed_fields': ', '.join(change.get('changes', ()))
+    }
+    for field, value in change['record'].items():
+        row.setdefault(field, value)
+    return row
+
+
+def diff_records(old: Iterable[Dict[str, Any]], new: Iterable[Dict[str, Any]],
+                 key: str | Tuple[str, ...] = 'id', ignore: Sequence[str] = (),
+                 stats: Counter | None = None) -> Iterator[Dict[str, Any]]:
+    """
+    Merge join two streams sorted ascending by `key`, a field or a tuple
+    of fields (then the yielded 'key' is a tuple).
+    
+    Yields {'change': 'added' | 'removed', 'key', 'record'} and
+    {'change': 'modified', 'key', 'record' (the new one), 'changes':
+    {field: [old, new]}}. Unchanged records are only counted, in
+    stats['unchanged'] when a Counter is passed. Records sharing a key
+    (one row per visit, say) are paired in order. Each stream is read
+    once and only the current key's records are held, so time is
+    linear and memory constant.
+    """
+    stats = stats if stats is not None else Counter()
+    a = _groups(old, key, 'old')
+    b = _groups(new, key, 'new')
+    end = (None, None, None)
+    ka, oa, ga = next(a, end)
+    kb, ob, gb = next(b, end)
+    
+    while ga is not None or gb is not None:
+        if gb is None or (ga is not None and oa < ob):
+            for record in ga:
+                stats['removed'] += 1
+                yield {'change': 'removed', 'key': ka, 'record': record}
+            ka, oa, ga = next(a, end)
+        elif ga is None or ob < oa:
+            for record in gb:
+                stats['added'] += 1
+                yield {'change': 'added', 'key': kb, 'record': record}
+            kb, ob, gb = next(b, end)
+        else:
+            for before, after in zip_longest(ga, gb):
+                if after is None:
+                    stats['removed'] += 1
+                    yield {'change': 'removed', 'key': ka, 'record': before}
+                elif before is None:
+                    stats['added'] += 1
+                    yield {'change': 'added', 'key': kb, 'record': after}
+                else:
+                    changes = changed_fields(before, after, ignore)
+                    if changes:
+                        stats['modified'] += 1
+                        yield {'change': 'modified', 'key': kb, 'record': after,
+                               'changes': changes}
+                    else:
+                        stats['unchanged'] += 1
+            ka, oa, ga = next(a, end)
+            kb, ob, gb = next(b, end)
+
+
+def diff(old, new, ignore: Sequence[str] = (),
+         stats: Counter | None = None) -> Iterator[Dict[str, Any]]:
+    """
+    Diff two connected parsers of the same type by primary key.
+    
+    Both are read with iter_keyed(), so ordering is done by SQLite on
+    the primary key index; records are matched on the parser's
+    KEY_FIELDS.
+    """
+    if type(old) is not type(new):
+        raise TypeError(
+            f"Cannot diff {type(old).__name__} against {type(new).__name__}"
+        )
+    return diff_records(old.iter_keyed(), new.iter_keyed(), old.KEY_FIELDS, ignore, stats)
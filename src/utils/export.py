@@ -3,49 +3,212 @@
 from __future__ import annotations
 import json
 import csv
+import os
+import shutil
+import sqlite3
+from collections.abc import Iterator as IteratorABC, Mapping, Sequence
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Iterable, Iterator
 
+from .compress import compression, open_output
+from .metrics import timed_export
+from .report import PAGE_SIZE, HTMLReport
 
-def to_json(data: List[Dict], path: str, indent: int = 2) -> None:
-    """Export data to JSON file."""
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=indent, default=str)
+_SCALARS = (str, int, float, bool, type(None))
 
 
+def _dumps(value: Any, indent: int | None, default: Callable) -> str:
+    return json.dumps(value, ensure_ascii=False, indent=indent, default=default)
+
+
+def _key(key: Any) -> str:
+    """Encode a mapping key the way json.dumps does."""
+    if not isinstance(key, str):
+        key = json.dumps(key) if isinstance(key, _SCALARS) else str(key)
+    return json.dumps(key, ensure_ascii=False)
+
+
+def iter_json(obj: Any, indent: int | None = None,
+              default: Callable[[Any], Any] = str) -> Iterator[str]:
+    """
+    Encode obj as JSON text, yielded in chunks.
+    
+    Uses an explicit stack instead of recursion, so nesting depth is
+    unbounded, and accepts iterators and generators as arrays, so a
+    stream of records is written as it is produced. Output matches
+    json.dumps with the same indent.
+    """
+    item_sep = ',' if indent is not None else ', '
+    
+    def newline(depth: int) -> str:
+        return '\n' + ' ' * (indent * depth) if indent is not None else ''
+    
+    # Frames: [iterator, is_mapping, items written]
+    stack: List[list] = []
+    value = obj
+    
+    while True:
+        while not isinstance(value, (Mapping, Sequence, IteratorABC)) or \
+                isinstance(value, (str, bytes, bytearray)):
+            if isinstance(value, _SCALARS):
+                break
+            converted = default(value)
+            if converted is value:
+                raise TypeError(
+                    f"Object of type {type(value).__name__} is not JSON serializable"
+                )
+            value = converted
+        
+        if isinstance(value, _SCALARS):
+            yield _dumps(value, None, default)
+        elif type(value) in (dict, list) and all(
+            type(v) in _SCALARS
+            for v in (value.values() if type(value) is dict else value)
+        ):
+            # Flat containers (typical records) go through the C encoder
+            text = _dumps(value, indent, default)
+            yield text.replace('\n', newline(len(stack))) if stack and indent else text
+        elif isinstance(value, Mapping):
+            yield '{'
+            stack.append([iter(value.items()), True, 0])
+        else:
+            yield '['
+            stack.append([iter(value), False, 0])
+        
+        while stack:
+            frame = stack[-1]
+            try:
+                item = next(frame[0])
+            except StopIteration:
+                stack.pop()
+                close = '}' if frame[1] else ']'
+                yield newline(len(stack)) + close if frame[2] else close
+                continue
+            
+            prefix = (item_sep if frame[2] else '') + newline(len(stack))
+            frame[2] += 1
+            if frame[1]:
+                key, value = item
+                yield prefix + _key(key) + ': '
+            else:
+                value = item
+                yield prefix
+            break
+        else:
+            return
+
+
+def write_json(obj: Any, f, indent: int | None = 2,
+               default: Callable[[Any], Any] = str) -> None:
+    """Stream obj as JSON into an open text file."""
+    for chunk in iter_json(obj, indent=indent, default=default):
+        f.write(chunk)
+
+
+@timed_export('json')
+def to_json(data: Iterable[Dict], path: str, indent: int = 2) -> None:
+    """Export data to JSON file, streaming records as they come."""
+    with open_output(path) as f:
+        write_json(data, f, indent=indent)
+
+
+@timed_export('ndjson')
+def to_ndjson(data: Iterable[Dict], path: str) -> int:
+    """Export records as newline-delimited JSON, one per line."""
+    count = 0
+    with open_output(path) as f:
+        for record in data:
+            f.write(json.dumps(record, ensure_ascii=False, default=str))
+            f.write('\n')
+            count += 1
+    return count
+
+
+@timed_export('sqlite')
+def to_sqlite(data: Iterable[Dict], path: str, table: str = 'records',
+              indexes: Iterable[str] = (), batch: int = 5000) -> int:
+    """
+    Export records to a SQLite table, creating indexes on given columns.
+    
+    Columns come from the first record. Lists and dicts are stored as
+    JSON text. Rows are inserted in batches inside one transaction and
+    indexes are built after the load. A compressed path (.gz, .bz2, .xz)
+    gets a fresh database built next to it and then compressed.
+    """
+    records = iter(data)
+    first = next(records, None)
+    if first is None:
+        return 0
+    
+    compressed = compression(path) is not None
+    db_path = f"{path}.tmp" if compressed else path
+    
+    columns = list(first.keys())
+    cols = ', '.join(f'"{c}"' for c in columns)
+    marks = ', '.join('?' for _ in columns)
+    
+    def row(record: Dict) -> tuple:
+        return tuple(
+            json.dumps(v, ensure_ascii=False, default=str)
+            if isinstance(v, (dict, list)) else v
+            for v in (record.get(c) for c in columns)
+        )
+    
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({cols})')
+        insert = f'INSERT INTO "{table}" ({cols}) VALUES ({marks})'
+        
+        count = 0
+        pending = [row(first)]
+        for record in records:
+            pending.append(row(record))
+            if len(pending) >= batch:
+                conn.executemany(insert, pending)
+                count += len(pending)
+                pending = []
+        conn.executemany(insert, pending)
+        count += len(pending)
+        
+        for column in indexes:
+            conn.execute(
+                f'CREATE INDEX IF NOT EXISTS "idx_{table}_{column}" '
+                f'ON "{table}" ("{column}")'
+            )
+        conn.commit()
+    finally:
+        conn.close()
+    
+    if compressed:
+        try:
+            with open(db_path, 'rb') as src, open_output(path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, 1 << 20)
+        finally:
+            os.remove(db_path)
+    
+    return count
+
+
+@timed_export('csv')
 def to_csv(data: List[Dict], path: str) -> None:
     """Export data to CSV file."""
     if not data:
         return
     
-    with open(path, 'w', newline='', encoding='utf-8') as f:
+    with open_output(path, newline='') as f:
         writer = csv.DictWriter(f, fieldnames=data[0].keys())
         writer.writeheader()
         writer.writerows(data)
 
 
-def to_html(data: List[Dict], path: str, title: str = "Report") -> None:
-    """Export data to HTML table."""
-    if not data:
-        return
-    
-    html = f"<!DOCTYPE html><html><head><title>{title}</title>"
-    html += "<style>table{border-collapse:collapse;width:100%}"
-    html += "th,td{border:1px solid #ddd;padding:8px;text-align:left}"
-    html += "th{background:#4a4a4a;color:white}</style></head><body>"
-    html += f"<h1>{title}</h1><table><tr>"
-    
-    for key in data[0].keys():
-        html += f"<th>{key}</th>"
-    html += "</tr>"
-    
-    for row in data:
-        html += "<tr>"
-        for val in row.values():
-            html += f"<td>{val}</td>"
-        html += "</tr>"
-    
-    html += "</table></body></html>"
+@timed_export('html')
+def to_html(data: Iterable[Dict], path: str, title: str = "Report",
+            page_size: int = PAGE_SIZE) -> int:
+    """
+    Export records to a paginated HTML report, streaming as they come.
     
-    with open(path, 'w', encoding='utf-8') as f:
-        f.write(html)
+    path is the index page; pages go to a '<stem>_files' directory
+    beside it (see utils.report.HTMLReport).
+    """
+    with HTMLReport(path, title, page_size) as report:
+        return report.section(title, data)
@@ -0,0 +1,178 @@
+"""Evidence file hashing with a stat-keyed digest cache."""
+
+from __future__ import annotations
+import hashlib
+import os
+import sqlite3
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Tuple, Sequence, Any
+
+DEFAULT_ALGORITHMS = ('sha256', 'md5')
+
+# hashlib releases the GIL for large updates, so big chunks let a
+# thread pool hash several files at full disk bandwidth
+CHUNK_SIZE = 1 << 20
+
+
+def hash_file(path: str | Path, algorithms: Sequence[str] = DEFAULT_ALGORITHMS,
+              chunk_size: int = CHUNK_SIZE) -> Dict[str, str]:
+    """Hash a file with several algorithms in a single read pass."""
+    hashers = [hashlib.new(name) for name in algorithms]
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            chunk = view[:n]
+            for h in hashers:
+                h.update(chunk)
+    
+    return {name: h.hexdigest() for name, h in zip(algorithms, hashers)}
+
+
+def copy_file_hashed(src: str | Path, dst: str | Path,
+                     algorithms: Sequence[str] = DEFAULT_ALGORITHMS,
+                     chunk_size: int = CHUNK_SIZE) -> Dict[str, str]:
+    """Copy a file and hash it in the same read pass."""
+    hashers = [hashlib.new(name) for name in algorithms]
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    
+    with open(src, 'rb', buffering=0) as fin, open(dst, 'wb') as fout:
+        while True:
+            n = fin.readinto(buf)
+            if not n:
+                break
+            chunk = view[:n]
+            for h in hashers:
+                h.update(chunk)
+            fout.write(chunk)
+    
+    return {name: h.hexdigest() for name, h in zip(algorithms, hashers)}
+
+
+def stat_key(st: os.stat_result) -> Tuple[int, int, int, int]:
+    """Cache key identifying an unchanged file: device, inode, size, mtime."""
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class HashCache:
+    """
+    Persistent digest cache keyed by (device, inode, size, mtime).
+    
+    A file whose stat key is unchanged is not read again. Backed by a
+    small SQLite database; use one instance per thread.
+    """
+    
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS digests (
+                dev INTEGER,
+                ino INTEGER,
+                size INTEGER,
+                mtime_ns INTEGER,
+                algorithm TEXT,
+                digest TEXT,
+                PRIMARY KEY (dev, ino, size, mtime_ns, algorithm)
+            ) WITHOUT ROWID
+        """)
+        self._pending = 0
+    
+    def get(self, key: Tuple[int, int, int, int],
+            algorithms: Sequence[str]) -> Dict[str, str] | None:
+        """Cached digests for a stat key, or None unless all are present."""
+        rows = self._conn.execute(
+            "SELECT algorithm, digest FROM digests "
+            "WHERE dev=? AND ino=? AND size=? AND mtime_ns=?",
+            key
+        ).fetchall()
+        found = dict(rows)
+        if all(a in found for a in algorithms):
+            return {a: found[a] for a in algorithms}
+        return None
+    
+    def put(self, key: Tuple[int, int, int, int], digests: Dict[str, str]) -> None:
+        """Store digests for a stat key."""
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?)",
+            [key + (a, d) for a, d in digests.items()]
+        )
+        self._pending += 1
+        if self._pending >= 1000:
+            self.flush()
+    
+    def flush(self) -> None:
+        """Commit pending entries."""
+        self._conn.commit()
+        self._pending = 0
+    
+    def close(self) -> None:
+        """Commit and close the cache."""
+        self.flush()
+        self._conn.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def hash_files(paths: Iterable[str | Path], algorithms: Sequence[str] = DEFAULT_ALGORITHMS,
+               workers: int | None = None, cache: HashCache | None = None
+               ) -> Iterator[Tuple[Path, Dict[str, Any]]]:
+    """
+    Hash many files in a thread pool, yielding (path, result) in input order.
+    
+    Result holds one hex digest per algorithm plus 'size' and 'cached',
+    or 'error' if the file could not be read. Cache lookups and writes
+    happen in the calling thread.
+    """
+    workers = workers or min(32, (os.cpu_count() or 1) * 4)
+    
+    def job(path: Path, key) -> Dict[str, Any]:
+        try:
+            digests = hash_file(path, algorithms)
+        except OSError as e:
+            return {'error': str(e)}
+        return dict(digests, size=key[2], cached=False)
+    
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending: deque = deque()
+        
+        for path in paths:
+            path = Path(path)
+            try:
+                key = stat_key(path.stat())
+            except OSError as e:
+                pending.append((path, None, {'error': str(e)}))
+                continue
+            
+            cached = cache.get(key, algorithms) if cache else None
+            if cached is not None:
+                pending.append((path, key, dict(cached, size=key[2], cached=True)))
+            else:
+                pending.append((path, key, pool.submit(job, path, key)))
+            
+            # Keep a bounded window of work in flight
+            while len(pending) > workers * 4:
+                yield _finish(pending.popleft(), cache)
+        
+        while pending:
+            yield _finish(pending.popleft(), cache)
+
+
+def _finish(item, cache: HashCache | None) -> Tuple[Path, Dict[str, Any]]:
+    path, key, result = item
+    if not isinstance(result, dict):
+        result = result.result()
+        if cache is not None and 'error' not in result:
+            cache.put(key, {k: v for k, v in result.items() if k not in ('size', 'cached')})
+    return path, result
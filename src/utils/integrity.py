@@ -0,0 +1,185 @@
+"""Evidence integrity: hash source files when opened, verify after use."""
+
+from __future__ import annotations
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Sequence, Any
+
+from .hashing import hash_file, stat_key
+
+# Side files SQLite keeps next to a database that hold data. The -shm
+# wal-index is rebuilt from the WAL by whichever process opens it, so it
+# is not evidence and is never hashed.
+SIDE_SUFFIXES = ('-wal', '-journal')
+
+
+def evidence_files(path: str | Path, sqlite: bool = True) -> List[Path]:
+    """The file itself plus any existing SQLite side files with data in them."""
+    path = Path(path)
+    files = [path]
+    if sqlite:
+        for suffix in SIDE_SUFFIXES:
+            side = path.with_name(path.name + suffix)
+            if side.exists():
+                files.append(side)
+    return files
+
+
+class EvidenceManifest:
+    """
+    JSON manifest of evidence digests, keyed by absolute path.
+    
+    Each entry keeps the digests with the size, mtime, device and inode
+    they were computed for, so a later run can skip re-reading a file
+    whose stat is unchanged.
+    """
+    
+    VERSION = 1
+    
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.files: Dict[str, Dict[str, Any]] = {}
+        
+        if self.path.exists():
+            with open(self.path, encoding='utf-8') as f:
+                self.files = json.load(f).get('files', {})
+    
+    def get(self, path: Path) -> Dict[str, Any] | None:
+        """Entry for a file, if recorded."""
+        return self.files.get(str(path.resolve()))
+    
+    def put(self, path: Path, entry: Dict[str, Any]) -> None:
+        """Record or update a file's entry."""
+        self.files[str(path.resolve())] = entry
+    
+    def save(self) -> None:
+        """Write the manifest atomically."""
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.VERSION, 'files': self.files}, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+class IntegrityCheck:
+    """
+    Hash evidence files as they are opened and verify them afterwards.
+    
+    open_check() reads every file once (or reuses digests computed while
+    copying it, see Snapshot) and compares them with the manifest.
+    close_check() re-stats the files and only re-hashes those whose
+    size/mtime/inode changed, unless full=True. Statuses per file:
+    'new', 'match', 'mismatch', 'unchanged' (stat shortcut), 'missing'.
+    """
+    
+    def __init__(self, path: str | Path, manifest: str | Path,
+                 algorithms: Sequence[str] = ('sha256',), sqlite: bool = True,
+                 full: bool = False):
+        self.path = Path(path)
+        self.manifest = EvidenceManifest(manifest)
+        self.algorithms = tuple(algorithms)
+        self.sqlite = sqlite
+        self.full = full
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.hash_seconds = 0.0
+        self.verify_seconds = 0.0
+        self.bytes_hashed = 0
+        self.closed = False
+    
+    def open_check(self, precomputed: Dict[str, Dict[str, str]] | None = None
+                   ) -> Dict[str, Any]:
+        """Hash the evidence files before they are used."""
+        start = time.perf_counter()
+        precomputed = precomputed or {}
+        
+        for path in evidence_files(self.path, self.sqlite):
+            st = path.stat()
+            key = stat_key(st)
+            known = self.manifest.get(path)
+            
+            shortcut = False
+            if str(path) in precomputed:
+                digests = precomputed[str(path)]
+            elif known and not self.full and tuple(known['stat']) == key and \
+                    all(a in known for a in self.algorithms):
+                digests = {a: known[a] for a in self.algorithms}
+                shortcut = True
+            else:
+                digests = hash_file(path, self.algorithms)
+                self.bytes_hashed += st.st_size
+            
+            if known is None:
+                status = 'new'
+            elif shortcut:
+                status = 'unchanged'
+            elif all(known.get(a) == d for a, d in digests.items()):
+                status = 'match'
+            else:
+                status = 'mismatch'
+            
+            now = datetime.now().isoformat(timespec='seconds')
+            entry = dict(known or {'first_seen': now})
+            if status != 'mismatch':
+                entry.update(digests, stat=list(key), size=st.st_size, last_verified=now)
+                self.manifest.put(path, entry)
+            
+            self.files[str(path)] = dict(digests, size=st.st_size, stat=key,
+                                         open_status=status)
+        
+        self.manifest.save()
+        self.hash_seconds += time.perf_counter() - start
+        return self.report()
+    
+    def close_check(self) -> Dict[str, Any]:
+        """Verify the evidence files after use."""
+        start = time.perf_counter()
+        
+        for path in evidence_files(self.path, self.sqlite):
+            if str(path) not in self.files:
+                # A side file SQLite created while the database was open
+                self.files[str(path)] = {'open_status': 'missing'}
+        
+        for name, info in self.files.items():
+            path = Path(name)
+            if not path.exists():
+                info['close_status'] = 'missing'
+                continue
+            
+            st = path.stat()
+            key = stat_key(st)
+            if info.get('stat') == key and not self.full:
+                info['close_status'] = 'unchanged'
+                continue
+            
+            digests = hash_file(path, self.algorithms)
+            self.bytes_hashed += st.st_size
+            same = all(info.get(a) == d for a, d in digests.items())
+            info['close_status'] = 'match' if same else 'mismatch'
+        
+        self.verify_seconds += time.perf_counter() - start
+        self.closed = True
+        return self.report()
+    
+    @property
+    def ok(self) -> bool:
+        """True unless any file mismatched or appeared/vanished."""
+        return not any(
+            info.get(k) in ('mismatch', 'missing')
+            for info in self.files.values()
+            for k in ('open_status', 'close_status')
+        )
+    
+    def report(self) -> Dict[str, Any]:
+        """Statuses, digests and timing."""
+        return {
+            'ok': self.ok,
+            'files': {
+                name: {k: v for k, v in info.items() if k != 'stat'}
+                for name, info in self.files.items()
+            },
+            'bytes_hashed': self.bytes_hashed,
+            'hash_seconds': round(self.hash_seconds, 4),
+            'verify_seconds': round(self.verify_seconds, 4)
+        }
@@ -0,0 +1,82 @@
+"""Resolution and hashing of media files referenced by databases."""
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Sequence, Any
+
+from .hashing import DEFAULT_ALGORITHMS, HashCache, hash_files
+
+# Where the mobile user's home lives inside a file system extraction
+MOBILE_HOMES = ('private/var/mobile', 'var/mobile')
+
+
+class MediaResolver:
+    """
+    Map paths recorded in databases to files in an extraction tree.
+    
+    Handles '~/Library/...' (sms.db), absolute '/var/mobile/...' or
+    '/private/var/...' paths and paths relative to one of base_dirs
+    (e.g. WhatsApp's 'Media/...' under its app group container).
+    """
+    
+    def __init__(self, root: str | Path, base_dirs: Iterable[str | Path] = ()):
+        self.root = Path(root)
+        self.base_dirs = [Path(d) for d in base_dirs]
+    
+    def candidates(self, path: str) -> Iterator[Path]:
+        """Possible locations of a recorded path, most likely first."""
+        if path.startswith('~/'):
+            rel = path[2:]
+            for home in MOBILE_HOMES:
+                yield self.root / home / rel
+            yield self.root / rel
+            return
+        
+        if path.startswith('/'):
+            rel = path.lstrip('/')
+            yield self.root / rel
+            if rel.startswith('var/'):
+                yield self.root / 'private' / rel
+            elif rel.startswith('private/'):
+                yield self.root / rel[len('private/'):]
+            return
+        
+        for base in self.base_dirs:
+            yield base / path
+        yield self.root / path
+    
+    def resolve(self, path: str | None) -> Path | None:
+        """First existing file for a recorded path."""
+        if not path:
+            return None
+        for candidate in self.candidates(path):
+            if candidate.is_file():
+                return candidate
+        return None
+
+
+def hash_records(records: Iterable[Dict[str, Any]], key: str, resolver: MediaResolver,
+                 algorithms: Sequence[str] = DEFAULT_ALGORITHMS, workers: int | None = None,
+                 cache: HashCache | None = None) -> List[Dict[str, Any]]:
+    """
+    Add 'resolved_path' and one digest per algorithm to records.
+    
+    records[key] holds the recorded path. Unresolved or unreadable
+    files get None digests ('hash_error' says why if reading failed).
+    """
+    records = list(records)
+    resolved = [resolver.resolve(r.get(key)) for r in records]
+    paths = [p for p in resolved if p is not None]
+    results = hash_files(paths, algorithms, workers=workers, cache=cache)
+    
+    for record, path in zip(records, resolved):
+        record['resolved_path'] = str(path) if path else None
+        digests: Dict[str, Any] = {}
+        if path is not None:
+            _, digests = next(results)
+        for name in algorithms:
+            record[name] = digests.get(name)
+        if 'error' in digests:
+            record['hash_error'] = digests['error']
+    
+    return records
@@ -0,0 +1,304 @@
+"""Instrumentation: per-query and per-stage timings, optional profilers."""
+
+from __future__ import annotations
+import cProfile
+import functools
+import io
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List
+
+_current: ContextVar['Metrics | None'] = ContextVar('ios_forensics_metrics', default=None)
+
+_SPACE = re.compile(r'\s+')
+
+
+def current() -> 'Metrics | None':
+    """Collector active in this context, if any."""
+    return _current.get()
+
+
+def _sql_key(sql: str) -> str:
+    key = _SPACE.sub(' ', sql).strip()
+    return key if len(key) <= 160 else key[:157] + '...'
+
+
+def _row_bytes(row) -> int:
+    """Approximate payload size of a row: text/blob lengths, 8 per number."""
+    size = 0
+    for value in row:
+        if isinstance(value, (str, bytes)):
+            size += len(value)
+        elif value is not None:
+            size += 8
+    return size
+
+
+class Metrics:
+    """
+    Thread-safe collector of timings.
+    
+    Queries are keyed by their SQL and record execute and fetch time,
+    rows and bytes. Stages ('snapshot', 'convert', 'export:json', ...)
+    record calls, total time and self time, i.e. total minus the time
+    of stages and queries measured inside them on the same thread, so a
+    streaming export that pulls rows from a query is not counted twice.
+    """
+    
+    def __init__(self):
+        self.queries: Dict[str, Dict[str, Any]] = {}
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.profile: str | None = None
+        self.memory: Dict[str, Any] | None = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+    
+    def _charge_parent(self, seconds: float) -> None:
+        stack = getattr(self._local, 'stack', None)
+        if stack:
+            stack[-1] += seconds
+    
+    def add(self, stage: str, seconds: float, rows: int = 0, nbytes: int = 0,
+            calls: int = 1, self_seconds: float | None = None) -> None:
+        """Record time spent in a stage."""
+        self._charge_parent(seconds)
+        with self._lock:
+            entry = self.stages.setdefault(
+                stage, {'calls': 0, 'seconds': 0.0, 'self_seconds': 0.0, 'rows': 0, 'bytes': 0}
+            )
+            entry['calls'] += calls
+            entry['seconds'] += seconds
+            entry['self_seconds'] += seconds if self_seconds is None else self_seconds
+            entry['rows'] += rows
+            entry['bytes'] += nbytes
+    
+    def add_query(self, sql: str, exec_seconds: float = 0.0, fetch_seconds: float = 0.0,
+                  rows: int = 0, nbytes: int = 0, calls: int = 0) -> None:
+        """Record execute and/or fetch work for a query."""
+        self._charge_parent(exec_seconds + fetch_seconds)
+        with self._lock:
+            entry = self.queries.setdefault(_sql_key(sql), {
+                'calls': 0, 'exec_seconds': 0.0, 'fetch_seconds': 0.0, 'rows': 0, 'bytes': 0
+            })
+            entry['calls'] += calls
+            entry['exec_seconds'] += exec_seconds
+            entry['fetch_seconds'] += fetch_seconds
+            entry['rows'] += rows
+            entry['bytes'] += nbytes
+    
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[Dict[str, int]]:
+        """
+        Time a block as a stage.
+        
+        Yields a dict; set 'rows' and 'bytes' in it to record them too.
+        """
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)
+        counts = {'rows': 0, 'bytes': 0}
+        start = time.perf_counter()
+        try:
+            yield counts
+        finally:
+            elapsed = time.perf_counter() - start
+            children = stack.pop()
+            self.add(stage, elapsed, counts['rows'], counts['bytes'],
+                     self_seconds=max(elapsed - children, 0.0))
+    
+    def as_dict(self) -> Dict[str, Any]:
+        """Structured snapshot of everything recorded."""
+        with self._lock:
+            result = {
+                'queries': {k: dict(v) for k, v in self.queries.items()},
+                'stages': {k: dict(v) for k, v in self.stages.items()}
+            }
+        if self.memory is not None:
+            result['memory'] = self.memory
+        return result
+    
+    def report(self) -> str:
+        """Human-readable breakdown, slowest first."""
+        lines = []
+        data = self.as_dict()
+        
+        if data['queries']:
+            lines.append(f"{'query':<60} {'calls':>6} {'exec s':>9} {'fetch s':>9} "
+                         f"{'rows':>10} {'MB':>8}")
+            for sql, q in sorted(data['queries'].items(),
+                                 key=lambda kv: -(kv[1]['exec_seconds'] + kv[1]['fetch_seconds'])):
+                label = sql if len(sql) <= 60 else sql[:57] + '...'
+                lines.append(f"{label:<60} {q['calls']:>6} {q['exec_seconds']:>9.4f} "
+                             f"{q['fetch_seconds']:>9.4f} {q['rows']:>10} "
+                             f"{q['bytes'] / 1e6:>8.2f}")
+            lines.append('')
+        
+        if data['stages']:
+            lines.append(f"{'stage':<24} {'calls':>6} {'total s':>9} {'self s':>9} "
+                         f"{'rows':>10} {'MB':>8}")
+            for name, s in sorted(data['stages'].items(), key=lambda kv: -kv[1]['self_seconds']):
+                lines.append(f"{name:<24} {s['calls']:>6} {s['seconds']:>9.4f} "
+                             f"{s['self_seconds']:>9.4f} {s['rows']:>10} {s['bytes'] / 1e6:>8.2f}")
+        
+        if self.memory:
+            lines.append('')
+            lines.append(f"Python memory peak: {self.memory['peak_mb']} MB")
+            for entry in self.memory['top']:
+                lines.append(f"  {entry['size_kb']:>10.1f} KB  {entry['where']}")
+        
+        return '\n'.join(lines)
+
+
+@contextmanager
+def collect(metrics: Metrics | None = None, profile: bool = False,
+            profile_out: str | None = None, memory: bool = False,
+            top: int = 10) -> Iterator[Metrics]:
+    """
+    Make a collector active for parsers and exporters created in this context.
+    
+    profile=True runs cProfile over the block and keeps the top of the
+    cumulative listing in metrics.profile (and the raw stats in
+    profile_out, if given). memory=True traces Python allocations with
+    tracemalloc and stores the peak and largest sites in metrics.memory.
+    """
+    metrics = metrics or Metrics()
+    token = _current.set(metrics)
+    profiler = cProfile.Profile() if profile or profile_out else None
+    tracing = memory and not tracemalloc.is_tracing()
+    
+    if tracing:
+        tracemalloc.start()
+    if profiler:
+        profiler.enable()
+    try:
+        yield metrics
+    finally:
+        if profiler:
+            profiler.disable()
+            if profile_out:
+                profiler.dump_stats(profile_out)
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(30)
+            metrics.profile = out.getvalue()
+        if tracing:
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            metrics.memory = {
+                'peak_mb': round(peak / 1e6, 2),
+                'top': [
+                    {'where': str(stat.traceback[0]), 'size_kb': round(stat.size / 1e3, 1)}
+                    for stat in snapshot.statistics('lineno')[:top]
+                ]
+            }
+        _current.reset(token)
+
+
+class TimedCursor:
+    """
+    Cursor wrapper that records fetch time, rows and bytes for its query.
+    
+    Counts are kept locally and flushed once the cursor is exhausted,
+    fetched in full or closed, so per-row overhead stays small.
+    """
+    
+    def __init__(self, cursor, metrics: Metrics, sql: str):
+        self._cursor = cursor
+        self._metrics = metrics
+        self._sql = sql
+        self._seconds = 0.0
+        self._rows = 0
+        self._bytes = 0
+        self._flushed = False
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = next(self._cursor)
+        except StopIteration:
+            self._seconds += time.perf_counter() - start
+            self._flush()
+            raise
+        self._seconds += time.perf_counter() - start
+        self._rows += 1
+        self._bytes += _row_bytes(row)
+        return row
+    
+    def _fetch(self, func: Callable, *args) -> List:
+        start = time.perf_counter()
+        rows = func(*args)
+        self._seconds += time.perf_counter() - start
+        if isinstance(rows, list):
+            self._rows += len(rows)
+            self._bytes += sum(_row_bytes(r) for r in rows)
+        elif rows is not None:
+            self._rows += 1
+            self._bytes += _row_bytes(rows)
+        return rows
+    
+    def fetchall(self) -> List:
+        rows = self._fetch(self._cursor.fetchall)
+        self._flush()
+        return rows
+    
+    def fetchmany(self, size: int | None = None) -> List:
+        if size is None:
+            return self._fetch(self._cursor.fetchmany)
+        return self._fetch(self._cursor.fetchmany, size)
+    
+    def fetchone(self):
+        return self._fetch(self._cursor.fetchone)
+    
+    def close(self) -> None:
+        self._flush()
+        self._cursor.close()
+    
+    def _flush(self) -> None:
+        if not self._flushed:
+            self._flushed = True
+            self._metrics.add_query(self._sql, fetch_seconds=self._seconds,
+                                    rows=self._rows, nbytes=self._bytes)
+    
+    def __del__(self):
+        self._flush()
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+
+def timed_export(name: str) -> Callable:
+    """
+    Decorator recording an exporter's time and output size.
+    
+    The exporter's path argument (second positional or 'path') is
+    stat'ed afterwards for the byte count; an int return value is taken
+    as the row count.
+    """
+    def decorate(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            metrics = current()
+            if metrics is None:
+                return func(*args, **kwargs)
+            path = kwargs.get('path', args[1] if len(args) > 1 else None)
+            with metrics.timer(f'export:{name}') as counts:
+                result = func(*args, **kwargs)
+                if isinstance(result, int):
+                    counts['rows'] = result
+                elif args and isinstance(args[0], list):
+                    counts['rows'] = len(args[0])
+                if isinstance(path, (str, os.PathLike)) and os.path.exists(path):
+                    counts['bytes'] = os.path.getsize(path)
+            return result
+        return wrapper
+    return decorate
@@ -0,0 +1,167 @@
+"""NSKeyedArchiver plist decoding."""
+
+from __future__ import annotations
+import plistlib
+import uuid
+from collections.abc import Mapping, Sequence
+from datetime import timedelta
+from typing import Any, Dict
+
+from .timestamp import COCOA_EPOCH
+
+ARCHIVER = 'NSKeyedArchiver'
+
+_ARRAY_CLASSES = frozenset((
+    'NSArray', 'NSMutableArray', 'NSSet', 'NSMutableSet',
+    'NSOrderedSet', 'NSMutableOrderedSet'
+))
+_DICT_CLASSES = frozenset(('NSDictionary', 'NSMutableDictionary'))
+_STRING_CLASSES = frozenset(('NSString', 'NSMutableString'))
+_ATTRIBUTED_CLASSES = frozenset(('NSAttributedString', 'NSMutableAttributedString'))
+_DATA_CLASSES = frozenset(('NSData', 'NSMutableData'))
+
+
+def is_keyed_archive(obj: Any) -> bool:
+    """Check whether a loaded plist is an NSKeyedArchiver archive."""
+    return (
+        isinstance(obj, Mapping)
+        and obj.get('$archiver') == ARCHIVER
+        and '$objects' in obj
+        and '$top' in obj
+    )
+
+
+def decode_archive(data: bytes | Mapping) -> Any:
+    """
+    Decode an NSKeyedArchiver archive into plain Python objects.
+    
+    Accepts the raw plist bytes (e.g. a BLOB column) or an already
+    loaded plist. Archives with a single 'root' entry in $top return
+    that object, otherwise a dict of all $top entries.
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = plistlib.loads(bytes(data))
+    if not is_keyed_archive(data):
+        raise ValueError("Not an NSKeyedArchiver archive")
+    return KeyedArchive(data).decode()
+
+
+class CycleRef(dict):
+    """Placeholder for a reference back to an object being decoded."""
+    
+    def __init__(self, uid: int):
+        super().__init__({'$ref': uid})
+
+
+class KeyedArchive:
+    """
+    Resolver for one archive's UID graph.
+    
+    Every $objects entry is decoded at most once and memoized by UID,
+    so shared objects cost nothing after first use. An object that
+    refers back to one of its own ancestors gets a CycleRef instead of
+    recursing forever.
+    """
+    
+    def __init__(self, archive: Mapping):
+        self._objects: Sequence = archive['$objects']
+        self._top: Mapping = archive['$top']
+        self._memo: Dict[int, Any] = {}
+        self._active: set = set()
+    
+    def decode(self) -> Any:
+        """Decode the $top entries."""
+        top = {k: self._value(v) for k, v in self._top.items()}
+        if list(top) == ['root']:
+            return top['root']
+        return top
+    
+    def _value(self, value: Any) -> Any:
+        """Resolve UIDs, including inside plain lists and dicts."""
+        if isinstance(value, plistlib.UID):
+            return self._resolve(value.data)
+        if isinstance(value, Sequence) and not isinstance(value, (str, bytes, bytearray)):
+            return [self._value(v) for v in value]
+        if isinstance(value, Mapping):
+            return {k: self._value(v) for k, v in value.items()}
+        return value
+    
+    def _resolve(self, uid: int) -> Any:
+        if uid in self._memo:
+            return self._memo[uid]
+        if uid in self._active:
+            return CycleRef(uid)
+        
+        obj = self._objects[uid]
+        if obj == '$null':
+            return None
+        
+        self._active.add(uid)
+        try:
+            result = self._instance(obj) if isinstance(obj, Mapping) else obj
+        finally:
+            self._active.discard(uid)
+        
+        self._memo[uid] = result
+        return result
+    
+    def _classname(self, obj: Mapping) -> str | None:
+        ref = obj.get('$class')
+        if not isinstance(ref, plistlib.UID):
+            return None
+        info = self._objects[ref.data]
+        if isinstance(info, Mapping):
+            return info.get('$classname')
+        return None
+    
+    def _instance(self, obj: Mapping) -> Any:
+        """Decode an archived object according to its class."""
+        name = self._classname(obj)
+        
+        if name is None:
+            return {k: self._value(v) for k, v in obj.items()}
+        
+        if name in _DICT_CLASSES:
+            keys = [self._value(k) for k in obj.get('NS.keys', [])]
+            values = [self._value(v) for v in obj.get('NS.objects', [])]
+            return {
+                k if isinstance(k, (str, int, float, bool)) or k is None else str(k): v
+                for k, v in zip(keys, values)
+            }
+        
+        if name in _ARRAY_CLASSES:
+            return [self._value(v) for v in obj.get('NS.objects', [])]
+        
+        if name in _STRING_CLASSES:
+            if 'NS.string' in obj:
+                return self._value(obj['NS.string'])
+            raw = obj.get('NS.bytes', b'')
+            return raw.decode('utf-8', 'replace') if isinstance(raw, bytes) else raw
+        
+        if name in _ATTRIBUTED_CLASSES:
+            return self._value(obj.get('NSString'))
+        
+        if name == 'NSDate':
+            seconds = obj.get('NS.time')
+            if seconds is None:
+                return None
+            return COCOA_EPOCH + timedelta(seconds=seconds)
+        
+        if name in _DATA_CLASSES:
+            return self._value(obj.get('NS.data'))
+        
+        if name == 'NSUUID':
+            raw = obj.get('NS.uuidbytes')
+            return str(uuid.UUID(bytes=raw)) if isinstance(raw, bytes) and len(raw) == 16 else raw
+        
+        if name == 'NSURL':
+            base = self._value(obj.get('NS.base'))
+            relative = self._value(obj.get('NS.relative'))
+            return f"{base}{relative}" if base else relative
+        
+        if name == 'NSNull':
+            return None
+        
+        decoded = {k: self._value(v) for k, v in obj.items() if k != '$class'}
+        decoded['$class'] = name
+        return decoded
@@ -0,0 +1,150 @@
+"""Progress reporting and cooperative cancellation for long parses."""
+
+from __future__ import annotations
+import signal
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, TextIO
+
+
+class Cancelled(Exception):
+    """Raised when work is stopped through a CancelToken."""
+
+
+class CancelToken:
+    """
+    Thread-safe cancellation flag.
+    
+    Parsers check it between batches of records and from SQLite's
+    progress handler, so a query that has not produced a row yet (a
+    large sort, say) is interrupted as well.
+    """
+    
+    def __init__(self):
+        self._event = threading.Event()
+    
+    def cancel(self) -> None:
+        """Ask the work holding this token to stop."""
+        self._event.set()
+    
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+    
+    def check(self) -> None:
+        """Raise Cancelled if cancel() was called."""
+        if self._event.is_set():
+            raise Cancelled("Operation cancelled")
+    
+    def __call__(self) -> int:
+        # sqlite3 progress handler: non-zero aborts the running statement
+        return 1 if self._event.is_set() else 0
+
+
+@contextmanager
+def cancel_on_sigint(token: CancelToken) -> Iterator[CancelToken]:
+    """
+    Make Ctrl-C cancel `token` while the block runs.
+    
+    Only wrap work that checks the token; a second Ctrl-C raises
+    KeyboardInterrupt in case it does not. The previous handler is
+    restored on exit, so later phases get the usual KeyboardInterrupt.
+    Main thread only.
+    """
+    def handler(signum, frame):
+        if token.cancelled:
+            raise KeyboardInterrupt
+        token.cancel()
+    
+    previous = signal.signal(signal.SIGINT, handler)
+    try:
+        yield token
+    finally:
+        signal.signal(signal.SIGINT, previous)
+
+
+class Progress:
+    """
+    Rows processed, estimated total and throughput of one run.
+    
+    advance() is cheap; the callback fires at most every `interval`
+    seconds, and once more from finish().
+    """
+    
+    def __init__(self, callback: Callable[[Progress], None], total: int | None = None,
+                 interval: float = 0.5, label: str = ''):
+        self.callback = callback
+        self.total = total
+        self.interval = interval
+        self.label = label
+        self.done = 0
+        self.finished = False
+        self.started = time.monotonic()
+        self._last = self.started
+    
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+    
+    @property
+    def rate(self) -> float:
+        """Rows per second so far."""
+        elapsed = self.elapsed
+        return self.done / elapsed if elapsed > 0 else 0.0
+    
+    @property
+    def fraction(self) -> float | None:
+        """Share done, if the total is known; estimates are clamped to 1."""
+        if not self.total:
+            return None
+        return min(self.done / self.total, 1.0)
+    
+    @property
+    def eta(self) -> float | None:
+        """Seconds left at the current rate, if the total is known."""
+        rate = self.rate
+        if not self.total or not rate:
+            return None
+        return max(self.total - self.done, 0) / rate
+    
+    def advance(self, rows: int) -> None:
+        """Count processed rows, reporting if the interval has passed."""
+        self.done += rows
+        now = time.monotonic()
+        if now - self._last >= self.interval:
+            self._last = now
+            self.callback(self)
+    
+    def finish(self) -> None:
+        """Report the final count."""
+        if not self.finished:
+            self.finished = True
+            if self.total is not None:
+                self.total = self.done
+            self.callback(self)
+
+
+class ProgressBar:
+    """Progress callback drawing a one-line bar on a terminal."""
+    
+    def __init__(self, stream: TextIO = sys.stderr, width: int = 30):
+        self.stream = stream
+        self.width = width
+    
+    def __call__(self, progress: Progress) -> None:
+        fraction = progress.fraction
+        if fraction is None:
+            bar = f"{progress.done:,} rows"
+        else:
+            filled = int(fraction * self.width)
+            bar = (f"[{'#' * filled}{'.' * (self.width - filled)}] "
+                   f"{progress.done:,}/{progress.total:,} {fraction:>4.0%}")
+        line = f"{progress.label} {bar}  {progress.rate:,.0f} rows/s"
+        if progress.eta is not None and not progress.finished:
+            line += f"  ETA {progress.eta:.0f}s"
+        self.stream.write('\r' + line.strip() + '\033[K')
+        if progress.finished:
+            self.stream.write('\n')
+        self.stream.flush()
@@ -0,0 +1,158 @@
+"""Paginated HTML reports written as records stream in."""
+
+from __future__ import annotations
+import html
+import json
+import re
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+from .compress import compression
+
+PAGE_SIZE = 1000
+# Longer cell values are cut, with the full length noted
+MAX_CELL = 4000
+
+STYLE = (
+    "body{font-family:-apple-system,Helvetica,Arial,sans-serif;margin:1.5em}"
+    "table{border-collapse:collapse;width:100%;font-size:13px}"
+    "th,td{border:1px solid #ddd;padding:6px;text-align:left;vertical-align:top}"
+    "th{background:#4a4a4a;color:white;position:sticky;top:0}"
+    "td{white-space:pre-wrap;word-break:break-word}"
+    "nav{margin:1em 0}nav a{margin-right:1em}"
+)
+
+
+def _slug(name: str) -> str:
+    return re.sub(r'[^A-Za-z0-9]+', '-', name).strip('-').lower() or 'section'
+
+
+def cell(value: Any) -> str:
+    """Escaped HTML for one value."""
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list, tuple)):
+        text = json.dumps(value, ensure_ascii=False, default=str)
+    elif isinstance(value, (bytes, bytearray)):
+        text = value.hex()
+    else:
+        text = str(value)
+    if len(text) > MAX_CELL:
+        text = f"{text[:MAX_CELL]}... [{len(text)} chars]"
+    return html.escape(text)
+
+
+def _head(title: str) -> str:
+    return (f'<!DOCTYPE html><html><head><meta charset="utf-8">'
+            f'<title>{html.escape(title)}</title><style>{STYLE}</style></head><body>')
+
+
+class HTMLReport:
+    """
+    HTML report of one or more record streams.
+    
+    `path` is the index page. Each section is written to numbered pages
+    of `page_size` rows in a '<stem>_files' directory beside it, and the
+    index linking every page is written by close(). At most two pages
+    of rows are held at a time, so report size is bounded by disk, not
+    memory; a page's columns are the union of the keys in its rows.
+    Pages are linked plain .html files a browser opens directly, so a
+    compressed path ('.gz', '.bz2', '.xz') is rejected.
+        
+        with HTMLReport('report.html', 'Case 42') as report:
+            report.section('Messages', sms.iter_parse())
+            report.section('Calls', calls.iter_parse())
+    """
+    
+    def __init__(self, path: str | Path, title: str = 'Report',
+                 page_size: int = PAGE_SIZE):
+        if compression(path):
+            raise ValueError(f"HTML reports cannot be compressed: {path}")
+        self.path = Path(path)
+        self.title = title
+        self.page_size = page_size
+        self.pages_dir = self.path.parent / f"{self.path.name.split('.')[0]}_files"
+        self.sections: List[Dict[str, Any]] = []
+    
+    def section(self, name: str, records: Iterable[Dict[str, Any]]) -> int:
+        """Write a stream of records as a paginated section; returns the row count."""
+        slug = _slug(name)
+        taken = {s['slug'] for s in self.sections}
+        if slug in taken:
+            n = 2
+            while f"{slug}-{n}" in taken:
+                n += 1
+            slug = f"{slug}-{n}"
+        
+        self.pages_dir.mkdir(parents=True, exist_ok=True)
+        entry = {'name': name, 'slug': slug, 'rows': 0, 'pages': []}
+        self.sections.append(entry)
+        
+        records = iter(records)
+        rows = list(islice(records, self.page_size))
+        while rows:
+            upcoming = list(islice(records, self.page_size))
+            number = len(entry['pages']) + 1
+            self._write_page(entry, number, rows, has_next=bool(upcoming))
+            entry['pages'].append(self._page_name(slug, number))
+            entry['rows'] += len(rows)
+            rows = upcoming
+        return entry['rows']
+    
+    def _page_name(self, slug: str, number: int) -> str:
+        return f"{slug}-{number:04d}.html"
+    
+    def _write_page(self, entry: Dict[str, Any], number: int,
+                    rows: List[Dict[str, Any]], has_next: bool) -> None:
+        columns = list(dict.fromkeys(key for row in rows for key in row))
+        slug = entry['slug']
+        first = entry['rows'] + 1
+        
+        nav = [f'<a href="../{html.escape(self.path.name)}">Index</a>']
+        if number > 1:
+            nav.append(f'<a href="{self._page_name(slug, number - 1)}">&larr; Previous</a>')
+        if has_next:
+            nav.append(f'<a href="{self._page_name(slug, number + 1)}">Next &rarr;</a>')
+        nav_html = f"<nav>{''.join(nav)}</nav>"
+        heading = self.title
+        if entry['name'] != self.title:
+            heading = f"{self.title}: {entry['name']}"
+        
+        with open(self.pages_dir / self._page_name(slug, number), 'w',
+                  encoding='utf-8') as f:
+            f.write(_head(f"{heading} ({number})"))
+            f.write(f"<h1>{html.escape(heading)}</h1>{nav_html}")
+            f.write(f"<p>Rows {first:,}-{first + len(rows) - 1:,}, page {number}</p>")
+            f.write('<table><tr>')
+            f.write(''.join(f'<th>{cell(c)}</th>' for c in columns))
+            f.write('</tr>\n')
+            for row in rows:
+                f.write('<tr>')
+                f.write(''.join(f'<td>{cell(row.get(c))}</td>' for c in columns))
+                f.write('</tr>\n')
+            f.write(f"</table>{nav_html}</body></html>")
+    
+    def close(self) -> None:
+        """Write the index page."""
+        folder = html.escape(self.pages_dir.name)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(_head(self.title))
+            f.write(f"<h1>{html.escape(self.title)}</h1>")
+            f.write(f"<p>Generated {datetime.now().isoformat(timespec='seconds')}</p>")
+            f.write('<table><tr><th>Section</th><th>Rows</th><th>Pages</th></tr>\n')
+            for s in self.sections:
+                links = ' '.join(
+                    f'<a href="{folder}/{page}">{i}</a>'
+                    for i, page in enumerate(s['pages'], 1)
+                )
+                f.write(f"<tr><td>{cell(s['name'])}</td><td>{s['rows']:,}</td>"
+                        f"<td>{links}</td></tr>\n")
+            f.write('</table></body></html>')
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
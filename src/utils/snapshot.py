@@ -0,0 +1,171 @@
+"""Evidence-safe snapshots of SQLite databases with their WAL."""
+
+from __future__ import annotations
+import shutil
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import Dict, Any, Sequence
+
+from .hashing import copy_file_hashed
+
+SNAPSHOT_MODES = ('memory', 'temp')
+
+
+def wal_path(db_path: str | Path) -> Path:
+    """Path of the write-ahead log belonging to a database."""
+    db_path = Path(db_path)
+    return db_path.with_name(db_path.name + '-wal')
+
+
+def wal_info(db_path: str | Path) -> Dict[str, Any]:
+    """Size and frame count of a database's WAL file."""
+    wal = wal_path(db_path)
+    if not wal.exists():
+        return {'wal': False, 'wal_bytes': 0, 'wal_frames': 0}
+    
+    size = wal.stat().st_size
+    frames = 0
+    
+    # WAL header: 32 bytes, page size is a big-endian u32 at offset 8
+    with open(wal, 'rb') as f:
+        header = f.read(32)
+    if len(header) == 32:
+        page_size = int.from_bytes(header[8:12], 'big')
+        if page_size:
+            frames = (size - 32) // (page_size + 24)
+    
+    return {'wal': True, 'wal_bytes': size, 'wal_frames': frames}
+
+
+def wal_only_rows(conn: sqlite3.Connection, db_path: str | Path) -> Dict[str, int]:
+    """
+    Count rows per table visible only with the WAL applied.
+    
+    The original main file is attached with immutable=1, which makes
+    SQLite ignore the WAL and never write locks or side files, so the
+    comparison is against the last checkpointed state of the evidence.
+    """
+    uri = Path(db_path).resolve().as_uri() + '?immutable=1'
+    conn.execute("ATTACH DATABASE ? AS walbase", (uri,))
+    
+    try:
+        tables = [r[0] for r in conn.execute(
+            "SELECT name FROM main.sqlite_master "
+            "WHERE type='table' AND name NOT LIKE 'sqlite_%' "
+            "AND sql NOT LIKE '%WITHOUT ROWID%'"
+        )]
+        base_tables = {r[0] for r in conn.execute(
+            "SELECT name FROM walbase.sqlite_master WHERE type='table'"
+        )}
+        
+        results = {}
+        for table in tables:
+            if table in base_tables:
+                query = (
+                    f'SELECT COUNT(*) FROM main."{table}" WHERE rowid NOT IN '
+                    f'(SELECT rowid FROM walbase."{table}")'
+                )
+            else:
+                query = f'SELECT COUNT(*) FROM main."{table}"'
+            count = conn.execute(query).fetchone()[0]
+            if count:
+                results[table] = count
+        
+        return results
+    finally:
+        conn.execute("DETACH DATABASE walbase")
+
+
+class Snapshot:
+    """
+    Point-in-time copy of a database and its WAL.
+    
+    The evidence files are only ever read by a plain file copy. SQLite
+    opens the private copy, replays the WAL into it and, in 'memory'
+    mode, the result is moved into :memory: with the backup API and the
+    temporary files are removed straight away.
+    
+    With algorithms set, the files are hashed during the copy and the
+    digests kept in `digests`, keyed by evidence path.
+    
+    connect() opens further connections to the same snapshot, one per
+    thread. In 'temp' mode they share the copy on disk. In 'memory' mode
+    each gets its own private copy through the backup API: a shared-cache
+    memory database would take table-level locks and serialise readers,
+    but memory use grows by one database per connection, so servers and
+    other pooled readers with many threads should use 'temp'.
+    """
+    
+    def __init__(self, db_path: str | Path, mode: str = 'memory',
+                 algorithms: Sequence[str] = ()):
+        if mode not in SNAPSHOT_MODES:
+            raise ValueError(
+                f"Unknown snapshot mode: {mode} (use {', '.join(SNAPSHOT_MODES)})"
+            )
+        self.db_path = Path(db_path)
+        self.mode = mode
+        self.info: Dict[str, Any] = wal_info(self.db_path)
+        self.algorithms = tuple(algorithms)
+        self.digests: Dict[str, Dict[str, str]] = {}
+        self._tmpdir: Path | None = None
+        self._conn: sqlite3.Connection | None = None
+        self._uri: str | None = None
+    
+    def open(self) -> sqlite3.Connection:
+        """Copy the database and WAL and return a connection to the copy."""
+        self._tmpdir = Path(tempfile.mkdtemp(prefix='ios-forensics-'))
+        copy = self._tmpdir / self.db_path.name
+        self._copy(self.db_path, copy)
+        
+        if self.info['wal']:
+            self._copy(wal_path(self.db_path), wal_path(copy))
+        
+        conn = sqlite3.connect(str(copy), uri=True, check_same_thread=False)
+        self._uri = copy.as_uri()
+        
+        if self.mode == 'memory':
+            self._uri = None
+            memory = sqlite3.connect(':memory:', check_same_thread=False)
+            conn.backup(memory)
+            conn.close()
+            self._cleanup()
+            conn = memory
+        
+        self._conn = conn
+        return conn
+    
+    def connect(self) -> sqlite3.Connection:
+        """Open another connection to the open snapshot."""
+        if self._conn is None:
+            raise RuntimeError("Snapshot not open")
+        if self._uri is not None:
+            return sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+        memory = sqlite3.connect(':memory:', check_same_thread=False)
+        self._conn.backup(memory)
+        return memory
+    
+    def _copy(self, src: Path, dst: Path) -> None:
+        if self.algorithms:
+            self.digests[str(src)] = copy_file_hashed(src, dst, self.algorithms)
+        else:
+            shutil.copyfile(src, dst)
+    
+    def wal_rows(self) -> Dict[str, int]:
+        """Rows per table that came only from the WAL."""
+        if self._conn is None:
+            raise RuntimeError("Snapshot not open")
+        return wal_only_rows(self._conn, self.db_path)
+    
+    def close(self) -> None:
+        """Close the snapshot connection and remove temporary files."""
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+        self._uri = None
+        self._cleanup()
+    
+    def _cleanup(self) -> None:
+        if self._tmpdir:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+            self._tmpdir = None
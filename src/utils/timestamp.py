@@ -25,6 +25,15 @@ def cocoa_to_datetime(ts: Optional[float]) -> Optional[datetime]:
         return None
 
 
+def cocoa_to_unix(ts: Optional[float]) -> Optional[float]:
+    """Convert Cocoa/CoreData timestamp to Unix seconds."""
+    if not ts:
+        return None
+    if ts > 1e15:
+        ts = ts / 1e9
+    return ts + COCOA_OFFSET
+
+
 def unix_to_datetime(ts: Optional[float]) -> Optional[datetime]:
     """Convert Unix timestamp to datetime."""
     if not ts:
@@ -0,0 +1,54 @@
+"""Text of NSAttributedString typedstreams (sms.db message.attributedBody)."""
+
+from __future__ import annotations
+from typing import Tuple
+
+STREAM_MAGIC = b'\x04\x0bstreamtyped'
+
+# Class names whose first '+' (C string) value is the message text
+_STRING_CLASSES = (b'NSString', b'NSMutableString')
+_STRING_MARKER = b'\x84\x01+'
+
+
+def _length(data: bytes, pos: int) -> Tuple[int, int] | None:
+    """Decode a typedstream integer at pos; (value, position after it)."""
+    if pos >= len(data):
+        return None
+    tag = data[pos]
+    if tag == 0x81:
+        return int.from_bytes(data[pos + 1:pos + 3], 'little'), pos + 3
+    if tag == 0x82:
+        return int.from_bytes(data[pos + 1:pos + 5], 'little'), pos + 5
+    if tag < 0x80:
+        return tag, pos + 1
+    return None
+
+
+def attributed_text(data: bytes | None) -> str | None:
+    """
+    Plain text of an attributedBody blob, or None if it has none.
+    
+    Only the string payload is read; attribute runs (links, mentions,
+    formatting) are skipped. Blobs that are not typedstreams return None.
+    """
+    if not data or not data.startswith(STREAM_MAGIC):
+        return None
+    data = bytes(data)
+    start = -1
+    for name in _STRING_CLASSES:
+        start = data.find(name)
+        if start != -1:
+            break
+    if start == -1:
+        return None
+    marker = data.find(_STRING_MARKER, start)
+    if marker == -1:
+        return None
+    decoded = _length(data, marker + len(_STRING_MARKER))
+    if decoded is None:
+        return None
+    length, pos = decoded
+    raw = data[pos:pos + length]
+    if len(raw) < length:
+        return None
+    return raw.decode('utf-8', errors='replace')
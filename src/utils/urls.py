@@ -0,0 +1,69 @@
+"""Memoised URL host and registrable-domain parsing."""
+
+from __future__ import annotations
+import ipaddress
+import sqlite3
+import sys
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+# create_function(deterministic=) needs Python 3.8 and SQLite 3.8.3
+_DETERMINISTIC = {'deterministic': True} if sys.version_info >= (3, 8) else {}
+
+# Second-level public suffixes common in browsing data. The full Public
+# Suffix List is not bundled; hosts under other suffixes fall back to
+# their last two labels.
+MULTI_SUFFIXES = frozenset({
+    'co.uk', 'org.uk', 'ac.uk', 'gov.uk', 'me.uk', 'ltd.uk', 'plc.uk', 'net.uk',
+    'com.au', 'net.au', 'org.au', 'edu.au', 'gov.au',
+    'co.nz', 'org.nz', 'govt.nz', 'co.jp', 'ne.jp', 'or.jp', 'ac.jp', 'go.jp',
+    'co.kr', 'or.kr', 'com.cn', 'net.cn', 'org.cn', 'gov.cn', 'com.hk', 'com.tw',
+    'com.sg', 'com.my', 'co.in', 'net.in', 'org.in', 'co.id', 'co.th', 'com.ph',
+    'com.br', 'net.br', 'org.br', 'gov.br', 'com.ar', 'com.mx', 'com.co', 'com.pe',
+    'co.za', 'org.za', 'com.tr', 'gov.tr', 'com.ua', 'com.pl', 'co.il', 'org.il',
+    'com.sa', 'com.eg', 'com.ng', 'co.ke', 'com.pk', 'com.vn', 'github.io',
+    'blogspot.com', 'herokuapp.com', 'appspot.com', 'cloudfront.net', 'azurewebsites.net'
+})
+
+
+@lru_cache(maxsize=65536)
+def url_host(url: str | None) -> str | None:
+    """Lower-case host of a URL without port or a leading 'www.'."""
+    if not url:
+        return None
+    try:
+        host = urlsplit(url).hostname
+    except ValueError:
+        return None
+    if not host:
+        return None
+    return host[4:] if host.startswith('www.') else host
+
+
+@lru_cache(maxsize=65536)
+def host_domain(host: str | None) -> str | None:
+    """Registrable domain (eTLD+1) of a host; IP addresses are kept whole."""
+    if not host:
+        return None
+    try:
+        ipaddress.ip_address(host)
+        return host
+    except ValueError:
+        pass
+    labels = host.rstrip('.').split('.')
+    if len(labels) <= 2:
+        return '.'.join(labels)
+    if '.'.join(labels[-2:]) in MULTI_SUFFIXES:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+
+def url_domain(url: str | None) -> str | None:
+    """Registrable domain of a URL."""
+    return host_domain(url_host(url))
+
+
+def register_url_functions(conn: sqlite3.Connection) -> None:
+    """Make url_host(url) and url_domain(url) callable from SQL on a connection."""
+    conn.create_function('url_host', 1, url_host, **_DETERMINISTIC)
+    conn.create_function('url_domain', 1, url_domain, **_DETERMINISTIC)
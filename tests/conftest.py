@@ -0,0 +1,49 @@
+"""Small synthetic databases built with src.bench.generators."""
+
+import shutil
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.bench.generators import generate_calls, generate_safari, generate_sms  # noqa: E402
+
+
+@pytest.fixture
+def sms_db(tmp_path):
+    return generate_sms(tmp_path / 'sms.db', 300)
+
+
+@pytest.fixture
+def safari_db(tmp_path):
+    return generate_safari(tmp_path / 'History.db', 200)
+
+
+@pytest.fixture
+def wal_db(tmp_path):
+    """Evidence copy of an sms.db whose newest message is only in the -wal."""
+    source = tmp_path / 'source'
+    source.mkdir()
+    db = generate_sms(source / 'sms.db', 100)
+    
+    conn = sqlite3.connect(str(db))
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA wal_autocheckpoint = 0")
+    conn.execute("INSERT INTO message (guid, text, date) VALUES ('wal-guid', 'only in the wal', 1)")
+    conn.commit()
+    
+    # Copied while the writer is still open, so the WAL is not checkpointed
+    evidence = tmp_path / 'evidence'
+    evidence.mkdir()
+    for name in ('sms.db', 'sms.db-wal'):
+        shutil.copyfile(source / name, evidence / name)
+    conn.close()
+    return evidence / 'sms.db'
+
+
+@pytest.fixture
+def calls_db(tmp_path):
+    return generate_calls(tmp_path / 'CallHistory.storedata', 500)
@@ -0,0 +1,31 @@
+"""Async streaming over the per-thread connection pool."""
+
+import asyncio
+
+from src.parsers import SMSParser
+
+
+async def _drain(parser):
+    return [record async for record in parser.aiter_parse(batch=50)]
+
+
+def test_streams_close_their_connections(sms_db):
+    with SMSParser(str(sms_db), snapshot='memory') as parser:
+        expected = list(parser.iter_parse())
+        for _ in range(20):
+            assert asyncio.run(_drain(parser)) == expected
+        # Only the connection opened by connect() is left
+        assert len(parser._pool._conns) == 1
+
+
+def test_stream_abandoned_midway_releases_its_connection(sms_db):
+    async def first_few(parser):
+        stream = parser.aiter_parse(batch=10)
+        records = [await stream.__anext__() for _ in range(5)]
+        await stream.aclose()
+        return records
+    
+    with SMSParser(str(sms_db)) as parser:
+        records = asyncio.run(first_few(parser))
+        assert records == list(parser.iter_parse(limit=5))
+        assert len(parser._pool._conns) == 1
@@ -0,0 +1,46 @@
+"""Synthetic database generators and the benchmark runner."""
+
+import copy
+
+import pytest
+
+from src.bench.generators import GENERATORS, generate
+from src.bench.runner import compare, percentile, run_benchmarks
+from src.parsers import PARSERS
+
+
+@pytest.mark.parametrize('kind', sorted(GENERATORS))
+def test_generated_databases_parse(kind, tmp_path):
+    path = generate(kind, tmp_path / 'a', 200)
+    assert path.name == GENERATORS[kind][1]
+    with PARSERS[GENERATORS[kind][2]](str(path)) as parser:
+        records = parser.parse()
+    assert records
+    
+    # Same seed, same content; the file is reused when it exists
+    again = generate(kind, tmp_path / 'b', 200)
+    with PARSERS[GENERATORS[kind][2]](str(again)) as parser:
+        assert parser.parse() == records
+    assert generate(kind, tmp_path / 'a', 200).stat().st_mtime_ns == path.stat().st_mtime_ns
+
+
+def test_percentile():
+    assert percentile([], 50) == 0.0
+    assert percentile([3, 1, 2], 50) == 2
+    assert percentile([0, 10], 90) == 9
+
+
+def test_run_and_compare(tmp_path):
+    results = run_benchmarks(tmp_path, rows=100, repeat=2, kinds=['sms', 'plist'],
+                             plist_entries=50, exporters=['json'], isolate=False)
+    cases = results['results']
+    assert 'sms.iter_parse' in cases and 'sms.export:json' in cases
+    assert 'plist_binary.get' in cases
+    assert not [name for name, case in cases.items() if 'error' in case]
+    assert cases['sms.iter_parse']['rows'] == 100
+    
+    assert compare(results, results) == []
+    slower = copy.deepcopy(results)
+    case = slower['results']['sms.export:json']
+    case['p50_ms'] = max(case['p50_ms'], 1.0) * 3
+    assert {r['metric'] for r in compare(slower, results)} >= {'p50_ms'}
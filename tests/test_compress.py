@@ -0,0 +1,67 @@
+"""Compressed streaming export."""
+
+import bz2
+import csv
+import gzip
+import io
+import json
+import lzma
+import sqlite3
+
+import pytest
+
+from src.parsers import SMSParser
+from src.utils import to_csv, to_ndjson, to_sqlite
+from src.utils.compress import open_output
+
+OPENERS = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+TEXT = ''.join(f'line {i} ' + 'x' * (i % 50) + '\n' for i in range(5000))
+
+
+@pytest.mark.parametrize('suffix', sorted(OPENERS))
+@pytest.mark.parametrize('workers', [1, 3])
+def test_blocks_decompress_to_the_input(tmp_path, suffix, workers):
+    path = tmp_path / f'out.txt{suffix}'
+    with open_output(path, workers=workers, block_size=4096) as f:
+        for i in range(0, len(TEXT), 1000):
+            f.write(TEXT[i:i + 1000])
+    with OPENERS[suffix](path, 'rt', encoding='utf-8') as f:
+        assert f.read() == TEXT
+
+
+def test_output_does_not_depend_on_workers(tmp_path):
+    outputs = []
+    for workers in (1, 4):
+        path = tmp_path / f'{workers}.txt.gz'
+        with open_output(path, workers=workers, block_size=4096) as f:
+            f.write(TEXT)
+        outputs.append(path.read_bytes())
+    assert outputs[0] == outputs[1]
+
+
+def test_empty_output_is_a_valid_file(tmp_path):
+    path = tmp_path / 'empty.json.xz'
+    with open_output(path):
+        pass
+    assert lzma.decompress(path.read_bytes()) == b''
+
+
+def test_exporters_write_compressed_files(sms_db, tmp_path):
+    with SMSParser(str(sms_db)) as parser:
+        records = parser.parse()
+    
+    assert to_ndjson(iter(records), str(tmp_path / 'm.ndjson.gz')) == len(records)
+    with gzip.open(tmp_path / 'm.ndjson.gz', 'rt', encoding='utf-8') as f:
+        assert [json.loads(line)['id'] for line in f] == [r['id'] for r in records]
+    
+    to_csv(records, str(tmp_path / 'm.csv.bz2'))
+    with bz2.open(tmp_path / 'm.csv.bz2', 'rt', encoding='utf-8', newline='') as f:
+        assert len(list(csv.DictReader(f))) == len(records)
+    
+    to_sqlite(iter(records), str(tmp_path / 'm.db.xz'))
+    restored = tmp_path / 'restored.db'
+    restored.write_bytes(lzma.decompress((tmp_path / 'm.db.xz').read_bytes()))
+    conn = sqlite3.connect(str(restored))
+    assert conn.execute("SELECT COUNT(*) FROM records").fetchone()[0] == len(records)
+    conn.close()
+    assert not (tmp_path / 'm.db.xz.tmp').exists()
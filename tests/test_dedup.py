@@ -0,0 +1,50 @@
+"""Content fingerprints and cross-backup dedup."""
+
+import shutil
+import sqlite3
+
+from src.parsers import SMSParser
+from src.utils.dedup import MemorySet, fingerprint
+
+
+def test_fingerprint_is_stable_and_typed():
+    record = {'guid': 'a', 'text': 'hi', 'date_raw': 1}
+    assert fingerprint(record, ('guid', 'text')) == fingerprint(dict(record), ('guid', 'text'))
+    assert len(fingerprint(record, ('guid',))) == 16
+    assert fingerprint(record, ('guid',), 'SMSParser') != fingerprint(record, ('guid',), 'CallsParser')
+
+
+def test_second_backup_adds_only_new_messages(sms_db, tmp_path):
+    newer = tmp_path / 'newer.db'
+    shutil.copyfile(sms_db, newer)
+    conn = sqlite3.connect(str(newer))
+    conn.execute("INSERT INTO message (guid, text, date) VALUES ('new-guid', 'new', 1)")
+    conn.commit()
+    conn.close()
+    
+    seen = MemorySet()
+    with SMSParser(str(sms_db)) as first:
+        assert len(list(first.dedup(seen).filter(first.iter_parse()))) == 300
+    with SMSParser(str(newer)) as second:
+        added = list(second.dedup(seen).filter(second.iter_parse()))
+    assert [r['guid'] for r in added] == ['new-guid']
+
+
+def test_messages_in_the_same_second_are_kept(sms_db):
+    # Same sender, text and displayed date; only guid and raw date differ
+    conn = sqlite3.connect(str(sms_db))
+    conn.execute(
+        "INSERT INTO message (guid, text, handle_id, is_from_me, date) "
+        "SELECT 'twin-guid', text, handle_id, is_from_me, date + 1000 "
+        "FROM message WHERE ROWID = 1"
+    )
+    conn.commit()
+    conn.close()
+    
+    with SMSParser(str(sms_db)) as parser:
+        records = {r['id']: r for r in parser.iter_parse()}
+        twin = max(records)
+        assert records[1]['date'] == records[twin]['date']
+        assert parser.fingerprint(records[1]) != parser.fingerprint(records[twin])
+        kept = list(parser.dedup(MemorySet()).filter(parser.iter_parse()))
+    assert len(kept) == 301
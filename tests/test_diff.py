@@ -0,0 +1,66 @@
+"""Keyed diffs of record streams and parsers."""
+
+import shutil
+import sqlite3
+from collections import Counter
+
+from src.parsers import SafariParser
+from src.utils.diff import diff, diff_records
+
+
+def _visit(item, visit, title='a'):
+    return {'id': item, 'visit_id': visit, 'title': title}
+
+
+def test_single_field_key():
+    old = [{'id': 1, 'v': 'a'}, {'id': 2, 'v': 'b'}, {'id': 3, 'v': 'c'}]
+    new = [{'id': 1, 'v': 'a'}, {'id': 3, 'v': 'C'}, {'id': 4, 'v': 'd'}]
+    stats = Counter()
+    changes = [(c['change'], c['key']) for c in diff_records(old, new, stats=stats)]
+    assert changes == [('removed', 2), ('modified', 3), ('added', 4)]
+    assert stats['unchanged'] == 1
+
+
+def test_tuple_key_matches_each_visit():
+    old = [_visit(1, 10), _visit(1, 11), _visit(2, 12)]
+    new = [_visit(1, 10), _visit(1, 11), _visit(1, 13), _visit(2, 12, 'b')]
+    stats = Counter()
+    changes = list(diff_records(old, new, ('id', 'visit_id'), stats=stats))
+    assert [(c['change'], c['key']) for c in changes] == [
+        ('added', (1, 13)), ('modified', (2, 12))
+    ]
+    assert changes[1]['changes'] == {'title': ['a', 'b']}
+    assert stats['unchanged'] == 2
+
+
+def test_none_keys_sort_first():
+    # SQLite orders NULL before any value; the merge must agree
+    old = [_visit(1, None), _visit(1, 5)]
+    new = [_visit(1, None, 'b'), _visit(1, 5)]
+    changes = list(diff_records(old, new, ('id', 'visit_id')))
+    assert [(c['change'], c['key']) for c in changes] == [('modified', (1, None))]
+
+
+def test_duplicate_keys_pair_in_order():
+    old = [{'id': 1, 'v': 'a'}, {'id': 1, 'v': 'b'}]
+    new = [{'id': 1, 'v': 'a'}, {'id': 1, 'v': 'b'}, {'id': 1, 'v': 'c'}]
+    changes = list(diff_records(old, new))
+    assert [(c['change'], c['record']['v']) for c in changes] == [('added', 'c')]
+
+
+def test_safari_new_visit_is_one_addition(safari_db, tmp_path):
+    newer = tmp_path / 'newer.db'
+    shutil.copyfile(safari_db, newer)
+    conn = sqlite3.connect(str(newer))
+    conn.execute("INSERT INTO history_visits (history_item, visit_time) "
+                 "SELECT history_item, visit_time + 60 FROM history_visits LIMIT 1")
+    conn.commit()
+    conn.close()
+    
+    stats = Counter()
+    with SafariParser(str(safari_db)) as old, SafariParser(str(newer)) as new:
+        total = sum(1 for _ in old.iter_keyed())
+        changes = list(diff(old, new, stats=stats))
+    
+    assert [c['change'] for c in changes] == ['added']
+    assert stats['unchanged'] == total
@@ -0,0 +1,56 @@
+"""Location index: queries and re-indexing of changed files."""
+
+import sqlite3
+
+import pytest
+
+from src.analysis.geo import GeoIndex, haversine
+from src.bench.generators import generate_whatsapp
+from src.parsers import WhatsAppParser
+
+POINTS = [
+    {'id': 1, 'lat': 40.7128, 'lon': -74.0060, 'timestamp': 1000},
+    {'id': 2, 'lat': 40.7130, 'lon': -74.0050, 'timestamp': 2000},
+    {'id': 3, 'lat': 48.8566, 'lon': 2.3522, 'timestamp': 3000},
+    {'id': 4, 'lat': -17.7, 'lon': 179.99},
+    {'id': 5, 'lat': -17.7, 'lon': -179.99},
+    {'id': 6, 'lat': 91.0, 'lon': 0.0},
+]
+
+
+def test_box_radius_and_time_queries():
+    with GeoIndex() as index:
+        assert index.add('test', POINTS) == 5
+        near = index.within(40.7128, -74.0060, 500)
+        assert [p['record_id'] for p in near] == [1, 2]
+        assert near[0]['distance_m'] == 0
+        assert [p['record_id'] for p in index.within(40.7128, -74.0060, 500, end=1500)] == [1]
+        # A box with west > east wraps across the antimeridian
+        assert {p['record_id'] for p in index.bbox(-18, 179, -17, -179)} == {4, 5}
+        assert [p['record_id'] for p in index.between(1500, 5000)] == [2, 3]
+    
+    paris = haversine(40.7128, -74.0060, [48.8566], [2.3522])[0]
+    assert paris == pytest.approx(5837e3, rel=0.01)
+
+
+def test_changed_file_is_reindexed(tmp_path):
+    db = generate_whatsapp(tmp_path / 'ChatStorage.sqlite', 300)
+    path = tmp_path / 'locations.db'
+    with WhatsAppParser(str(db)) as parser:
+        with GeoIndex(path) as index:
+            total = index.add_parser(parser)
+            assert total == len(index) > 0
+            assert index.add_parser(parser) == 0
+        moved = next(parser.iter_locations())['id']
+    
+    conn = sqlite3.connect(str(db))
+    conn.execute("UPDATE ZWAMEDIAITEM SET ZLATITUDE = -33.8688, ZLONGITUDE = 151.2093 "
+                 "WHERE Z_PK = ?", (moved,))
+    conn.commit()
+    conn.close()
+    
+    with WhatsAppParser(str(db)) as parser, GeoIndex(path) as index:
+        assert index.add_parser(parser) == total
+        assert len(index) == total
+        sydney = index.within(-33.8688, 151.2093, 100)
+        assert [p['record_id'] for p in sydney] == [moved]
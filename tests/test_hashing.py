@@ -0,0 +1,81 @@
+"""Parallel evidence hashing, the digest cache and media path resolution."""
+
+import hashlib
+import os
+
+from src.parsers import SMSParser
+from src.utils.hashing import HashCache, hash_files
+from src.utils.media import MediaResolver
+
+
+def _files(directory, count):
+    directory.mkdir()
+    paths = []
+    for i in range(count):
+        path = directory / f'{i}.bin'
+        path.write_bytes(os.urandom(1000 + i))
+        paths.append(path)
+    return paths
+
+
+def test_hash_files_keeps_order_and_reports_errors(tmp_path):
+    paths = _files(tmp_path / 'files', 40)
+    paths.insert(5, tmp_path / 'missing.bin')
+    results = list(hash_files(paths, ('sha256', 'md5'), workers=4))
+    assert [path for path, _ in results] == paths
+    assert 'error' in results[5][1]
+    for path, result in results[:5] + results[6:]:
+        data = path.read_bytes()
+        assert result['sha256'] == hashlib.sha256(data).hexdigest()
+        assert result['md5'] == hashlib.md5(data).hexdigest()
+        assert result['size'] == len(data)
+
+
+def test_cache_skips_unchanged_files(tmp_path):
+    paths = _files(tmp_path / 'files', 5)
+    with HashCache(tmp_path / 'hashes.db') as cache:
+        assert not any(r['cached'] for _, r in hash_files(paths, cache=cache))
+    
+    paths[0].write_bytes(b'changed')
+    with HashCache(tmp_path / 'hashes.db') as cache:
+        results = dict(hash_files(paths, cache=cache))
+    assert [results[p]['cached'] for p in paths] == [False, True, True, True, True]
+    assert results[paths[0]]['sha256'] == hashlib.sha256(b'changed').hexdigest()
+
+
+def test_resolver_maps_recorded_paths(tmp_path):
+    home = tmp_path / 'private' / 'var' / 'mobile'
+    target = home / 'Library' / 'SMS' / 'a.jpg'
+    target.parent.mkdir(parents=True)
+    target.write_bytes(b'jpg')
+    media = tmp_path / 'group' / 'Media' / 'b.jpg'
+    media.parent.mkdir(parents=True)
+    media.write_bytes(b'jpg')
+    
+    resolver = MediaResolver(tmp_path, base_dirs=[tmp_path / 'group'])
+    assert resolver.resolve('~/Library/SMS/a.jpg') == target
+    assert resolver.resolve('/var/mobile/Library/SMS/a.jpg') == target
+    assert resolver.resolve('Media/b.jpg') == media
+    assert resolver.resolve('Media/none.jpg') is None
+    assert resolver.resolve(None) is None
+
+
+def test_sms_attachments_are_hashed(sms_db, tmp_path):
+    root = tmp_path / 'extraction'
+    with SMSParser(str(sms_db)) as parser:
+        recorded = [a['filename'] for a in parser.attachments(None)]
+        present = recorded[::2]
+        assert present
+        for name in present:
+            path = root / 'private' / 'var' / 'mobile' / name[2:]
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(name.encode())
+        
+        records = parser.hash_attachments(str(root), limit=None, workers=2)
+    
+    assert len(records) == len(recorded)
+    for record in records:
+        if record['filename'] in present:
+            assert record['sha256'] == hashlib.sha256(record['filename'].encode()).hexdigest()
+        else:
+            assert record['resolved_path'] is None and record['sha256'] is None
@@ -0,0 +1,62 @@
+"""Evidence integrity checks when a database is opened and closed."""
+
+import hashlib
+
+from src.parsers import SMSParser
+
+
+def _digests(directory):
+    return {
+        p.name: hashlib.sha256(p.read_bytes()).hexdigest()
+        for p in sorted(directory.iterdir())
+    }
+
+
+def test_integrity_on_wal_database(wal_db, tmp_path):
+    manifest = tmp_path / 'evidence.json'
+    before = _digests(wal_db.parent)
+    
+    # Read through a temp snapshot, hashed while it is copied
+    for expected in ('new', 'match'):
+        with SMSParser(str(wal_db), manifest=str(manifest)) as parser:
+            assert len(parser.parse()) == 101
+        report = parser.integrity.report()
+        assert report['ok']
+        names = sorted(n.rsplit('/', 1)[-1] for n in report['files'])
+        assert names == ['sms.db', 'sms.db-wal']
+        assert {f['open_status'] for f in report['files'].values()} == {expected}
+    
+    # Nothing was created next to the evidence, not even a -shm
+    assert _digests(wal_db.parent) == before
+
+
+def test_integrity_detects_changed_wal(wal_db, tmp_path):
+    manifest = tmp_path / 'evidence.json'
+    with SMSParser(str(wal_db), manifest=str(manifest)):
+        pass
+    
+    wal = wal_db.parent / 'sms.db-wal'
+    data = bytearray(wal.read_bytes())
+    data[-1] ^= 0xFF
+    wal.write_bytes(bytes(data))
+    
+    with SMSParser(str(wal_db), manifest=str(manifest)) as parser:
+        pass
+    files = parser.integrity.report()['files']
+    assert not parser.integrity.ok
+    assert files[str(wal)]['open_status'] == 'mismatch'
+
+
+def test_integrity_without_wal_opens_immutable(sms_db, tmp_path):
+    manifest = tmp_path / 'evidence.json'
+    before = _digests(sms_db.parent)
+    
+    for expected in ('new', 'unchanged'):
+        with SMSParser(str(sms_db), manifest=str(manifest)) as parser:
+            assert len(parser.parse()) == 300
+        assert parser.integrity.ok
+        assert parser.integrity.report()['files'][str(sms_db)]['open_status'] == expected
+    
+    after = _digests(sms_db.parent)
+    del after['evidence.json']
+    assert after == before
@@ -0,0 +1,99 @@
+"""KnowledgeC interval sweeps: usage buckets, sessions and overlaps."""
+
+from src.analysis.intervals import IntervalMerger, OverlapMeter, covered, split_buckets
+from src.analysis.knowledgec import (BACKLIT, FOCUS, LOCKED, ActivitySweep,
+                                     activity, timeline)
+from src.bench.generators import generate_knowledgec
+from src.parsers import KnowledgeCParser
+
+# An hour boundary falls 50 seconds after BASE
+BASE = 1_700_000_000 - 1_700_000_000 % 3600 - 50
+
+
+def test_interval_primitives():
+    merged = []
+    merger = IntervalMerger(lambda s, e: merged.append((s, e)), gap=5)
+    for interval in [(0, 10), (5, 8), (14, 20), (30, 31)]:
+        merger.add(*interval)
+    merger.close()
+    assert merged == [(0, 20), (30, 31)]
+    
+    meter = OverlapMeter()
+    meter.add_a(0, 10)
+    meter.add_b(5, 20)
+    meter.add_a(15, 30)
+    assert meter.seconds == 10
+    
+    assert covered([(0, 10), (5, 12), (20, 21)]) == 13
+    assert list(split_buckets(50, 130, 60)) == [(0, 10), (1, 60), (2, 10)]
+    assert list(split_buckets(50, 70, 60, offset=10)) == [(1, 20)]
+
+
+def test_sweep_by_hand():
+    events = [
+        (0, 100, LOCKED, 0),
+        (0, 80, BACKLIT, 1),
+        (10, 50, FOCUS, 'a'),
+        (30, 60, FOCUS, 'a'),
+        (55, 120, FOCUS, 'b'),
+        (110, 200, LOCKED, 0),
+        (150, 250, BACKLIT, 1),
+        (300, 400, BACKLIT, 0),
+        (300, 400, LOCKED, 1),
+    ]
+    sweep = ActivitySweep('hour', session_gap=5)
+    for start, end, stream, value in events:
+        sweep.add(BASE + start, BASE + end, stream, value)
+    sweep.close()
+    result = sweep.result()
+    
+    assert sweep.app_totals == {'a': 50, 'b': 65}
+    assert [(r['bundle_id'], r['seconds']) for r in result['usage']] == [
+        ('a', 40), ('b', 65), ('a', 10)]
+    assert result['usage'][0]['bucket'] < result['usage'][1]['bucket']
+    
+    first, second = result['sessions']
+    assert (first['duration_sec'], first['screen_on_sec']) == (100, 80)
+    assert first['apps'] == {'a': 50, 'b': 45}
+    assert first['app_seconds'] == 95
+    assert (second['duration_sec'], second['screen_on_sec']) == (90, 50)
+    assert second['apps'] == {'b': 10}
+    
+    assert result['concurrency'] == {
+        'focus_seconds': 110,
+        'screen_on_seconds': 180,
+        'unlocked_seconds': 190,
+        'focus_while_screen_on': 70,
+        'focus_while_unlocked': 100,
+        'screen_on_while_locked': 50,
+    }
+    
+    merged = ActivitySweep('hour', session_gap=30)
+    for start, end, stream, value in events:
+        merged.add(BASE + start, BASE + end, stream, value)
+    merged.close()
+    assert len(merged.sessions) == 1
+    assert merged.sessions[0]['apps'] == {'b': 65, 'a': 50}
+
+
+def test_activity_matches_a_direct_union(tmp_path):
+    db = generate_knowledgec(tmp_path / 'knowledgeC.db', 5000)
+    with KnowledgeCParser(str(db)) as parser:
+        result = activity(parser, 'day')
+        focus = {}
+        for start, end, _, bundle in timeline(parser, (FOCUS,)):
+            if bundle is not None:
+                focus.setdefault(bundle, []).append((start, end))
+    
+    expected = {b: round(covered(v) / 3600, 2) for b, v in focus.items()}
+    assert {r['bundle_id']: r['hours'] for r in result['apps']} == expected
+    used = {}
+    for row in result['usage']:
+        used[row['bundle_id']] = used.get(row['bundle_id'], 0) + row['seconds']
+    for bundle, seconds in used.items():
+        assert abs(seconds / 3600 - expected[bundle]) < 0.01
+    
+    sessions = result['sessions']
+    assert sessions
+    assert all(a['end'] <= b['start'] for a, b in zip(sessions, sessions[1:]))
+    assert all(s['app_seconds'] <= s['duration_sec'] * len(s['apps']) for s in sessions)
@@ -0,0 +1,46 @@
+"""Per-query and per-stage instrumentation."""
+
+import time
+
+from src.parsers import SMSParser
+from src.utils import to_ndjson
+from src.utils.metrics import Metrics, collect
+
+
+def test_parser_records_queries_and_conversion(sms_db):
+    metrics = Metrics()
+    with SMSParser(str(sms_db), metrics=metrics) as parser:
+        records = parser.parse()
+    
+    data = metrics.as_dict()
+    assert data['stages']['convert']['rows'] == len(records)
+    rows = [q['rows'] for q in data['queries'].values()]
+    assert len(records) in rows
+    assert all(q['bytes'] >= 0 for q in data['queries'].values())
+    assert 'convert' in metrics.report()
+
+
+def test_collect_reaches_parsers_and_exporters(sms_db, tmp_path):
+    out = tmp_path / 'messages.ndjson'
+    with collect(profile=True, memory=True) as metrics:
+        with SMSParser(str(sms_db)) as parser:
+            count = to_ndjson(parser.iter_parse(), str(out))
+    
+    export = metrics.stages['export:ndjson']
+    assert export['rows'] == count == 300
+    assert export['bytes'] == out.stat().st_size
+    assert metrics.stages['convert']['rows'] == 300
+    # Rows pulled from the query inside the export are not counted twice
+    assert export['self_seconds'] < export['seconds']
+    assert 'cumulative' in metrics.profile
+    assert metrics.memory['peak_mb'] > 0
+
+
+def test_nested_stages_report_self_time():
+    metrics = Metrics()
+    with metrics.timer('outer'):
+        with metrics.timer('inner'):
+            time.sleep(0.02)
+    outer, inner = metrics.stages['outer'], metrics.stages['inner']
+    assert outer['seconds'] >= inner['seconds'] >= 0.02
+    assert outer['self_seconds'] < 0.01
@@ -0,0 +1,76 @@
+"""NSKeyedArchiver decoding."""
+
+import plistlib
+from datetime import datetime
+
+import pytest
+
+from src.parsers import PlistParser
+from src.utils.nskeyedarchiver import decode_archive, is_keyed_archive
+
+UID = plistlib.UID
+
+
+def _archive(objects, top=None):
+    return {
+        '$version': 100000,
+        '$archiver': 'NSKeyedArchiver',
+        '$top': top or {'root': UID(1)},
+        '$objects': ['$null'] + objects,
+    }
+
+
+# root: NSDictionary {'name': 'Alice', 'when': NSDate, 'tags': NSArray ['a', 'a'],
+#       'self': [root], 'missing': $null}
+ARCHIVE = _archive([
+    {'NS.keys': [UID(2), UID(3), UID(4), UID(5), UID(12)],
+     'NS.objects': [UID(6), UID(7), UID(9), UID(11), UID(0)], '$class': UID(13)},
+    'name', 'when', 'tags', 'self',
+    'Alice',
+    {'NS.time': 86400.0, '$class': UID(8)},
+    {'$classname': 'NSDate', '$classes': ['NSDate', 'NSObject']},
+    {'NS.objects': [UID(10), UID(10)], '$class': UID(14)},
+    'a',
+    {'NS.objects': [UID(1)], '$class': UID(14)},
+    'missing',
+    {'$classname': 'NSDictionary', '$classes': ['NSDictionary', 'NSObject']},
+    {'$classname': 'NSArray', '$classes': ['NSArray', 'NSObject']},
+])
+
+
+def test_decode_resolves_classes_and_cycles():
+    assert is_keyed_archive(ARCHIVE)
+    root = decode_archive(ARCHIVE)
+    assert root['name'] == 'Alice'
+    assert root['when'] == datetime(2001, 1, 2)
+    assert root['tags'] == ['a', 'a']
+    assert root['missing'] is None
+    # The array refers back to the dictionary being decoded
+    assert root['self'] == [{'$ref': 1}]
+
+
+def test_decode_from_bytes_and_lazy_plist(tmp_path):
+    raw = plistlib.dumps(ARCHIVE, fmt=plistlib.FMT_BINARY)
+    assert decode_archive(raw)['name'] == 'Alice'
+    
+    path = tmp_path / 'archive.plist'
+    path.write_bytes(raw)
+    plist = PlistParser(str(path))
+    assert plist.is_archive()
+    assert plist.unarchive()['tags'] == ['a', 'a']
+
+
+def test_unknown_class_keeps_its_fields():
+    archive = _archive([
+        {'title': UID(2), '$class': UID(3)},
+        'Hello',
+        {'$classname': 'CustomThing', '$classes': ['CustomThing', 'NSObject']},
+    ])
+    assert decode_archive(archive) == {'title': 'Hello', '$class': 'CustomThing'}
+
+
+def test_several_top_entries_and_rejects_plain_plists():
+    archive = _archive(['one', 'two'], top={'a': UID(1), 'b': UID(2)})
+    assert decode_archive(archive) == {'a': 'one', 'b': 'two'}
+    with pytest.raises(ValueError):
+        decode_archive({'plain': True})
@@ -0,0 +1,81 @@
+"""Lazy binary plist reading."""
+
+import plistlib
+import struct
+from datetime import datetime
+
+from src.parsers import PlistParser
+from src.parsers.plist import BinaryPlistReader, LazyDict
+
+DATA = {
+    'CFBundleIdentifier': 'com.example.app',
+    'apps': [{'name': 'Maps', 'size': 12}, {'name': 'Notes', 'size': 3}],
+    'nested': {'deep': {'value': 42, 'none': None, 'when': datetime(2023, 6, 1)}},
+    'blob': b'\x00\x01',
+}
+
+
+def _bplist(tmp_path, data, name='test.plist'):
+    path = tmp_path / name
+    path.write_bytes(plistlib.dumps(data, fmt=plistlib.FMT_BINARY))
+    return path
+
+
+def _cyclic(tmp_path):
+    """{'self': [<the dict itself>]}: object 2 refers back to object 0."""
+    objects = [bytes([0xD1, 1, 2]), b'\x54self', bytes([0xA1, 0])]
+    body, offsets = b'bplist00', []
+    for obj in objects:
+        offsets.append(len(body))
+        body += obj
+    table = len(body)
+    body += bytes(offsets) + struct.pack('>6xBBQQQ', 1, 1, len(objects), 0, table)
+    path = tmp_path / 'cyclic.plist'
+    path.write_bytes(body)
+    return path
+
+
+def test_lazy_reads_match_plistlib(tmp_path):
+    path = _bplist(tmp_path, DATA)
+    plist = PlistParser(str(path))
+    assert plist.get('CFBundleIdentifier') == 'com.example.app'
+    assert plist.get('apps.1.name') == 'Notes'
+    assert plist.get('nested.deep.value') == 42
+    assert plist.get('nested.deep.none', 'default') is None
+    assert plist.get('nested.missing', 'default') == 'default'
+    assert plist.get('apps.9', 'default') == 'default'
+    assert plist.get('nested') == DATA['nested']
+    assert sorted(plist.keys()) == sorted(DATA)
+    assert plist.flatten()['apps.0.size'] == 12
+    
+    with PlistParser(str(path)) as lazy:
+        assert isinstance(lazy.get('nested'), LazyDict)
+        assert lazy.to_serializable()['blob'] == '0001'
+
+
+def test_get_looks_each_key_up_once(tmp_path, monkeypatch):
+    path = _bplist(tmp_path, DATA)
+    calls = []
+    find_key = BinaryPlistReader.find_key
+    
+    def counted(self, refs, key):
+        calls.append(key)
+        return find_key(self, refs, key)
+    
+    monkeypatch.setattr(BinaryPlistReader, 'find_key', counted)
+    assert PlistParser(str(path)).get('nested.deep.value') == 42
+    assert calls == ['nested', 'deep', 'value']
+
+
+def test_cyclic_plist_is_cut_with_a_reference(tmp_path):
+    path = _cyclic(tmp_path)
+    plist = PlistParser(str(path))
+    assert plist.get('self') == [{'self': {'$ref': 2}}]
+    assert plist.to_serializable() == {'self': [{'$ref': 0}]}
+    assert plist.flatten() == {'self.0': {'$ref': 0}}
+    
+    # plistlib shares the objects too, so parsed data is cyclic as well
+    assert PlistParser(str(path)).parse()['self'][0]['self'][0]['self']
+    parsed = PlistParser(str(path))
+    parsed.parse()
+    assert parsed.to_serializable() == {'self': [{'$ref': None}]}
@@ -0,0 +1,56 @@
+"""Bulk parsing of a directory of plists."""
+
+import plistlib
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.parsers.plist import parse_tree, tree_rows
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture
+def plist_dir(tmp_path):
+    root = tmp_path / 'tree'
+    (root / 'App' / 'Prefs').mkdir(parents=True)
+    for i in range(6):
+        data = {'id': i, 'name': f'app {i}', 'nested': {'flag': i % 2 == 0}}
+        fmt = plistlib.FMT_BINARY if i % 2 else plistlib.FMT_XML
+        (root / 'App' / 'Prefs' / f'{i}.plist').write_bytes(plistlib.dumps(data, fmt=fmt))
+    (root / 'App' / 'broken.plist').write_bytes(b'bplist00 not really')
+    (root / 'App' / 'notes.txt').write_text('ignored')
+    return root
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_every_plist_is_parsed_or_reported(plist_dir, workers):
+    results = list(parse_tree(str(plist_dir), workers=workers, chunksize=2))
+    assert len(results) == 7
+    broken = [r for r in results if r['error']]
+    assert [Path(r['path']).name for r in broken] == ['broken.plist']
+    parsed = sorted(r['data']['id'] for r in results if not r['error'])
+    assert parsed == list(range(6))
+
+
+def test_keys_and_rows(plist_dir):
+    results = list(parse_tree(str(plist_dir), keys=['name', 'nested.flag'], workers=1))
+    good = [r for r in results if not r['error']]
+    assert all(set(r['data']) == {'name', 'nested.flag'} for r in good)
+    
+    rows = list(tree_rows(results))
+    assert sum(1 for r in rows if r['error']) == 1
+    assert {r['key'] for r in rows if not r['error']} == {'name', 'nested.flag'}
+
+
+def test_cli_writes_an_indexed_table(plist_dir, tmp_path):
+    out = tmp_path / 'values.db'
+    subprocess.run([sys.executable, str(ROOT / 'cli.py'), str(plist_dir), '-o', str(out),
+                    '--workers', '1'], check=True, capture_output=True, cwd=ROOT)
+    conn = sqlite3.connect(str(out))
+    names = conn.execute("SELECT value FROM plist_values WHERE key = 'name'").fetchall()
+    assert sorted(v for v, in names) == [f'app {i}' for i in range(6)]
+    conn.close()
@@ -0,0 +1,39 @@
+"""Iterative plist flatten and structure walks."""
+
+import plistlib
+import sys
+
+from src.parsers import PlistParser
+
+DATA = {'a': {'b': [1, {'c': 'x' * 50}], 'd': True}, 'e': [], 'f': 'short'}
+
+
+def _deep_xml(tmp_path, depth):
+    """XML plist nested `depth` dictionaries deep; plistlib cannot write one."""
+    body = '<dict><key>k</key>' * depth + '<string>leaf</string>' + '</dict>' * depth
+    path = tmp_path / 'deep.plist'
+    path.write_text('<?xml version="1.0" encoding="UTF-8"?>\n'
+                    '<plist version="1.0">' + body + '</plist>')
+    return path
+
+
+def test_flatten_and_structure(tmp_path):
+    path = tmp_path / 'small.plist'
+    path.write_bytes(plistlib.dumps(DATA, fmt=plistlib.FMT_BINARY))
+    plist = PlistParser(str(path))
+    assert plist.flatten() == {'a.b.0': 1, 'a.b.1.c': 'x' * 50, 'a.d': True, 'f': 'short'}
+    assert plist.flatten(sep='/')['a/b/0'] == 1
+    assert list(plist.iter_structure()) == [
+        'a: (dict)', '  b: (list)', '    [2 items]', '  d: True',
+        'e: (list)', '  [0 items]', 'f: short'
+    ]
+    assert list(plist.iter_structure(max_depth=1))[2] == '    ...'
+
+
+def test_walks_deeper_than_the_recursion_limit(tmp_path):
+    depth = sys.getrecursionlimit() * 2
+    plist = PlistParser(str(_deep_xml(tmp_path, depth)))
+    (path, value), = plist.iter_flatten()
+    assert value == 'leaf' and path.count('.') == depth - 1
+    assert len(list(plist.iter_structure(max_depth=depth))) == depth
+    assert plist.to_serializable()['k']['k']['k']
@@ -0,0 +1,41 @@
+"""Per-thread connections: concurrent queries and private memory snapshots."""
+
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+from src.parsers import SMSParser
+
+
+def test_memory_snapshot_connections_are_private(wal_db):
+    with SMSParser(str(wal_db), snapshot='memory') as parser:
+        first = parser._snapshot.connect()
+        second = parser._snapshot.connect()
+        first.execute("PRAGMA query_only = 0")
+        first.execute("DELETE FROM message")
+        assert second.execute("SELECT COUNT(*) FROM message").fetchone()[0] == 101
+        first.close()
+        second.close()
+
+
+def test_threads_query_on_their_own_connections(sms_db):
+    with SMSParser(str(sms_db)) as parser:
+        expected = parser.parse()
+        
+        def job(_):
+            return threading.get_ident(), id(parser.conn), parser.parse()
+        
+        with ThreadPoolExecutor(4) as pool:
+            results = list(pool.map(job, range(16)))
+        assert all(records == expected for _, _, records in results)
+        by_thread = {thread: conn for thread, conn, _ in results}
+        assert len(set(by_thread.values())) == len(by_thread)
+        assert id(parser.conn) not in by_thread.values()
+
+
+def test_stream_survives_other_queries(sms_db):
+    with SMSParser(str(sms_db)) as parser:
+        stream = parser.iter_parse()
+        first = [next(stream) for _ in range(10)]
+        assert parser.count('message') == 300
+        assert parser.tables()
+        assert first + list(stream) == parser.parse()
@@ -0,0 +1,38 @@
+"""Progress totals and cancellation of parses."""
+
+import pytest
+
+from src.bench.generators import generate_sms
+from src.parsers import SafariParser, SMSParser
+from src.utils.progress import CancelToken, Cancelled
+
+
+def test_safari_estimate_counts_visits(safari_db):
+    with SafariParser(str(safari_db)) as parser:
+        records = len(parser.parse())
+        assert records > parser.count('history_items')
+        assert parser.estimate_rows(exact=True) == parser.count('history_visits')
+        assert abs(parser.estimate_rows() - records) <= records * 0.1
+
+
+def test_progress_reports_every_record(sms_db):
+    reports = []
+    with SMSParser(str(sms_db), progress=reports.append) as parser:
+        records = parser.parse()
+    assert reports[-1].finished
+    assert reports[-1].done == reports[-1].total == len(records)
+
+
+def test_cancelled_parse_stops(tmp_path):
+    db = generate_sms(tmp_path / 'sms.db', 3000)
+    token = CancelToken()
+    with SMSParser(str(db), cancel=token) as parser:
+        stream = parser.iter_parse()
+        next(stream)
+        token.cancel()
+        with pytest.raises(Cancelled):
+            list(stream)
+        
+        # A token already cancelled stops the next parse as well
+        with pytest.raises(Cancelled):
+            parser.parse()
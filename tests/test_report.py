@@ -0,0 +1,46 @@
+"""Paginated HTML reports."""
+
+import pytest
+
+from src.utils import to_html
+from src.utils.report import MAX_CELL, HTMLReport, cell
+
+
+def test_cell_escapes_and_truncates():
+    assert cell(None) == ''
+    assert cell('<b>&') == '&lt;b&gt;&amp;'
+    assert cell(b'\x01\xff') == '01ff'
+    assert cell({'a': [1]}) == '{&quot;a&quot;: [1]}'
+    long = cell('x' * (MAX_CELL + 10))
+    assert long.endswith(f'... [{MAX_CELL + 10} chars]')
+
+
+def test_sections_are_split_into_linked_pages(tmp_path):
+    index = tmp_path / 'case.html'
+    with HTMLReport(index, 'Case', page_size=10) as report:
+        assert report.section('Messages', ({'id': i} for i in range(25))) == 25
+        assert report.section('Messages', iter([{'id': 0, 'extra': '<x>'}])) == 1
+        assert report.section('Empty', iter([])) == 0
+    
+    pages = sorted(p.name for p in (tmp_path / 'case_files').iterdir())
+    assert pages == ['messages-0001.html', 'messages-0002.html',
+                     'messages-0003.html', 'messages-2-0001.html']
+    first = (tmp_path / 'case_files' / 'messages-0001.html').read_text()
+    assert 'Next &rarr;' in first and 'Previous' not in first
+    last = (tmp_path / 'case_files' / 'messages-0003.html').read_text()
+    assert 'Rows 21-25' in last and 'Next' not in last
+    assert '<td>24</td>' in last
+    second = (tmp_path / 'case_files' / 'messages-2-0001.html').read_text()
+    assert '<th>extra</th>' in second and '&lt;x&gt;' in second
+    
+    text = index.read_text()
+    for page in pages:
+        assert f'case_files/{page}' in text
+    assert '<td>25</td>' in text and '<td>Empty</td>' in text
+
+
+def test_to_html_and_compressed_paths(tmp_path):
+    assert to_html(({'n': i} for i in range(3)), str(tmp_path / 'r.html'), 'SMS') == 3
+    assert (tmp_path / 'r_files' / 'sms-0001.html').exists()
+    with pytest.raises(ValueError):
+        HTMLReport(tmp_path / 'r.html.gz')
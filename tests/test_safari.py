@@ -0,0 +1,52 @@
+"""Safari per-domain index."""
+
+import shutil
+import sqlite3
+
+from src.analysis.safari import domain_index
+from src.parsers import SafariParser
+
+
+def _checkpointed(db, sql=None):
+    conn = sqlite3.connect(str(db))
+    conn.execute("PRAGMA journal_mode = WAL")
+    if sql:
+        conn.execute(sql)
+        conn.commit()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+
+
+def test_saved_index_is_rebuilt_for_changed_history(safari_db, tmp_path):
+    first = tmp_path / 'first' / 'History.db'
+    second = tmp_path / 'second' / 'History.db'
+    for db in (first, second):
+        db.parent.mkdir()
+    _checkpointed(safari_db)
+    shutil.copyfile(safari_db, first)
+    shutil.copyfile(safari_db, second)
+    # Same size and header as the first acquisition, visits moved
+    _checkpointed(second, "UPDATE history_visits SET history_item = "
+                          "(SELECT MAX(id) FROM history_items) WHERE id <= 50")
+    
+    saved = tmp_path / 'domains.db'
+    with SafariParser(str(first)) as parser, domain_index(parser, saved) as index:
+        before = index.top(None)
+    with SafariParser(str(second)) as parser:
+        with domain_index(parser) as fresh:
+            expected = fresh.top(None)
+        with domain_index(parser, saved) as index:
+            assert index.top(None) == expected
+    assert expected != before
+
+
+def test_utc_offset_shifts_hours_and_rebuilds(safari_db, tmp_path):
+    saved = tmp_path / 'domains.db'
+    with SafariParser(str(safari_db)) as parser:
+        with domain_index(parser, saved) as index:
+            domain = index.top(1)[0]['domain']
+            utc = index.lookup(domain)['by_hour']
+        with domain_index(parser, saved, utc_offset=3600) as index:
+            assert index.utc_offset == 3600
+            shifted = index.lookup(domain)['by_hour']
+    assert all(shifted[f'{(int(h) + 1) % 24:02d}'] == n for h, n in utc.items())
@@ -0,0 +1,63 @@
+"""Query server method allowlist and parameter checks."""
+
+import threading
+
+import pytest
+
+from src.parsers import PARSERS, SMSParser
+from src.server import QUERY_METHODS, ParserPool, QueryServer, call, request
+
+
+@pytest.fixture
+def sms(sms_db):
+    with SMSParser(str(sms_db)) as parser:
+        yield parser
+
+
+def test_allowlist_names_real_methods():
+    for name in QUERY_METHODS:
+        assert any(callable(getattr(cls, name, None)) for cls in PARSERS.values()), name
+
+
+def test_parse_with_limit_and_offset(sms):
+    records = list(call(sms, 'parse', {'limit': 5, 'offset': 10}))
+    assert [r['id'] for r in records] == [r['id'] for r in sms.parse()][10:15]
+
+
+@pytest.mark.parametrize('method', ['close', 'connect', 'execute', 'export_json',
+                                    '_record', '__class__', 'conversations_x'])
+def test_methods_outside_allowlist_are_refused(sms, method):
+    with pytest.raises(AttributeError):
+        call(sms, method, {})
+
+
+def test_table_parameter_must_name_a_table(sms):
+    assert call(sms, 'count', {'table': 'message'}) == 300
+    with pytest.raises(ValueError):
+        call(sms, 'count', {'table': 'message; DROP TABLE message'})
+
+
+@pytest.mark.parametrize('value', ['5', 5.0, True, [5]])
+def test_integer_parameters_are_checked(sms, value):
+    with pytest.raises(TypeError):
+        list(call(sms, 'parse', {'limit': value}))
+
+
+def test_unknown_parse_parameters_are_refused(sms):
+    with pytest.raises(TypeError):
+        call(sms, 'parse', {'order_by': 'text'})
+
+
+def test_request_over_socket(sms_db, tmp_path):
+    socket_path = str(tmp_path / 'server.sock')
+    server = QueryServer(socket_path, ParserPool(max_open=2), workers=2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        records = list(request(socket_path, str(sms_db), params={'limit': 3}))
+        assert len(records) == 3
+        with pytest.raises(RuntimeError, match='not available'):
+            list(request(socket_path, str(sms_db), 'close'))
+    finally:
+        server.shutdown()
+        server.server_close()
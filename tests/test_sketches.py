@@ -0,0 +1,49 @@
+"""Sampled sketches and the coverage of their 95% intervals."""
+
+import bisect
+import sqlite3
+
+from src.analysis import approximate
+from src.analysis.sketches import scale_count
+from src.bench.generators import generate_calls
+from src.parsers import CallHistoryParser
+
+
+def test_scale_count_uses_the_spread_between_blocks():
+    even = scale_count(40, 0.1, squares=4 * 10 ** 2, blocks=4)
+    clustered = scale_count(40, 0.1, squares=40 ** 2, blocks=4)
+    assert even['estimate'] == clustered['estimate'] == 400
+    assert even['low'] == even['high'] == 400
+    assert clustered['high'] > 1000
+    assert scale_count(40, 0.1, squares=40 ** 2, blocks=1)['high'] is None
+    assert scale_count(40, 1.0) == {'estimate': 40, 'low': 40, 'high': 40}
+
+
+def test_intervals_cover_contacts_called_in_runs(tmp_path):
+    db = generate_calls(tmp_path / 'CallHistory.storedata', 50000)
+    conn = sqlite3.connect(str(db))
+    # 100 numbers, each called 500 times in a row: rows are far from independent
+    conn.execute("UPDATE ZCALLRECORD SET ZADDRESS = 'n' || ((Z_PK - 1) / 500)")
+    conn.commit()
+    truth = dict(conn.execute("SELECT ZADDRESS, count(*) FROM ZCALLRECORD GROUP BY 1"))
+    durations = sorted(d for d, in conn.execute(
+        "SELECT COALESCE(ZDURATION, 0) FROM ZCALLRECORD"))
+    conn.close()
+    
+    covered = intervals = 0
+    ranks_covered = ranks = 0
+    with CallHistoryParser(str(db)) as parser:
+        for seed in range(20):
+            summary = approximate(parser, 0.05, seed=seed)
+            for row in summary['top_numbers']:
+                intervals += 1
+                covered += row['low'] <= truth[row['number']] <= row['high']
+            quantiles = summary['duration_seconds']
+            for q in (50, 90, 99):
+                value, error = quantiles[f'p{q}'], quantiles['rank_error'][f'p{q}']
+                low = bisect.bisect_left(durations, value) / len(durations)
+                high = bisect.bisect_right(durations, value) / len(durations)
+                ranks += 1
+                ranks_covered += low - error <= q / 100 <= high + error
+    assert covered / intervals >= 0.85
+    assert ranks_covered / ranks >= 0.85
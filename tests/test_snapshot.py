@@ -0,0 +1,38 @@
+"""WAL-aware snapshots: rows only in the -wal are read, evidence is untouched."""
+
+import hashlib
+
+import pytest
+
+from src.parsers import SMSParser
+
+
+def _digests(directory):
+    return {
+        p.name: hashlib.sha256(p.read_bytes()).hexdigest()
+        for p in sorted(directory.iterdir())
+    }
+
+
+@pytest.mark.parametrize('mode', ['memory', 'temp'])
+def test_snapshot_reads_wal_without_touching_evidence(wal_db, mode):
+    before = _digests(wal_db.parent)
+    
+    with SMSParser(str(wal_db), snapshot=mode) as parser:
+        texts = [r['text'] for r in parser.iter_parse()]
+        assert 'only in the wal' in texts
+        assert parser.wal_rows() == {'message': 1}
+    
+    assert _digests(wal_db.parent) == before
+
+
+def test_snapshot_copies_are_removed(wal_db):
+    with SMSParser(str(wal_db), snapshot='temp') as parser:
+        copy = parser._snapshot._tmpdir
+        assert (copy / 'sms.db').exists()
+        assert parser.count('message') == 101
+    assert not copy.exists()
+    
+    # A memory snapshot drops its files as soon as it is loaded
+    with SMSParser(str(wal_db), snapshot='memory') as parser:
+        assert parser._snapshot._tmpdir is None
@@ -0,0 +1,73 @@
+"""Single-scan summaries and their content-keyed cache."""
+
+import shutil
+import sqlite3
+
+from src.analysis import SummaryCache, database_fingerprint, summarize
+from src.parsers import CallHistoryParser
+from src.utils.hashing import HashCache
+
+
+def _checkpointed(db, sql=None):
+    """Switch to WAL, optionally write, and checkpoint the WAL away."""
+    conn = sqlite3.connect(str(db))
+    conn.execute("PRAGMA journal_mode = WAL")
+    if sql:
+        conn.execute(sql)
+        conn.commit()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+
+
+def test_one_changed_row_misses_the_cache(calls_db, tmp_path):
+    _checkpointed(calls_db)
+    other = tmp_path / 'other.storedata'
+    shutil.copyfile(calls_db, other)
+    # In WAL mode the header change counter stays put and so does the size
+    _checkpointed(other, "UPDATE ZCALLRECORD SET ZDURATION = ZDURATION + 100000 "
+                         "WHERE Z_PK = 1")
+    assert calls_db.stat().st_size == other.stat().st_size
+    assert database_fingerprint(calls_db) != database_fingerprint(other)
+    
+    cache = SummaryCache(tmp_path / 'cache')
+    with CallHistoryParser(str(calls_db)) as parser:
+        first = summarize(parser, cache)
+    with CallHistoryParser(str(other)) as parser:
+        second = summarize(parser, cache)
+        assert second == summarize(parser)
+    assert second != first
+
+
+def test_unchanged_database_hits_the_cache(calls_db, tmp_path):
+    cache = SummaryCache(tmp_path / 'cache')
+    with CallHistoryParser(str(calls_db)) as parser, \
+            HashCache(tmp_path / 'hashes.db') as hashes:
+        first = summarize(parser, cache, hashes=hashes)
+        assert len(list((tmp_path / 'cache').iterdir())) == 1
+        assert summarize(parser, cache, hashes=hashes) == first
+    assert len(list((tmp_path / 'cache').iterdir())) == 1
+
+
+def test_fingerprint_reuses_manifest_digests(calls_db, tmp_path):
+    with CallHistoryParser(str(calls_db), manifest=str(tmp_path / 'm.json')) as parser:
+        known = parser.integrity.files
+        assert database_fingerprint(calls_db, known=known) == database_fingerprint(calls_db)
+        # Digests taken for a different stat key are not trusted
+        stale = {name: dict(info, sha256='0' * 64, stat=(0, 0, 0, 0))
+                 for name, info in known.items()}
+        assert database_fingerprint(calls_db, known=stale) == database_fingerprint(calls_db)
+
+
+def test_utc_offset_shifts_activity_and_is_cached_apart(calls_db, tmp_path):
+    cache = SummaryCache(tmp_path / 'cache')
+    with CallHistoryParser(str(calls_db)) as parser:
+        utc = summarize(parser, cache)
+        eastern = summarize(parser, cache, utc_offset=-5 * 3600)
+        assert summarize(parser, cache, utc_offset=-5 * 3600) == eastern
+        assert summarize(parser) == utc
+    
+    hours = list(utc['by_hour'].values())
+    assert list(eastern['by_hour'].values()) == hours[5:] + hours[:5]
+    assert sum(eastern['daily'].values()) == sum(utc['daily'].values())
+    assert eastern['daily'] != utc['daily']
+    assert eastern['calls'] == utc['calls']
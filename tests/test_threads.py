@@ -0,0 +1,58 @@
+"""SMS thread reconstruction and attributedBody text."""
+
+import sqlite3
+
+from src.bench.generators import typedstream_string
+from src.parsers import SMSParser
+from src.utils.typedstream import attributed_text
+
+
+def test_attributed_text_reads_each_length_form():
+    for text in ('hi', 'é' * 100, 'x' * 70000):
+        assert attributed_text(typedstream_string(text)) == text
+    blob = typedstream_string('truncated message')
+    assert attributed_text(blob[:blob.index(b'truncated') + 4]) is None
+    assert attributed_text(b'bplist00') is None
+    assert attributed_text(None) is None
+
+
+def test_threads_cover_every_message_in_order(sms_db):
+    conn = sqlite3.connect(str(sms_db))
+    joined = sorted(conn.execute("SELECT chat_id, message_id FROM chat_message_join"))
+    hidden = dict(conn.execute(
+        "SELECT ROWID, attributedBody FROM message WHERE text IS NULL AND attributedBody IS NOT NULL"))
+    with_files = {m for m, in conn.execute(
+        "SELECT message_id FROM message_attachment_join maj "
+        "JOIN message m ON m.ROWID = maj.message_id WHERE m.cache_has_attachments")}
+    conn.close()
+    assert hidden and with_files
+    
+    seen = []
+    with SMSParser(str(sms_db)) as parser:
+        for chat, messages in parser.iter_threads():
+            assert 'participants' in chat
+            assert [m['sort'] for m in messages] == sorted(m['sort'] for m in messages)
+            assert {m['chat_id'] for m in messages} == {chat['id']}
+            seen.extend((m['chat_id'], m['id']) for m in messages)
+            for m in messages:
+                if m['id'] in hidden:
+                    assert m['text'] == attributed_text(hidden[m['id']]) is not None
+                assert bool(m['attachments']) == (m['id'] in with_files)
+                if not m['is_from_me']:
+                    assert m['sender'] in chat['participants'] or not chat['participants']
+    assert sorted(seen) == joined
+
+
+def test_pages_resume_after_the_last_message(sms_db):
+    with SMSParser(str(sms_db)) as parser:
+        chat, messages = max(parser.iter_threads(), key=lambda t: len(t[1]))
+        pages = []
+        after = None
+        while True:
+            page = parser.thread_page(chat['id'], size=7, after=after)
+            assert page['chat'] == chat
+            pages.extend(page['messages'])
+            after = page['next']
+            if after is None:
+                break
+    assert [m['id'] for m in pages] == [m['id'] for m in messages]
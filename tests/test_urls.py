@@ -0,0 +1,47 @@
+"""Memoised URL host and domain parsing."""
+
+import sqlite3
+
+from src.analysis.safari import domain_index
+from src.parsers import SafariParser
+from src.utils.urls import host_domain, register_url_functions, url_domain, url_host
+
+
+def test_hosts_and_registrable_domains():
+    assert url_host('https://WWW.Example.com:8443/a?b') == 'example.com'
+    assert url_host('http://[::1]/') == '::1'
+    assert url_host('http://[broken/') is None
+    assert url_host('about:blank') is None
+    assert url_host(None) is None
+    
+    assert host_domain('news.bbc.co.uk') == 'bbc.co.uk'
+    assert host_domain('a.b.example.com') == 'example.com'
+    assert host_domain('user.github.io') == 'user.github.io'
+    assert host_domain('localhost') == 'localhost'
+    assert host_domain('192.168.0.1') == '192.168.0.1'
+    assert url_domain('https://mail.google.com/mail') == 'google.com'
+
+
+def test_parsing_is_memoised():
+    url_host.cache_clear()
+    for _ in range(3):
+        url_domain('https://cache.example.org/x')
+    info = url_host.cache_info()
+    assert (info.misses, info.hits) == (1, 2)
+
+
+def test_sql_functions_match_the_index(safari_db):
+    conn = sqlite3.connect(str(safari_db))
+    register_url_functions(conn)
+    assert conn.execute("SELECT url_host('https://www.a.co.uk/'), "
+                        "url_domain('https://www.a.co.uk/')").fetchone() == ('a.co.uk', 'a.co.uk')
+    expected = dict(conn.execute(
+        "SELECT url_domain(i.url), COUNT(*) FROM history_visits v "
+        "JOIN history_items i ON v.history_item = i.id "
+        "WHERE url_domain(i.url) IS NOT NULL GROUP BY 1"))
+    conn.close()
+    
+    with SafariParser(str(safari_db)) as parser, domain_index(parser) as index:
+        assert {row['domain']: row['visits'] for row in index.top(None)} == expected
+        domain = next(iter(expected))
+        assert index.lookup(f'WWW.{domain}')['visits'] == expected[domain]
@@ -0,0 +1,27 @@
+"""WhatsApp chats, including databases without push names."""
+
+import sqlite3
+
+from src.bench.generators import generate_whatsapp
+from src.parsers import WhatsAppParser
+
+
+def _chats(db):
+    with WhatsAppParser(str(db)) as parser:
+        return {chat['id']: messages for chat, messages in parser.iter_chats()}
+
+
+def test_chats_without_push_name_table(tmp_path):
+    db = generate_whatsapp(tmp_path / 'ChatStorage.sqlite', 300)
+    before = _chats(db)
+    
+    conn = sqlite3.connect(str(db))
+    conn.execute("DROP TABLE ZWAPROFILEPUSHNAME")
+    conn.commit()
+    conn.close()
+    after = _chats(db)
+    
+    assert after.keys() == before.keys()
+    assert sum(map(len, after.values())) == sum(map(len, before.values())) > 0
+    senders = [m['sender_jid'] for messages in after.values() for m in messages]
+    assert any(senders)